@@ -1,119 +1,456 @@
 """
 Module de chargement de configuration pour les protocoles d'intégration
+La configuration est servie depuis un instantané immuable chargé en mémoire ; une tâche
+de fond surveille protocols.yml et remplace l'instantané d'un bloc quand le fichier change.
+Le chemin des requêtes ne fait donc aucun accès au système de fichiers.
 """
+import asyncio
 import yaml
 import os
-from typing import Dict, Any
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Cache pour éviter de lire le fichier à chaque fois en production
-_config_cache = None
-_cache_timestamp = None
+CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    "config",
+    "protocols.yml"
+)
+
+# Configuration par défaut si le fichier n'existe pas
+DEFAULT_PROTOCOL_CONFIG = {
+    "enabled_protocols": {
+        "rest": True,
+        "ss7": False,
+        "diameter": False
+    },
+    "timeouts": {
+        "rest": 30,
+        "ss7": 10,
+        "diameter": 60
+    },
+    "logging": {
+        "rest": {"level": "INFO", "enabled": True},
+        "ss7": {"level": "DEBUG", "enabled": True},
+        "diameter": {"level": "INFO", "enabled": True}
+    }
+}
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_LOGGING_CONFIG = MappingProxyType({"level": "INFO", "enabled": True})
+# Disjoncteur et plafond par défaut (section circuit_breakers absente ou incomplète)
+DEFAULT_CIRCUIT_BREAKER_CONFIG = MappingProxyType({
+    "failure_threshold": 5,
+    "recovery_timeout": 30,
+    "half_open_max_calls": 1,
+    "max_in_flight": 200
+})
+
+
+def _freeze(value: Any) -> Any:
+    """Copie en lecture seule : dict -> MappingProxyType, list -> tuple (récursif)"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Copie modifiable d'une valeur figée par _freeze"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """Signature (mtime, taille, inode) du fichier, ou None s'il n'existe pas"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def _build_protocol_logger(protocol: str, log_config: Mapping[str, Any]) -> logging.Logger:
+    """
+    Configure le logger d'un protocole (niveau, handler console)
+    Appelée à chaque rechargement : "enabled: false" désactive le logger, "enabled: true" le réactive
+
+    Args:
+        protocol: Nom du protocole
+        log_config: Section logging.<protocole> de la configuration
+
+    Returns:
+        Logger configuré pour le protocole
+    """
+    protocol_logger = logging.getLogger(f"protocol.{protocol}")
+    enabled = bool(log_config.get("enabled", True))
+    protocol_logger.disabled = not enabled
+
+    if enabled:
+        level = getattr(logging, str(log_config.get("level", "INFO")).upper(), logging.INFO)
+        protocol_logger.setLevel(level)
+
+        # Créer un handler si pas déjà existant
+        if not protocol_logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter(
+                f'%(asctime)s - {protocol.upper()} - %(levelname)s - %(message)s'
+            )
+            handler.setFormatter(formatter)
+            protocol_logger.addHandler(handler)
+
+    return protocol_logger
+
+
+class ProtocolConfigSnapshot:
+    """
+    Instantané immuable de la configuration des protocoles
+
+    Les sections sont figées en lecture seule et les loggers de chaque protocole
+    sont configurés à la construction : les accesseurs ne font que des lectures.
+    """
+
+    __slots__ = ("raw", "enabled_protocols", "timeouts", "logging", "loggers", "circuit_breakers",
+                 "default_circuit_breaker", "source", "signature", "version", "loaded_at")
+
+    def __init__(self, config: Dict[str, Any], source: Optional[str], signature: Optional[Tuple[int, int, int]],
+                 version: int):
+        """
+        Construit l'instantané
+
+        Args:
+            config: Configuration lue dans protocols.yml (ou configuration par défaut)
+            source: Chemin du fichier, ou None pour la configuration par défaut
+            signature: Signature du fichier au moment de la lecture
+            version: Numéro d'ordre de l'instantané
+        """
+        raw = _freeze(config)
+        logging_config = raw.get("logging") or MappingProxyType({})
+        protocols = set(raw.get("enabled_protocols") or {}) | set(logging_config)
+
+        object.__setattr__(self, "raw", raw)
+        object.__setattr__(self, "enabled_protocols", raw.get("enabled_protocols") or MappingProxyType({}))
+        object.__setattr__(self, "timeouts", raw.get("timeouts") or MappingProxyType({}))
+        object.__setattr__(self, "logging", logging_config)
+        object.__setattr__(self, "loggers", MappingProxyType({
+            protocol: _build_protocol_logger(protocol, logging_config.get(protocol, DEFAULT_LOGGING_CONFIG))
+            for protocol in sorted(protocols)
+        }))
+        # Réglages des disjoncteurs : défauts, puis section "default", puis section du protocole
+        breakers = raw.get("circuit_breakers") or MappingProxyType({})
+        default_breaker = MappingProxyType({**DEFAULT_CIRCUIT_BREAKER_CONFIG, **(breakers.get("default") or {})})
+        object.__setattr__(self, "default_circuit_breaker", default_breaker)
+        object.__setattr__(self, "circuit_breakers", MappingProxyType({
+            protocol: MappingProxyType({**default_breaker, **(breakers.get(protocol) or {})})
+            for protocol in sorted(protocols | set(breakers)) if protocol != "default"
+        }))
+        object.__setattr__(self, "source", source)
+        object.__setattr__(self, "signature", signature)
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "loaded_at", datetime.now().isoformat())
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"ProtocolConfigSnapshot est immuable ({name})")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"ProtocolConfigSnapshot est immuable ({name})")
+
+    def __repr__(self):
+        return f"<ProtocolConfigSnapshot v{self.version} {self.source or 'défaut'}>"
+
+
+# Instantané courant : remplacé d'un bloc (affectation atomique), jamais modifié
+_snapshot: Optional[ProtocolConfigSnapshot] = None
+_snapshot_version = 0
+# Erreur du dernier chargement refusé (None si l'instantané courant vient du dernier chargement)
+_load_error: Optional[str] = None
+
+
+def _read_snapshot() -> ProtocolConfigSnapshot:
+    """
+    Lit protocols.yml et construit un nouvel instantané
+
+    Returns:
+        Nouvel instantané (configuration par défaut si le fichier n'existe pas)
+
+    Raises:
+        ValueError: Si le YAML est invalide
+    """
+    global _snapshot_version
+
+    signature = _file_signature(CONFIG_PATH)
+    try:
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as file:
+            config = yaml.safe_load(file) or {}
+        source = CONFIG_PATH
+        logger.info(f"Configuration des protocoles rechargée depuis {CONFIG_PATH}")
+    except FileNotFoundError:
+        logger.error(f"Fichier de configuration non trouvé: {CONFIG_PATH}")
+        config = DEFAULT_PROTOCOL_CONFIG
+        source = None
+        signature = None
+    except yaml.YAMLError as e:
+        logger.error(f"Erreur lors du parsing du fichier YAML: {e}")
+        raise ValueError(f"Configuration YAML invalide: {e}")
+
+    if not isinstance(config, dict):
+        raise ValueError(f"Configuration YAML invalide: mapping attendu, {type(config).__name__} trouvé")
+
+    _snapshot_version += 1
+    return ProtocolConfigSnapshot(config, source, signature, _snapshot_version)
+
+
+def reload_protocol_config() -> ProtocolConfigSnapshot:
+    """
+    Relit protocols.yml et publie le nouvel instantané
+
+    Returns:
+        Instantané publié
+
+    Raises:
+        ValueError: Si le YAML est invalide (l'instantané courant est conservé)
+    """
+    global _snapshot, _load_error
+    try:
+        _snapshot = _read_snapshot()
+    except ValueError as e:
+        _load_error = str(e)
+        raise
+    _load_error = None
+    return _snapshot
+
+
+def get_protocol_config_snapshot() -> ProtocolConfigSnapshot:
+    """
+    Instantané courant de la configuration (chargé au premier appel)
+
+    Si protocols.yml est invalide au premier chargement, la configuration par défaut est
+    publiée avec la signature du fichier refusé : les appels suivants ne relisent pas le
+    fichier, et la surveillance le recharge dès qu'il change.
+
+    Returns:
+        Instantané immuable de la configuration des protocoles
+    """
+    global _snapshot, _snapshot_version
+    snapshot = _snapshot
+    if snapshot is not None:
+        return snapshot
+
+    try:
+        return reload_protocol_config()
+    except ValueError as e:
+        logger.error(f"Configuration des protocoles par défaut utilisée: {e}")
+        _snapshot_version += 1
+        _snapshot = ProtocolConfigSnapshot(DEFAULT_PROTOCOL_CONFIG, None, _file_signature(CONFIG_PATH),
+                                           _snapshot_version)
+        return _snapshot
+
 
 def load_protocol_config(force_reload: bool = False) -> Dict[str, Any]:
     """
     Charge la configuration des protocoles depuis le fichier YAML
-    
+
     Args:
-        force_reload: Si True, force le rechargement même si en cache
-    
+        force_reload: Si True, relit le fichier au lieu de l'instantané courant
+
     Returns:
-        Dict contenant la configuration des protocoles
-    """
-    global _config_cache, _cache_timestamp
-    
-    config_path = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)), 
-        "config", 
-        "protocols.yml"
-    )
-    
-    # Vérifier si on doit recharger (force ou fichier modifié)
-    should_reload = force_reload or _config_cache is None
-    
-    if not should_reload and _cache_timestamp is not None:
-        try:
-            file_mtime = os.path.getmtime(config_path)
-            if file_mtime > _cache_timestamp:
-                should_reload = True
-        except OSError:
-            should_reload = True
-    
-    if should_reload:
-        try:
-            with open(config_path, 'r', encoding='utf-8') as file:
-                _config_cache = yaml.safe_load(file)
-                _cache_timestamp = os.path.getmtime(config_path)
-                logger.info(f"Configuration des protocoles rechargée depuis {config_path}")
-        except FileNotFoundError:
-            logger.error(f"Fichier de configuration non trouvé: {config_path}")
-            # Configuration par défaut si le fichier n'existe pas
-            _config_cache = {
-                "enabled_protocols": {
-                    "rest": True,
-                    "ss7": False,
-                    "diameter": False
-                },
-                "timeouts": {
-                    "rest": 30,
-                    "ss7": 10,
-                    "diameter": 60
-                },
-                "logging": {
-                    "rest": {"level": "INFO", "enabled": True},
-                    "ss7": {"level": "DEBUG", "enabled": True},
-                    "diameter": {"level": "INFO", "enabled": True}
-                }
-            }
-            _cache_timestamp = 0
-        except yaml.YAMLError as e:
-            logger.error(f"Erreur lors du parsing du fichier YAML: {e}")
-            raise ValueError(f"Configuration YAML invalide: {e}")
-    
-    return _config_cache
+        Dict contenant la configuration des protocoles (copie modifiable)
+    """
+    snapshot = reload_protocol_config() if force_reload else get_protocol_config_snapshot()
+    return _thaw(snapshot.raw)
+
 
 def is_protocol_enabled(protocol: str) -> bool:
     """
     Vérifie si un protocole est activé dans la configuration
-    
+
     Args:
         protocol: Nom du protocole (rest, ss7, diameter)
-        
+
     Returns:
         True si le protocole est activé, False sinon
     """
-    config = load_protocol_config(force_reload=True)  # Force reload pour les changements de config
-    enabled_protocols = config.get("enabled_protocols", {})
-    return enabled_protocols.get(protocol, False)
+    return bool(get_protocol_config_snapshot().enabled_protocols.get(protocol, False))
 
 def get_protocol_timeout(protocol: str) -> int:
     """
     Obtient le timeout configuré pour un protocole
-    
+
     Args:
         protocol: Nom du protocole
-        
+
     Returns:
         Timeout en secondes
     """
-    config = load_protocol_config(force_reload=True)
-    timeouts = config.get("timeouts", {})
-    default_timeout = 30
-    return timeouts.get(protocol, default_timeout)
+    return get_protocol_config_snapshot().timeouts.get(protocol, DEFAULT_TIMEOUT)
 
-def get_protocol_logging_config(protocol: str) -> Dict[str, Any]:
+def get_protocol_logging_config(protocol: str) -> Mapping[str, Any]:
     """
     Obtient la configuration de logging pour un protocole
-    
+
     Args:
         protocol: Nom du protocole
-        
+
+    Returns:
+        Configuration de logging (lecture seule)
+    """
+    return get_protocol_config_snapshot().logging.get(protocol, DEFAULT_LOGGING_CONFIG)
+
+def get_protocol_circuit_breaker_config(protocol: str) -> Mapping[str, Any]:
+    """
+    Obtient les réglages du disjoncteur d'un protocole
+
+    Args:
+        protocol: Nom du protocole
+
+    Returns:
+        failure_threshold, recovery_timeout, half_open_max_calls, max_in_flight (lecture seule)
+    """
+    snapshot = get_protocol_config_snapshot()
+    return snapshot.circuit_breakers.get(protocol, snapshot.default_circuit_breaker)
+
+def get_protocol_logger(protocol: str) -> logging.Logger:
+    """
+    Logger d'un protocole, configuré au chargement de l'instantané
+
+    Args:
+        protocol: Nom du protocole
+
     Returns:
-        Configuration de logging
+        Logger "protocol.<protocole>"
+    """
+    protocol_logger = get_protocol_config_snapshot().loggers.get(protocol)
+    return protocol_logger or logging.getLogger(f"protocol.{protocol}")
+
+
+class ProtocolConfigWatcher:
+    """
+    Surveillance de protocols.yml : compare périodiquement la signature du fichier
+    (mtime, taille, inode) et publie un nouvel instantané quand elle change.
+    Un fichier invalide est signalé et l'instantané courant est conservé.
+    """
+
+    def __init__(self, interval: float = 5.0):
+        """
+        Initialise la surveillance
+
+        Args:
+            interval: Période de vérification en secondes (0 = désactivée)
+        """
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        # Signature d'un fichier invalide déjà signalé : pas de nouvelle lecture tant qu'il ne change pas
+        self._rejected_signature: Optional[Tuple[int, int, int]] = None
+        self.is_running = False
+
+        self.stats = {
+            'checks': 0,
+            'reloads': 0,
+            'errors': 0,
+            'last_reload': None,
+            'last_error': None
+        }
+
+    async def start(self):
+        """Démarre la surveillance sur la boucle d'événements courante"""
+        if self.is_running:
+            return
+
+        # Premier chargement hors de la boucle d'événements, même sans surveillance
+        await asyncio.to_thread(get_protocol_config_snapshot)
+        if self.interval <= 0:
+            return
+
+        self._task = asyncio.create_task(self._run())
+        self.is_running = True
+        logger.info(f"Surveillance de {CONFIG_PATH} démarrée - intervalle: {self.interval}s")
+
+    async def stop(self):
+        """Arrête la surveillance"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        logger.info("Surveillance de la configuration des protocoles arrêtée")
+
+    async def _run(self):
+        """Boucle de vérification périodique"""
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    async def check(self) -> bool:
+        """
+        Recharge la configuration si le fichier a changé depuis l'instantané courant
+
+        Returns:
+            True si un nouvel instantané a été publié
+        """
+        self.stats['checks'] += 1
+        signature = await asyncio.to_thread(_file_signature, CONFIG_PATH)
+        if signature == get_protocol_config_snapshot().signature or signature == self._rejected_signature:
+            return False
+
+        try:
+            snapshot = await asyncio.to_thread(reload_protocol_config)
+        except ValueError as e:
+            self._rejected_signature = signature
+            self.stats['errors'] += 1
+            self.stats['last_error'] = str(e)
+            logger.error(f"Configuration des protocoles conservée (v{get_protocol_config_snapshot().version}): {e}")
+            return False
+
+        self.stats['reloads'] += 1
+        self.stats['last_reload'] = snapshot.loaded_at
+        logger.info(f"Nouvelle configuration des protocoles publiée (v{snapshot.version})")
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne l'état de la surveillance et de l'instantané courant
+
+        Returns:
+            Compteurs, version et origine de l'instantané
+        """
+        snapshot = get_protocol_config_snapshot()
+        return {
+            **self.stats,
+            'is_running': self.is_running,
+            'interval_seconds': self.interval,
+            'snapshot_version': snapshot.version,
+            'snapshot_source': snapshot.source,
+            'snapshot_loaded_at': snapshot.loaded_at,
+            'snapshot_error': _load_error
+        }
+
+
+# Instance globale pour utilisation dans l'application
+protocol_config_watcher = ProtocolConfigWatcher(
+    interval=float(os.getenv("PROTOCOL_CONFIG_RELOAD_INTERVAL_SECONDS", "5"))
+)
+
+async def start_protocol_config_watcher():
+    """
+    Démarre la surveillance de protocols.yml
+    À appeler au démarrage de l'application FastAPI
+    """
+    await protocol_config_watcher.start()
+
+async def stop_protocol_config_watcher():
+    """
+    Arrête la surveillance de protocols.yml
+    À appeler à l'arrêt de l'application FastAPI
     """
-    config = load_protocol_config(force_reload=True)
-    logging_config = config.get("logging", {})
-    default_config = {"level": "INFO", "enabled": True}
-    return logging_config.get(protocol, default_config)
+    await protocol_config_watcher.stop()
@@ -0,0 +1,390 @@
+"""
+Contrôle d'admission des requêtes HTTP par classe de trafic
+Chaque classe (réseau, API authentifiée, visiteur) dispose de sa propre limite de
+requêtes simultanées et de sa propre file d'attente : une vague de recherches publiques
+remplit la file des visiteurs sans consommer la capacité réservée aux éléments réseau.
+La classe est déduite d'une identité vérifiée (adresse source autorisée, jeton JWT valide),
+jamais des seuls chemin ou en-têtes de la requête.
+Une requête qui attend au-delà du délai de sa file est rejetée (503 + Retry-After).
+"""
+
+import asyncio
+import ipaddress
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .auth import verify_token
+from .database import DB_POOL_CAPACITY
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+
+# Classes de trafic
+CLASSE_RESEAU = "reseau"
+CLASSE_API = "api"
+CLASSE_VISITEUR = "visiteur"
+
+
+class AdmissionLane:
+    """
+    File d'admission d'une classe de trafic : N requêtes simultanées, les suivantes
+    attendent dans l'ordre d'arrivée, dans la limite de max_queue et de queue_timeout
+
+    Utilisée uniquement depuis la boucle d'événements : aucun verrou n'est nécessaire.
+    À la sortie d'une requête, le créneau est transmis directement au premier en attente.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout_ms: int):
+        """
+        Initialise la file
+
+        Args:
+            name: Nom de la classe de trafic
+            max_concurrency: Nombre maximum de requêtes traitées simultanément
+            max_queue: Nombre maximum de requêtes en attente
+            queue_timeout_ms: Délai maximum d'attente avant rejet
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout_ms / 1000
+
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        self.stats = {
+            'admitted': 0,
+            'queued': 0,
+            'admitted_after_wait': 0,
+            'shed_queue_full': 0,
+            'shed_timeout': 0,
+            'max_queue_depth': 0,
+            'wait_ms_total': 0.0,
+            'wait_ms_max': 0.0
+        }
+
+    @property
+    def queue_depth(self) -> int:
+        """Nombre de requêtes en attente d'admission"""
+        return len(self._waiters)
+
+    @property
+    def retry_after(self) -> int:
+        """Délai conseillé (secondes) avant une nouvelle tentative après un rejet"""
+        return max(1, math.ceil(self.queue_timeout))
+
+    async def acquire(self) -> bool:
+        """
+        Demande un créneau de traitement
+
+        Returns:
+            True si la requête est admise (release() doit être appelé), False si elle est rejetée
+        """
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            self.stats['admitted'] += 1
+            return True
+
+        if len(self._waiters) >= self.max_queue:
+            self.stats['shed_queue_full'] += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.stats['queued'] += 1
+        if len(self._waiters) > self.stats['max_queue_depth']:
+            self.stats['max_queue_depth'] = len(self._waiters)
+
+        start = time.perf_counter()
+        try:
+            # asyncio.timeout plutôt que wait_for : wait_for (Python 3.11) absorbe une annulation
+            # arrivée juste après la transmission du créneau
+            async with asyncio.timeout(self.queue_timeout):
+                await waiter
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # Délai expiré ou client déconnecté : rendre le créneau s'il venait d'être transmis
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._discard(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.stats['shed_timeout'] += 1
+            return False
+
+        wait_ms = (time.perf_counter() - start) * 1000
+        self.stats['wait_ms_total'] += wait_ms
+        if wait_ms > self.stats['wait_ms_max']:
+            self.stats['wait_ms_max'] = wait_ms
+        self.stats['admitted'] += 1
+        self.stats['admitted_after_wait'] += 1
+        return True
+
+    def release(self):
+        """Libère un créneau : transmis au premier en attente, sinon rendu à la file"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _discard(self, waiter: asyncio.Future):
+        """Retire une attente expirée ou annulée"""
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne l'état de la file
+
+        Returns:
+            Requêtes en cours, profondeur de file, compteurs d'admission et de rejet
+        """
+        waited = self.stats['admitted_after_wait']
+        return {
+            **self.stats,
+            'wait_ms_total': round(self.stats['wait_ms_total'], 2),
+            'wait_ms_max': round(self.stats['wait_ms_max'], 2),
+            'wait_ms_avg': round(self.stats['wait_ms_total'] / waited, 2) if waited else 0,
+            'active': self.active,
+            'queue_depth': self.queue_depth,
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+            'queue_timeout_ms': int(self.queue_timeout * 1000)
+        }
+
+
+class AdmissionController:
+    """
+    Classement des requêtes et files d'admission par classe
+
+    - réseau : chemins des passerelles protocolaires appelés par un élément réseau
+      identifié (adresse source autorisée, ou jeton JWT valide d'un type d'utilisateur réseau)
+    - api : requêtes portant un jeton Bearer valide
+    - visiteur : toutes les autres requêtes, jeton absent ou invalide compris
+    Les chemins exemptés (sondes de santé, métriques) ne passent par aucune file.
+    """
+
+    def __init__(self, lanes: Iterable[AdmissionLane], network_paths: Iterable[str],
+                 exempt_paths: Iterable[str], network_sources: Iterable[str] = (),
+                 network_user_types: Iterable[str] = ()):
+        """
+        Initialise le contrôleur
+
+        Args:
+            lanes: Files des classes CLASSE_RESEAU, CLASSE_API et CLASSE_VISITEUR
+            network_paths: Préfixes de chemins de la classe réseau
+            exempt_paths: Chemins exacts exemptés du contrôle d'admission
+            network_sources: Adresses ou réseaux (CIDR) des éléments réseau
+            network_user_types: Types d'utilisateur (claim user_type du JWT) des éléments réseau
+        """
+        self.lanes = {lane.name: lane for lane in lanes}
+        self.network_paths = tuple(path.strip() for path in network_paths if path.strip())
+        self.exempt_paths = frozenset(exempt_paths)
+        self.network_sources = tuple(
+            ipaddress.ip_network(source.strip(), strict=False) for source in network_sources if source.strip()
+        )
+        self.network_user_types = frozenset(
+            user_type.strip() for user_type in network_user_types if user_type.strip()
+        )
+
+    def classify(self, scope: Scope) -> Optional[str]:
+        """
+        Classe de trafic d'une requête HTTP
+
+        Args:
+            scope: Scope ASGI de la requête
+
+        Returns:
+            Nom de la classe, ou None si la requête est exemptée
+        """
+        path = scope.get("path", "")
+        if path in self.exempt_paths or scope.get("method") == "OPTIONS":
+            return None
+        payload = self._token_payload(scope)
+        if path.startswith(self.network_paths) and (
+            self._network_source(scope)
+            or (payload is not None and payload.get("user_type") in self.network_user_types)
+        ):
+            return CLASSE_RESEAU
+        return CLASSE_API if payload is not None else CLASSE_VISITEUR
+
+    @staticmethod
+    def _token_payload(scope: Scope) -> Optional[Dict[str, Any]]:
+        """Contenu du jeton Bearer de la requête, None s'il est absent ou invalide"""
+        for name, value in scope.get("headers", ()):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer" or not token.strip():
+                    return None
+                try:
+                    return verify_token(token.strip())
+                except HTTPException:
+                    return None
+        return None
+
+    def _network_source(self, scope: Scope) -> bool:
+        """Vrai si l'adresse source de la requête appartient aux éléments réseau autorisés"""
+        client = scope.get("client")
+        if not self.network_sources or not client:
+            return False
+        try:
+            address = ipaddress.ip_address(client[0])
+        except ValueError:
+            return False
+        return any(address in network for network in self.network_sources)
+
+    def lane_for(self, scope: Scope) -> Optional[AdmissionLane]:
+        """File d'admission d'une requête, ou None si elle est exemptée"""
+        traffic_class = self.classify(scope)
+        return self.lanes.get(traffic_class) if traffic_class else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne l'état de chaque file
+
+        Returns:
+            Dict classe -> statistiques, avec les chemins de la classe réseau
+        """
+        return {
+            "enabled": ADMISSION_CONTROL_ENABLED,
+            "network_paths": list(self.network_paths),
+            "network_sources": [str(network) for network in self.network_sources],
+            "network_user_types": sorted(self.network_user_types),
+            "classes": {name: lane.get_stats() for name, lane in self.lanes.items()}
+        }
+
+    def render_prometheus_metrics(self) -> str:
+        """
+        Exporte l'état des files au format texte Prometheus
+
+        Returns:
+            Lignes de métriques eir_admission_*
+        """
+        lines: List[str] = [
+            "# HELP eir_admission_active Requêtes en cours de traitement par classe de trafic",
+            "# TYPE eir_admission_active gauge"
+        ]
+        lines += [f'eir_admission_active{{classe="{name}"}} {lane.active}' for name, lane in self.lanes.items()]
+        lines += [
+            "# HELP eir_admission_queue_depth Requêtes en attente d'admission par classe de trafic",
+            "# TYPE eir_admission_queue_depth gauge"
+        ]
+        lines += [f'eir_admission_queue_depth{{classe="{name}"}} {lane.queue_depth}' for name, lane in self.lanes.items()]
+        lines += [
+            "# HELP eir_admission_shed_total Requêtes rejetées par classe de trafic et motif",
+            "# TYPE eir_admission_shed_total counter"
+        ]
+        for name, lane in self.lanes.items():
+            lines.append(f'eir_admission_shed_total{{classe="{name}",motif="file_pleine"}} {lane.stats["shed_queue_full"]}')
+            lines.append(f'eir_admission_shed_total{{classe="{name}",motif="delai"}} {lane.stats["shed_timeout"]}')
+        return "\n".join(lines) + "\n"
+
+
+class AdmissionControlMiddleware:
+    """
+    Middleware ASGI : admet chaque requête dans la file de sa classe de trafic
+
+    Le créneau est tenu jusqu'à la fin de la réponse, corps en flux compris.
+    """
+
+    def __init__(self, app: ASGIApp, controller: "AdmissionController"):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        lane = self.controller.lane_for(scope)
+        if lane is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await lane.acquire():
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": f"Service saturé pour la classe {lane.name}, réessayer plus tard"},
+                headers={"Retry-After": str(lane.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release()
+
+
+def _lane_from_env(name: str, max_concurrency: int, max_queue: int, queue_timeout_ms: int) -> AdmissionLane:
+    """File d'une classe configurée par ADMISSION_<CLASSE>_MAX_CONCURRENCY / _MAX_QUEUE / _QUEUE_TIMEOUT_MS"""
+    prefix = f"ADMISSION_{name.upper()}"
+    return AdmissionLane(
+        name,
+        max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", str(max_concurrency))),
+        max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", str(max_queue))),
+        queue_timeout_ms=int(os.getenv(f"{prefix}_QUEUE_TIMEOUT_MS", str(queue_timeout_ms)))
+    )
+
+
+def _default_concurrency(pool_capacity: int) -> Dict[str, int]:
+    """
+    Limites de concurrence par défaut déduites de la capacité du pool SQLAlchemy
+
+    Les classes api et visiteur se partagent au plus les trois quarts du pool (deux tiers
+    pour api) : le quart restant reste libre pour la classe réseau, qui peut occuper
+    tout le pool.
+
+    Args:
+        pool_capacity: pool_size + max_overflow du moteur (core.database.DB_POOL_CAPACITY)
+
+    Returns:
+        Dict classe -> nombre maximum de requêtes simultanées
+    """
+    pool_capacity = max(pool_capacity, 4)
+    shared = pool_capacity - max(2, pool_capacity // 4)
+    api = max(1, shared * 2 // 3)
+    return {CLASSE_RESEAU: pool_capacity, CLASSE_API: api, CLASSE_VISITEUR: max(1, shared - api)}
+
+
+def _check_pool_headroom(lanes: Iterable[AdmissionLane], pool_capacity: int):
+    """Signale une configuration où api + visiteur peuvent épuiser le pool réservé au réseau"""
+    lanes = {lane.name: lane for lane in lanes}
+    shared = lanes[CLASSE_API].max_concurrency + lanes[CLASSE_VISITEUR].max_concurrency
+    if shared >= pool_capacity:
+        logger.warning(
+            f"Contrôle d'admission: api + visiteur = {shared} requêtes simultanées pour un pool de "
+            f"{pool_capacity} connexions (DB_POOL_SIZE + DB_MAX_OVERFLOW) : aucune réserve pour la classe réseau"
+        )
+
+
+# Instance globale : limites par worker, dimensionnées d'après le pool SQLAlchemy du worker
+_DEFAULT_CONCURRENCY = _default_concurrency(DB_POOL_CAPACITY)
+_LANES = [
+    _lane_from_env(CLASSE_RESEAU, _DEFAULT_CONCURRENCY[CLASSE_RESEAU], max_queue=256, queue_timeout_ms=2000),
+    _lane_from_env(CLASSE_API, _DEFAULT_CONCURRENCY[CLASSE_API], max_queue=128, queue_timeout_ms=5000),
+    _lane_from_env(CLASSE_VISITEUR, _DEFAULT_CONCURRENCY[CLASSE_VISITEUR], max_queue=64, queue_timeout_ms=1000),
+]
+_check_pool_headroom(_LANES, DB_POOL_CAPACITY)
+
+admission_controller = AdmissionController(
+    lanes=_LANES,
+    network_paths=os.getenv("ADMISSION_NETWORK_PATHS", "/verify_imei").split(","),
+    exempt_paths=("/health", "/metrics"),
+    # Adresse vue par le worker : derrière un proxy, y déclarer les adresses du proxy dédié au réseau
+    network_sources=os.getenv("ADMISSION_NETWORK_SOURCES", "").split(","),
+    network_user_types=os.getenv("ADMISSION_NETWORK_USER_TYPES", "operateur").split(",")
+)
@@ -1,8 +1,18 @@
 from fastapi import Depends
 from sqlalchemy.orm import Session
-from .dependencies import get_db
-from ..services.audit import AuditService
+from sqlalchemy.ext.asyncio import AsyncSession
+from .dependencies import get_db, get_async_db
+from ..services.audit import AuditService, AsyncAuditService
+from ..tasks.write_behind import write_behind_buffer
 
 def get_audit_service(db: Session = Depends(get_db)) -> AuditService:
     """Dependency to get audit service"""
-    return AuditService(db)
\ No newline at end of file
+    return AuditService(db)
+
+def get_deferred_audit_service(db: Session = Depends(get_db)) -> AuditService:
+    """Dependency to get an audit service whose entries go through the write-behind buffer"""
+    return AuditService(db, write_behind=write_behind_buffer)
+
+def get_deferred_audit_service_async(db: AsyncSession = Depends(get_async_db)) -> AsyncAuditService:
+    """Async variant of get_deferred_audit_service for `async def` routes: shares the request's AsyncSession"""
+    return AsyncAuditService(db, write_behind=write_behind_buffer)
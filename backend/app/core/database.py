@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 import os
 from dotenv import load_dotenv
 
@@ -8,17 +9,58 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Taille des pools de connexions (par moteur et par worker) : pool_size connexions
+# permanentes + max_overflow temporaires. Le contrôle d'admission (core.admission)
+# dimensionne ses files d'après DB_POOL_CAPACITY.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_CAPACITY = DB_POOL_SIZE + DB_MAX_OVERFLOW
+
+
+def _pool_options(url: str) -> dict:
+    """Options de pool du moteur (les pools SQLite n'acceptent ni pool_size ni max_overflow)"""
+    if url.startswith("sqlite"):
+        return {}
+    return {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+
+
 # Add support for UUID and better connection handling
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
-    pool_recycle=300
+    pool_recycle=300,
+    **_pool_options(DATABASE_URL)
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url(url: str) -> str:
+    """
+    Dérive l'URL du moteur asynchrone à partir de DATABASE_URL
+    postgresql:// (psycopg2) -> postgresql+asyncpg://, sqlite:// -> sqlite+aiosqlite://
+    """
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(DATABASE_URL)
+
+# Moteur asynchrone (asyncpg) pour les routes async : les requêtes ne bloquent pas la boucle d'événements
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    **_pool_options(ASYNC_DATABASE_URL)
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
-# Dependency pour FastAPI
+# Dependency pour FastAPI - unique fournisseur de session de la requête,
+# partagé par les routes et les dépendances (utilisateur courant, audit...)
 def get_db():
     db = SessionLocal()
     try:
@@ -26,6 +68,11 @@ def get_db():
     finally:
         db.close()
 
+# Dependency asynchrone pour les routes `async def`
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Fonction pour obtenir une session de base de données (pour les tâches en arrière-plan)
 def get_db_session():
     db = SessionLocal()
@@ -0,0 +1,86 @@
+"""
+Compteurs de connexions et de requêtes SQL par requête HTTP
+Activés par DB_DEBUG_HEADERS=true : chaque réponse porte les en-têtes
+X-DB-Connections et X-DB-Queries, pour vérifier qu'un endpoint n'emprunte
+qu'une seule connexion au pool
+"""
+
+import os
+import logging
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+DB_DEBUG_HEADERS = os.getenv("DB_DEBUG_HEADERS", "false").lower() == "true"
+
+# Compteurs de la requête HTTP courante (None hors requête : tâches de fond, scripts)
+_request_db_stats: ContextVar[Optional[Dict[str, int]]] = ContextVar("request_db_stats", default=None)
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    """Événement pool : une connexion est empruntée"""
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats["connections"] += 1
+
+
+def _on_execute(conn, cursor, statement, parameters, context, executemany):
+    """Événement moteur : une requête SQL est exécutée"""
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats["queries"] += 1
+
+
+def install_db_metrics(*engines: Engine):
+    """
+    Branche les compteurs sur les moteurs SQLAlchemy
+
+    Args:
+        engines: Moteurs synchrones (pour un moteur asynchrone, passer async_engine.sync_engine)
+    """
+    for engine in engines:
+        event.listen(engine.pool, "checkout", _on_checkout)
+        event.listen(engine, "before_cursor_execute", _on_execute)
+
+
+def get_request_db_stats() -> Optional[Dict[str, int]]:
+    """Retourne les compteurs de la requête HTTP courante"""
+    return _request_db_stats.get()
+
+
+class DBMetricsMiddleware:
+    """
+    Middleware ASGI : initialise les compteurs de la requête et les expose en en-têtes
+
+    Les dépendances à yield étant fermées avant l'envoi de la réponse, les valeurs
+    couvrent toute la requête (hors corps des réponses en flux).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = {"connections": 0, "queries": 0}
+        token = _request_db_stats.set(stats)
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-connections", str(stats["connections"]).encode()))
+                headers.append((b"x-db-queries", str(stats["queries"]).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _request_db_stats.reset(token)
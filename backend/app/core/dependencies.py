@@ -1,23 +1,34 @@
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, Dict, Any
 import time
+import uuid
 from collections import defaultdict
-from .database import SessionLocal
+from .database import get_db, get_async_db
 from .auth import verify_token
 from .permissions import PermissionManager, Operation, AccessLevel, PorteeDonnees
+from .user_cache import user_snapshot_cache, UtilisateurSnapshot
 from ..models.utilisateur import Utilisateur
 
 security = HTTPBearer()
 
-def get_db():
-    """Database dependency"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# get_db / get_async_db viennent de core.database : un seul fournisseur de session
+# par requête, partagé par toutes les dépendances (FastAPI met en cache chaque
+# dépendance pour la durée de la requête)
+
+def _load_user(user_id: Any, db: Session) -> Optional[UtilisateurSnapshot]:
+    """Instantané de l'utilisateur d'un JWT, depuis le cache ou la table utilisateur"""
+    snapshot = user_snapshot_cache.get(str(user_id))
+    if snapshot is not None:
+        return snapshot
+    
+    user = db.query(Utilisateur).filter(Utilisateur.id == user_id).first()
+    if user is None:
+        return None
+    return user_snapshot_cache.put(str(user_id), user)
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -34,7 +45,7 @@ def get_current_user(
             detail="Could not validate credentials"
         )
     
-    user = db.query(Utilisateur).filter(Utilisateur.id == user_id).first()
+    user = _load_user(user_id, db)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -74,7 +85,7 @@ def get_current_user_optional(
         user_id = payload.get("sub")
         
         if user_id:
-            user = db.query(Utilisateur).filter(Utilisateur.id == user_id).first()
+            user = _load_user(user_id, db)
             # Check if user is active
             if user and hasattr(user, 'est_actif') and not user.est_actif:
                 return None
@@ -84,6 +95,76 @@ def get_current_user_optional(
     
     return None
 
+# Async variants - used by `async def` routes with get_async_db, so the user
+# lookup shares the route's AsyncSession and never blocks the event loop
+async def _load_user_async(token: str, db: AsyncSession) -> Optional[UtilisateurSnapshot]:
+    """Load the user referenced by a JWT, None if the token has no subject"""
+    payload = verify_token(token)
+    user_id = payload.get("sub")
+    if user_id is None:
+        return None
+    
+    snapshot = user_snapshot_cache.get(str(user_id))
+    if snapshot is not None:
+        return snapshot
+    
+    result = await db.execute(select(Utilisateur).where(Utilisateur.id == uuid.UUID(str(user_id))))
+    user = result.scalar_one_or_none()
+    if user is None:
+        return None
+    return user_snapshot_cache.put(str(user_id), user)
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> Utilisateur:
+    """Get current authenticated user (async session)"""
+    try:
+        user = await _load_user_async(credentials.credentials, db)
+    except ValueError:
+        user = None
+    
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials"
+        )
+    
+    # Check if user is active
+    if hasattr(user, 'est_actif') and not user.est_actif:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account is deactivated"
+        )
+    
+    return user
+
+async def get_current_user_optional_async(
+    credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer(auto_error=False)),
+    db: AsyncSession = Depends(get_async_db)
+) -> Optional[Utilisateur]:
+    """Get current user if authenticated, None otherwise (async session)"""
+    if credentials is None:
+        return None
+    
+    try:
+        user = await _load_user_async(credentials.credentials, db)
+        # Check if user is active
+        if user and hasattr(user, 'est_actif') and not user.est_actif:
+            return None
+        return user
+    except Exception:
+        return None
+
+async def get_admin_user_async(current_user: Utilisateur = Depends(get_current_user_async)) -> Utilisateur:
+    """Require admin privileges (async session)"""
+    if current_user.type_utilisateur != "administrateur":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return current_user
+
 # Rate limiting for visitors (in production, use Redis)
 visitor_requests = defaultdict(list)
 VISITOR_RATE_LIMIT = 10  # requests per hour
@@ -129,7 +210,7 @@ def get_current_user_with_visitor_support(
         user_id = payload.get("sub")
         
         if user_id:
-            user = db.query(Utilisateur).filter(Utilisateur.id == user_id).first()
+            user = _load_user(user_id, db)
             if user:
                 # Check if user is active
                 if hasattr(user, 'est_actif') and not user.est_actif:
@@ -0,0 +1,320 @@
+"""
+Compilation des règles d'accès IMEI (plages_imei_autorisees) des parties concernées
+Les règles JSON sont compilées une fois par version de l'utilisateur en structures
+de recherche : arbre de préfixes, intervalles triés, expressions régulières
+précompilées et ensembles d'IMEI exacts
+"""
+
+import re
+import logging
+from bisect import bisect_right
+from re import _parser as _sre_parse
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import String, any_, bindparam, false, or_
+from sqlalchemy.types import ARRAY
+
+logger = logging.getLogger(__name__)
+
+# Clé des nœuds terminaux de l'arbre de préfixes (index de la première règle)
+_TERMINAL = None
+
+# Sous-ensemble des expressions régulières interprété de la même façon par re (Python)
+# et par l'opérateur ~ de PostgreSQL (ARE) : littéraux, classes, \d \s \w, groupes,
+# alternatives, quantificateurs et ancres ^ $
+_SQL_REGEX_OPCODES = frozenset({
+    "LITERAL", "NOT_LITERAL", "ANY", "IN", "RANGE", "NEGATE", "CATEGORY",
+    "MAX_REPEAT", "MIN_REPEAT", "SUBPATTERN", "BRANCH", "AT"
+})
+_SQL_REGEX_AT = frozenset({"AT_BEGINNING", "AT_END"})
+# Échappements admis : \d \D \s \S \w \W et les caractères non alphanumériques
+_SQL_REGEX_ESCAPE = re.compile(r"\\(?:[dDsSwW]|[^0-9A-Za-z])")
+_SQL_REGEX_QUANTIFIER = re.compile(r"\{[0-9]+(?:,[0-9]*)?\}")
+# Bornes de répétition maximales de PostgreSQL (RE_DUP_MAX)
+_SQL_REGEX_MAX_REPEAT = 255
+
+
+def _sql_regex_items(parsed) -> bool:
+    """Vérifie récursivement un motif analysé par re._parser (voir is_sql_compatible_regex)"""
+    for op, arg in parsed:
+        name = str(op)
+        if name not in _SQL_REGEX_OPCODES:
+            return False
+        if name == "AT" and str(arg) not in _SQL_REGEX_AT:
+            return False
+        if name == "IN":
+            if not all(str(item_op) in _SQL_REGEX_OPCODES for item_op, _ in arg):
+                return False
+        elif name in ("MAX_REPEAT", "MIN_REPEAT"):
+            low, high, sub = arg
+            if low > _SQL_REGEX_MAX_REPEAT or (high != _sre_parse.MAXREPEAT and high > _SQL_REGEX_MAX_REPEAT):
+                return False
+            if not _sql_regex_items(sub):
+                return False
+        elif name == "SUBPATTERN":
+            _, add_flags, del_flags, sub = arg
+            if add_flags or del_flags or not _sql_regex_items(sub):
+                return False
+        elif name == "BRANCH":
+            if not all(_sql_regex_items(branch) for branch in arg[1]):
+                return False
+    return True
+
+
+def is_sql_compatible_regex(pattern: str) -> bool:
+    """
+    Indique si un motif re peut être envoyé tel quel à l'opérateur ~ de PostgreSQL
+
+    Les motifs hors du sous-ensemble commun (assertions, références arrière, drapeaux,
+    groupes nommés, \\A \\Z \\b, échappements alphanumériques, accolades littérales,
+    {,n}) ont un sens différent ou sont refusés par PostgreSQL : ils restent évalués
+    en Python.
+
+    Args:
+        pattern: Motif de la règle regex
+
+    Returns:
+        True si le motif a le même sens en Python et en SQL
+    """
+    try:
+        parsed = _sre_parse.parse(pattern)
+    except (re.error, TypeError):
+        return False
+    # Accolades et barres obliques inverses vérifiées sur le texte : l'analyse de re
+    # accepte des formes littérales que PostgreSQL refuse ou interprète autrement
+    text = _SQL_REGEX_QUANTIFIER.sub("", _SQL_REGEX_ESCAPE.sub("", pattern))
+    if "\\" in text or "{" in text or "}" in text:
+        return False
+    # Drapeaux globaux ((?i) ...) et groupes nommés inconnus de PostgreSQL
+    if parsed.state.flags & ~re.UNICODE or parsed.state.groupdict:
+        return False
+    return _sql_regex_items(parsed)
+
+
+class CompiledIMEIRules:
+    """
+    Règles d'accès IMEI compilées, équivalentes à PermissionManager._imei_matches_rule
+    appliqué à chaque règle de la liste
+
+    - prefix : arbre de préfixes, parcouru en O(longueur de l'IMEI)
+    - range  : intervalles triés par borne basse et maximum cumulé des bornes
+               hautes, recherche dichotomique en O(log n)
+    - regex  : motifs compilés une seule fois (re.match) ; seuls les motifs du
+               sous-ensemble commun à PostgreSQL sont traduits par sql_filter
+    - exact  : table de hachage IMEI -> règle
+
+    Lorsque plusieurs règles correspondent, la règle retournée est celle de plus
+    petit index parmi les préfixes, regex et IMEI exacts ; pour les intervalles,
+    c'est l'une des règles correspondantes.
+    """
+
+    __slots__ = ("rules", "_trie", "_range_starts", "_range_max_end", "_range_argmax",
+                 "_regexes", "_exact", "_has_prefix", "sql_complete")
+
+    def __init__(self, rules: Optional[Iterable[Dict[str, Any]]]):
+        """
+        Compile une liste de règles
+
+        Args:
+            rules: Règles JSON de l'utilisateur (plages_imei_autorisees)
+        """
+        self.rules: List[Dict[str, Any]] = [rule for rule in rules or [] if isinstance(rule, dict)]
+        self._trie: Dict[Any, Any] = {}
+        self._has_prefix = False
+        self._regexes: List[Tuple[int, "re.Pattern"]] = []
+        self._exact: Dict[str, int] = {}
+        # False si une règle regex n'a pas d'équivalent PostgreSQL (évaluée en Python)
+        self.sql_complete = True
+        intervals: List[Tuple[str, str, int]] = []
+
+        for index, rule in enumerate(self.rules):
+            rule_type = rule.get("type", "prefix")
+
+            if rule_type == "prefix":
+                self._add_prefix(str(rule.get("prefix") or ""), index)
+
+            elif rule_type == "range":
+                start = rule.get("start", "")
+                end = rule.get("end", "")
+                if isinstance(start, str) and isinstance(end, str) and start <= end:
+                    intervals.append((start, end, index))
+
+            elif rule_type == "regex":
+                try:
+                    self._regexes.append((index, re.compile(rule.get("pattern", ""))))
+                except (re.error, TypeError) as e:
+                    logger.warning(f"Règle IMEI regex ignorée (motif invalide): {rule.get('pattern')!r} - {e}")
+                    continue
+                if not is_sql_compatible_regex(rule.get("pattern", "")):
+                    self.sql_complete = False
+                    logger.warning(f"Règle IMEI regex évaluée en Python (syntaxe non portable vers PostgreSQL): "
+                                   f"{rule.get('pattern')!r}")
+
+            elif rule_type == "exact":
+                for imei in rule.get("imeis", []) or []:
+                    if isinstance(imei, str):
+                        self._exact.setdefault(imei, index)
+
+        # Intervalles : triés par borne basse, avec le maximum cumulé des bornes
+        # hautes ; un IMEI est couvert si la plus grande borne haute parmi les
+        # intervalles commençant avant lui est >= IMEI
+        intervals.sort()
+        self._range_starts = [start for start, _, _ in intervals]
+        self._range_max_end: List[str] = []
+        self._range_argmax: List[int] = []
+        best_end, best_index = None, -1
+        for _, end, index in intervals:
+            if best_end is None or end > best_end:
+                best_end, best_index = end, index
+            self._range_max_end.append(best_end)
+            self._range_argmax.append(best_index)
+
+    def _add_prefix(self, prefix: str, index: int):
+        """Ajoute un préfixe à l'arbre (la première règle d'un préfixe est conservée)"""
+        node = self._trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node.setdefault(_TERMINAL, index)
+        self._has_prefix = True
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, imei: str) -> Optional[Dict[str, Any]]:
+        """
+        Recherche une règle couvrant l'IMEI
+
+        Args:
+            imei: Numéro IMEI
+
+        Returns:
+            La règle JSON correspondante, ou None
+        """
+        best = len(self.rules)
+
+        index = self._exact.get(imei)
+        if index is not None:
+            best = index
+
+        if self._has_prefix:
+            node = self._trie
+            if _TERMINAL in node:
+                best = min(best, node[_TERMINAL])
+            for char in imei:
+                node = node.get(char)
+                if node is None:
+                    break
+                if _TERMINAL in node:
+                    best = min(best, node[_TERMINAL])
+
+        for index, pattern in self._regexes:
+            if index >= best:
+                break
+            if pattern.match(imei):
+                best = index
+                break
+
+        if best < len(self.rules):
+            return self.rules[best]
+
+        if self._range_starts:
+            position = bisect_right(self._range_starts, imei) - 1
+            if position >= 0 and self._range_max_end[position] >= imei:
+                return self.rules[self._range_argmax[position]]
+
+        return None
+
+    def matches(self, imei: str) -> bool:
+        """Indique si l'IMEI est couvert par au moins une règle"""
+        return self.match(imei) is not None
+
+    def sql_filter(self, column, dialect_name: Optional[str] = None):
+        """
+        Traduit les règles en un prédicat SQL (OU des règles) sur une colonne IMEI
+
+        prefix -> LIKE 'p%', range -> BETWEEN, exact -> = ANY (IN hors PostgreSQL),
+        regex -> ~ ancré en début de chaîne comme re.match. Les règles ignorées à
+        la compilation le sont aussi ici, de même que les regex hors du sous-ensemble
+        commun à PostgreSQL : si sql_complete est False, le prédicat ne couvre pas
+        toutes les règles et l'appelant doit évaluer match() en Python.
+
+        Args:
+            column: Colonne contenant le numéro IMEI (ex. Recherche.imei_recherche)
+            dialect_name: Dialecte de la session ("postgresql" active = ANY(tableau))
+
+        Returns:
+            Expression SQLAlchemy utilisable dans filter()
+        """
+        predicates = []
+
+        for rule in self.rules:
+            rule_type = rule.get("type", "prefix")
+
+            if rule_type == "prefix":
+                prefix = str(rule.get("prefix") or "")
+                predicates.append(column.startswith(prefix, autoescape=True) if prefix else column.isnot(None))
+
+            elif rule_type == "range":
+                start = rule.get("start", "")
+                end = rule.get("end", "")
+                if isinstance(start, str) and isinstance(end, str) and start <= end:
+                    predicates.append(column.between(start, end))
+
+        for _, pattern in self._regexes:
+            if not is_sql_compatible_regex(pattern.pattern):
+                continue
+            predicates.append(column.regexp_match(f"^(?:{pattern.pattern})"))
+
+        if self._exact:
+            exact_imeis = list(self._exact)
+            if dialect_name == "postgresql":
+                # Un seul paramètre tableau, quel que soit le nombre d'IMEI
+                predicates.append(column == any_(bindparam("imeis_exacts", exact_imeis, type_=ARRAY(String))))
+            else:
+                predicates.append(column.in_(exact_imeis))
+
+        if not predicates:
+            return false()
+        return or_(*predicates)
+
+
+# Matcher partagé des utilisateurs sans règle
+EMPTY_RULES = CompiledIMEIRules([])
+
+
+def compile_imei_rules(rules: Optional[Iterable[Dict[str, Any]]]) -> CompiledIMEIRules:
+    """
+    Compile les règles d'accès IMEI d'un utilisateur
+
+    Args:
+        rules: Règles JSON (plages_imei_autorisees)
+
+    Returns:
+        Règles compilées (EMPTY_RULES si la liste est vide)
+    """
+    if not rules:
+        return EMPTY_RULES
+    return CompiledIMEIRules(rules)
+
+
+def get_imei_rules(user) -> CompiledIMEIRules:
+    """
+    Retourne les règles IMEI compilées d'un utilisateur
+
+    Les instantanés du cache utilisateur portent leurs règles déjà compilées ;
+    pour un enregistrement Utilisateur chargé depuis la base, elles sont compilées
+    à la volée.
+
+    Args:
+        user: Instantané ou enregistrement Utilisateur
+
+    Returns:
+        Règles compilées
+    """
+    compiled = getattr(user, "regles_imei", None)
+    if compiled is not None:
+        return compiled
+    return compile_imei_rules(getattr(user, "plages_imei_autorisees", None))
@@ -10,6 +10,8 @@ from sqlalchemy.orm import Session
 from ..models.utilisateur import Utilisateur
 from ..models.appareil import Appareil
 from ..models.imei import IMEI
+from ..services.imei_cache import imei_status_cache
+from .imei_rules import get_imei_rules
 import re
 
 class AccessLevel(Enum):
@@ -191,9 +193,12 @@ class PermissionManager:
         return operation in default_permissions
     
     @staticmethod
-    def can_access_imei(user: Optional[Utilisateur], imei: str, db: Session = None) -> tuple[bool, dict]:
+    def can_access_imei(user: Optional[Utilisateur], imei: str, db: Session = None,
+                        projections: Optional[Dict[str, Any]] = None) -> tuple[bool, dict]:
         """
         Check if user can access specific IMEI with detailed reasoning
+        projections : projections déjà chargées par lot (imei_status_cache.get_many_or_load) ;
+        un IMEI absent de ce dictionnaire est inconnu, ni la base ni le cache ne sont consultés
         Returns: (can_access: bool, context: dict)
         """
         context = {
@@ -218,16 +223,17 @@ class PermissionManager:
             return True, context
         
         # Check IMEI range restrictions for concerned parties
+        # (règles compilées une fois par version de l'utilisateur, cf. core.imei_rules)
         allowed_ranges = user.plages_imei_autorisees or []
         if allowed_ranges:
-            for range_rule in allowed_ranges:
-                if PermissionManager._imei_matches_rule(imei, range_rule):
-                    context.update({
-                        "raison": "plage_imei_correspondance",
-                        "portee_donnees": "plages_limitees",
-                        "regle_correspondante": range_rule
-                    })
-                    return True, context
+            range_rule = get_imei_rules(user).match(imei)
+            if range_rule is not None:
+                context.update({
+                    "raison": "plage_imei_correspondance",
+                    "portee_donnees": "plages_limitees",
+                    "regle_correspondante": range_rule
+                })
+                return True, context
             
             # L’IMEI ne correspond à aucune plage autorisée
             context.update({
@@ -237,20 +243,24 @@ class PermissionManager:
             return False, context
         
         # Check device marque restrictions
-        if db and user.marques_autorisees:
-            imei_record = db.query(IMEI).filter(IMEI.numero_imei == imei).first()
-            if imei_record and imei_record.appareil:
-                if imei_record.appareil.marque in user.marques_autorisees:
+        if user.marques_autorisees and (projections is not None or db):
+            if projections is not None:
+                imei_record = projections.get(imei)
+            else:
+                imei_record = imei_status_cache.get_or_load(imei, db)
+            appareil = imei_record["appareil"] if imei_record else None
+            if appareil:
+                if appareil["marque"] in user.marques_autorisees:
                     context.update({
                         "raison": "acces_marque",
                         "portee_donnees": "limite_marque",
-                        "marque": imei_record.appareil.marque
+                        "marque": appareil["marque"]
                     })
                     return True, context
                 else:
                     context.update({
                         "raison": "restriction_marque",
-                        "marque_appareil": imei_record.appareil.marque,
+                        "marque_appareil": appareil["marque"],
                         "marques_autorisees": user.marques_autorisees
                     })
                     return False, context
@@ -416,7 +426,8 @@ class PermissionManager:
     
     @staticmethod
     def _imei_matches_rule(imei: str, rule: dict) -> bool:
-        """Check if IMEI matches a specific access rule"""
+        """Check if IMEI matches a specific access rule
+        (interprétation de référence, les chemins de requête utilisent core.imei_rules)"""
         rule_type = rule.get("type", "prefix")
         
         if rule_type == "prefix":
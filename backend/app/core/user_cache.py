@@ -0,0 +1,212 @@
+"""
+Cache en mémoire des utilisateurs authentifiés, indexé par le sujet (sub) du JWT
+Évite la lecture de la table utilisateur à chaque requête authentifiée ; les routes
+de gestion des permissions et la déconnexion invalident l'entrée concernée
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from .imei_rules import compile_imei_rules
+
+logger = logging.getLogger(__name__)
+
+# Champs de l'utilisateur conservés dans l'instantané (contrôle d'accès et affichage)
+SNAPSHOT_FIELDS = (
+    "id",
+    "nom",
+    "email",
+    "type_utilisateur",
+    "niveau_acces",
+    "portee_donnees",
+    "organisation",
+    "est_actif",
+    "marques_autorisees",
+    "plages_imei_autorisees",
+    "date_creation",
+)
+
+
+class UtilisateurSnapshot:
+    """
+    Instantané immuable d'un utilisateur, détaché de toute session
+
+    Expose les mêmes attributs que le modèle Utilisateur pour les champs de
+    SNAPSHOT_FIELDS : les routes et PermissionManager l'utilisent à l'identique.
+    Les listes de marques et de plages sont figées en tuples, et les plages IMEI
+    sont compilées une fois par instantané (regles_imei).
+    """
+
+    __slots__ = SNAPSHOT_FIELDS + ("regles_imei",)
+
+    def __init__(self, **values):
+        for field in SNAPSHOT_FIELDS:
+            object.__setattr__(self, field, values.get(field))
+        object.__setattr__(self, "regles_imei", compile_imei_rules(self.plages_imei_autorisees))
+
+    @classmethod
+    def from_model(cls, user) -> "UtilisateurSnapshot":
+        """
+        Construit l'instantané à partir d'un enregistrement Utilisateur
+
+        Args:
+            user: Instance du modèle Utilisateur
+
+        Returns:
+            Instantané de l'utilisateur
+        """
+        return cls(
+            id=user.id,
+            nom=user.nom,
+            email=user.email,
+            type_utilisateur=user.type_utilisateur,
+            niveau_acces=user.niveau_acces,
+            portee_donnees=user.portee_donnees,
+            organisation=user.organisation,
+            est_actif=user.est_actif,
+            marques_autorisees=tuple(user.marques_autorisees or ()),
+            plages_imei_autorisees=tuple(dict(plage) if isinstance(plage, dict) else plage
+                                         for plage in user.plages_imei_autorisees or ()),
+            date_creation=user.date_creation
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"UtilisateurSnapshot est immuable ({name})")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"UtilisateurSnapshot est immuable ({name})")
+
+    def __repr__(self):
+        return f"<UtilisateurSnapshot {self.id} {self.type_utilisateur}/{self.niveau_acces}>"
+
+
+class UserSnapshotCache:
+    """
+    Cache LRU/TTL des instantanés utilisateur indexés par sujet JWT
+
+    L'invalidation est locale au processus : avec plusieurs workers, le TTL borne
+    la durée pendant laquelle un autre worker peut servir un instantané périmé.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60):
+        """
+        Initialise le cache
+
+        Args:
+            max_entries: Nombre maximum d'entrées avant éviction LRU
+            ttl_seconds: Durée de vie d'une entrée en secondes (0 désactive le cache)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, UtilisateurSnapshot]]" = OrderedDict()
+        # Les dépendances synchrones s'exécutent dans le threadpool de Starlette
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'expirations': 0,
+            'evictions': 0,
+            'invalidations': 0
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, subject: str) -> Optional[UtilisateurSnapshot]:
+        """
+        Lit un instantané depuis le cache
+
+        Args:
+            subject: Sujet (sub) du JWT, c'est-à-dire l'ID utilisateur
+
+        Returns:
+            L'instantané, ou None s'il est absent ou expiré
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            expires_at, snapshot = entry
+            if expires_at <= now:
+                del self._entries[subject]
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(subject)
+            self.stats['hits'] += 1
+            return snapshot
+
+    def put(self, subject: str, user) -> UtilisateurSnapshot:
+        """
+        Enregistre l'instantané d'un utilisateur chargé depuis la base
+
+        Args:
+            subject: Sujet (sub) du JWT
+            user: Instance du modèle Utilisateur
+
+        Returns:
+            L'instantané enregistré
+        """
+        snapshot = UtilisateurSnapshot.from_model(user)
+        if not self.enabled:
+            return snapshot
+
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[subject] = (expires_at, snapshot)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+        return snapshot
+
+    def invalidate(self, *user_ids: Any):
+        """
+        Supprime des utilisateurs du cache après une modification ou une déconnexion
+
+        Args:
+            user_ids: IDs des utilisateurs (UUID ou chaînes ; les valeurs vides sont ignorées)
+        """
+        with self._lock:
+            for user_id in user_ids:
+                if user_id and self._entries.pop(str(user_id), None) is not None:
+                    self.stats['invalidations'] += 1
+
+    def clear(self):
+        """Vide entièrement le cache"""
+        with self._lock:
+            self.stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne les statistiques du cache
+
+        Returns:
+            Compteurs hits/misses et taille courante
+        """
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hit_ratio': round(self.stats['hits'] / lookups, 4) if lookups else 0.0
+            }
+
+
+# Instance globale pour utilisation dans l'application
+user_snapshot_cache = UserSnapshotCache(
+    max_entries=int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+)
@@ -0,0 +1,206 @@
+"""
+Disjoncteurs par protocole (fermé, ouvert, semi-ouvert)
+Après N échecs consécutifs d'un handler (exception, délai dépassé, réponse d'erreur),
+le circuit s'ouvre : les requêtes sont refusées immédiatement au lieu d'attendre un
+backend défaillant. Après le délai de récupération, quelques requêtes d'essai décident
+de la fermeture ou d'une nouvelle ouverture.
+"""
+import logging
+import math
+import time
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from ..config_loader import get_protocol_circuit_breaker_config, get_protocol_config_snapshot
+
+logger = logging.getLogger(__name__)
+
+# États du disjoncteur
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur d'un protocole
+
+    Utilisé uniquement depuis la boucle d'événements : aucun verrou n'est nécessaire.
+    Le passage de l'état ouvert à semi-ouvert est évalué à la lecture de l'état.
+    Chaque changement d'état ouvre une nouvelle génération : le résultat d'une requête
+    admise dans une génération précédente (ex. admise circuit fermé, terminée en
+    semi-ouvert) est ignoré et ne compte pas comme un essai.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1, max_in_flight: int = 200):
+        """
+        Initialise le disjoncteur (fermé)
+
+        Args:
+            name: Nom du protocole
+            failure_threshold: Échecs consécutifs avant ouverture
+            recovery_timeout: Secondes en état ouvert avant les requêtes d'essai
+            half_open_max_calls: Requêtes d'essai simultanées en semi-ouvert
+            max_in_flight: Requêtes simultanées maximum pour le protocole
+        """
+        self.name = name
+        self.configure(failure_threshold, recovery_timeout, half_open_max_calls, max_in_flight)
+        self.config_version: Optional[int] = None
+
+        self._state = CIRCUIT_CLOSED
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._trial_calls = 0
+        self._generation = 0
+
+        self.stats = {
+            'opened': 0,
+            'short_circuited': 0,
+            'stale_results': 0,
+            'last_opened': None,
+            'last_closed': None
+        }
+
+    def configure(self, failure_threshold: int, recovery_timeout: float, half_open_max_calls: int,
+                  max_in_flight: int):
+        """Applique de nouveaux réglages sans changer l'état du circuit"""
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.recovery_timeout = float(recovery_timeout)
+        self.half_open_max_calls = max(1, int(half_open_max_calls))
+        self.max_in_flight = max(1, int(max_in_flight))
+
+    @property
+    def state(self) -> str:
+        """État courant (ouvert devient semi-ouvert une fois le délai de récupération écoulé)"""
+        if self._state == CIRCUIT_OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = CIRCUIT_HALF_OPEN
+            self._trial_calls = 0
+            self._generation += 1
+            logger.info(f"Disjoncteur {self.name.upper()} semi-ouvert : requêtes d'essai autorisées")
+        return self._state
+
+    def allow(self) -> Optional[Tuple[str, int]]:
+        """
+        Autorise ou refuse une requête ; en semi-ouvert, réserve une place d'essai
+
+        Returns:
+            Ticket (état, génération) d'admission si la requête peut être exécutée
+            (record() doit alors être appelé avec ce ticket), None si elle est refusée
+        """
+        state = self.state
+        if state == CIRCUIT_CLOSED:
+            return state, self._generation
+        if state == CIRCUIT_HALF_OPEN and self._trial_calls < self.half_open_max_calls:
+            self._trial_calls += 1
+            return state, self._generation
+        self.stats['short_circuited'] += 1
+        return None
+
+    def record(self, ticket: Tuple[str, int], success: Optional[bool]):
+        """
+        Enregistre l'issue d'une requête autorisée par allow()
+
+        Args:
+            ticket: Ticket retourné par allow() à l'admission de la requête
+            success: True (succès), False (échec), None (requête annulée : sans effet sur l'état)
+        """
+        admitted_state, generation = ticket
+        if generation != self._generation:
+            # Le circuit a changé d'état depuis l'admission : le résultat ne le concerne plus
+            self.stats['stale_results'] += 1
+            return
+
+        if admitted_state == CIRCUIT_HALF_OPEN:
+            self._trial_calls = max(0, self._trial_calls - 1)
+
+        if success is None:
+            return
+        if success:
+            self._consecutive_failures = 0
+            if self._state == CIRCUIT_HALF_OPEN:
+                self._close()
+            return
+
+        self._consecutive_failures += 1
+        if self._state == CIRCUIT_HALF_OPEN or (
+            self._state == CIRCUIT_CLOSED and self._consecutive_failures >= self.failure_threshold
+        ):
+            self._open()
+
+    def retry_after(self) -> int:
+        """Secondes restantes avant les requêtes d'essai (au moins 1)"""
+        if self._state != CIRCUIT_OPEN:
+            return 1
+        remaining = self.recovery_timeout - (time.monotonic() - self._opened_at)
+        return max(1, math.ceil(remaining))
+
+    def _open(self):
+        self._state = CIRCUIT_OPEN
+        self._opened_at = time.monotonic()
+        self._trial_calls = 0
+        self._generation += 1
+        self.stats['opened'] += 1
+        self.stats['last_opened'] = datetime.now().isoformat()
+        logger.warning(
+            f"Disjoncteur {self.name.upper()} ouvert après {self._consecutive_failures} échecs consécutifs "
+            f"(essai dans {self.recovery_timeout}s)"
+        )
+
+    def _close(self):
+        self._state = CIRCUIT_CLOSED
+        self._consecutive_failures = 0
+        self._generation += 1
+        self.stats['last_closed'] = datetime.now().isoformat()
+        logger.info(f"Disjoncteur {self.name.upper()} refermé")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne l'état du disjoncteur
+
+        Returns:
+            État, échecs consécutifs, compteurs et réglages
+        """
+        state = self.state
+        return {
+            **self.stats,
+            'state': state,
+            'consecutive_failures': self._consecutive_failures,
+            'retry_after_seconds': self.retry_after() if state == CIRCUIT_OPEN else 0,
+            'failure_threshold': self.failure_threshold,
+            'recovery_timeout_seconds': self.recovery_timeout,
+            'half_open_max_calls': self.half_open_max_calls,
+            'max_in_flight': self.max_in_flight
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def _apply_config(breaker: CircuitBreaker, config: Mapping[str, Any]):
+    breaker.configure(
+        config["failure_threshold"], config["recovery_timeout"],
+        config["half_open_max_calls"], config["max_in_flight"]
+    )
+
+
+def get_circuit_breaker(protocol: str) -> CircuitBreaker:
+    """
+    Disjoncteur d'un protocole, réglé depuis l'instantané de configuration courant
+
+    Les réglages sont réappliqués quand la configuration des protocoles est rechargée.
+
+    Args:
+        protocol: Nom du protocole
+
+    Returns:
+        Disjoncteur du protocole
+    """
+    version = get_protocol_config_snapshot().version
+    breaker = _breakers.get(protocol)
+    if breaker is None:
+        breaker = _breakers.setdefault(protocol, CircuitBreaker(protocol))
+    if breaker.config_version != version:
+        _apply_config(breaker, get_protocol_circuit_breaker_config(protocol))
+        breaker.config_version = version
+    return breaker
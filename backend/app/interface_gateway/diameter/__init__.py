@@ -0,0 +1,3 @@
+"""
+Package Diameter : codec binaire (RFC 6733) et serveur S13 ME-Identity-Check (3GPP TS 29.272)
+"""
@@ -0,0 +1,311 @@
+"""
+Codec des messages Diameter (RFC 6733)
+En-tête de 20 octets et AVP (code, flags, longueur, Vendor-Id optionnel, données
+alignées sur 4 octets). Les messages décodés sont des dictionnaires ; les AVP
+gardent leurs données brutes et sont interprétées à la demande.
+"""
+import asyncio
+import ipaddress
+import struct
+from typing import Any, Dict, Iterable, List, Optional
+
+# Version du protocole
+DIAMETER_VERSION = 1
+
+# Drapeaux de l'en-tête
+FLAG_REQUEST = 0x80
+FLAG_PROXIABLE = 0x40
+FLAG_ERROR = 0x20
+FLAG_RETRANSMIT = 0x10
+
+# Drapeaux des AVP
+AVP_FLAG_VENDOR = 0x80
+AVP_FLAG_MANDATORY = 0x40
+
+# Codes de commande
+CMD_CAPABILITIES_EXCHANGE = 257
+CMD_DEVICE_WATCHDOG = 280
+CMD_DISCONNECT_PEER = 282
+CMD_ME_IDENTITY_CHECK = 324
+
+# Applications
+APP_DIAMETER_COMMON = 0
+APP_S13 = 16777252
+VENDOR_3GPP = 10415
+
+# Codes AVP de base (RFC 6733)
+AVP_USER_NAME = 1
+AVP_HOST_IP_ADDRESS = 257
+AVP_AUTH_APPLICATION_ID = 258
+AVP_VENDOR_SPECIFIC_APPLICATION_ID = 260
+AVP_SESSION_ID = 263
+AVP_ORIGIN_HOST = 264
+AVP_SUPPORTED_VENDOR_ID = 265
+AVP_VENDOR_ID = 266
+AVP_RESULT_CODE = 268
+AVP_PRODUCT_NAME = 269
+AVP_DISCONNECT_CAUSE = 273
+AVP_AUTH_SESSION_STATE = 277
+AVP_ORIGIN_STATE_ID = 278
+AVP_ERROR_MESSAGE = 281
+AVP_DESTINATION_REALM = 283
+AVP_DESTINATION_HOST = 293
+AVP_ORIGIN_REALM = 296
+
+# Codes AVP 3GPP (TS 29.272, Vendor-Id 10415)
+AVP_TERMINAL_INFORMATION = 1401
+AVP_IMEI = 1402
+AVP_SOFTWARE_VERSION = 1403
+AVP_EQUIPMENT_STATUS = 1445
+
+# Codes résultat
+DIAMETER_SUCCESS = 2001
+DIAMETER_COMMAND_UNSUPPORTED = 3001
+DIAMETER_INVALID_HDR_BITS = 3008
+DIAMETER_UNKNOWN_PEER = 3010
+DIAMETER_INVALID_AVP_VALUE = 5004
+DIAMETER_MISSING_AVP = 5005
+DIAMETER_INVALID_AVP_LENGTH = 5014
+DIAMETER_UNABLE_TO_COMPLY = 5012
+DIAMETER_NO_COMMON_APPLICATION = 5010
+
+# Auth-Session-State
+NO_STATE_MAINTAINED = 1
+
+HEADER_LENGTH = 20
+# Taille maximale acceptée d'un message (protège contre une longueur corrompue)
+MAX_MESSAGE_LENGTH = 64 * 1024
+
+_HEADER = struct.Struct("!IIIII")
+_AVP_HEADER = struct.Struct("!IBBH")
+_UINT32 = struct.Struct("!I")
+
+
+class DiameterDecodeError(ValueError):
+    """Message ou AVP Diameter mal formé, avec le code résultat de la réponse d'erreur"""
+
+    def __init__(self, message: str, result_code: int = DIAMETER_INVALID_AVP_VALUE):
+        super().__init__(message)
+        self.result_code = result_code
+
+
+def _padding(length: int) -> int:
+    return (4 - length % 4) % 4
+
+
+def encode_avp(code: int, value: Any, vendor_id: int = 0, mandatory: bool = True) -> bytes:
+    """
+    Encode une AVP
+
+    Args:
+        code: Code de l'AVP
+        value: int (Unsigned32), str (UTF8String), bytes (OctetString)
+               ou liste d'AVP encodées (Grouped)
+        vendor_id: Vendor-Id (0 = AVP de base, sans champ Vendor-Id)
+        mandatory: Positionne le drapeau M
+
+    Returns:
+        AVP encodée, padding inclus
+    """
+    if isinstance(value, bool):
+        raise TypeError("Valeur booléenne non supportée pour une AVP")
+    if isinstance(value, int):
+        data = _UINT32.pack(value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+    elif isinstance(value, (bytes, bytearray)):
+        data = bytes(value)
+    elif isinstance(value, (list, tuple)):
+        data = b"".join(value)
+    else:
+        raise TypeError(f"Type de valeur AVP non supporté: {type(value).__name__}")
+
+    flags = AVP_FLAG_MANDATORY if mandatory else 0
+    header_length = 8
+    if vendor_id:
+        flags |= AVP_FLAG_VENDOR
+        header_length = 12
+
+    length = header_length + len(data)
+    header = _AVP_HEADER.pack(code, flags, length >> 16, length & 0xFFFF)
+    if vendor_id:
+        header += _UINT32.pack(vendor_id)
+    return header + data + b"\x00" * _padding(length)
+
+
+def encode_address(ip: str) -> bytes:
+    """Données d'une AVP de type Address (famille IANA + adresse)"""
+    address = ipaddress.ip_address(ip)
+    family = 1 if address.version == 4 else 2
+    return struct.pack("!H", family) + address.packed
+
+
+def encode_message(command_code: int, application_id: int, avps: Iterable[bytes], flags: int = 0,
+                   hop_by_hop: int = 0, end_to_end: int = 0) -> bytes:
+    """
+    Encode un message Diameter
+
+    Args:
+        command_code: Code de commande
+        application_id: Application-Id de l'en-tête
+        avps: AVP encodées (encode_avp)
+        flags: Drapeaux de l'en-tête (FLAG_REQUEST, FLAG_PROXIABLE, FLAG_ERROR)
+        hop_by_hop: Identifiant Hop-by-Hop
+        end_to_end: Identifiant End-to-End
+
+    Returns:
+        Message encodé
+    """
+    body = b"".join(avps)
+    length = HEADER_LENGTH + len(body)
+    header = _HEADER.pack(
+        (DIAMETER_VERSION << 24) | length,
+        (flags << 24) | command_code,
+        application_id,
+        hop_by_hop,
+        end_to_end
+    )
+    return header + body
+
+
+def decode_header(data: bytes) -> Dict[str, int]:
+    """
+    Décode l'en-tête d'un message
+
+    Args:
+        data: Au moins les 20 premiers octets du message
+
+    Returns:
+        Dictionnaire version, length, flags, command_code, application_id, hop_by_hop, end_to_end
+
+    Raises:
+        DiameterDecodeError: Si l'en-tête est invalide
+    """
+    if len(data) < HEADER_LENGTH:
+        raise DiameterDecodeError("En-tête Diameter tronqué")
+
+    word1, word2, application_id, hop_by_hop, end_to_end = _HEADER.unpack_from(data)
+    header = {
+        "version": word1 >> 24,
+        "length": word1 & 0xFFFFFF,
+        "flags": word2 >> 24,
+        "command_code": word2 & 0xFFFFFF,
+        "application_id": application_id,
+        "hop_by_hop": hop_by_hop,
+        "end_to_end": end_to_end
+    }
+    if header["version"] != DIAMETER_VERSION:
+        raise DiameterDecodeError(f"Version Diameter non supportée: {header['version']}")
+    if header["length"] < HEADER_LENGTH or header["length"] % 4:
+        raise DiameterDecodeError(f"Longueur de message invalide: {header['length']}")
+    return header
+
+
+def decode_avps(data: bytes) -> List[Dict[str, Any]]:
+    """
+    Décode une suite d'AVP (corps d'un message ou d'une AVP Grouped)
+
+    Args:
+        data: Octets des AVP
+
+    Returns:
+        Liste de dictionnaires code, flags, vendor_id, data
+
+    Raises:
+        DiameterDecodeError: Si une AVP déborde des données
+    """
+    avps = []
+    offset = 0
+    end = len(data)
+
+    while offset < end:
+        if end - offset < 8:
+            raise DiameterDecodeError("En-tête d'AVP tronqué", DIAMETER_INVALID_AVP_LENGTH)
+        code, flags, length_high, length_low = _AVP_HEADER.unpack_from(data, offset)
+        length = (length_high << 16) | length_low
+        header_length = 12 if flags & AVP_FLAG_VENDOR else 8
+        if length < header_length or offset + length > end:
+            raise DiameterDecodeError(f"Longueur d'AVP invalide (code {code}): {length}", DIAMETER_INVALID_AVP_LENGTH)
+
+        vendor_id = _UINT32.unpack_from(data, offset + 8)[0] if flags & AVP_FLAG_VENDOR else 0
+        avps.append({
+            "code": code,
+            "flags": flags,
+            "vendor_id": vendor_id,
+            "data": data[offset + header_length:offset + length]
+        })
+        offset += length + _padding(length)
+
+    return avps
+
+
+def decode_message(data: bytes) -> Dict[str, Any]:
+    """
+    Décode un message complet
+
+    Args:
+        data: Message complet (en-tête compris)
+
+    Returns:
+        En-tête décodé avec la clé "avps"
+    """
+    message = decode_header(data)
+    if message["length"] != len(data):
+        raise DiameterDecodeError("Longueur du message différente de l'en-tête")
+    message["avps"] = decode_avps(data[HEADER_LENGTH:])
+    return message
+
+
+def find_avp(avps: List[Dict[str, Any]], code: int, vendor_id: int = 0) -> Optional[Dict[str, Any]]:
+    """Première AVP portant ce code (et ce Vendor-Id), ou None"""
+    for avp in avps:
+        if avp["code"] == code and avp["vendor_id"] == vendor_id:
+            return avp
+    return None
+
+
+def avp_str(avp: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Valeur UTF8String/DiameterIdentity d'une AVP"""
+    if avp is None:
+        return None
+    try:
+        return bytes(avp["data"]).decode("utf-8")
+    except UnicodeDecodeError:
+        raise DiameterDecodeError(f"AVP {avp['code']} : UTF-8 invalide")
+
+
+def avp_uint32(avp: Optional[Dict[str, Any]]) -> Optional[int]:
+    """Valeur Unsigned32/Enumerated d'une AVP"""
+    if avp is None:
+        return None
+    if len(avp["data"]) != 4:
+        raise DiameterDecodeError(f"AVP {avp['code']} : Unsigned32 attendu")
+    return _UINT32.unpack(avp["data"])[0]
+
+
+def avp_grouped(avp: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """AVP contenues dans une AVP Grouped"""
+    if avp is None:
+        return []
+    return decode_avps(avp["data"])
+
+
+async def read_message(reader: asyncio.StreamReader) -> bytes:
+    """
+    Lit un message complet sur un flux TCP
+
+    Args:
+        reader: Flux de lecture de la connexion
+
+    Returns:
+        Message complet (en-tête compris)
+
+    Raises:
+        asyncio.IncompleteReadError: Si la connexion est fermée
+        DiameterDecodeError: Si l'en-tête est invalide ou le message trop long
+    """
+    header = await reader.readexactly(HEADER_LENGTH)
+    length = decode_header(header)["length"]
+    if length > MAX_MESSAGE_LENGTH:
+        raise DiameterDecodeError(f"Message Diameter trop long: {length} octets")
+    return header + await reader.readexactly(length - HEADER_LENGTH)
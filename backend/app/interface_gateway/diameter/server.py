@@ -0,0 +1,375 @@
+"""
+Serveur Diameter S13 de l'EIR (ME-Identity-Check, 3GPP TS 29.272)
+Serveur TCP asyncio : Capabilities-Exchange, Device-Watchdog, Disconnect-Peer
+et ECR/ECA (commande 324) répondues depuis les statuts IMEI de l'EIR.
+Les ECR sont lues sur place (wire.EcrView) et les ECA écrites directement dans leur
+tampon d'envoi ; les autres commandes, rares, passent par le codec à dictionnaires.
+Les ECR d'une même connexion sont traitées en parallèle (jusqu'à
+max_inflight_per_peer) et les réponses renvoyées dans l'ordre où elles sont prêtes.
+Une requête mal formée reçoit une réponse d'erreur (bit E, RFC 6733 §7.2) reprenant
+les identifiants hop-by-hop et end-to-end de son en-tête.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from ...config_loader import load_protocol_config
+from ..handlers.diameter_handler import map_imei_status_to_diameter_code, map_status_to_equipment_status
+from ..imei_status import get_imei_status
+from .codec import (
+    APP_S13, VENDOR_3GPP, FLAG_REQUEST, FLAG_PROXIABLE, FLAG_ERROR,
+    CMD_CAPABILITIES_EXCHANGE, CMD_DEVICE_WATCHDOG, CMD_DISCONNECT_PEER, CMD_ME_IDENTITY_CHECK,
+    AVP_AUTH_APPLICATION_ID, AVP_HOST_IP_ADDRESS, AVP_ORIGIN_HOST, AVP_ORIGIN_REALM, AVP_ORIGIN_STATE_ID,
+    AVP_ERROR_MESSAGE, AVP_PRODUCT_NAME, AVP_RESULT_CODE, AVP_SESSION_ID, AVP_SUPPORTED_VENDOR_ID,
+    AVP_VENDOR_ID, AVP_VENDOR_SPECIFIC_APPLICATION_ID,
+    DIAMETER_SUCCESS, DIAMETER_COMMAND_UNSUPPORTED, DIAMETER_INVALID_HDR_BITS, DIAMETER_UNKNOWN_PEER,
+    DIAMETER_MISSING_AVP, DIAMETER_UNABLE_TO_COMPLY, DiameterDecodeError,
+    avp_str, decode_header, decode_message, encode_address, encode_avp, encode_message, find_avp, read_message
+)
+from .wire import EcrView, encode_eca
+
+logger = logging.getLogger("protocol.diameter")
+
+
+class DiameterS13Server:
+    """
+    Serveur Diameter S13 : une tâche de lecture par connexion pair, une tâche par ECR
+
+    Le nombre d'ECR en cours par pair est borné : au-delà, la lecture de la
+    connexion est suspendue (contre-pression TCP vers le MME/SGSN).
+    """
+
+    def __init__(self, config: Dict[str, Any], status_lookup: Callable[[str], Awaitable[str]] = None):
+        """
+        Initialise le serveur
+
+        Args:
+            config: Section endpoints.diameter de protocols.yml, avec "timeout" (timeouts.diameter)
+            status_lookup: Coroutine IMEI -> statut d'équipement (par défaut la base EIR)
+        """
+        self.host = config.get("host", "0.0.0.0")
+        self.port = int(config.get("port", 3868))
+        self.realm = config.get("realm", "eir.local.realm")
+        self.origin_host = config.get("origin_host") or f"eir.{self.realm}"
+        self.product_name = config.get("product_name", "EIR Project")
+        self.max_inflight_per_peer = int(config.get("max_inflight_per_peer", 1024))
+        # SO_REUSEPORT : chaque worker uvicorn ouvre le même port, le noyau répartit les connexions
+        self.reuse_port = bool(config.get("reuse_port", True)) and hasattr(socket, "SO_REUSEPORT")
+        # Délai maximum de recherche du statut : au-delà, l'ECA porte 5012
+        self.answer_timeout = float(config.get("timeout", 60))
+        self.status_lookup = status_lookup or get_imei_status
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: Dict[int, Dict[str, Any]] = {}
+        self._origin_state_id = int(time.time())
+        self.is_running = False
+
+        self.stats = {
+            'connections': 0,
+            'requests': 0,
+            'answers': 0,
+            'in_flight': 0,
+            'decode_errors': 0,
+            'timeouts': 0,
+            'commands': {},
+            'result_codes': {}
+        }
+
+    async def start(self):
+        """Ouvre le port d'écoute Diameter"""
+        if self.is_running:
+            return
+
+        self._server = await asyncio.start_server(
+            self._handle_peer, self.host, self.port, reuse_address=True,
+            reuse_port=self.reuse_port or None
+        )
+        # Port effectif (utile avec port: 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.is_running = True
+        logger.info(f"Serveur Diameter S13 en écoute sur {self.host}:{self.port} ({self.origin_host})")
+
+    async def stop(self):
+        """Ferme le port d'écoute et les connexions, après les réponses en cours"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        self._server.close()
+        for peer in list(self._peers.values()):
+            if peer["tasks"]:
+                await asyncio.gather(*peer["tasks"], return_exceptions=True)
+            peer["writer"].close()
+        await self._server.wait_closed()
+        logger.info(f"Serveur Diameter S13 arrêté - {self.stats['answers']} réponses envoyées")
+
+    async def _handle_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Lit les messages d'une connexion pair et les répartit par commande"""
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        peer = {
+            "address": writer.get_extra_info("peername"),
+            "origin_host": None,
+            "writer": writer,
+            "tasks": set(),
+            "slots": asyncio.Semaphore(self.max_inflight_per_peer)
+        }
+        self._peers[id(peer)] = peer
+        self.stats['connections'] += 1
+        logger.info(f"Connexion Diameter entrante: {peer['address']}")
+
+        try:
+            while True:
+                try:
+                    raw = await read_message(reader)
+                except asyncio.IncompleteReadError:
+                    break
+
+                if not raw[4] & FLAG_REQUEST:
+                    # Réponses aux requêtes du serveur (aucune n'est émise pour l'instant)
+                    continue
+
+                # En-tête déjà vérifié par read_message : commande sur les octets 5 à 7
+                command = int.from_bytes(raw[5:8], "big")
+                try:
+                    if raw[4] & FLAG_ERROR:
+                        # Le bit E est interdit dans une requête
+                        raise DiameterDecodeError("Bit E positionné dans une requête", DIAMETER_INVALID_HDR_BITS)
+                    if command == CMD_ME_IDENTITY_CHECK:
+                        message = EcrView(raw).validate()
+                    else:
+                        message = decode_message(raw)
+                except DiameterDecodeError as e:
+                    # Le message a été lu en entier : le découpage du flux reste valide
+                    self.stats['decode_errors'] += 1
+                    logger.warning(f"Message Diameter invalide de {peer['address']}: {e}")
+                    self._send(peer, self._answer_error(raw, e))
+                    await writer.drain()
+                    continue
+
+                self.stats['requests'] += 1
+                self.stats['commands'][command] = self.stats['commands'].get(command, 0) + 1
+
+                if command == CMD_ME_IDENTITY_CHECK:
+                    await peer["slots"].acquire()
+                    self.stats['in_flight'] += 1
+                    task = asyncio.create_task(self._process_ecr(peer, message))
+                    peer["tasks"].add(task)
+                    task.add_done_callback(lambda done, peer=peer: self._ecr_done(peer, done))
+                elif command == CMD_CAPABILITIES_EXCHANGE:
+                    try:
+                        answer = self._answer_cer(peer, message)
+                    except DiameterDecodeError as e:
+                        self.stats['decode_errors'] += 1
+                        logger.warning(f"CER invalide de {peer['address']}: {e}")
+                        answer = self._answer_error(raw, e)
+                    self._send(peer, answer)
+                elif command == CMD_DEVICE_WATCHDOG:
+                    self._send(peer, self._answer(message, DIAMETER_SUCCESS, [
+                        encode_avp(AVP_ORIGIN_STATE_ID, self._origin_state_id)
+                    ]))
+                elif command == CMD_DISCONNECT_PEER:
+                    self._send(peer, self._answer(message, DIAMETER_SUCCESS))
+                    break
+                else:
+                    self._send(peer, self._answer(message, DIAMETER_COMMAND_UNSUPPORTED, flags=FLAG_ERROR))
+
+                await writer.drain()
+
+        except DiameterDecodeError as e:
+            # En-tête invalide : le découpage du flux est perdu, la connexion est fermée
+            self.stats['decode_errors'] += 1
+            logger.warning(f"Flux Diameter invalide de {peer['address']}, fermeture: {e}")
+        except ConnectionError:
+            pass
+        finally:
+            if peer["tasks"]:
+                await asyncio.gather(*peer["tasks"], return_exceptions=True)
+            self._peers.pop(id(peer), None)
+            writer.close()
+            logger.info(f"Connexion Diameter fermée: {peer['address']} ({peer['origin_host']})")
+
+    def _ecr_done(self, peer: Dict[str, Any], task: asyncio.Task):
+        peer["tasks"].discard(task)
+        peer["slots"].release()
+        self.stats['in_flight'] -= 1
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Erreur lors du traitement d'une ECR: {task.exception()}")
+
+    def _send(self, peer: Dict[str, Any], answer: Union[bytes, bytearray]):
+        """
+        Écrit une réponse complète (un seul write : pas d'entrelacement entre réponses)
+
+        Le tampon peut rester référencé par le transport : il n'est jamais réutilisé.
+        """
+        peer["writer"].write(answer)
+        self.stats['answers'] += 1
+
+    def _count_result(self, result_code: int):
+        self.stats['result_codes'][result_code] = self.stats['result_codes'].get(result_code, 0) + 1
+
+    def _answer(self, request: Dict[str, Any], result_code: int, avps: List[bytes] = None,
+                flags: int = 0, session_id: str = None) -> bytes:
+        """Construit une réponse reprenant la commande et les identifiants de la requête"""
+        self._count_result(result_code)
+
+        head = [encode_avp(AVP_SESSION_ID, session_id)] if session_id else []
+        head += [
+            encode_avp(AVP_RESULT_CODE, result_code),
+            encode_avp(AVP_ORIGIN_HOST, self.origin_host),
+            encode_avp(AVP_ORIGIN_REALM, self.realm)
+        ]
+        return encode_message(
+            request["command_code"],
+            request["application_id"],
+            head + (avps or []),
+            flags=(request["flags"] & FLAG_PROXIABLE) | flags,
+            hop_by_hop=request["hop_by_hop"],
+            end_to_end=request["end_to_end"]
+        )
+
+    def _answer_error(self, raw: bytes, error: DiameterDecodeError) -> bytes:
+        """
+        Réponse d'erreur (bit E) à une requête mal formée : Result-Code de l'erreur,
+        Error-Message, identifiants repris de l'en-tête lu
+        """
+        return self._answer(decode_header(raw), error.result_code, [
+            encode_avp(AVP_ERROR_MESSAGE, str(error), mandatory=False)
+        ], flags=FLAG_ERROR)
+
+    def _answer_cer(self, peer: Dict[str, Any], request: Dict[str, Any]) -> bytes:
+        """Capabilities-Exchange-Answer : annonce l'application S13"""
+        origin_host = avp_str(find_avp(request["avps"], AVP_ORIGIN_HOST))
+        if not origin_host:
+            raise DiameterDecodeError("AVP Origin-Host absente", DIAMETER_MISSING_AVP)
+        peer["origin_host"] = origin_host
+        logger.info(f"Capabilities-Exchange avec {peer['origin_host']} ({peer['address']})")
+
+        local_ip = peer["writer"].get_extra_info("sockname")[0]
+        return self._answer(request, DIAMETER_SUCCESS, [
+            encode_avp(AVP_HOST_IP_ADDRESS, encode_address(local_ip)),
+            encode_avp(AVP_VENDOR_ID, 0),
+            encode_avp(AVP_PRODUCT_NAME, self.product_name, mandatory=False),
+            encode_avp(AVP_ORIGIN_STATE_ID, self._origin_state_id),
+            encode_avp(AVP_SUPPORTED_VENDOR_ID, VENDOR_3GPP),
+            encode_avp(AVP_AUTH_APPLICATION_ID, APP_S13),
+            encode_avp(AVP_VENDOR_SPECIFIC_APPLICATION_ID, [
+                encode_avp(AVP_VENDOR_ID, VENDOR_3GPP),
+                encode_avp(AVP_AUTH_APPLICATION_ID, APP_S13)
+            ])
+        ])
+
+    def _answer_eca(self, request: EcrView, result_code: int, equipment_status: Optional[int] = None,
+                    error_message: Optional[str] = None, flags: int = 0) -> bytearray:
+        """ECA écrite dans un nouveau tampon, Session-Id recopié de la requête"""
+        self._count_result(result_code)
+        return encode_eca(request, self.origin_host, self.realm, result_code,
+                          equipment_status, error_message, flags)
+
+    async def _process_ecr(self, peer: Dict[str, Any], request: EcrView):
+        """ME-Identity-Check : statut de l'IMEI du Terminal-Information"""
+        try:
+            answer = await self._answer_ecr(peer, request)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            logger.warning(f"ECR : délai de réponse dépassé ({self.answer_timeout}s)")
+            answer = self._answer_eca(request, DIAMETER_UNABLE_TO_COMPLY,
+                                      error_message=f"Délai de réponse dépassé ({self.answer_timeout}s)",
+                                      flags=FLAG_ERROR)
+        except DiameterDecodeError as e:
+            self.stats['decode_errors'] += 1
+            logger.warning(f"ECR invalide: {e}")
+            answer = self._answer_eca(request, e.result_code, error_message=str(e), flags=FLAG_ERROR)
+        except Exception as e:
+            logger.error(f"Erreur lors du traitement Diameter ECR: {e}")
+            answer = self._answer_eca(request, DIAMETER_UNABLE_TO_COMPLY, error_message=str(e), flags=FLAG_ERROR)
+
+        if not peer["writer"].is_closing():
+            self._send(peer, answer)
+            await peer["writer"].drain()
+
+    async def _answer_ecr(self, peer: Dict[str, Any], request: EcrView) -> bytearray:
+        if peer["origin_host"] is None:
+            return self._answer_eca(request, DIAMETER_UNKNOWN_PEER, flags=FLAG_ERROR)
+
+        imei = request.imei
+        if not request.session_id_bytes or not imei:
+            return self._answer_eca(request, DIAMETER_MISSING_AVP, flags=FLAG_ERROR)
+
+        imei_status = await asyncio.wait_for(self.status_lookup(imei), self.answer_timeout)
+        result_code = map_imei_status_to_diameter_code(imei_status)
+        equipment_status = None
+        if result_code == DIAMETER_SUCCESS:
+            equipment_status = map_status_to_equipment_status(imei_status)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"ECA {request.session_id} - IMEI {imei}: {imei_status}")
+        return self._answer_eca(request, result_code, equipment_status)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne les statistiques du serveur
+
+        Returns:
+            Compteurs de connexions, requêtes et codes résultat
+        """
+        return {
+            **self.stats,
+            'is_running': self.is_running,
+            'host': self.host,
+            'port': self.port,
+            'reuse_port': self.reuse_port,
+            'origin_host': self.origin_host,
+            'answer_timeout_seconds': self.answer_timeout,
+            'active_peers': len(self._peers),
+            'peers': [peer["origin_host"] or str(peer["address"]) for peer in self._peers.values()]
+        }
+
+
+def _diameter_config() -> Dict[str, Any]:
+    """Section endpoints.diameter de protocols.yml, complétée du délai timeouts.diameter"""
+    config = load_protocol_config()
+    return {
+        **(config.get("endpoints", {}).get("diameter", {}) or {}),
+        "timeout": config.get("timeouts", {}).get("diameter", 60)
+    }
+
+
+# Instance globale pour utilisation dans l'application
+diameter_server = DiameterS13Server(_diameter_config())
+
+async def start_diameter_server():
+    """
+    Démarre le serveur Diameter S13
+    À appeler au démarrage de l'application FastAPI (DIAMETER_SERVER_ENABLED=true)
+    """
+    await diameter_server.start()
+
+async def stop_diameter_server():
+    """
+    Arrête le serveur Diameter S13
+    À appeler à l'arrêt de l'application FastAPI
+    """
+    await diameter_server.stop()
+
+
+if __name__ == "__main__":
+    # Serveur autonome : python -m app.interface_gateway.diameter.server
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+
+    async def _main():
+        await start_diameter_server()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await stop_diameter_server()
+
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,498 @@
+"""
+Accès sans copie aux messages Diameter S13 (ECR/ECA)
+MessageView lit un message reçu (bytes, bytearray, memoryview) sur place : l'en-tête
+est lu champ par champ, l'index des AVP (positions seulement) est construit au premier
+accès et les valeurs ne sont décodées qu'à leur lecture. Les encodeurs écrivent les AVP
+directement dans un bytearray, en reprenant au besoin les octets de la requête
+(Session-Id) sans passer par une chaîne intermédiaire.
+Format identique à codec.py : les deux implémentations sont interchangeables.
+"""
+import struct
+from functools import lru_cache
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+from .codec import (
+    APP_S13, AVP_AUTH_APPLICATION_ID, AVP_AUTH_SESSION_STATE, AVP_DESTINATION_REALM,
+    AVP_EQUIPMENT_STATUS, AVP_ERROR_MESSAGE, AVP_FLAG_MANDATORY, AVP_FLAG_VENDOR, AVP_IMEI,
+    AVP_ORIGIN_HOST, AVP_ORIGIN_REALM, AVP_RESULT_CODE, AVP_SESSION_ID, AVP_SOFTWARE_VERSION,
+    AVP_TERMINAL_INFORMATION, AVP_VENDOR_ID, AVP_VENDOR_SPECIFIC_APPLICATION_ID,
+    CMD_ME_IDENTITY_CHECK, DIAMETER_INVALID_AVP_LENGTH, DIAMETER_VERSION, FLAG_PROXIABLE, FLAG_REQUEST,
+    HEADER_LENGTH, NO_STATE_MAINTAINED, VENDOR_3GPP, DiameterDecodeError
+)
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+_HEADER = struct.Struct("!IIIII")
+_AVP_HEADER = struct.Struct("!IBBH")
+_VENDOR_AVP_HEADER = struct.Struct("!IBBHI")
+_UINT32 = struct.Struct("!I")
+# Code de l'AVP puis mot flags (8 bits) + longueur (24 bits)
+_AVP_CODE_WORD = struct.Struct("!II")
+VENDOR_WORD_FLAG = AVP_FLAG_VENDOR << 24
+_UINT32_AVP = struct.Struct("!IBBHI")
+_VENDOR_UINT32_AVP = struct.Struct("!IBBHII")
+
+# Octets de padding (alignement sur 4 octets), indexés par leur nombre
+_PADDING = (b"", b"\x00", b"\x00\x00", b"\x00\x00\x00")
+
+
+def _padding(length: int) -> int:
+    return (4 - length % 4) % 4
+
+
+class AvpView:
+    """AVP d'un tampon : positions de ses données, valeur lue à la demande"""
+
+    __slots__ = ("_data", "code", "flags", "vendor_id", "start", "end")
+
+    def __init__(self, data: memoryview, code: int, flags: int, vendor_id: int, start: int, end: int):
+        self._data = data
+        self.code = code
+        self.flags = flags
+        self.vendor_id = vendor_id
+        self.start = start
+        self.end = end
+
+    @property
+    def data(self) -> memoryview:
+        """Données de l'AVP, sans copie"""
+        return self._data[self.start:self.end]
+
+    def as_uint32(self) -> int:
+        """Valeur Unsigned32/Enumerated"""
+        if self.end - self.start != 4:
+            raise DiameterDecodeError(f"AVP {self.code} : Unsigned32 attendu")
+        return _UINT32.unpack_from(self._data, self.start)[0]
+
+    def as_str(self) -> str:
+        """Valeur UTF8String/DiameterIdentity"""
+        try:
+            return str(self._data[self.start:self.end], "utf-8")
+        except UnicodeDecodeError:
+            raise DiameterDecodeError(f"AVP {self.code} : UTF-8 invalide")
+
+    def grouped(self) -> "AvpIndex":
+        """AVP contenues dans une AVP Grouped"""
+        return AvpIndex(self._data, self.start, self.end)
+
+
+class AvpIndex:
+    """
+    Suite d'AVP d'un tampon (corps d'un message ou d'une AVP Grouped)
+
+    Le parcours, qui vérifie le découpage des AVP, n'a lieu qu'au premier accès et ne
+    relève que les positions de la première occurrence de chaque (code, Vendor-Id).
+    """
+
+    __slots__ = ("_data", "_start", "_end", "_positions")
+
+    def __init__(self, data: memoryview, start: int, end: int):
+        self._data = data
+        self._start = start
+        self._end = end
+        self._positions: Optional[Dict[Tuple[int, int], Tuple[int, int, int]]] = None
+
+    def __iter__(self) -> Iterator[AvpView]:
+        """Toutes les AVP, dans l'ordre du message"""
+        data = self._data
+        for code, flags, vendor_id, start, end in self._walk():
+            yield AvpView(data, code, flags, vendor_id, start, end)
+
+    def _walk(self) -> Iterator[Tuple[int, int, int, int, int]]:
+        data, offset, end = self._data, self._start, self._end
+        while offset < end:
+            if end - offset < 8:
+                raise DiameterDecodeError("En-tête d'AVP tronqué", DIAMETER_INVALID_AVP_LENGTH)
+            code, flags, length_high, length_low = _AVP_HEADER.unpack_from(data, offset)
+            length = (length_high << 16) | length_low
+            if flags & AVP_FLAG_VENDOR:
+                if length < 12 or offset + length > end:
+                    raise DiameterDecodeError(f"Longueur d'AVP invalide (code {code}): {length}",
+                                              DIAMETER_INVALID_AVP_LENGTH)
+                vendor_id = _UINT32.unpack_from(data, offset + 8)[0]
+                yield code, flags, vendor_id, offset + 12, offset + length
+            else:
+                if length < 8 or offset + length > end:
+                    raise DiameterDecodeError(f"Longueur d'AVP invalide (code {code}): {length}",
+                                              DIAMETER_INVALID_AVP_LENGTH)
+                yield code, flags, 0, offset + 8, offset + length
+            offset += length + _padding(length)
+
+    def _index(self) -> Dict[Tuple[int, int], Tuple[int, int, int]]:
+        positions = self._positions
+        if positions is not None:
+            return positions
+        # Même parcours que _walk(), déroulé : chemin de chaque ECR reçue
+        positions = {}
+        data, offset, end = self._data, self._start, self._end
+        unpack_header = _AVP_CODE_WORD.unpack_from
+        unpack_uint32 = _UINT32.unpack_from
+        while offset < end:
+            if end - offset < 8:
+                raise DiameterDecodeError("En-tête d'AVP tronqué", DIAMETER_INVALID_AVP_LENGTH)
+            code, word = unpack_header(data, offset)
+            length = word & 0xFFFFFF
+            if word & VENDOR_WORD_FLAG:
+                if length < 12 or offset + length > end:
+                    raise DiameterDecodeError(f"Longueur d'AVP invalide (code {code}): {length}",
+                                              DIAMETER_INVALID_AVP_LENGTH)
+                key = (code, unpack_uint32(data, offset + 8)[0])
+                start = offset + 12
+            else:
+                if length < 8 or offset + length > end:
+                    raise DiameterDecodeError(f"Longueur d'AVP invalide (code {code}): {length}",
+                                              DIAMETER_INVALID_AVP_LENGTH)
+                key = (code, 0)
+                start = offset + 8
+            if key not in positions:
+                positions[key] = (word >> 24, start, offset + length)
+            offset += (length + 3) & ~3
+        self._positions = positions
+        return positions
+
+    def validate(self):
+        """Vérifie le découpage des AVP (construit l'index)"""
+        self._index()
+
+    def find(self, code: int, vendor_id: int = 0) -> Optional[AvpView]:
+        """Première AVP portant ce code (et ce Vendor-Id), ou None"""
+        position = self._index().get((code, vendor_id))
+        if position is None:
+            return None
+        return AvpView(self._data, code, position[0], vendor_id, position[1], position[2])
+
+    def uint32(self, code: int, vendor_id: int = 0) -> Optional[int]:
+        """Valeur Unsigned32 de la première AVP portant ce code, ou None"""
+        position = self._index().get((code, vendor_id))
+        if position is None:
+            return None
+        if position[2] - position[1] != 4:
+            raise DiameterDecodeError(f"AVP {code} : Unsigned32 attendu")
+        return _UINT32.unpack_from(self._data, position[1])[0]
+
+    def text(self, code: int, vendor_id: int = 0) -> Optional[str]:
+        """Valeur UTF8String de la première AVP portant ce code, ou None"""
+        position = self._index().get((code, vendor_id))
+        if position is None:
+            return None
+        try:
+            return str(self._data[position[1]:position[2]], "utf-8")
+        except UnicodeDecodeError:
+            raise DiameterDecodeError(f"AVP {code} : UTF-8 invalide")
+
+    def raw(self, code: int, vendor_id: int = 0) -> Optional[memoryview]:
+        """Données de la première AVP portant ce code, sans copie, ou None"""
+        position = self._index().get((code, vendor_id))
+        return self._data[position[1]:position[2]] if position is not None else None
+
+
+class MessageView:
+    """
+    Message Diameter lu sur place
+
+    Seuls la version et la longueur sont vérifiées à la construction ; validate()
+    vérifie en plus le découpage des AVP.
+    """
+
+    def __init__(self, data: Buffer):
+        """
+        Args:
+            data: Message complet (en-tête compris)
+
+        Raises:
+            DiameterDecodeError: Si l'en-tête est invalide ou la longueur incohérente
+        """
+        self._data = memoryview(data)
+        if len(self._data) < HEADER_LENGTH:
+            raise DiameterDecodeError("En-tête Diameter tronqué")
+        word1 = _UINT32.unpack_from(self._data, 0)[0]
+        if word1 >> 24 != DIAMETER_VERSION:
+            raise DiameterDecodeError(f"Version Diameter non supportée: {word1 >> 24}")
+        if (word1 & 0xFFFFFF) != len(self._data):
+            raise DiameterDecodeError("Longueur du message différente de l'en-tête")
+        self.avps = AvpIndex(self._data, HEADER_LENGTH, len(self._data))
+
+    @property
+    def length(self) -> int:
+        return len(self._data)
+
+    @property
+    def header(self) -> memoryview:
+        """En-tête de 20 octets, sans copie"""
+        return self._data[:HEADER_LENGTH]
+
+    @property
+    def flags(self) -> int:
+        return self._data[4]
+
+    @property
+    def is_request(self) -> bool:
+        return bool(self._data[4] & FLAG_REQUEST)
+
+    @property
+    def command_code(self) -> int:
+        return _UINT32.unpack_from(self._data, 4)[0] & 0xFFFFFF
+
+    @property
+    def application_id(self) -> int:
+        return _UINT32.unpack_from(self._data, 8)[0]
+
+    @property
+    def hop_by_hop(self) -> int:
+        return _UINT32.unpack_from(self._data, 12)[0]
+
+    @property
+    def end_to_end(self) -> int:
+        return _UINT32.unpack_from(self._data, 16)[0]
+
+    def validate(self) -> "MessageView":
+        """Vérifie le découpage des AVP du message"""
+        self.avps.validate()
+        return self
+
+    @property
+    def session_id(self) -> Optional[str]:
+        return self.avps.text(AVP_SESSION_ID)
+
+    @property
+    def session_id_bytes(self) -> Optional[memoryview]:
+        """Session-Id brut (à recopier dans la réponse sans décodage)"""
+        return self.avps.raw(AVP_SESSION_ID)
+
+    @property
+    def origin_host(self) -> Optional[str]:
+        return self.avps.text(AVP_ORIGIN_HOST)
+
+
+class EcrView(MessageView):
+    """ME-Identity-Check-Request : IMEI et version logicielle du Terminal-Information"""
+
+    _terminal: Optional[AvpIndex] = None
+
+    def _terminal_information(self) -> Optional[AvpIndex]:
+        """AVP du Terminal-Information (index mémorisé après la première lecture)"""
+        if self._terminal is None:
+            avp = self.avps.find(AVP_TERMINAL_INFORMATION, VENDOR_3GPP)
+            if avp is None:
+                return None
+            self._terminal = avp.grouped()
+        return self._terminal
+
+    @property
+    def imei(self) -> Optional[str]:
+        terminal = self._terminal_information()
+        return terminal.text(AVP_IMEI, VENDOR_3GPP) if terminal is not None else None
+
+    @property
+    def software_version(self) -> Optional[str]:
+        terminal = self._terminal_information()
+        return terminal.text(AVP_SOFTWARE_VERSION, VENDOR_3GPP) if terminal is not None else None
+
+    @property
+    def auth_session_state(self) -> Optional[int]:
+        return self.avps.uint32(AVP_AUTH_SESSION_STATE)
+
+
+class EcaView(MessageView):
+    """ME-Identity-Check-Answer : Result-Code et Equipment-Status"""
+
+    @property
+    def result_code(self) -> Optional[int]:
+        return self.avps.uint32(AVP_RESULT_CODE)
+
+    @property
+    def equipment_status(self) -> Optional[int]:
+        return self.avps.uint32(AVP_EQUIPMENT_STATUS, VENDOR_3GPP)
+
+    @property
+    def error_message(self) -> Optional[str]:
+        return self.avps.text(AVP_ERROR_MESSAGE)
+
+
+# --- Encodage ---------------------------------------------------------------
+
+def put_avp(buffer: bytearray, code: int, data: Union[Buffer, str], vendor_id: int = 0, mandatory: bool = True):
+    """
+    Écrit une AVP de données (OctetString, UTF8String) à la fin du tampon
+
+    Args:
+        buffer: Tampon de destination
+        code: Code de l'AVP
+        data: Octets (recopiés une seule fois, dans le tampon) ou chaîne UTF-8
+        vendor_id: Vendor-Id (0 = AVP de base)
+        mandatory: Positionne le drapeau M
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    flags = AVP_FLAG_MANDATORY if mandatory else 0
+    if vendor_id:
+        length = 12 + len(data)
+        buffer += _VENDOR_AVP_HEADER.pack(code, flags | AVP_FLAG_VENDOR, length >> 16, length & 0xFFFF, vendor_id)
+    else:
+        length = 8 + len(data)
+        buffer += _AVP_HEADER.pack(code, flags, length >> 16, length & 0xFFFF)
+    buffer += data
+    buffer += _PADDING[_padding(length)]
+
+
+def put_avp_uint32(buffer: bytearray, code: int, value: int, vendor_id: int = 0, mandatory: bool = True):
+    """Écrit une AVP Unsigned32/Enumerated à la fin du tampon"""
+    flags = AVP_FLAG_MANDATORY if mandatory else 0
+    if vendor_id:
+        buffer += _VENDOR_UINT32_AVP.pack(code, flags | AVP_FLAG_VENDOR, 0, 16, vendor_id, value)
+    else:
+        buffer += _UINT32_AVP.pack(code, flags, 0, 12, value)
+
+
+def begin_grouped(buffer: bytearray, code: int, vendor_id: int = 0, mandatory: bool = True) -> int:
+    """
+    Ouvre une AVP Grouped ; les AVP écrites ensuite en font partie jusqu'à end_grouped()
+
+    Returns:
+        Position de l'AVP dans le tampon
+    """
+    offset = len(buffer)
+    flags = AVP_FLAG_MANDATORY if mandatory else 0
+    if vendor_id:
+        buffer += _VENDOR_AVP_HEADER.pack(code, flags | AVP_FLAG_VENDOR, 0, 0, vendor_id)
+    else:
+        buffer += _AVP_HEADER.pack(code, flags, 0, 0)
+    return offset
+
+
+def end_grouped(buffer: bytearray, offset: int):
+    """Ferme l'AVP Grouped ouverte à offset (les AVP contenues sont déjà alignées)"""
+    length = len(buffer) - offset
+    struct.pack_into("!BH", buffer, offset + 5, length >> 16, length & 0xFFFF)
+
+
+def begin_message(buffer: bytearray, command_code: int, application_id: int, flags: int,
+                  hop_by_hop: int, end_to_end: int) -> int:
+    """
+    Écrit l'en-tête d'un message ; la longueur est fixée par end_message()
+
+    Returns:
+        Position du message dans le tampon
+    """
+    offset = len(buffer)
+    buffer += _HEADER.pack(DIAMETER_VERSION << 24, (flags << 24) | command_code, application_id,
+                           hop_by_hop, end_to_end)
+    return offset
+
+
+def end_message(buffer: bytearray, offset: int):
+    """Fixe la longueur du message commencé à offset"""
+    length = len(buffer) - offset
+    _UINT32.pack_into(buffer, offset, (DIAMETER_VERSION << 24) | length)
+
+
+@lru_cache(maxsize=16)
+def _answer_origin_avps(origin_host: str, origin_realm: str) -> bytes:
+    """Origin-Host, Origin-Realm et Vendor-Specific-Application-Id S13, identiques pour chaque ECA"""
+    buffer = bytearray()
+    put_avp(buffer, AVP_ORIGIN_HOST, origin_host)
+    put_avp(buffer, AVP_ORIGIN_REALM, origin_realm)
+    _put_s13_application(buffer)
+    return bytes(buffer)
+
+
+def _put_s13_application(buffer: bytearray):
+    group = begin_grouped(buffer, AVP_VENDOR_SPECIFIC_APPLICATION_ID)
+    put_avp_uint32(buffer, AVP_VENDOR_ID, VENDOR_3GPP)
+    put_avp_uint32(buffer, AVP_AUTH_APPLICATION_ID, APP_S13)
+    end_grouped(buffer, group)
+
+
+def write_ecr(buffer: bytearray, hop_by_hop: int, end_to_end: int, session_id: Union[Buffer, str],
+              origin_host: str, origin_realm: str, destination_realm: str, imei: str,
+              software_version: Optional[str] = None) -> bytearray:
+    """
+    Écrit une ME-Identity-Check-Request à la fin du tampon
+
+    Args:
+        buffer: Tampon de destination
+        hop_by_hop: Identifiant Hop-by-Hop
+        end_to_end: Identifiant End-to-End
+        session_id: Session-Id
+        origin_host: Origin-Host du MME/SGSN
+        origin_realm: Origin-Realm du MME/SGSN
+        destination_realm: Destination-Realm (EIR)
+        imei: IMEI (14 chiffres, sans chiffre de contrôle)
+        software_version: Software-Version (2 chiffres), omise si None
+
+    Returns:
+        Le tampon
+    """
+    message = begin_message(buffer, CMD_ME_IDENTITY_CHECK, APP_S13, FLAG_REQUEST | FLAG_PROXIABLE,
+                            hop_by_hop, end_to_end)
+    put_avp(buffer, AVP_SESSION_ID, session_id)
+    _put_s13_application(buffer)
+    put_avp_uint32(buffer, AVP_AUTH_SESSION_STATE, NO_STATE_MAINTAINED)
+    put_avp(buffer, AVP_ORIGIN_HOST, origin_host)
+    put_avp(buffer, AVP_ORIGIN_REALM, origin_realm)
+    put_avp(buffer, AVP_DESTINATION_REALM, destination_realm)
+    terminal = begin_grouped(buffer, AVP_TERMINAL_INFORMATION, vendor_id=VENDOR_3GPP)
+    put_avp(buffer, AVP_IMEI, imei, vendor_id=VENDOR_3GPP)
+    if software_version is not None:
+        put_avp(buffer, AVP_SOFTWARE_VERSION, software_version, vendor_id=VENDOR_3GPP)
+    end_grouped(buffer, terminal)
+    end_message(buffer, message)
+    return buffer
+
+
+def write_eca(buffer: bytearray, request: MessageView, origin_host: str, origin_realm: str,
+              result_code: int, equipment_status: Optional[int] = None,
+              error_message: Optional[str] = None, flags: int = 0) -> bytearray:
+    """
+    Écrit la ME-Identity-Check-Answer d'une requête à la fin du tampon
+
+    Commande, Application-Id, identifiants et Session-Id sont repris de la requête
+    (Session-Id recopié octet pour octet, sans décodage).
+
+    Args:
+        buffer: Tampon de destination
+        request: Requête à laquelle il est répondu (EcrView ou MessageView)
+        origin_host: Origin-Host de l'EIR
+        origin_realm: Origin-Realm de l'EIR
+        result_code: Result-Code
+        equipment_status: Equipment-Status (avec DIAMETER_SUCCESS), omis si None
+        error_message: Error-Message, omis si None
+        flags: Drapeaux ajoutés au bit P de la requête (FLAG_ERROR)
+
+    Returns:
+        Le tampon
+    """
+    # En-tête de la requête recopié (commande, Application-Id, identifiants), drapeaux remplacés
+    message = len(buffer)
+    header = request.header
+    buffer += header
+    buffer[message + 4] = (header[4] & FLAG_PROXIABLE) | flags
+    session_id = request.session_id_bytes
+    if session_id is not None:
+        put_avp(buffer, AVP_SESSION_ID, session_id)
+    put_avp_uint32(buffer, AVP_RESULT_CODE, result_code)
+    buffer += _answer_origin_avps(origin_host, origin_realm)
+    auth_session_state = request.avps.uint32(AVP_AUTH_SESSION_STATE)
+    put_avp_uint32(buffer, AVP_AUTH_SESSION_STATE, auth_session_state or NO_STATE_MAINTAINED)
+    if equipment_status is not None:
+        put_avp_uint32(buffer, AVP_EQUIPMENT_STATUS, equipment_status, vendor_id=VENDOR_3GPP)
+    if error_message is not None:
+        put_avp(buffer, AVP_ERROR_MESSAGE, error_message, mandatory=False)
+    end_message(buffer, message)
+    return buffer
+
+
+def encode_ecr(hop_by_hop: int, end_to_end: int, session_id: Union[Buffer, str], origin_host: str,
+               origin_realm: str, destination_realm: str, imei: str,
+               software_version: Optional[str] = None) -> bytearray:
+    """ME-Identity-Check-Request dans un nouveau tampon"""
+    return write_ecr(bytearray(), hop_by_hop, end_to_end, session_id, origin_host, origin_realm,
+                     destination_realm, imei, software_version)
+
+
+def encode_eca(request: MessageView, origin_host: str, origin_realm: str, result_code: int,
+               equipment_status: Optional[int] = None, error_message: Optional[str] = None,
+               flags: int = 0) -> bytearray:
+    """ME-Identity-Check-Answer dans un nouveau tampon"""
+    return write_eca(bytearray(), request, origin_host, origin_realm, result_code,
+                     equipment_status, error_message, flags)
@@ -1,13 +1,21 @@
 """
 Dispatcher pour les requêtes multi-protocoles
-Gère le routage des requêtes vers les handlers appropriés
+Gère le routage des requêtes vers les handlers appropriés et instrumente leur
+exécution (compteurs, requêtes en cours, histogrammes de latence par protocole)
 """
+import asyncio
 import logging
-from typing import Dict, Any, Optional, Union
+import time
+from bisect import bisect_left
+from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
 
-from ..config_loader import is_protocol_enabled, get_protocol_timeout, get_protocol_logging_config
-from .handlers import rest_handler, ss7_handler, diameter_handler
+from ..config_loader import is_protocol_enabled, get_protocol_timeout, get_protocol_logger
+# L'import des modules de handlers les enregistre dans le registre
+from .handlers import rest_handler, ss7_handler, diameter_handler  # noqa: F401
+from .handlers.registry import get_handler, get_registered_protocols, get_timeout_response
+from .work_queue import WORK_QUEUES
+from .circuit_breaker import CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, get_circuit_breaker
 
 logger = logging.getLogger(__name__)
 
@@ -19,37 +27,221 @@ class UnsupportedProtocolException(Exception):
     """Exception levée pour un protocole non supporté"""
     pass
 
-def setup_protocol_logger(protocol: str) -> logging.Logger:
+class ProtocolOverloadedException(Exception):
+    """Exception levée quand la file d'un protocole fire-and-forget est pleine"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class ProtocolCircuitOpenException(ProtocolOverloadedException):
+    """Exception levée quand le disjoncteur d'un protocole est ouvert (refus immédiat)"""
+    pass
+
+class ProtocolTimeoutException(Exception):
+    """Exception levée quand un handler dépasse le délai configuré de son protocole"""
+
+    def __init__(self, message: str, timeout: float):
+        super().__init__(message)
+        self.timeout = timeout
+
+# Bornes (secondes) des histogrammes de latence, identiques pour tous les protocoles
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Valeurs de la jauge eir_protocol_circuit_state
+CIRCUIT_STATE_VALUES = {CIRCUIT_CLOSED: 0, CIRCUIT_HALF_OPEN: 1, CIRCUIT_OPEN: 2}
+
+class ProtocolMetrics:
     """
-    Configure un logger spécifique pour un protocole
-    
+    Compteurs et histogramme de latence d'un protocole
+
+    Mis à jour uniquement depuis la boucle d'événements (dispatcher, workers de file) :
+    les incréments n'y sont jamais entrelacés, aucun verrou n'est nécessaire.
+    L'histogramme garde un compteur par intervalle ; les cumuls sont calculés à l'export.
+    """
+
+    __slots__ = ("protocol", "requests", "errors", "rejected", "timeouts", "cancelled", "in_flight",
+                 "bucket_counts", "latency_sum")
+
+    def __init__(self, protocol: str):
+        self.protocol = protocol
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.in_flight = 0
+        # Dernier intervalle : au-delà de la plus grande borne (+Inf)
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+
+    def observe(self, seconds: float, error: bool = False):
+        """
+        Enregistre une requête terminée
+
+        Args:
+            seconds: Durée de traitement
+            error: True si la requête s'est terminée en erreur
+        """
+        self.requests += 1
+        if error:
+            self.errors += 1
+        self.latency_sum += seconds
+        self.bucket_counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def cumulative_buckets(self) -> List[int]:
+        """Compteurs cumulés par borne (format Prometheus `le`), +Inf compris"""
+        cumulative = []
+        total = 0
+        for count in self.bucket_counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def quantile_ms(self, quantile: float) -> Optional[float]:
+        """
+        Estimation d'un quantile de latence : borne supérieure de l'intervalle qui le contient
+
+        Args:
+            quantile: Quantile entre 0 et 1
+
+        Returns:
+            Latence en millisecondes, ou None sans requête enregistrée
+        """
+        if not self.requests:
+            return None
+        rank = quantile * self.requests
+        for bound, cumulative in zip(LATENCY_BUCKETS, self.cumulative_buckets()):
+            if cumulative >= rank:
+                return bound * 1000
+        return LATENCY_BUCKETS[-1] * 1000
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Résumé des métriques du protocole
+
+        Returns:
+            Compteurs, requêtes en cours, latence moyenne et quantiles estimés
+        """
+        return {
+            "total_requests": self.requests,
+            "failed_requests": self.errors,
+            "successful_requests": self.requests - self.errors,
+            "rejected_requests": self.rejected,
+            "timed_out_requests": self.timeouts,
+            "cancelled_requests": self.cancelled,
+            "in_flight": self.in_flight,
+            "average_response_time_ms": round(self.latency_sum / self.requests * 1000, 2) if self.requests else 0,
+            "p50_ms": self.quantile_ms(0.50),
+            "p95_ms": self.quantile_ms(0.95),
+            "p99_ms": self.quantile_ms(0.99)
+        }
+
+_protocol_metrics: Dict[str, ProtocolMetrics] = {
+    protocol: ProtocolMetrics(protocol) for protocol in get_registered_protocols()
+}
+
+def get_protocol_metrics(protocol: str) -> ProtocolMetrics:
+    """
+    Métriques d'un protocole (créées au premier usage)
+
     Args:
         protocol: Nom du protocole
-        
+
     Returns:
-        Logger configuré pour le protocole
+        Instance ProtocolMetrics du protocole
+    """
+    metrics = _protocol_metrics.get(protocol)
+    if metrics is None:
+        metrics = _protocol_metrics.setdefault(protocol, ProtocolMetrics(protocol))
+    return metrics
+
+def _is_error_response(response: Optional[Dict[str, Any]]) -> bool:
+    """Réponse d'erreur construite par un handler (REST: status error, Diameter: metadata.error)"""
+    if not isinstance(response, dict):
+        return False
+    return response.get("status") == "error" or bool(response.get("metadata", {}).get("error"))
+
+async def run_handler(protocol: str, payload: Dict[str, Any]) -> Union[Dict[str, Any], None]:
     """
-    protocol_logger = logging.getLogger(f"protocol.{protocol}")
+    Exécute le handler d'un protocole sous son délai, en enregistrant ses métriques
     
-    # Obtenir la configuration de logging pour ce protocole
-    log_config = get_protocol_logging_config(protocol)
+    Utilisé par le dispatcher et par les workers des files fire-and-forget. Au-delà du
+    délai (clé "timeout" de la payload, en secondes), le handler est annulé et la réponse
+    de délai dépassé du protocole est renvoyée (Diameter : 5012).
+    La requête est refusée sans appeler le handler si le protocole a atteint son plafond
+    de requêtes simultanées ou si son disjoncteur est ouvert ; exceptions, délais dépassés
+    et réponses d'erreur comptent comme des échecs pour le disjoncteur. Une requête annulée
+    (asyncio.CancelledError) est seulement comptée comme annulée, puis l'annulation est propagée.
     
-    if log_config.get("enabled", True):
-        level = getattr(logging, log_config.get("level", "INFO").upper())
-        protocol_logger.setLevel(level)
+    Args:
+        protocol: Nom du protocole
+        payload: Payload enrichie par le dispatcher
         
-        # Créer un handler si pas déjà existant
-        if not protocol_logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter(
-                f'%(asctime)s - {protocol.upper()} - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
-            protocol_logger.addHandler(handler)
+    Returns:
+        Réponse du handler
+        
+    Raises:
+        ProtocolOverloadedException: Si le plafond de requêtes simultanées est atteint
+        ProtocolCircuitOpenException: Si le disjoncteur du protocole est ouvert
+        ProtocolTimeoutException: Si le délai est dépassé et que le protocole n'a pas de réponse dédiée
+    """
+    handler = get_handler(protocol)
+    metrics = get_protocol_metrics(protocol)
+    breaker = get_circuit_breaker(protocol)
+    timeout = payload.get("timeout")
     
-    return protocol_logger
+    if metrics.in_flight >= breaker.max_in_flight:
+        metrics.rejected += 1
+        raise ProtocolOverloadedException(
+            f"Plafond de {breaker.max_in_flight} requêtes {protocol.upper()} simultanées atteint, réessayer plus tard",
+            retry_after=1
+        )
+    ticket = breaker.allow()
+    if ticket is None:
+        metrics.rejected += 1
+        raise ProtocolCircuitOpenException(
+            f"Disjoncteur {protocol.upper()} ouvert, réessayer plus tard",
+            retry_after=breaker.retry_after()
+        )
+    
+    metrics.in_flight += 1
+    start = time.perf_counter()
+    error = True
+    cancelled = False
+    # Issue pour le disjoncteur : None si la requête est annulée (client déconnecté, arrêt)
+    outcome = None
+    try:
+        try:
+            response = await asyncio.wait_for(handler(payload), timeout) if timeout else await handler(payload)
+        except asyncio.TimeoutError:
+            metrics.timeouts += 1
+            outcome = False
+            logger.warning(f"Délai {protocol.upper()} dépassé ({timeout}s) - IMEI: {payload.get('imei')}")
+            timeout_response = get_timeout_response(protocol)
+            if timeout_response is None:
+                raise ProtocolTimeoutException(
+                    f"Délai de traitement {protocol.upper()} dépassé ({timeout}s)", timeout=timeout
+                )
+            return timeout_response(payload, timeout)
+        error = _is_error_response(response)
+        outcome = not error
+        return response
+    except asyncio.CancelledError:
+        cancelled = True
+        metrics.cancelled += 1
+        raise
+    except Exception:
+        outcome = False
+        raise
+    finally:
+        metrics.in_flight -= 1
+        if not cancelled:
+            metrics.observe(time.perf_counter() - start, error)
+        # Sans issue (annulation), record() libère seulement la place d'essai éventuelle
+        breaker.record(ticket, outcome)
 
-def handle_incoming_request(protocol: str, payload: Dict[str, Any]) -> Union[Dict[str, Any], None]:
+async def handle_incoming_request(protocol: str, payload: Dict[str, Any]) -> Union[Dict[str, Any], None]:
     """
     Dispatche une requête entrante vers le handler approprié
     
@@ -63,14 +255,22 @@ def handle_incoming_request(protocol: str, payload: Dict[str, Any]) -> Union[Dic
     Raises:
         ProtocolNotEnabledException: Si le protocole n'est pas activé
         UnsupportedProtocolException: Si le protocole n'est pas supporté
+        ProtocolOverloadedException: Si la file ou le plafond de requêtes du protocole est atteint
+        ProtocolCircuitOpenException: Si le disjoncteur du protocole est ouvert
+        ProtocolTimeoutException: Si le handler dépasse le délai du protocole
     """
+    handler = get_handler(protocol)
+    if handler is None:
+        logger.error(f"Protocole non supporté: {protocol}")
+        raise UnsupportedProtocolException(f"Le protocole {protocol} n'est pas supporté")
+    
     # Vérifier si le protocole est activé
     if not is_protocol_enabled(protocol):
         logger.warning(f"Tentative d'utilisation du protocole désactivé: {protocol}")
         raise ProtocolNotEnabledException(f"Le protocole {protocol} n'est pas activé")
     
-    # Configurer le logger pour ce protocole
-    protocol_logger = setup_protocol_logger(protocol)
+    # Logger du protocole, configuré au chargement de la configuration
+    protocol_logger = get_protocol_logger(protocol)
     
     # Ajouter des métadonnées à la payload
     enhanced_payload = {
@@ -82,27 +282,36 @@ def handle_incoming_request(protocol: str, payload: Dict[str, Any]) -> Union[Dic
     
     protocol_logger.info(f"Traitement de la requête {protocol.upper()}: {payload}")
     
+    # Protocoles fire-and-forget : la payload est confiée à la file, la requête rend la main
+    work_queue = WORK_QUEUES.get(protocol)
+    if work_queue is not None and work_queue.is_running:
+        # Circuit ouvert : refuser tout de suite plutôt que remplir la file de requêtes vouées à l'échec
+        breaker = get_circuit_breaker(protocol)
+        if breaker.state == CIRCUIT_OPEN:
+            breaker.stats['short_circuited'] += 1
+            get_protocol_metrics(protocol).rejected += 1
+            raise ProtocolCircuitOpenException(
+                f"Disjoncteur {protocol.upper()} ouvert, réessayer plus tard",
+                retry_after=breaker.retry_after()
+            )
+        if not work_queue.submit(enhanced_payload):
+            get_protocol_metrics(protocol).rejected += 1
+            protocol_logger.warning(f"File {protocol.upper()} pleine ({work_queue.max_queue}), requête refusée")
+            raise ProtocolOverloadedException(
+                f"File {protocol.upper()} pleine, réessayer plus tard",
+                retry_after=work_queue.retry_after()
+            )
+        protocol_logger.info(f"Requête {protocol.upper()} mise en file (fire-and-forget)")
+        return None
+    
     try:
-        # Dispatcher vers le handler approprié
-        if protocol == "rest":
-            response = rest_handler.process_rest(enhanced_payload)
-            protocol_logger.info(f"Réponse REST: {response}")
-            return response
-            
-        elif protocol == "ss7":
-            # SS7 est fire-and-forget, pas de réponse
-            ss7_handler.process_ss7(enhanced_payload)
-            protocol_logger.info("Requête SS7 traitée (fire-and-forget)")
-            return None
-            
-        elif protocol == "diameter":
-            response = diameter_handler.process_diameter(enhanced_payload)
-            protocol_logger.info(f"Réponse Diameter: {response}")
-            return response
-            
+        # Les handlers sont des coroutines : les requêtes concurrentes partagent la boucle d'événements
+        response = await run_handler(protocol, enhanced_payload)
+        if response is None:
+            protocol_logger.info(f"Requête {protocol.upper()} traitée (fire-and-forget)")
         else:
-            logger.error(f"Protocole non supporté: {protocol}")
-            raise UnsupportedProtocolException(f"Le protocole {protocol} n'est pas supporté")
+            protocol_logger.info(f"Réponse {protocol.upper()}: {response}")
+        return response
             
     except Exception as e:
         protocol_logger.error(f"Erreur lors du traitement de la requête {protocol}: {str(e)}")
@@ -116,10 +325,9 @@ def get_supported_protocols() -> Dict[str, bool]:
     Returns:
         Dict avec les protocoles et leur statut
     """
-    protocols = ["rest", "ss7", "diameter"]
     return {
         protocol: is_protocol_enabled(protocol) 
-        for protocol in protocols
+        for protocol in get_registered_protocols()
     }
 
 def validate_payload(protocol: str, payload: Dict[str, Any]) -> bool:
@@ -156,3 +364,90 @@ def validate_payload(protocol: str, payload: Dict[str, Any]) -> bool:
         pass
     
     return True
+
+def get_protocol_statistics() -> Dict[str, Dict[str, Any]]:
+    """
+    Résumé des métriques de chaque protocole, avec l'état de son disjoncteur et de sa
+    file le cas échéant
+    
+    Returns:
+        Dict protocole -> statistiques
+    """
+    statistics = {}
+    for protocol in get_registered_protocols():
+        statistics[protocol] = get_protocol_metrics(protocol).get_stats()
+        statistics[protocol]["circuit_breaker"] = get_circuit_breaker(protocol).get_stats()
+        work_queue = WORK_QUEUES.get(protocol)
+        if work_queue is not None:
+            statistics[protocol]["queue"] = work_queue.get_stats()
+    return statistics
+
+def get_circuit_states() -> Dict[str, str]:
+    """
+    État du disjoncteur de chaque protocole (closed, open, half_open)
+    
+    Returns:
+        Dict protocole -> état
+    """
+    return {protocol: get_circuit_breaker(protocol).state for protocol in get_registered_protocols()}
+
+def render_prometheus_metrics() -> str:
+    """
+    Exporte les métriques des protocoles au format texte Prometheus (version 0.0.4)
+    
+    Returns:
+        Corps de la réponse /metrics
+    """
+    protocols = list(_protocol_metrics.values())
+    lines = []
+
+    counters = (
+        ("eir_protocol_requests_total", "Requêtes traitées par protocole", "requests"),
+        ("eir_protocol_errors_total", "Requêtes terminées en erreur par protocole", "errors"),
+        ("eir_protocol_rejected_total", "Requêtes refusées (file pleine, plafond, circuit ouvert) par protocole", "rejected"),
+        ("eir_protocol_timeouts_total", "Requêtes annulées au-delà du délai configuré par protocole", "timeouts"),
+        ("eir_protocol_cancelled_total", "Requêtes annulées (client déconnecté, arrêt) par protocole", "cancelled"),
+    )
+    for name, help_text, attribute in counters:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for metrics in protocols:
+            lines.append(f'{name}{{protocol="{metrics.protocol}"}} {getattr(metrics, attribute)}')
+
+    lines.append("# HELP eir_protocol_in_flight Requêtes en cours de traitement par protocole")
+    lines.append("# TYPE eir_protocol_in_flight gauge")
+    for metrics in protocols:
+        lines.append(f'eir_protocol_in_flight{{protocol="{metrics.protocol}"}} {metrics.in_flight}')
+
+    name = "eir_protocol_request_duration_seconds"
+    lines.append(f"# HELP {name} Durée de traitement des requêtes par protocole")
+    lines.append(f"# TYPE {name} histogram")
+    for metrics in protocols:
+        label = f'protocol="{metrics.protocol}"'
+        cumulative = metrics.cumulative_buckets()
+        for bound, count in zip(LATENCY_BUCKETS, cumulative):
+            lines.append(f'{name}_bucket{{{label},le="{bound:g}"}} {count}')
+        lines.append(f'{name}_bucket{{{label},le="+Inf"}} {cumulative[-1]}')
+        lines.append(f"{name}_sum{{{label}}} {metrics.latency_sum:.6f}")
+        lines.append(f"{name}_count{{{label}}} {metrics.requests}")
+
+    breakers = [(metrics.protocol, get_circuit_breaker(metrics.protocol)) for metrics in protocols]
+    lines.append("# HELP eir_protocol_circuit_state État du disjoncteur par protocole (0 fermé, 1 semi-ouvert, 2 ouvert)")
+    lines.append("# TYPE eir_protocol_circuit_state gauge")
+    for protocol, breaker in breakers:
+        lines.append(f'eir_protocol_circuit_state{{protocol="{protocol}"}} {CIRCUIT_STATE_VALUES[breaker.state]}')
+    lines.append("# HELP eir_protocol_circuit_opened_total Ouvertures du disjoncteur par protocole")
+    lines.append("# TYPE eir_protocol_circuit_opened_total counter")
+    for protocol, breaker in breakers:
+        lines.append(f'eir_protocol_circuit_opened_total{{protocol="{protocol}"}} {breaker.stats["opened"]}')
+
+    lines.append("# HELP eir_protocol_queue_depth Requêtes en attente dans la file du protocole")
+    lines.append("# TYPE eir_protocol_queue_depth gauge")
+    for protocol, work_queue in WORK_QUEUES.items():
+        lines.append(f'eir_protocol_queue_depth{{protocol="{protocol}"}} {work_queue.queue_depth}')
+    lines.append("# HELP eir_protocol_queue_capacity Capacité de la file du protocole")
+    lines.append("# TYPE eir_protocol_queue_capacity gauge")
+    for protocol, work_queue in WORK_QUEUES.items():
+        lines.append(f'eir_protocol_queue_capacity{{protocol="{protocol}"}} {work_queue.max_queue}')
+
+    return "\n".join(lines) + "\n"
@@ -6,11 +6,14 @@ import logging
 from typing import Dict, Any
 from datetime import datetime
 import time
-import random
+
+from ..imei_status import get_imei_status
+from .registry import register_handler, register_timeout_response
 
 logger = logging.getLogger("protocol.diameter")
 
-def process_diameter(payload: Dict[str, Any]) -> Dict[str, Any]:
+@register_handler("diameter")
+async def process_diameter(payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Traite une requête Diameter de vérification IMEI
     
@@ -34,11 +37,8 @@ def process_diameter(payload: Dict[str, Any]) -> Dict[str, Any]:
     origin_realm = payload.get("origin_realm", "unknown.realm")
     
     try:
-        # Simulation d'une vérification IMEI via Diameter
-        time.sleep(random.uniform(0.2, 0.8))
-        
-        # Déterminer le statut de l'IMEI
-        imei_status = determine_diameter_imei_status(imei)
+        # Statut lu dans la base EIR (via le cache IMEI), sans bloquer la boucle d'événements
+        imei_status = await get_imei_status(imei)
         
         processing_time = time.time() - start_time
         
@@ -154,28 +154,27 @@ def build_diameter_error_response(imei: str, session_id: str, origin_host: str,
         }
     }
 
-def determine_diameter_imei_status(imei: str) -> str:
+@register_timeout_response("diameter")
+def build_diameter_timeout_response(payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
     """
-    Détermine le statut d'un IMEI pour Diameter
+    Réponse Diameter quand le délai configuré est dépassé (DIAMETER_UNABLE_TO_COMPLY)
     
     Args:
-        imei: Numéro IMEI
+        payload: Payload de la requête
+        timeout: Délai appliqué en secondes
         
     Returns:
-        Statut de l'IMEI
+        Réponse d'erreur Diameter (Result-Code 5012)
     """
-    if not imei:
-        return "unknown"
-    
-    # Logique similaire aux autres handlers mais avec des spécificités Diameter
-    last_digit = int(imei[-1]) if imei[-1].isdigit() else 0
-    
-    if last_digit in [0, 1, 2, 3, 4, 5, 6]:
-        return "whitelisted"
-    elif last_digit in [7, 8]:
-        return "blacklisted"
-    else:
-        return "unknown"
+    response = build_diameter_error_response(
+        imei=payload.get("imei"),
+        session_id=payload.get("session_id") or generate_session_id(),
+        origin_host=payload.get("origin_host", "unknown.host"),
+        origin_realm=payload.get("origin_realm", "unknown.realm"),
+        error_message=f"Délai de réponse dépassé ({timeout}s)"
+    )
+    response["metadata"]["timeout"] = True
+    return response
 
 def map_imei_status_to_diameter_code(status: str) -> int:
     """
@@ -190,6 +189,7 @@ def map_imei_status_to_diameter_code(status: str) -> int:
     status_mapping = {
         "whitelisted": 2001,  # DIAMETER_SUCCESS
         "blacklisted": 2001,  # DIAMETER_SUCCESS (mais avec Equipment-Status différent)
+        "greylisted": 2001,   # DIAMETER_SUCCESS (mais avec Equipment-Status différent)
         "unknown": 2001,      # DIAMETER_SUCCESS (mais avec Equipment-Status différent)
     }
     
@@ -208,6 +208,7 @@ def map_status_to_equipment_status(status: str) -> int:
     equipment_status_mapping = {
         "whitelisted": 0,  # WHITELISTED
         "blacklisted": 1,  # BLACKLISTED  
+        "greylisted": 2,   # GREYLISTED
         "unknown": 2       # UNKNOWN
     }
     
@@ -255,23 +256,3 @@ def validate_diameter_payload(payload: Dict[str, Any]) -> tuple[bool, str]:
         return False, "Session-Id ne peut pas être vide"
     
     return True, ""
-
-def get_diameter_statistics() -> Dict[str, Any]:
-    """
-    Retourne des statistiques sur les requêtes Diameter traitées
-    
-    Returns:
-        Dictionnaire avec les statistiques
-    """
-    return {
-        "total_diameter_requests": 0,
-        "successful_responses": 0,
-        "error_responses": 0,
-        "average_response_time_ms": 0,
-        "active_sessions": 0,
-        "last_request_timestamp": None,
-        "result_codes": {
-            "2001": 0,  # DIAMETER_SUCCESS
-            "5012": 0   # DIAMETER_UNABLE_TO_COMPLY
-        }
-    }
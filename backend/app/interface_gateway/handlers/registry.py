@@ -0,0 +1,78 @@
+"""
+Registre des handlers de protocoles
+Chaque handler est une coroutine `async def process(payload) -> réponse` enregistrée
+sous le nom de son protocole ; le dispatcher la retrouve ici au lieu d'une chaîne de if.
+Un protocole peut aussi enregistrer la réponse à renvoyer quand son délai est dépassé.
+"""
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Handler de protocole : reçoit la payload enrichie, retourne la réponse (None en fire-and-forget)
+ProtocolHandler = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+# Réponse de délai dépassé : reçoit la payload et le délai (secondes) appliqué
+TimeoutResponse = Callable[[Dict[str, Any], float], Dict[str, Any]]
+
+_handlers: Dict[str, ProtocolHandler] = {}
+_timeout_responses: Dict[str, TimeoutResponse] = {}
+
+
+def register_handler(protocol: str) -> Callable[[ProtocolHandler], ProtocolHandler]:
+    """
+    Décorateur d'enregistrement d'un handler de protocole
+
+    Args:
+        protocol: Nom du protocole (rest, ss7, diameter)
+
+    Returns:
+        Décorateur retournant la coroutine inchangée
+    """
+    def decorator(handler: ProtocolHandler) -> ProtocolHandler:
+        if protocol in _handlers and _handlers[protocol] is not handler:
+            logger.warning(f"Handler du protocole {protocol} remplacé par {handler.__qualname__}")
+        _handlers[protocol] = handler
+        return handler
+    return decorator
+
+
+def register_timeout_response(protocol: str) -> Callable[[TimeoutResponse], TimeoutResponse]:
+    """
+    Décorateur d'enregistrement de la réponse protocolaire à un délai dépassé
+
+    Sans réponse enregistrée, le dispatcher lève ProtocolTimeoutException.
+
+    Args:
+        protocol: Nom du protocole
+
+    Returns:
+        Décorateur retournant la fonction inchangée
+    """
+    def decorator(builder: TimeoutResponse) -> TimeoutResponse:
+        _timeout_responses[protocol] = builder
+        return builder
+    return decorator
+
+
+def get_timeout_response(protocol: str) -> Optional[TimeoutResponse]:
+    """Réponse de délai dépassé enregistrée pour un protocole, ou None"""
+    return _timeout_responses.get(protocol)
+
+
+def get_handler(protocol: str) -> Optional[ProtocolHandler]:
+    """
+    Handler enregistré pour un protocole
+
+    Args:
+        protocol: Nom du protocole
+
+    Returns:
+        Coroutine du handler, ou None si aucun handler n'est enregistré
+    """
+    return _handlers.get(protocol)
+
+
+def get_registered_protocols() -> List[str]:
+    """Noms des protocoles disposant d'un handler, dans l'ordre d'enregistrement"""
+    return list(_handlers)
@@ -5,12 +5,15 @@ Traite les requêtes REST et retourne des réponses JSON
 import logging
 from typing import Dict, Any
 from datetime import datetime
-import random
 import time
 
+from ..imei_status import get_imei_status
+from .registry import register_handler
+
 logger = logging.getLogger("protocol.rest")
 
-def process_rest(payload: Dict[str, Any]) -> Dict[str, Any]:
+@register_handler("rest")
+async def process_rest(payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Traite une requête REST de vérification IMEI
     
@@ -28,14 +31,9 @@ def process_rest(payload: Dict[str, Any]) -> Dict[str, Any]:
     start_time = time.time()
     imei = payload.get("imei")
     
-    # Simulation d'une vérification IMEI
-    # Dans un vrai système, ceci ferait appel à une base de données EIR
     try:
-        # Simuler un délai de traitement
-        time.sleep(random.uniform(0.1, 0.5))
-        
-        # Logique de simulation basée sur l'IMEI
-        imei_status = determine_imei_status(imei)
+        # Statut lu dans la base EIR (via le cache IMEI), sans bloquer la boucle d'événements
+        imei_status = await get_imei_status(imei)
         
         processing_time = time.time() - start_time
         
@@ -57,6 +55,9 @@ def process_rest(payload: Dict[str, Any]) -> Dict[str, Any]:
             response["message"] = "IMEI bloqué - Appareil signalé"
             response["action"] = "block"
             response["raison"] = "Appareil déclaré volé ou perdu"
+        elif imei_status == "greylisted":
+            response["message"] = "IMEI suspect - Appareil sous surveillance"
+            response["action"] = "monitor"
         elif imei_status == "unknown":
             response["message"] = "IMEI inconnu - Statut indéterminé"
             response["action"] = "monitor"
@@ -77,29 +78,6 @@ def process_rest(payload: Dict[str, Any]) -> Dict[str, Any]:
             "response_code": "ERROR"
         }
 
-def determine_imei_status(imei: str) -> str:
-    """
-    Détermine le statut d'un IMEI basé sur une logique de simulation
-    
-    Args:
-        imei: Numéro IMEI à vérifier
-        
-    Returns:
-        Statut de l'IMEI: 'whitelisted', 'blacklisted', ou 'unknown'
-    """
-    if not imei:
-        return "unknown"
-    
-    # Logique de simulation basée sur les derniers chiffres de l'IMEI
-    last_digit = int(imei[-1]) if imei[-1].isdigit() else 0
-    
-    if last_digit in [0, 1, 2, 3, 4, 5, 6]:
-        return "whitelisted"
-    elif last_digit in [7, 8]:
-        return "blacklisted"
-    else:
-        return "unknown"
-
 def validate_rest_payload(payload: Dict[str, Any]) -> tuple[bool, str]:
     """
     Valide la payload pour une requête REST
@@ -125,19 +103,3 @@ def validate_rest_payload(payload: Dict[str, Any]) -> tuple[bool, str]:
         return False, "IMEI doit contenir 14 ou 15 chiffres"
     
     return True, ""
-
-def get_rest_statistics() -> Dict[str, Any]:
-    """
-    Retourne des statistiques sur les requêtes REST traitées
-    
-    Returns:
-        Dictionnaire avec les statistiques
-    """
-    # Dans un vrai système, ces statistiques seraient stockées en base
-    return {
-        "total_requests": 0,
-        "successful_requests": 0,
-        "failed_requests": 0,
-        "average_response_time_ms": 0,
-        "last_request_timestamp": None
-    }
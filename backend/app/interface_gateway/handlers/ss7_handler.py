@@ -1,15 +1,19 @@
 """
 Handler SS7 pour la vérification IMEI
-Traite les requêtes SS7 en mode fire-and-forget (pas de réponse)
+Traite les requêtes SS7 en mode fire-and-forget (pas de réponse) ; le dispatcher
+les confie à la file SS7 (work_queue.ss7_work_queue), dont les workers appellent process_ss7
 """
 import logging
 from typing import Dict, Any
 from datetime import datetime
-import asyncio
+
+from ..imei_status import get_imei_status
+from .registry import register_handler
 
 logger = logging.getLogger("protocol.ss7")
 
-def process_ss7(payload: Dict[str, Any]) -> None:
+@register_handler("ss7")
+async def process_ss7(payload: Dict[str, Any]) -> None:
     """
     Traite une requête SS7 de vérification IMEI en mode fire-and-forget
     
@@ -39,18 +43,16 @@ def process_ss7(payload: Dict[str, Any]) -> None:
         # 3. Interroger la base EIR
         # 4. Optionnellement, envoyer une notification au MSC/VLR
         
-        # Simulation du traitement SS7
-        simulate_ss7_processing(imei, msisdn, imsi)
-        
-        # Optionnel: déclencher des actions asynchrones
-        schedule_async_ss7_actions(payload)
+        # Vérification de l'IMEI dans la base EIR
+        await check_ss7_imei(imei, msisdn, imsi)
         
         logger.info(f"Requête SS7 traitée avec succès - IMEI: {imei}")
         
     except Exception as e:
         logger.error(f"Erreur lors du traitement SS7 pour IMEI {imei}: {str(e)}")
-        # En SS7, on ne retourne pas d'erreur à l'appelant
-        # mais on peut logger ou déclencher des alertes
+        # En SS7, on ne retourne pas d'erreur à l'appelant : l'exception remonte
+        # au worker de la file, qui la comptabilise dans les métriques du protocole
+        raise
 
 def log_ss7_request(imei: str, msisdn: str = None, imsi: str = None, payload: Dict[str, Any] = None):
     """
@@ -78,34 +80,31 @@ def log_ss7_request(imei: str, msisdn: str = None, imsi: str = None, payload: Di
     # Dans un vrai système, on stockerait ceci dans une base de données
     # pour l'audit et le monitoring
 
-def simulate_ss7_processing(imei: str, msisdn: str = None, imsi: str = None):
+async def check_ss7_imei(imei: str, msisdn: str = None, imsi: str = None):
     """
-    Simule le traitement d'une requête SS7
+    Traite le CheckIMEI d'une requête SS7
     
     Args:
         imei: Numéro IMEI à traiter
         msisdn: Numéro de téléphone associé
         imsi: IMSI associé
     """
-    logger.debug(f"Simulation traitement SS7 - IMEI: {imei}")
+    logger.debug(f"Traitement CheckIMEI SS7 - IMEI: {imei}")
     
-    # Simulation des étapes de traitement SS7:
+    # Étapes de traitement SS7:
     
     # 1. Validation de l'IMEI
     if not validate_ss7_imei(imei):
         logger.warning(f"IMEI invalide dans requête SS7: {imei}")
         return
     
-    # 2. Recherche dans la base EIR (simulation)
-    imei_status = lookup_imei_in_eir(imei)
+    # 2. Recherche dans la base EIR
+    imei_status = await lookup_imei_in_eir(imei)
     logger.debug(f"Statut IMEI trouvé: {imei_status}")
     
     # 3. Correlation avec IMSI/MSISDN si fournis
     if imsi or msisdn:
         correlate_subscriber_data(imei, imsi, msisdn)
-    
-    # 4. Mise à jour des statistiques
-    update_ss7_statistics(imei, imei_status)
 
 def validate_ss7_imei(imei: str) -> bool:
     """
@@ -128,25 +127,17 @@ def validate_ss7_imei(imei: str) -> bool:
     
     return True
 
-def lookup_imei_in_eir(imei: str) -> str:
+async def lookup_imei_in_eir(imei: str) -> str:
     """
-    Simule une recherche IMEI dans la base EIR
+    Recherche le statut d'un IMEI dans la base EIR
     
     Args:
-        imei: IMEI à rechercher
+        imei: IMEI à rechercher (14 ou 15 chiffres)
         
     Returns:
-        Statut de l'IMEI
+        Statut de l'IMEI: 'whitelisted', 'greylisted', 'blacklisted' ou 'unknown'
     """
-    # Logique de simulation similaire au handler REST
-    last_digit = int(imei[-1]) if imei[-1].isdigit() else 0
-    
-    if last_digit in [0, 1, 2, 3, 4, 5, 6]:
-        return "whitelisted"
-    elif last_digit in [7, 8]:
-        return "blacklisted"
-    else:
-        return "unknown"
+    return await get_imei_status(imei)
 
 def correlate_subscriber_data(imei: str, imsi: str = None, msisdn: str = None):
     """
@@ -168,50 +159,3 @@ def correlate_subscriber_data(imei: str, imsi: str = None, msisdn: str = None):
     
     # Dans un vrai système, on stockerait cette corrélation
     # pour des analyses de sécurité et de fraude
-
-def update_ss7_statistics(imei: str, status: str):
-    """
-    Met à jour les statistiques SS7
-    
-    Args:
-        imei: IMEI traité
-        status: Statut déterminé
-    """
-    stats_update = {
-        "timestamp": datetime.now().isoformat(),
-        "protocol": "SS7",
-        "imei_status": status,
-        "processed": True
-    }
-    
-    logger.debug(f"Mise à jour statistiques SS7: {stats_update}")
-
-def schedule_async_ss7_actions(payload: Dict[str, Any]):
-    """
-    Programme des actions asynchrones suite à une requête SS7
-    
-    Args:
-        payload: Données de la requête originale
-    """
-    # Dans un vrai système, on pourrait programmer :
-    # - Des notifications vers d'autres systèmes
-    # - Des mises à jour de base de données
-    # - Des alertes de sécurité
-    
-    logger.debug("Actions asynchrones SS7 programmées")
-
-def get_ss7_statistics() -> Dict[str, Any]:
-    """
-    Retourne des statistiques sur les requêtes SS7 traitées
-    
-    Returns:
-        Dictionnaire avec les statistiques
-    """
-    return {
-        "total_ss7_requests": 0,
-        "whitelisted_count": 0,
-        "blacklisted_count": 0,
-        "unknown_count": 0,
-        "last_request_timestamp": None,
-        "average_processing_time_ms": 0
-    }
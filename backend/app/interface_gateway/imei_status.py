@@ -0,0 +1,93 @@
+"""
+Source partagée des statuts IMEI pour les handlers de protocoles
+Les statuts EIR (table imei) sont lus via le cache imei_status_cache et convertis
+dans le vocabulaire des équipements réseau (whitelisted, greylisted, blacklisted, unknown)
+"""
+import logging
+from typing import Any, Dict, Optional
+
+from ..core.database import AsyncSessionLocal
+from ..services.imei_cache import imei_status_cache
+from ..services.imei_validation import chiffre_controle
+
+logger = logging.getLogger(__name__)
+
+# Statut EIR (imei.statut) -> statut d'équipement ; tout autre statut est autorisé
+STATUT_EQUIPEMENT = {
+    "bloque": "blacklisted",
+    "suspect": "greylisted",
+}
+
+
+def luhn_check_digit(digits: str) -> str:
+    """
+    Chiffre de contrôle Luhn d'un IMEI de 14 chiffres
+
+    Args:
+        digits: 14 premiers chiffres de l'IMEI
+
+    Returns:
+        Chiffre de contrôle
+    """
+    return str(chiffre_controle(digits))
+
+
+def normalize_imei(imei: str) -> str:
+    """
+    Forme stockée d'un IMEI (15 chiffres)
+
+    Les interfaces réseau (S13, MAP) transportent l'IMEI sur 14 chiffres, sans
+    chiffre de contrôle : celui-ci est recalculé pour la recherche en base.
+
+    Args:
+        imei: IMEI de 14 ou 15 chiffres
+
+    Returns:
+        IMEI de 15 chiffres (inchangé s'il n'a pas 14 chiffres)
+    """
+    if len(imei) == 14 and imei.isdigit():
+        return imei + luhn_check_digit(imei)
+    return imei
+
+
+def equipment_status(projection: Optional[Dict[str, Any]]) -> str:
+    """
+    Convertit une projection IMEI en statut d'équipement
+
+    Args:
+        projection: Projection du cache IMEI, ou None si l'IMEI est inconnu
+
+    Returns:
+        "whitelisted", "greylisted", "blacklisted" ou "unknown"
+    """
+    if projection is None:
+        return "unknown"
+    return STATUT_EQUIPEMENT.get(projection.get("statut"), "whitelisted")
+
+
+async def lookup_imei(imei: str) -> Optional[Dict[str, Any]]:
+    """
+    Projection IMEI/appareil depuis le cache, chargée via une session asynchrone si absente
+
+    Args:
+        imei: Numéro IMEI
+
+    Returns:
+        Projection IMEI/appareil, ou None si l'IMEI n'existe pas
+    """
+    # La session n'emprunte une connexion qu'en cas d'absence du cache
+    async with AsyncSessionLocal() as db:
+        return await imei_status_cache.get_or_load_async(imei, db)
+
+
+async def get_imei_status(imei: str) -> str:
+    """
+    Statut d'équipement d'un IMEI
+
+    Args:
+        imei: Numéro IMEI (14 ou 15 chiffres)
+
+    Returns:
+        "whitelisted", "greylisted", "blacklisted" ou "unknown"
+    """
+    return equipment_status(await lookup_imei(normalize_imei(imei)))
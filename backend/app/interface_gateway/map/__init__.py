@@ -0,0 +1,3 @@
+"""
+Package MAP : codec binaire des composants TCAP de l'opération CheckIMEI (3GPP TS 29.002)
+"""
@@ -0,0 +1,427 @@
+"""
+Codec MAP CheckIMEI (3GPP TS 29.002, opération 43) au niveau des composants TCAP
+Composants Invoke, ReturnResultLast et ReturnError encodés en BER (ITU-T Q.773).
+Les encodeurs écrivent directement dans un bytearray ; MapComponentView lit un tampon
+(bytes, bytearray, memoryview) sans le copier : seules les positions des éléments sont
+relevées (au premier accès), chaque champ n'est décodé qu'à sa lecture.
+Formats MAP v3 (CheckIMEI-Arg / CheckIMEI-Res) et v2 (IMEI seul / EquipmentStatus seul).
+"""
+from typing import Optional, Tuple, Union
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# Opération MAP checkIMEI (localValue)
+OP_CHECK_IMEI = 43
+
+# Étiquettes des composants TCAP (contexte, construit)
+TAG_INVOKE = 0xA1
+TAG_RETURN_RESULT_LAST = 0xA2
+TAG_RETURN_ERROR = 0xA3
+
+# Étiquettes universelles BER
+TAG_INTEGER = 0x02
+TAG_BIT_STRING = 0x03
+TAG_OCTET_STRING = 0x04
+TAG_ENUMERATED = 0x0A
+TAG_SEQUENCE = 0x30
+
+# EquipmentStatus
+EQUIPMENT_WHITELISTED = 0
+EQUIPMENT_BLACKLISTED = 1
+EQUIPMENT_GREYLISTED = 2
+
+# RequestedEquipmentInfo (BIT STRING) : bit 0 equipmentStatus, bit 1 bmuef
+REQUESTED_EQUIPMENT_STATUS = 0x80
+REQUESTED_BMUEF = 0x40
+
+# Codes d'erreur MAP de l'opération checkIMEI
+MAP_ERROR_UNKNOWN_EQUIPMENT = 7
+MAP_ERROR_SYSTEM_FAILURE = 34
+MAP_ERROR_DATA_MISSING = 35
+MAP_ERROR_UNEXPECTED_DATA_VALUE = 36
+
+COMPONENT_KINDS = {
+    TAG_INVOKE: "invoke",
+    TAG_RETURN_RESULT_LAST: "return_result",
+    TAG_RETURN_ERROR: "return_error"
+}
+
+# Taille d'un IMEI en TBCD (15 chiffres + quartet de remplissage)
+IMEI_TBCD_LENGTH = 8
+
+
+class MapDecodeError(ValueError):
+    """Composant TCAP ou paramètre MAP mal formé"""
+    pass
+
+
+# --- Encodage ---------------------------------------------------------------
+
+def _put_length(buffer: bytearray, length: int):
+    """Longueur BER, forme courte ou longue (1 ou 2 octets)"""
+    if length < 0x80:
+        buffer.append(length)
+    elif length <= 0xFF:
+        buffer += bytes((0x81, length))
+    elif length <= 0xFFFF:
+        buffer += bytes((0x82, length >> 8, length & 0xFF))
+    else:
+        raise ValueError(f"Longueur BER non supportée: {length}")
+
+
+def _begin(buffer: bytearray, tag: int) -> int:
+    """
+    Ouvre un élément construit ; sa longueur est écrite par _end()
+
+    Returns:
+        Position de l'octet de longueur réservé
+    """
+    buffer.append(tag)
+    buffer.append(0)
+    return len(buffer) - 1
+
+
+def _end(buffer: bytearray, length_offset: int):
+    """Ferme un élément ouvert par _begin() (longueur insérée en forme longue si nécessaire)"""
+    length = len(buffer) - length_offset - 1
+    if length < 0x80:
+        buffer[length_offset] = length
+        return
+    encoded = bytearray()
+    _put_length(encoded, length)
+    buffer[length_offset:length_offset + 1] = encoded
+
+
+def _put_integer(buffer: bytearray, tag: int, value: int):
+    """INTEGER / ENUMERATED en complément à deux, sur le nombre minimal d'octets"""
+    size = max(1, (value + (value < 0)).bit_length() // 8 + 1)
+    buffer.append(tag)
+    buffer.append(size)
+    buffer += value.to_bytes(size, "big", signed=True)
+
+
+def _put_tbcd(buffer: bytearray, digits: str):
+    """Chiffres en TBCD : premier chiffre dans le quartet de poids faible, remplissage 0xF"""
+    if not digits.isdigit():
+        raise ValueError(f"Chiffres attendus: {digits!r}")
+    buffer.append(TAG_OCTET_STRING)
+    buffer.append((len(digits) + 1) // 2)
+    for i in range(0, len(digits) - 1, 2):
+        buffer.append((ord(digits[i + 1]) - 48) << 4 | (ord(digits[i]) - 48))
+    if len(digits) % 2:
+        buffer.append(0xF0 | (ord(digits[-1]) - 48))
+
+
+def _imei_digits(imei: str) -> str:
+    """IMEI sur 15 chiffres (un IMEI de 14 chiffres reçoit le chiffre de réserve 0)"""
+    if len(imei) == 14:
+        return imei + "0"
+    if len(imei) != 15:
+        raise ValueError(f"IMEI de 14 ou 15 chiffres attendu: {imei!r}")
+    return imei
+
+
+def write_check_imei_invoke(buffer: bytearray, invoke_id: int, imei: str, version: int = 3,
+                            requested_info: int = REQUESTED_EQUIPMENT_STATUS) -> bytearray:
+    """
+    Écrit un composant Invoke checkIMEI à la fin du tampon
+
+    Args:
+        buffer: Tampon de destination
+        invoke_id: Identifiant d'invocation (-128 à 127)
+        imei: IMEI de 14 ou 15 chiffres
+        version: Version MAP (3 : CheckIMEI-Arg, 2 : IMEI seul)
+        requested_info: Bits de RequestedEquipmentInfo (MAP v3)
+
+    Returns:
+        Le tampon
+    """
+    component = _begin(buffer, TAG_INVOKE)
+    _put_integer(buffer, TAG_INTEGER, invoke_id)
+    _put_integer(buffer, TAG_INTEGER, OP_CHECK_IMEI)
+    if version >= 3:
+        argument = _begin(buffer, TAG_SEQUENCE)
+        _put_tbcd(buffer, _imei_digits(imei))
+        # BIT STRING de 8 bits : aucun bit inutilisé
+        buffer += bytes((TAG_BIT_STRING, 2, 0, requested_info))
+        _end(buffer, argument)
+    else:
+        _put_tbcd(buffer, _imei_digits(imei))
+    _end(buffer, component)
+    return buffer
+
+
+def write_check_imei_result(buffer: bytearray, invoke_id: int, equipment_status: Optional[int],
+                            version: int = 3) -> bytearray:
+    """
+    Écrit un composant ReturnResultLast checkIMEI à la fin du tampon
+
+    Args:
+        buffer: Tampon de destination
+        invoke_id: Identifiant de l'Invoke auquel il est répondu
+        equipment_status: EQUIPMENT_WHITELISTED, _BLACKLISTED ou _GREYLISTED
+                          (None : CheckIMEI-Res vide, MAP v3 uniquement)
+        version: Version MAP (3 : CheckIMEI-Res, 2 : EquipmentStatus seul)
+
+    Returns:
+        Le tampon
+    """
+    if version < 3 and equipment_status is None:
+        raise ValueError("EquipmentStatus obligatoire en MAP v2")
+    component = _begin(buffer, TAG_RETURN_RESULT_LAST)
+    _put_integer(buffer, TAG_INTEGER, invoke_id)
+    result = _begin(buffer, TAG_SEQUENCE)
+    _put_integer(buffer, TAG_INTEGER, OP_CHECK_IMEI)
+    if version >= 3:
+        parameter = _begin(buffer, TAG_SEQUENCE)
+        if equipment_status is not None:
+            _put_integer(buffer, TAG_ENUMERATED, equipment_status)
+        _end(buffer, parameter)
+    else:
+        _put_integer(buffer, TAG_ENUMERATED, equipment_status)
+    _end(buffer, result)
+    _end(buffer, component)
+    return buffer
+
+
+def write_return_error(buffer: bytearray, invoke_id: int, error_code: int) -> bytearray:
+    """
+    Écrit un composant ReturnError (sans paramètre) à la fin du tampon
+
+    Args:
+        buffer: Tampon de destination
+        invoke_id: Identifiant de l'Invoke en erreur
+        error_code: Code d'erreur MAP (MAP_ERROR_*)
+
+    Returns:
+        Le tampon
+    """
+    component = _begin(buffer, TAG_RETURN_ERROR)
+    _put_integer(buffer, TAG_INTEGER, invoke_id)
+    _put_integer(buffer, TAG_INTEGER, error_code)
+    _end(buffer, component)
+    return buffer
+
+
+def encode_check_imei_invoke(invoke_id: int, imei: str, version: int = 3) -> bytearray:
+    """Composant Invoke checkIMEI dans un nouveau tampon"""
+    return write_check_imei_invoke(bytearray(), invoke_id, imei, version)
+
+
+def encode_check_imei_result(invoke_id: int, equipment_status: Optional[int], version: int = 3) -> bytearray:
+    """Composant ReturnResultLast checkIMEI dans un nouveau tampon"""
+    return write_check_imei_result(bytearray(), invoke_id, equipment_status, version)
+
+
+# --- Décodage ---------------------------------------------------------------
+
+def _read_tlv(data: memoryview, offset: int, end: int) -> Tuple[int, int, int]:
+    """
+    Lit l'en-tête d'un élément BER
+
+    Returns:
+        (étiquette, début de la valeur, fin de la valeur)
+
+    Raises:
+        MapDecodeError: Étiquette multi-octets, longueur indéfinie ou débordement
+    """
+    if end - offset < 2:
+        raise MapDecodeError("Élément BER tronqué")
+    tag = data[offset]
+    if tag & 0x1F == 0x1F:
+        raise MapDecodeError(f"Étiquette BER multi-octets non supportée: 0x{tag:02x}")
+    length = data[offset + 1]
+    start = offset + 2
+    if length & 0x80:
+        size = length & 0x7F
+        if size == 0 or size > 2:
+            raise MapDecodeError("Longueur BER indéfinie ou trop grande")
+        if start + size > end:
+            raise MapDecodeError("Longueur BER tronquée")
+        length = int.from_bytes(data[start:start + size], "big")
+        start += size
+    if start + length > end:
+        raise MapDecodeError(f"Élément BER 0x{tag:02x} débordant ({length} octets)")
+    return tag, start, start + length
+
+
+def _read_integer(data: memoryview, start: int, end: int) -> int:
+    if start == end:
+        raise MapDecodeError("INTEGER vide")
+    return int.from_bytes(data[start:end], "big", signed=True)
+
+
+def _decode_tbcd(data: memoryview, start: int, end: int) -> str:
+    """Chiffres TBCD jusqu'au quartet de remplissage"""
+    digits = []
+    for byte in data[start:end]:
+        low, high = byte & 0x0F, byte >> 4
+        if low > 9:
+            raise MapDecodeError(f"Chiffre TBCD invalide: 0x{low:x}")
+        digits.append(chr(48 + low))
+        if high == 0x0F:
+            break
+        if high > 9:
+            raise MapDecodeError(f"Chiffre TBCD invalide: 0x{high:x}")
+        digits.append(chr(48 + high))
+    return "".join(digits)
+
+
+class MapComponentView:
+    """
+    Vue sans copie d'un composant TCAP checkIMEI
+
+    La construction ne lit que l'en-tête du composant et la position des éléments ;
+    IMEI, statut et codes ne sont décodés qu'à leur lecture.
+    """
+
+    def __init__(self, data: Buffer):
+        """
+        Args:
+            data: Composant TCAP complet (Invoke, ReturnResultLast ou ReturnError)
+
+        Raises:
+            MapDecodeError: Composant tronqué ou de type non supporté
+        """
+        self._data = memoryview(data)
+        tag, start, end = _read_tlv(self._data, 0, len(self._data))
+        if tag not in COMPONENT_KINDS:
+            raise MapDecodeError(f"Composant TCAP non supporté: 0x{tag:02x}")
+        if end != len(self._data):
+            raise MapDecodeError("Longueur du composant différente du tampon")
+        self.tag = tag
+        self._start = start
+        self._end = end
+        self._positions = None
+
+    @property
+    def kind(self) -> str:
+        """invoke, return_result ou return_error"""
+        return COMPONENT_KINDS[self.tag]
+
+    def _fields(self) -> Tuple[int, Optional[Tuple[int, int, int]], Optional[Tuple[int, int, int, int]]]:
+        """
+        Positions des éléments du composant
+
+        Returns:
+            (invokeID, (étiquette, début, fin) du code d'opération ou d'erreur,
+             (position, étiquette, début, fin) du paramètre)
+        """
+        if self._positions is None:
+            self._positions = self._locate()
+        return self._positions
+
+    def _locate(self) -> Tuple[int, Optional[Tuple[int, int, int]], Optional[Tuple[int, int, int, int]]]:
+        data, end = self._data, self._end
+        tag, start, stop = _read_tlv(data, self._start, end)
+        if tag != TAG_INTEGER:
+            raise MapDecodeError("invokeID attendu")
+        invoke_id = _read_integer(data, start, stop)
+        code = parameter = None
+        offset = stop
+
+        if self.tag == TAG_RETURN_RESULT_LAST:
+            # Le résultat (opcode + paramètre) est optionnel et regroupé dans une SEQUENCE
+            if offset < end:
+                tag, start, stop = _read_tlv(data, offset, end)
+                if tag != TAG_SEQUENCE:
+                    raise MapDecodeError("SEQUENCE de résultat attendue")
+                end, offset = stop, start
+            else:
+                return invoke_id, None, None
+        elif offset < end and data[offset] == 0x80:
+            # linkedID [0] d'un Invoke : ignoré
+            offset = _read_tlv(data, offset, end)[2]
+
+        if offset < end:
+            code = _read_tlv(data, offset, end)
+            if code[0] != TAG_INTEGER:
+                raise MapDecodeError("Code d'opération ou d'erreur local attendu")
+            offset = code[2]
+        if offset < end:
+            parameter = (offset, *_read_tlv(data, offset, end))
+        return invoke_id, code, parameter
+
+    @property
+    def invoke_id(self) -> int:
+        return self._fields()[0]
+
+    @property
+    def opcode(self) -> Optional[int]:
+        """Code d'opération (Invoke, ReturnResultLast avec résultat)"""
+        if self.tag == TAG_RETURN_ERROR or self._fields()[1] is None:
+            return None
+        _, start, end = self._fields()[1]
+        return _read_integer(self._data, start, end)
+
+    @property
+    def error_code(self) -> Optional[int]:
+        """Code d'erreur MAP (ReturnError)"""
+        if self.tag != TAG_RETURN_ERROR or self._fields()[1] is None:
+            return None
+        _, start, end = self._fields()[1]
+        return _read_integer(self._data, start, end)
+
+    @property
+    def parameter(self) -> Optional[memoryview]:
+        """Paramètre encodé (élément BER complet), sans copie"""
+        parameter = self._fields()[2]
+        if parameter is None:
+            return None
+        return self._data[parameter[0]:parameter[3]]
+
+    def _find(self, tag: int, start: int, end: int) -> Optional[Tuple[int, int]]:
+        """Premier élément d'étiquette donnée dans [start, end)"""
+        while start < end:
+            found, value_start, value_end = _read_tlv(self._data, start, end)
+            if found == tag:
+                return value_start, value_end
+            start = value_end
+        return None
+
+    @property
+    def imei(self) -> Optional[str]:
+        """IMEI d'un Invoke checkIMEI (15 chiffres), None s'il est absent"""
+        parameter = self._fields()[2]
+        if self.tag != TAG_INVOKE or parameter is None:
+            return None
+        _, tag, start, end = parameter
+        if tag == TAG_SEQUENCE:
+            # MAP v3 : CheckIMEI-Arg
+            found = self._find(TAG_OCTET_STRING, start, end)
+            if found is None:
+                return None
+            start, end = found
+        elif tag != TAG_OCTET_STRING:
+            raise MapDecodeError(f"Paramètre checkIMEI inattendu: 0x{tag:02x}")
+        if end - start != IMEI_TBCD_LENGTH:
+            raise MapDecodeError(f"IMEI TBCD de {IMEI_TBCD_LENGTH} octets attendu")
+        return _decode_tbcd(self._data, start, end)
+
+    @property
+    def requested_equipment_info(self) -> Optional[int]:
+        """Bits de RequestedEquipmentInfo (MAP v3), None en MAP v2"""
+        parameter = self._fields()[2]
+        if self.tag != TAG_INVOKE or parameter is None or parameter[1] != TAG_SEQUENCE:
+            return None
+        found = self._find(TAG_BIT_STRING, parameter[2], parameter[3])
+        if found is None or found[1] - found[0] < 2:
+            return None
+        return self._data[found[0] + 1]
+
+    @property
+    def equipment_status(self) -> Optional[int]:
+        """EquipmentStatus d'un ReturnResultLast, None s'il est absent"""
+        parameter = self._fields()[2]
+        if self.tag != TAG_RETURN_RESULT_LAST or parameter is None:
+            return None
+        _, tag, start, end = parameter
+        if tag == TAG_SEQUENCE:
+            # MAP v3 : CheckIMEI-Res, equipmentStatus optionnel
+            found = self._find(TAG_ENUMERATED, start, end)
+            if found is None:
+                return None
+            start, end = found
+        elif tag != TAG_ENUMERATED:
+            raise MapDecodeError(f"Résultat checkIMEI inattendu: 0x{tag:02x}")
+        return _read_integer(self._data, start, end)
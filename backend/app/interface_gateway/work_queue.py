@@ -0,0 +1,297 @@
+"""
+File de travail asynchrone bornée pour les protocoles fire-and-forget (SS7)
+La requête HTTP dépose la payload et rend la main ; N workers asyncio exécutent le
+handler du protocole. Une file pleine est signalée à l'appelant (contre-pression)
+au lieu d'accumuler des tâches en attente. Une payload refusée par le protocole
+(disjoncteur ouvert, plafond de requêtes simultanées) est remise en file après le
+délai Retry-After, puis abandonnée et journalisée après max_retries tentatives.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from .handlers.registry import ProtocolHandler
+
+logger = logging.getLogger(__name__)
+
+
+class ProtocolWorkQueue:
+    """
+    File bornée consommée par un nombre fixe de workers
+
+    submit() ne bloque jamais : il retourne False si la file est pleine ou si elle
+    n'est pas démarrée. L'arrêt refuse les nouvelles payloads puis laisse les workers
+    vider la file dans la limite du délai de drainage.
+    """
+
+    def __init__(self, name: str, handler: ProtocolHandler, max_queue: int = 1000,
+                 workers: int = 16, drain_timeout: float = 10.0, enabled: bool = True,
+                 max_retries: int = 3):
+        """
+        Initialise la file
+
+        Args:
+            name: Nom du protocole (logs et métriques)
+            handler: Coroutine exécutée pour chaque payload
+            max_queue: Nombre maximum de payloads en attente
+            workers: Nombre de workers concurrents
+            drain_timeout: Délai maximum (secondes) de vidage à l'arrêt
+            enabled: Si False, le dispatcher exécute le handler dans la requête
+            max_retries: Remises en file d'une payload refusée par le protocole avant abandon
+        """
+        self.name = name
+        self.handler = handler
+        self.max_queue = max_queue
+        self.worker_count = workers
+        self.drain_timeout = drain_timeout
+        self.enabled = enabled
+        self.max_retries = max_retries
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # Remises en file différées (payloads refusées en attente de leur délai)
+        self._delayed: Set[asyncio.Task] = set()
+        self.is_running = False
+
+        self.stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'processed': 0,
+            'failed': 0,
+            'refused': 0,
+            'retried': 0,
+            'dropped': 0,
+            'dropped_on_shutdown': 0,
+            'max_depth': 0,
+            'busy_workers': 0,
+            'wait_ms_total': 0.0,
+            'wait_ms_max': 0.0,
+            'processing_ms_total': 0.0,
+            'processing_ms_max': 0.0,
+            'last_processed': None
+        }
+
+    async def start(self):
+        """Démarre les workers sur la boucle d'événements courante"""
+        if self.is_running or not self.enabled:
+            return
+
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-worker-{index}")
+            for index in range(self.worker_count)
+        ]
+        self.is_running = True
+        logger.info(f"File {self.name.upper()} démarrée - workers: {self.worker_count}, file max: {self.max_queue}")
+
+    async def stop(self):
+        """Refuse les nouvelles payloads, vide la file puis arrête les workers"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        try:
+            await asyncio.wait_for(self._queue.join(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            dropped = self._queue.qsize()
+            self.stats['dropped_on_shutdown'] += dropped
+            logger.warning(f"File {self.name.upper()} : {dropped} requêtes abandonnées après {self.drain_timeout}s de drainage")
+
+        if self._delayed:
+            logger.warning(f"File {self.name.upper()} : {len(self._delayed)} requêtes en attente de remise en file abandonnées")
+            for task in self._delayed:
+                task.cancel()
+            await asyncio.gather(*self._delayed, return_exceptions=True)
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        logger.info(f"File {self.name.upper()} arrêtée - {self.stats['processed']} requêtes traitées")
+
+    def submit(self, payload: Dict[str, Any]) -> bool:
+        """
+        Dépose une payload dans la file
+
+        Args:
+            payload: Payload enrichie par le dispatcher
+
+        Returns:
+            True si la payload a été prise en charge, False si la file est pleine ou arrêtée
+        """
+        if not self.is_running:
+            return False
+
+        try:
+            self._queue.put_nowait((payload, time.perf_counter(), 0))
+        except asyncio.QueueFull:
+            self.stats['rejected'] += 1
+            return False
+
+        self.stats['submitted'] += 1
+        depth = self._queue.qsize()
+        if depth > self.stats['max_depth']:
+            self.stats['max_depth'] = depth
+        return True
+
+    @property
+    def queue_depth(self) -> int:
+        """Nombre de payloads en attente"""
+        return self._queue.qsize() if self._queue else 0
+
+    def retry_after(self) -> int:
+        """
+        Délai conseillé (secondes) avant une nouvelle tentative : temps estimé
+        pour que les workers écoulent la file actuelle
+
+        Returns:
+            Nombre entier de secondes, au moins 1
+        """
+        processed = self.stats['processed'] + self.stats['failed']
+        if not processed:
+            return 1
+        average_s = self.stats['processing_ms_total'] / processed / 1000
+        return max(1, math.ceil(self.queue_depth * average_s / self.worker_count))
+
+    async def _worker(self):
+        """Boucle d'un worker : une payload à la fois, les erreurs n'arrêtent pas le worker"""
+        while True:
+            payload, enqueued_at, attempt = await self._queue.get()
+            started_at = time.perf_counter()
+            self._record('wait_ms', (started_at - enqueued_at) * 1000)
+            self.stats['busy_workers'] += 1
+            refused = False
+            try:
+                await self.handler(payload)
+                self.stats['processed'] += 1
+            except Exception as e:
+                # Refus du protocole (ProtocolOverloadedException et dérivées) : le handler
+                # n'a pas été exécuté, la payload est réessayée après le délai indiqué
+                retry_after = getattr(e, 'retry_after', None)
+                if retry_after is None:
+                    self.stats['failed'] += 1
+                    logger.error(f"Erreur du worker {self.name.upper()} pour IMEI {payload.get('imei')}: {e}")
+                else:
+                    refused = True
+                    self.stats['refused'] += 1
+                    self._retry_later(payload, attempt, retry_after, e)
+            finally:
+                self.stats['busy_workers'] -= 1
+                if not refused:
+                    self._record('processing_ms', (time.perf_counter() - started_at) * 1000)
+                    self.stats['last_processed'] = datetime.now().isoformat()
+                self._queue.task_done()
+
+    def _retry_later(self, payload: Dict[str, Any], attempt: int, delay: float, error: Exception):
+        """Programme la remise en file d'une payload refusée, ou l'abandonne (journalisé)"""
+        if attempt >= self.max_retries or not self.is_running:
+            self.stats['dropped'] += 1
+            logger.warning(
+                f"File {self.name.upper()} : requête abandonnée pour IMEI {payload.get('imei')} "
+                f"après {attempt + 1} tentatives - {error}"
+            )
+            return
+
+        self.stats['retried'] += 1
+        task = asyncio.create_task(self._requeue(payload, attempt + 1, delay))
+        self._delayed.add(task)
+        task.add_done_callback(self._delayed.discard)
+
+    async def _requeue(self, payload: Dict[str, Any], attempt: int, delay: float):
+        """Remet la payload en file une fois le délai écoulé"""
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.stats['dropped_on_shutdown'] += 1
+            raise
+
+        if not self.is_running:
+            self.stats['dropped_on_shutdown'] += 1
+            return
+        try:
+            self._queue.put_nowait((payload, time.perf_counter(), attempt))
+        except asyncio.QueueFull:
+            self.stats['dropped'] += 1
+            logger.warning(
+                f"File {self.name.upper()} pleine : requête abandonnée pour IMEI {payload.get('imei')} "
+                f"à sa remise en file (tentative {attempt + 1})"
+            )
+
+    def _record(self, metric: str, value_ms: float):
+        """Cumule une durée et conserve le maximum observé"""
+        self.stats[f'{metric}_total'] += value_ms
+        if value_ms > self.stats[f'{metric}_max']:
+            self.stats[f'{metric}_max'] = value_ms
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne les statistiques de la file
+
+        Returns:
+            Compteurs, profondeur, latences moyennes/maximales et configuration
+        """
+        done = self.stats['processed'] + self.stats['failed']
+        # La latence d'attente est enregistrée dès qu'un worker prend la payload
+        started = done + self.stats['refused'] + self.stats['busy_workers']
+        return {
+            **self.stats,
+            'wait_ms_total': round(self.stats['wait_ms_total'], 2),
+            'wait_ms_max': round(self.stats['wait_ms_max'], 2),
+            'wait_ms_avg': round(self.stats['wait_ms_total'] / started, 2) if started else 0,
+            'processing_ms_total': round(self.stats['processing_ms_total'], 2),
+            'processing_ms_max': round(self.stats['processing_ms_max'], 2),
+            'processing_ms_avg': round(self.stats['processing_ms_total'] / done, 2) if done else 0,
+            'protocol': self.name,
+            'enabled': self.enabled,
+            'is_running': self.is_running,
+            'queue_depth': self.queue_depth,
+            'max_queue': self.max_queue,
+            'workers': self.worker_count,
+            'max_retries': self.max_retries,
+            'pending_retries': len(self._delayed),
+            'drain_timeout_seconds': self.drain_timeout
+        }
+
+
+async def _run_ss7(payload: Dict[str, Any]) -> None:
+    """Exécute le handler SS7 via le dispatcher, qui enregistre ses métriques"""
+    # Import tardif : le dispatcher importe ce module
+    from .dispatcher import run_handler
+    await run_handler("ss7", payload)
+
+
+# File des requêtes SS7 (fire-and-forget)
+ss7_work_queue = ProtocolWorkQueue(
+    "ss7",
+    _run_ss7,
+    max_queue=int(os.getenv("SS7_QUEUE_MAX_SIZE", "1000")),
+    workers=int(os.getenv("SS7_QUEUE_WORKERS", "16")),
+    drain_timeout=float(os.getenv("SS7_QUEUE_DRAIN_TIMEOUT_SECONDS", "10")),
+    enabled=os.getenv("SS7_QUEUE_ENABLED", "true").lower() == "true",
+    max_retries=int(os.getenv("SS7_QUEUE_MAX_RETRIES", "3"))
+)
+
+# Files par protocole, consultées par le dispatcher
+WORK_QUEUES: Dict[str, ProtocolWorkQueue] = {
+    "ss7": ss7_work_queue
+}
+
+async def start_ss7_queue():
+    """
+    Démarre les workers de la file SS7
+    À appeler au démarrage de l'application FastAPI
+    """
+    await ss7_work_queue.start()
+
+async def stop_ss7_queue():
+    """
+    Vide et arrête la file SS7
+    À appeler à l'arrêt de l'application FastAPI
+    """
+    await ss7_work_queue.stop()
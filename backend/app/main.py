@@ -1,8 +1,10 @@
 from fastapi import FastAPI, Depends, HTTPException, Query, Request, status, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import func, desc, text
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
@@ -17,13 +19,25 @@ import logging
 
 
 from app.models.email_verification import EmailVerification
-from .core.dependencies import get_db, get_current_user, get_current_user_optional, get_admin_user
+from .core.dependencies import (
+    get_db, get_async_db, get_current_user, get_current_user_optional, get_admin_user,
+    get_current_user_optional_async
+)
 from .core.permissions import PermissionManager, Operation, AccessLevel, require_permission, require_niveau_acces
 from .core.i18n_deps import get_current_translator, get_language_from_request
-from .core.audit_deps import get_audit_service
+from .core.audit_deps import get_audit_service, get_deferred_audit_service, get_deferred_audit_service_async
 from .i18n import get_translator, SUPPORTED_LANGUAGES
-from .services.audit import AuditService
-from .services.eir_notifications import EIRNotificationService
+from .services.audit import AuditService, AsyncAuditService
+from .services.imei_cache import imei_status_cache
+from .services.imei_validation import imei_acceptable
+from .services.tac_index import tac_index
+from .services.tac_import import importer_tac_csv
+from .services.tac_sync import SOURCES_SYNC_TAC, synchroniser_tac_source
+from .core.user_cache import user_snapshot_cache
+from .core.imei_rules import get_imei_rules
+from .services.imei_stream import FORMATS, detect_format, iter_imei_chunks, ndjson_line, DuplexStreamingResponse
+from .tasks.write_behind import write_behind_buffer
+from .tasks.notification_outbox import notification_outbox, EVENEMENT_VERIFICATION_IMEI, EVENEMENT_NOUVEL_APPAREIL
 from .routes.auth import router as auth_router
 from .routes.access_management import router as access_router
 from .models.appareil import Appareil
@@ -33,6 +47,7 @@ from .models.sim import SIM
 from .models.notification import Notification
 from .models.journal_audit import JournalAudit
 from .models.imei import IMEI
+from .schemas.device import VerificationLotIMEI, ValidationLotIMEI
 import platform
 
 # Configuration du logger
@@ -165,6 +180,18 @@ from fastapi.middleware.cors import CORSMiddleware # Assuming you use FastAPI
 
 
 
+# Compteurs de connexions/requêtes SQL par requête, exposés en en-têtes (débogage)
+from .core.db_metrics import DB_DEBUG_HEADERS, DBMetricsMiddleware, install_db_metrics
+if DB_DEBUG_HEADERS:
+    from .core.database import engine, async_engine
+    install_db_metrics(engine, async_engine.sync_engine)
+    app.add_middleware(DBMetricsMiddleware)
+
+# Contrôle d'admission par classe de trafic (réseau, API authentifiée, visiteur)
+from .core.admission import ADMISSION_CONTROL_ENABLED, AdmissionControlMiddleware, admission_controller
+if ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware, controller=admission_controller)
+
 # Configuration CORS pour permettre les requêtes depuis le frontend
 app.add_middleware(
     CORSMiddleware,
@@ -763,6 +790,87 @@ def statistiques_publiques(
         }
 
 
+def construire_reponse_imei(imei: str, imei_record: Optional[dict], niveau_acces_utilisateur: str,
+                            access_details: dict, recherche_id, translator) -> dict:
+    """
+    Construit la réponse de recherche IMEI selon le niveau d'accès
+    Partagée par la recherche unitaire et la vérification par lot
+    
+    Args:
+        imei: Numéro IMEI recherché
+        imei_record: Projection IMEI/appareil (voir services.imei_cache), None si inconnu
+        niveau_acces_utilisateur: Niveau d'accès de l'utilisateur
+        access_details: Contexte retourné par PermissionManager.can_access_imei
+        recherche_id: ID de la ligne d'historique de recherche
+        translator: Traducteur de la requête
+    """
+    if imei_record:
+        appareil = imei_record["appareil"]
+        
+        # Build base response
+        response_data = {
+            "id": imei_record["id"],
+            "imei": imei,
+            "trouve": True,
+            "statut": imei_record["statut"],
+            "numero_slot": imei_record["numero_slot"],
+            "message": translator.translate("imei_trouve"),
+            "recherche_enregistree": True,
+            "id_recherche": str(recherche_id),
+            "contexte_acces": {
+                "niveau_acces": niveau_acces_utilisateur,
+                "motif_acces": access_details["raison"],
+                "portee_donnees": access_details["portee_donnees"]
+            }
+        }
+        
+        # Ajouter les informations d'appareil selon le niveau d'accès
+        if niveau_acces_utilisateur in ["limited", "standard", "elevated", "admin"]:
+            info_appareil = {
+                "id": appareil["id"],
+                "marque": appareil["marque"],
+                "modele": appareil["modele"],
+                "emmc": appareil["emmc"],
+                "numero_serie": appareil["numero_serie"]  # Include SNR
+            }
+            
+            # Add ownership info for elevated users and admins
+            if niveau_acces_utilisateur in ["elevated", "admin"]:
+                info_appareil["utilisateur_id"] = appareil["utilisateur_id"]
+                
+                # Ajouter les détails complets d'appareil pour les admins
+                # (la table appareil ne porte pas de dates de création/modification)
+                if niveau_acces_utilisateur == "admin":
+                    info_appareil.update({
+                        "created_date": None,
+                        "last_updated": None
+                    })
+            
+            response_data["appareil"] = info_appareil
+        else:
+            # Informations limitées pour visiteurs et utilisateurs de base
+            response_data["appareil"] = {
+                "marque": appareil["marque"],
+                "modele": appareil["modele"],
+                "numero_serie": appareil["numero_serie"]  # Include SNR even for basic users
+            }
+        
+        return response_data
+    
+    # IMEI not found response
+    return {
+        "imei": imei,
+        "trouve": False,
+        "message": translator.translate("erreur_imei_non_trouve"),
+        "recherche_enregistree": True,
+        "id_recherche": str(recherche_id),
+        "contexte_acces": {
+            "niveau_acces": niveau_acces_utilisateur,
+            "motif_acces": access_details["raison"]
+        }
+    }
+
+
 @app.get(
     "/imei/{imei}",
     tags=["IMEI", "Public"],
@@ -773,10 +881,10 @@ def statistiques_publiques(
 async def verifier_imei(
     imei: str,
     request: Request,
-    db: Session = Depends(get_db),
-    user = Depends(get_current_user_optional),
+    db: AsyncSession = Depends(get_async_db),
+    user = Depends(get_current_user_optional_async),
     translator = Depends(get_current_translator),
-    audit_service: AuditService = Depends(get_audit_service)
+    audit_service: AsyncAuditService = Depends(get_deferred_audit_service_async)
 ):
     """
     ## Service de Recherche IMEI Amélioré avec Contrôle d'Accès Granulaire
@@ -795,6 +903,7 @@ async def verifier_imei(
     - Toutes les recherches sont journalisées dans la table Recherche pour le suivi d'historique
     - Les tentatives d'accès sont auditées pour la surveillance de sécurité
     - Les vérifications de permissions sont journalisées pour la conformité
+    - Ces lignes sont écrites en différé par lots (write-behind) : la réponse n'attend pas de commit
     
     ### Paramètres :
     - **imei** : Numéro IMEI à 15 chiffres à rechercher
@@ -810,11 +919,14 @@ async def verifier_imei(
         niveau_acces_utilisateur = user.niveau_acces or "basique"
     
     # Check if user can access this specific IMEI
-    can_access, access_details = PermissionManager.can_access_imei(user, imei, db)
+    # (run_sync : les éventuelles requêtes du contrôle passent par l'AsyncSession sans bloquer la boucle)
+    can_access, access_details = await db.run_sync(
+        lambda session: PermissionManager.can_access_imei(user, imei, session)
+    )
     
     if not can_access:
         # Log denied access attempt
-        audit_service.log_access_attempt(
+        await audit_service.log_access_attempt(
             user_id=str(user.id) if user else None,
             operation="read_imei",
             entity_type="imei",
@@ -829,8 +941,8 @@ async def verifier_imei(
             detail=f"Access denied: {access_details['raison']}"
         )
     
-    # Search for IMEI
-    imei_record = db.query(IMEI).filter(IMEI.numero_imei == imei).first()
+    # Search for IMEI (projection IMEI + appareil servie par le cache en mémoire)
+    imei_record = await imei_status_cache.get_or_load_async(imei, db)
     found = imei_record is not None
     
     # Log the search in Recherche table (for search history)
@@ -840,10 +952,14 @@ async def verifier_imei(
         imei_recherche=imei,
         utilisateur_id=user.id if user else None
     )
-    db.add(recherche)
+    if not write_behind_buffer.enqueue_recherche(
+        recherche.id, imei, recherche.utilisateur_id, recherche.date_recherche
+    ):
+        # Tampon arrêté ou plein : écriture synchrone
+        db.add(recherche)
     
     # Log successful access in audit service
-    audit_service.log_access_attempt(
+    await audit_service.log_access_attempt(
         user_id=str(user.id) if user else None,
         operation="read_imei",
         entity_type="imei", 
@@ -854,100 +970,279 @@ async def verifier_imei(
     )
     
     # Log IMEI search for tracking
-    audit_service.log_imei_search(
+    await audit_service.log_imei_search(
         imei=imei,
         user_id=str(user.id) if user else None,
         found=found
     )
     
-    # Commit logs
-    db.commit()
-    
-    if imei_record:
-        appareil = imei_record.appareil
-        
-        # Build base response
-        response_data = {
-            "id": str(imei_record.id),
-            "imei": imei,
-            "trouve": True,
-            "statut": imei_record.statut,
-            "numero_slot": imei_record.numero_slot,
-            "message": translator.translate("imei_trouve"),
-            "recherche_enregistree": True,
-            "id_recherche": str(recherche.id),
-            "contexte_acces": {
-                "niveau_acces": niveau_acces_utilisateur,
-                "motif_acces": access_details["raison"],
-                "portee_donnees": access_details["portee_donnees"]
+    # 📧 IMEI verification result email (only for authenticated users), sent after
+    # the response by the outbox worker and coalesced per user into a digest
+    if user and imei_record:
+        appareil = imei_record["appareil"] or {}
+        notification_outbox.publier(
+            db,
+            EVENEMENT_VERIFICATION_IMEI,
+            user.id,
+            {
+                "imei": imei,
+                "statut": "blackliste" if imei_record["statut"] == "bloque" else "valide",
+                "raison": f"Statut IMEI: {imei_record['statut']}",
+                "marque": appareil.get("marque"),
+                "modele": appareil.get("modele"),
+                "date_verification": datetime.now().strftime('%d/%m/%Y à %H:%M')
             }
+        )
+    
+    # Commit logs written synchronously (buffer fallback) and the outbox event
+    if db.new:
+        await db.commit()
+    
+    return construire_reponse_imei(
+        imei, imei_record, niveau_acces_utilisateur, access_details, recherche.id, translator
+    )
+
+@app.post(
+    "/imei/batch",
+    tags=["IMEI", "Intégration"],
+    summary="Vérification IMEI par Lot",
+    description="Vérifier jusqu'à plusieurs milliers d'IMEI en une requête, résolus par une seule requête SQL",
+    response_model=None
+)
+def verifier_lot_imei(
+    donnees_lot: VerificationLotIMEI,
+    request: Request,
+    db: Session = Depends(get_db),
+    user: Utilisateur = Depends(get_current_user),
+    translator = Depends(get_current_translator),
+    audit_service: AuditService = Depends(get_deferred_audit_service)
+):
+    """
+    ## Vérification IMEI par Lot
+    
+    Destiné aux intégrations MSC/MME et aux opérateurs partenaires qui vérifient
+    des IMEI par rafales.
+    
+    ### Traitement :
+    - Les IMEI absents du cache sont résolus par une seule requête (IN) jointe à `appareil`
+    - Le contrôle d'accès `PermissionManager.can_access_imei` est appliqué à chaque IMEI
+    - L'historique de recherche est enregistré en un seul INSERT multi-lignes
+    - Chaque résultat est identique à celui de `GET /imei/{imei}` pour le même niveau d'accès
+    - Aucun email de vérification n'est envoyé pour les lots
+    
+    ### Paramètres :
+    - **imeis** : Liste de 1 à 5000 numéros IMEI
+    
+    ### Réponse :
+    - **resultats** : Un élément par IMEI demandé, dans l'ordre de la requête ;
+      les IMEI refusés portent `acces_refuse: true`
+    """
+    if not PermissionManager.has_permission(user, Operation.SEARCH_IMEI):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Permission refusée: Impossible de rechercher des IMEI"
+        )
+    
+    niveau_acces_utilisateur = user.niveau_acces or "basique"
+    # Lu avant le commit : l'accès après commit rechargerait l'utilisateur (nouvelle connexion)
+    user_id = str(user.id)
+    imeis = [imei.strip() for imei in donnees_lot.imeis]
+    ip_address = request.client.host if request.client else None
+    
+    # Résolution de tous les IMEI en une requête (les entrées en cache ne sont pas relues)
+    projections = imei_status_cache.get_many_or_load(imeis, db)
+    
+    resultats = []
+    lignes_recherche = []
+    now = datetime.now()
+    trouves = refuses = 0
+    
+    for imei in imeis:
+        can_access, access_details = PermissionManager.can_access_imei(user, imei, db)
+        
+        if not can_access:
+            refuses += 1
+            audit_service.log_access_attempt(
+                user_id=user_id,
+                operation="read_imei",
+                entity_type="imei",
+                entity_id=imei,
+                success=False,
+                raison=access_details["raison"],
+                ip_address=ip_address
+            )
+            resultats.append({
+                "imei": imei,
+                "acces_refuse": True,
+                "message": f"Access denied: {access_details['raison']}"
+            })
+            continue
+        
+        imei_record = projections.get(imei)
+        if imei_record:
+            trouves += 1
+        
+        recherche_id = uuid.uuid4()
+        lignes_recherche.append({
+            "id": recherche_id,
+            "date_recherche": now,
+            "imei_recherche": imei,
+            "utilisateur_id": user.id
+        })
+        resultats.append(construire_reponse_imei(
+            imei, imei_record, niveau_acces_utilisateur, access_details, recherche_id, translator
+        ))
+    
+    # Historique de recherche : un seul INSERT multi-lignes
+    if lignes_recherche:
+        db.execute(Recherche.__table__.insert(), lignes_recherche)
+        db.commit()
+    
+    audit_service.log_action(
+        action=f"Batch IMEI verification: {len(imeis)} IMEIs",
+        user_id=user_id,
+        entity_type="imei_batch",
+        details={
+            "total": len(imeis),
+            "trouves": trouves,
+            "refuses": refuses,
+            "ip_address": ip_address
         }
+    )
+    
+    return {
+        "total": len(imeis),
+        "trouves": trouves,
+        "non_trouves": len(imeis) - trouves - refuses,
+        "refuses": refuses,
+        "resultats": resultats,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post(
+    "/imei/stream",
+    tags=["IMEI", "Intégration"],
+    summary="Vérification IMEI en Flux (NDJSON/CSV)",
+    description="Vérifier des millions d'IMEI en flux : entrée NDJSON ou CSV, sortie NDJSON",
+    response_model=None
+)
+async def verifier_flux_imei(
+    request: Request,
+    format_entree: Optional[str] = Query(None, alias="format", description="Format d'entrée : ndjson ou csv (déduit du Content-Type sinon)"),
+    user: Utilisateur = Depends(get_current_user),
+    translator = Depends(get_current_translator)
+):
+    """
+    ## Vérification IMEI en Flux
+    
+    Destiné aux travaux de rapprochement qui confrontent des millions d'IMEI à l'EIR.
+    
+    ### Entrée (corps de requête, éventuellement chunked) :
+    - **NDJSON** : une ligne par IMEI, `"352..."` ou `{"imei": "352..."}`
+    - **CSV** : IMEI en première colonne, en-tête optionnel
+    
+    ### Traitement :
+    - Le corps est lu au fil de l'eau et découpé en lots de `IMEI_STREAM_CHUNK_SIZE` IMEI
+    - Chaque lot est résolu par une seule requête (même projection que `GET /imei/{imei}`)
+    - Les résultats sont renvoyés en NDJSON dès qu'un lot est traité ;
+      la mémoire utilisée ne dépend pas de la taille de l'entrée
+    
+    ### Sortie (NDJSON) :
+    - Une ligne par IMEI, identique à la réponse de `GET /imei/{imei}`
+    - Une ligne `{"ligne": n, "erreur": ...}` par ligne d'entrée illisible
+    - Une dernière ligne `{"resume": {...}}` avec les totaux
+    """
+    if not PermissionManager.has_permission(user, Operation.SEARCH_IMEI):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Permission refusée: Impossible de rechercher des IMEI"
+        )
+    
+    fmt = detect_format(request.headers.get("content-type"), format_entree)
+    if fmt not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Format non supporté: {fmt}. Formats acceptés: {', '.join(FORMATS)}"
+        )
+    
+    niveau_acces_utilisateur = user.niveau_acces or "basique"
+    ip_address = request.client.host if request.client else None
+    chunk_size = int(os.getenv("IMEI_STREAM_CHUNK_SIZE", "1000"))
+    
+    def traiter_lot(db: Session, imeis: List[str], totaux: dict) -> List[dict]:
+        """Résout un lot d'IMEI en une requête et enregistre son historique de recherche"""
+        # Sans insertion dans le cache : un flux de millions d'IMEI évincerait les IMEI chauds
+        projections = imei_status_cache.get_many_or_load(imeis, db, populate=False)
+        resultats = []
+        lignes_recherche = []
+        now = datetime.now()
         
-        # Ajouter les informations d'appareil selon le niveau d'accès
-        if niveau_acces_utilisateur in ["limited", "standard", "elevated", "admin"]:
-            info_appareil = {
-                "id": str(appareil.id),
-                "marque": appareil.marque,
-                "modele": appareil.modele,
-                "emmc": appareil.emmc,
-                "numero_serie": appareil.numero_serie  # Include SNR
-            }
+        for imei in imeis:
+            can_access, access_details = PermissionManager.can_access_imei(user, imei, db, projections)
+            if not can_access:
+                totaux["refuses"] += 1
+                resultats.append({
+                    "imei": imei,
+                    "acces_refuse": True,
+                    "message": f"Access denied: {access_details['raison']}"
+                })
+                continue
             
-            # Add ownership info for elevated users and admins
-            if niveau_acces_utilisateur in ["elevated", "admin"]:
-                info_appareil["utilisateur_id"] = str(appareil.utilisateur_id) if appareil.utilisateur_id else None
-                
-                # Ajouter les détails complets d'appareil pour les admins
-                if niveau_acces_utilisateur == "admin":
-                    info_appareil.update({
-                        "created_date": appareil.date_creation.isoformat() if hasattr(appareil, 'date_creation') else None,
-                        "last_updated": appareil.date_modification.isoformat() if hasattr(appareil, 'date_modification') else None
-                    })
+            imei_record = projections.get(imei)
+            if imei_record:
+                totaux["trouves"] += 1
             
-            response_data["appareil"] = info_appareil
-        else:
-            # Informations limitées pour visiteurs et utilisateurs de base
-            response_data["appareil"] = {
-                "marque": appareil.marque,
-                "modele": appareil.modele,
-                "numero_serie": appareil.numero_serie  # Include SNR even for basic users
-            }
-        
-        # 📧 Send IMEI verification result email (only for authenticated users)
-        if user:
-            try:
-                await EIRNotificationService.notifier_verification_imei(
-                    user_id=str(user.id),
-                    imei=imei,
-                    resultat="valide" if found else "invalide",
-                    details={
-                        "marque": appareil.marque if found else "Inconnue",
-                        "modele": appareil.modele if found else "Inconnu",
-                        "numero_serie": appareil.numero_serie if found else "N/A",
-                        "tac": imei[:8] if len(imei) >= 8 else "N/A",
-                        "snr": imei[8:14] if len(imei) >= 14 else "N/A",
-                        "luhn_valide": True,  # Simplified for demo
-                        "info_supplementaire": f"Vérification via niveau d'accès: {niveau_acces_utilisateur}"
-                    }
-                )
-                logger.info(f"IMEI verification email sent to user: {user.email}")
-            except Exception as e:
-                logger.warning(f"Failed to send IMEI verification email: {str(e)}")
+            recherche_id = uuid.uuid4()
+            lignes_recherche.append({
+                "id": recherche_id,
+                "date_recherche": now,
+                "imei_recherche": imei,
+                "utilisateur_id": user.id
+            })
+            resultats.append(construire_reponse_imei(
+                imei, imei_record, niveau_acces_utilisateur, access_details, recherche_id, translator
+            ))
+        
+        # Historique de recherche : un INSERT multi-lignes par lot
+        if lignes_recherche:
+            db.execute(Recherche.__table__.insert(), lignes_recherche)
+            db.commit()
         
-        return response_data
+        return resultats
     
-    # IMEI not found response
-    return {
-        "imei": imei,
-        "trouve": False,
-        "message": translator.translate("erreur_imei_non_trouve"),
-        "recherche_enregistree": True,
-        "id_recherche": str(recherche.id),
-        "contexte_acces": {
-            "niveau_acces": niveau_acces_utilisateur,
-            "motif_acces": access_details["raison"]
-        }
-    }
+    async def generer_resultats():
+        # Session propre au flux : celle de get_db est fermée avant l'envoi de la réponse
+        db = SessionLocal()
+        totaux = {"total": 0, "trouves": 0, "refuses": 0, "erreurs": 0}
+        try:
+            async for imeis, erreurs in iter_imei_chunks(request.stream(), fmt, chunk_size):
+                totaux["erreurs"] += len(erreurs)
+                sortie = [ndjson_line(erreur) for erreur in erreurs]
+                
+                if imeis:
+                    totaux["total"] += len(imeis)
+                    resultats = await run_in_threadpool(traiter_lot, db, imeis, totaux)
+                    sortie.extend(ndjson_line(resultat) for resultat in resultats)
+                
+                yield b"".join(sortie)
+            
+            totaux["non_trouves"] = totaux["total"] - totaux["trouves"] - totaux["refuses"]
+            yield ndjson_line({"resume": {**totaux, "timestamp": datetime.now().isoformat()}})
+            
+            AuditService(db, write_behind=write_behind_buffer).log_action(
+                action=f"Streaming IMEI verification: {totaux['total']} IMEIs",
+                user_id=str(user.id),
+                entity_type="imei_batch",
+                details={**totaux, "format": fmt, "ip_address": ip_address}
+            )
+        except Exception as e:
+            logger.error(f"Erreur lors de la vérification IMEI en flux: {e}")
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    return DuplexStreamingResponse(generer_resultats(), media_type="application/x-ndjson")
 
 # APIs de Gestion d'Appareils Améliorées avec contrôle d'accès granulaire
 @app.post("/appareils", tags=["Appareils"])
@@ -1048,9 +1343,25 @@ async def enregistrer_appareil(
         db.add(imei)
         numeros_imei.append(imei.numero_imei)
     
+    # 📧 New device registration email, sent after the response by the outbox worker
+    notification_outbox.publier(
+        db,
+        EVENEMENT_NOUVEL_APPAREIL,
+        user.id,
+        {
+            "marque": appareil.marque,
+            "modele": appareil.modele,
+            "emmc": appareil.emmc,
+            "numero_serie": appareil.numero_serie,
+            "imeis": [{"numero": numero, "slot": i+1} for i, numero in enumerate(numeros_imei)]
+        }
+    )
+    
     try:
         db.commit()
         db.refresh(appareil)
+        # Les IMEI créés ont pu être mis en cache comme inconnus
+        imei_status_cache.invalidate(numeros_imei)
     except Exception as e:
         db.rollback()
         # Vérifier si c'est une erreur de contrainte d'unicité sur l'IMEI
@@ -1078,22 +1389,6 @@ async def enregistrer_appareil(
         }
     )
     
-    # 📧 Send new device registration email
-    try:
-        await EIRNotificationService.notifier_nouvel_appareil(
-            user_id=str(user.id),
-            appareil_details={
-                "marque": appareil.marque,
-                "modele": appareil.modele,
-                "emmc": appareil.emmc,
-                "numero_serie": appareil.numero_serie,
-                "imeis": [{"numero": imei, "slot": i+1} for i, imei in enumerate(numeros_imei)]
-            }
-        )
-        logger.info(f"New device registration email sent to user: {user.email}")
-    except Exception as e:
-        logger.warning(f"Failed to send device registration email: {str(e)}")
-    
     return {
         "id": str(appareil.id),
         "marque": appareil.marque,
@@ -1165,37 +1460,25 @@ def list_searches(
         from .models.utilisateur import Utilisateur as UserModel
         org_user_ids = [u.id for u in db.query(UserModel).filter(UserModel.organisation == organisation).all()]
         query = query.filter(Recherche.utilisateur_id.in_(org_user_ids))
-    elif portee == "marques" and marques_autorisees:
+    elif portee_value == "marques" and marques_autorisees:
         # Filter by IMEIs belonging to allowed brands (requires IMEI->Appareil->marque join)
         from .models.imei import IMEI as IMEIModel
         from .models.appareil import Appareil as DeviceModel
         imei_subq = db.query(IMEIModel.numero_imei).join(DeviceModel, IMEIModel.appareil_id == DeviceModel.id).filter(DeviceModel.marque.in_(marques_autorisees)).subquery()
         query = query.filter(Recherche.imei_recherche.in_(imei_subq))
-    elif portee == "plages" and plages_imei_autorisees:
-        # Filter by IMEIs matching allowed ranges
-        # This requires custom logic, so we fetch all and filter in Python
-        all_searches = query.order_by(Recherche.date_recherche.desc()).all()
-        def imei_in_ranges(imei):
-            for rule in plages_imei_autorisees:
-                from .core.permissions import PermissionManager
-                if PermissionManager._imei_matches_rule(imei, rule):
-                    return True
-            return False
-        filtered_searches = [s for s in all_searches if imei_in_ranges(s.imei_recherche)]
-        total_count = len(filtered_searches)
-        searches = filtered_searches[skip:skip+limit]
-        return {
-            "searches": [
-                {
-                    "id": str(search.id),
-                    "date_recherche": format_datetime(search.date_recherche),
-                    "imei_recherche": search.imei_recherche,
-                    "utilisateur_id": str(search.utilisateur_id) if search.utilisateur_id else None
-                }
-                for search in searches
-            ],
-            "total_count": total_count
-        }
+    elif portee_value == "plages" and plages_imei_autorisees:
+        # Filter by IMEIs matching allowed ranges: règles traduites en prédicats SQL,
+        # le comptage et la pagination restent en base
+        regles_imei = get_imei_rules(user)
+        if regles_imei.sql_complete:
+            query = query.filter(regles_imei.sql_filter(Recherche.imei_recherche, db.bind.dialect.name))
+        else:
+            # Regex sans équivalent PostgreSQL : IMEI distincts de l'historique évalués en Python
+            imeis_autorises = [
+                imei for (imei,) in db.query(Recherche.imei_recherche).distinct()
+                if imei and regles_imei.matches(imei)
+            ]
+            query = query.filter(Recherche.imei_recherche.in_(imeis_autorises))
 
     # Filter by search term if provided
     if q:
@@ -1561,6 +1844,7 @@ def assign_device_to_user(
     
     # Get IMEIs for logging
     numero_imeis = [imei.numero_imei for imei in device.imeis]
+    imei_status_cache.invalidate(numero_imeis)
     
     # Log device assignment
     audit_service.log_device_assignment(
@@ -1600,6 +1884,7 @@ def delete_device(
     
     db.delete(appareil)
     db.commit()
+    imei_status_cache.invalidate(appareil_data["imeis"])
     
     # Journaliser la suppression de l'appareil
     audit_service.log_device_deletion(
@@ -1629,6 +1914,7 @@ def bulk_import_devices(
     """
     imported_count = 0
     errors = []
+    imported_imeis = []
     
     for device_data in devices_data:
         try:
@@ -1664,12 +1950,14 @@ def bulk_import_devices(
                         appareil_id=appareil.id
                     )
                 db.add(imei)
+                imported_imeis.append(imei.numero_imei)
             
             imported_count += 1
         except Exception as e:
             errors.append(f"{translator.translate('prefixe_erreur_import')} {device_data.get('marque', translator.translate('appareil_inconnu'))}: {str(e)}")
     
     db.commit()
+    imei_status_cache.invalidate(imported_imeis)
     
     # Journaliser l'opération d'import en lot
     audit_service.log_bulk_import(
@@ -1871,6 +2159,9 @@ async def bulk_import_from_file(
         # Commit successful imports
         if imported_count > 0:
             db.commit()
+            imei_status_cache.invalidate(
+                imei for device in successful_imports for imei in device["imeis"]
+            )
         
         # Log bulk import operation
         audit_service.log_bulk_import(
@@ -1960,7 +2251,7 @@ def validate_device_data(device_data: dict, row_number: int) -> None:
         imei_value = device_data.get(imei_field)
         if imei_value and imei_value.strip():
             imei_clean = imei_value.strip()
-            if not imei_clean.isdigit() or len(imei_clean) not in [14, 15]:
+            if not imei_acceptable(imei_clean):
                 raise ValueError(f"Format IMEI invalide pour {imei_field}: {imei_clean}")
     
     # Validate utilisateur_id format if provided
@@ -2345,6 +2636,7 @@ def add_imei_to_device(
     
     db.add(imei)
     db.commit()
+    imei_status_cache.invalidate([numero_imei])
     
     return {
         "message": translator.translate("imei_ajoute"),
@@ -2379,6 +2671,7 @@ def update_imei_status(
     new_status = status_data.get("statut")
     imei.statut = new_status
     db.commit()
+    imei_status_cache.invalidate([imei.numero_imei])
     
     # Journaliser le changement de statut IMEI
     audit_service.log_imei_status_change(
@@ -2548,10 +2841,9 @@ async def verify_imei_multi_protocol(
     request_data: dict,
     protocol: str = Query(default="rest", description="Protocole à utiliser (rest, ss7, diameter)"),
     request: Request = None,
-    db: Session = Depends(get_db),
-    user = Depends(get_current_user_optional),
+    user = Depends(get_current_user_optional_async),
     translator = Depends(get_current_translator),
-    audit_service: AuditService = Depends(get_audit_service)
+    audit_service: AsyncAuditService = Depends(get_deferred_audit_service_async)
 ):
     """
     ## Vérification IMEI Multi-Protocoles
@@ -2579,6 +2871,9 @@ async def verify_imei_multi_protocol(
     ### Codes d'Erreur :
     - **400** : Protocole non activé ou payload invalide
     - **422** : Protocole non supporté
+    - **503** (en-tête Retry-After), pour tous les protocoles : disjoncteur du protocole ouvert,
+      plafond de requêtes simultanées (`max_in_flight`) atteint, ou file SS7 pleine
+    - **504** : Délai du protocole dépassé (`timeouts` de `config/protocols.yml`) ; Diameter répond Result-Code 5012
     - **500** : Erreur de traitement
     """
     try:
@@ -2588,7 +2883,9 @@ async def verify_imei_multi_protocol(
             get_supported_protocols, 
             validate_payload,
             ProtocolNotEnabledException, 
-            UnsupportedProtocolException
+            UnsupportedProtocolException,
+            ProtocolOverloadedException,
+            ProtocolTimeoutException
         )
         
         # Validation des paramètres d'entrée
@@ -2627,7 +2924,7 @@ async def verify_imei_multi_protocol(
         
         # Log de la requête pour audit
         if audit_service:
-            audit_service.log_imei_search(
+            await audit_service.log_imei_search(
                 imei=imei,
                 user_id=str(user.id) if user else None,
                 found=True  # On mettra à jour selon le résultat
@@ -2635,7 +2932,7 @@ async def verify_imei_multi_protocol(
         
         # Traitement via le dispatcher
         try:
-            response = handle_incoming_request(protocol, enhanced_request_data)
+            response = await handle_incoming_request(protocol, enhanced_request_data)
             
             # Pour SS7 (fire-and-forget), construire une réponse de confirmation
             if protocol == "ss7":
@@ -2665,6 +2962,21 @@ async def verify_imei_multi_protocol(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail=str(e)
             )
+        
+        except ProtocolOverloadedException as e:
+            # File pleine, disjoncteur ouvert ou plafond de requêtes simultanées : réessayer plus tard
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        
+        except ProtocolTimeoutException as e:
+            # Délai configuré du protocole dépassé (Diameter répond lui-même 5012)
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail=str(e)
+            )
             
     except HTTPException:
         # Re-lever les HTTPExceptions
@@ -2699,12 +3011,13 @@ async def get_protocols_status(
     
     ### Informations Retournées :
     - **Protocoles supportés** et leur statut d'activation
+    - **État des disjoncteurs** par protocole (closed, open, half_open)
     - **Configuration actuelle** des timeouts et paramètres
-    - **Statistiques d'utilisation** (si utilisateur authentifié)
+    - **Statistiques d'utilisation** (administrateurs : requêtes, erreurs, latences p50/p95/p99, files)
     """
     try:
         # Import des modules d'intégration
-        from .interface_gateway.dispatcher import get_supported_protocols
+        from .interface_gateway.dispatcher import get_supported_protocols, get_circuit_states
         
         # Obtenir le statut des protocoles
         protocols_status = get_supported_protocols()
@@ -2714,30 +3027,32 @@ async def get_protocols_status(
             "protocols": protocols_status,
             "total_protocols": len(protocols_status),
             "active_protocols": sum(1 for active in protocols_status.values() if active),
+            "circuit_breakers": get_circuit_states(),
             "timestamp": datetime.now().isoformat()
         }
         
         # Informations supplémentaires pour les utilisateurs authentifiés
         if user:
             try:
-                from .config_loader import load_protocol_config
+                from .config_loader import load_protocol_config, protocol_config_watcher
                 config = load_protocol_config()
                 
                 response.update({
                     "timeouts": config.get("timeouts", {}),
+                    "circuit_breakers_config": config.get("circuit_breakers", {}),
                     "logging_config": config.get("logging", {}),
                     "user_access_level": user.niveau_acces if user else "public"
                 })
                 
+                # Version de la configuration en mémoire et état de la surveillance
+                if user.type_utilisateur == "administrateur":
+                    response["config_snapshot"] = protocol_config_watcher.get_stats()
+                
                 # Statistiques pour les administrateurs
                 if user.type_utilisateur == "administrateur":
-                    from .interface_gateway.handlers import rest_handler, ss7_handler, diameter_handler
+                    from .interface_gateway.dispatcher import get_protocol_statistics
                     
-                    response["statistics"] = {
-                        "rest": rest_handler.get_rest_statistics(),
-                        "ss7": ss7_handler.get_ss7_statistics(),
-                        "diameter": diameter_handler.get_diameter_statistics()
-                    }
+                    response["statistics"] = get_protocol_statistics()
             except ImportError as e:
                 response["config_error"] = f"Erreur de chargement de la configuration: {str(e)}"
         
@@ -2755,6 +3070,27 @@ async def get_protocols_status(
             "timestamp": datetime.now().isoformat()
         }
 
+@app.get(
+    "/metrics",
+    tags=["Système", "Intégration"],
+    summary="Métriques Prometheus",
+    description="Métriques des protocoles d'intégration au format texte Prometheus",
+    response_class=PlainTextResponse
+)
+async def get_prometheus_metrics():
+    """
+    ## Métriques des Protocoles (Prometheus)
+    
+    Par protocole : requêtes traitées, erreurs, refus (file pleine, plafond, circuit ouvert),
+    requêtes en cours, histogramme de latence, état du disjoncteur et profondeur des files
+    fire-and-forget.
+    Par classe de trafic : requêtes admises en cours, file d'admission et rejets.
+    Les compteurs sont propres à chaque worker de l'application.
+    """
+    from .interface_gateway.dispatcher import render_prometheus_metrics
+    body = render_prometheus_metrics() + admission_controller.render_prometheus_metrics()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get(
     "/imei/{imei}/validate",
     tags=["IMEI", "TAC"],
@@ -2790,13 +3126,8 @@ def valider_imei_avec_tac_endpoint(
     - Journalisation automatique des validations
     """
     try:
-        # Exécuter la fonction PostgreSQL de validation TAC
-        result = db.execute(
-            text("SELECT valider_imei_avec_tac(:imei)"),
-            {"imei": imei}
-        ).fetchone()
-        
-        validation_result = result[0] if result else {}
+        # Validation TAC + Luhn depuis l'index mémoire (repli SQL si l'index n'est pas chargé)
+        validation_result = tac_index.validate_imei(imei, db)
         
         # Enregistrer la recherche de validation
         recherche = Recherche(
@@ -2833,6 +3164,77 @@ def valider_imei_avec_tac_endpoint(
             detail=f"Erreur lors de la validation IMEI: {str(e)}"
         )
 
+# Nombre maximal d'IMEI dont le résultat détaillé est renvoyé par /imei/validate-batch
+IMEI_VALIDATE_BATCH_MAX_DETAILS = int(os.getenv("IMEI_VALIDATE_BATCH_MAX_DETAILS", "10000"))
+
+@app.post(
+    "/imei/validate-batch",
+    tags=["IMEI", "TAC"],
+    summary="Validation IMEI par Lot avec base TAC",
+    description="Valider jusqu'à un million d'IMEI (Luhn + base TAC) en une requête, sans requête SQL par IMEI",
+    response_model=None
+)
+def valider_lot_imei_avec_tac(
+    donnees_lot: ValidationLotIMEI,
+    request: Request,
+    user: Utilisateur = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    audit_service: AuditService = Depends(get_deferred_audit_service)
+):
+    """
+    ## Validation IMEI par Lot avec Base TAC
+
+    Remplace la fonction SQL `valider_lot_imeis_avec_tac` (limitée à 100 IMEI).
+
+    ### Traitement :
+    - Nettoyage, contrôle de format, Luhn et extraction du TAC vectorisés (NumPy)
+    - Jointure avec les clés de l'index TAC par recherche dichotomique
+    - Chaque résultat est identique à celui de `GET /imei/{imei}/validate`
+    - Aucune recherche n'est enregistrée dans l'historique (une entrée d'audit par lot)
+
+    ### Paramètres :
+    - **imeis** : Liste de 1 à 1 000 000 d'IMEI
+    - **details** : Inclure le résultat de chaque IMEI (limité à `IMEI_VALIDATE_BATCH_MAX_DETAILS`)
+
+    ### Réponse :
+    - Compteurs (valides, invalides, format invalide, Luhn invalide, TAC inconnus)
+    - **results** : Un élément par IMEI, dans l'ordre de la requête (si `details`)
+    """
+    if donnees_lot.details and len(donnees_lot.imeis) > IMEI_VALIDATE_BATCH_MAX_DETAILS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Résultats détaillés limités à {IMEI_VALIDATE_BATCH_MAX_DETAILS} IMEI : utilisez details=false"
+        )
+
+    user_id = str(user.id)
+    try:
+        started = time.perf_counter()
+        resultat = tac_index.validate_imei_batch(donnees_lot.imeis, db, details=donnees_lot.details)
+        duree_ms = round((time.perf_counter() - started) * 1000, 1)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors de la validation du lot IMEI: {str(e)}"
+        )
+
+    audit_service.log_action(
+        action=f"Batch IMEI validation: {resultat['total_processed']} IMEIs",
+        user_id=user_id,
+        entity_type="imei_batch",
+        details={
+            "total": resultat["total_processed"],
+            "valides": resultat["valid_imeis"],
+            "duree_ms": duree_ms,
+            "ip_address": request.client.host if request.client else None
+        }
+    )
+
+    return {
+        **resultat,
+        "duree_ms": duree_ms,
+        "processing_date": datetime.now().isoformat()
+    }
+
 @app.get(
     "/tac/{tac}",
     tags=["TAC"],
@@ -2870,24 +3272,11 @@ def rechercher_tac(
                 detail="Le TAC doit être un nombre à 8 chiffres"
             )
         
-        # Rechercher dans la base TAC
-        result = db.execute(
-            text("SELECT * FROM tac_database WHERE tac = :tac"),
-            {"tac": tac_clean}
-        ).fetchone()
+        # Rechercher dans l'index TAC (repli SQL si l'index n'est pas chargé)
+        result = tac_index.get_or_load(tac_clean, db)
         
         if result:
-            return {
-                "tac": result.tac,
-                "marque": result.marque,
-                "modele": result.modele,
-                "annee_sortie": result.annee_sortie,
-                "type_appareil": result.type_appareil,
-                "statut": result.statut,
-                "date_creation": result.date_creation.isoformat() if result.date_creation else None,
-                "date_modification": result.date_modification.isoformat() if result.date_modification else None,
-                "trouve": True
-            }
+            return {**result, "trouve": True}
         else:
             return {
                 "tac": tac_clean,
@@ -2980,6 +3369,7 @@ def statistiques_tac(
                 {"marque": row.marque, "count": row.count} 
                 for row in top_marques
             ],
+            "index_memoire": tac_index.get_stats(),
             "timestamp": datetime.now().isoformat()
         }
         
@@ -3000,55 +3390,56 @@ Synchroniser la base de données TAC depuis les sources externes configurées.
 ### Sources disponibles :
 - **osmocom_csv** : API CSV Osmocom (par défaut)
 - **osmocom_json** : API JSON Osmocom
-- **local_file** : Fichier local
 
-### Processus :
-1. Téléchargement depuis la source
-2. Validation des données
-3. Import avec gestion des conflits
-4. Journalisation des résultats"""
+### Processus incrémental :
+1. Téléchargement depuis la source (ignorée si identique à la dernière synchronisation, sauf `force=true`)
+2. Validation des données et empreinte de contenu par TAC
+3. Application des seules différences (ajouts, modifications, suppressions)
+4. Journalisation des résultats par catégorie"""
 )
 def synchroniser_tac(
     source: str = Query(default="osmocom_csv", description="Source de synchronisation"),
+    force: bool = Query(default=False, description="Comparer toutes les lignes même si la source n'a pas changé"),
     db: Session = Depends(get_db),
     current_user: Utilisateur = Depends(get_admin_user),
     audit_service: AuditService = Depends(get_audit_service),
     translator = Depends(get_current_translator)
 ):
+    if source not in SOURCES_SYNC_TAC:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Source non supportée: {source}"
+        )
+
     try:
-        if source == "osmocom_csv":
-            # Synchronisation depuis l'API CSV Osmocom
-            result = db.execute(text("""
-                SELECT sync_osmocom_csv() as result
-            """)).fetchone()
-            
-        elif source == "osmocom_json":
-            # Synchronisation depuis l'API JSON Osmocom
-            result = db.execute(text("""
-                SELECT sync_osmocom_json() as result
-            """)).fetchone()
-            
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Source non supportée: {source}"
-            )
+        result = synchroniser_tac_source(db, source, sync_type="manual", force=force)
         
         # Log de l'opération de synchronisation
         audit_service.log_tac_sync(
             user_id=str(current_user.id),
             source=source,
-            result=result[0] if result else {}
+            result=result
         )
         
+        # Publier la base synchronisée dans l'index mémoire (seulement si elle a changé)
+        if result["imported"] or result["updated"] or result["deleted"]:
+            tac_index.refresh(db)
+        
         return {
             "message": f"Synchronisation TAC depuis {source} terminée",
             "source": source,
-            "result": result[0] if result else {},
+            "result": result,
             "timestamp": datetime.now().isoformat(),
             "initiated_by": current_user.nom
         }
         
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Source TAC invalide: {str(e)}"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -3135,35 +3526,30 @@ async def importer_tac_fichier(
     
     ### Formats supportés :
     - **CSV Osmocom** : Format standard Osmocom TAC database
-    - **CSV Standard** : Format personnalisé avec colonnes définies
+    - **CSV Standard** : En-tête nommé (tac, marque, modele, type_appareil, statut, annee_sortie)
     - **JSON** : Format JSON avec structure définie
     
     ### Processus :
     1. Upload et validation du fichier
     2. Détection du format
-    3. Import avec gestion des doublons
-    4. Rapport détaillé des résultats
+    3. Import avec gestion des doublons (CSV : COPY en flux puis fusion des seules lignes modifiées)
+    4. Rapport détaillé des résultats, enregistré dans tac_sync_log
     """
     try:
-        # Lire le contenu du fichier
-        content = await file.read()
-        
         # Déterminer le type de fichier
         file_extension = file.filename.lower().split('.')[-1] if '.' in file.filename else ''
         
         if file_extension == 'csv':
-            # Import CSV
-            csv_content = content.decode('utf-8')
-            
-            result = db.execute(text("""
-                SELECT importer_tac_avec_mapping(:csv_data, :format_source)
-            """), {
-                "csv_data": csv_content,
-                "format_source": format_source
-            }).fetchone()
+            # Import CSV en flux : COPY dans une table de transit puis fusion ensembliste
+            import_result = await run_in_threadpool(
+                importer_tac_csv, db, file.file, format_source, f"manual_upload_{file.filename}"
+            )
+            file_size = import_result["file_size_bytes"]
             
         elif file_extension == 'json':
             # Import JSON
+            content = await file.read()
+            file_size = len(content)
             json_content = content.decode('utf-8')
             json_data = json.loads(json_content)
             
@@ -3173,6 +3559,7 @@ async def importer_tac_fichier(
                 "json_data": json.dumps(json_data),
                 "source_name": f"manual_upload_{file.filename}"
             }).fetchone()
+            import_result = result[0] if result else {}
             
         else:
             raise HTTPException(
@@ -3180,8 +3567,6 @@ async def importer_tac_fichier(
                 detail="Format de fichier non supporté. Utilisez CSV ou JSON."
             )
         
-        import_result = result[0] if result else {}
-        
         # Log de l'import
         audit_service.log_tac_import(
             user_id=str(current_user.id),
@@ -3190,20 +3575,31 @@ async def importer_tac_fichier(
             result=import_result
         )
         
+        # Publier les TAC importés dans l'index mémoire
+        await run_in_threadpool(tac_index.refresh, db)
+        
         return {
             "message": f"Import TAC depuis {file.filename} terminé",
             "filename": file.filename,
             "format_source": format_source,
-            "file_size_bytes": len(content),
+            "file_size_bytes": file_size,
             "result": import_result,
             "timestamp": datetime.now().isoformat()
         }
         
+    except HTTPException:
+        raise
     except json.JSONDecodeError as e:
         raise HTTPException(
             status_code=400,
             detail=f"Erreur de parsing JSON: {str(e)}"
         )
+    except ValueError as e:
+        # Format source inconnu, en-tête sans colonne TAC ou fichier non UTF-8
+        raise HTTPException(
+            status_code=400,
+            detail=f"Fichier TAC invalide: {str(e)}"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -3221,10 +3617,10 @@ async def importer_tac_fichier(
 async def details_complets_imei(
     imei: str,
     request: Request,
-    db: Session = Depends(get_db),
-    user = Depends(get_current_user_optional),
+    db: AsyncSession = Depends(get_async_db),
+    user = Depends(get_current_user_optional_async),
     translator = Depends(get_current_translator),
-    audit_service: AuditService = Depends(get_audit_service)
+    audit_service: AsyncAuditService = Depends(get_deferred_audit_service_async)
 ):
     """
     ## Détails Complets IMEI
@@ -3242,12 +3638,17 @@ async def details_complets_imei(
         # Recherche IMEI locale (réutilise la logique existante) - ASYNC CALL
         imei_local = await verifier_imei(imei, request, db, user, translator, audit_service)
         
-        # Validation TAC
-        tac_validation = valider_imei_avec_tac_endpoint(imei, request, db, user, translator, audit_service)
+        # Validation TAC (index mémoire, repli SQL synchrone via la même AsyncSession)
+        tac_validation = await db.run_sync(
+            lambda session: valider_imei_avec_tac_endpoint(
+                imei, request, session, user, translator,
+                AuditService(session, write_behind=audit_service.write_behind)
+            )
+        )
         
         # Extraire le TAC pour recherche détaillée
         tac = imei[:8].zfill(8)
-        tac_details = rechercher_tac(tac, db, user, translator)
+        tac_details = await db.run_sync(lambda session: rechercher_tac(tac, session, user, translator))
         
         # Combiner toutes les informations
         return {
@@ -3302,14 +3703,61 @@ async def startup_event():
     """
     logger.info("Démarrage de l'application EIR Project")
     
-    try:
-        # Démarrer le planificateur de notifications
-        from .tasks.notification_scheduler import start_notification_scheduler
-        await start_notification_scheduler()
+    # Chaque service est démarré indépendamment : l'échec de l'un (port Diameter occupé,
+    # protocols.yml invalide...) est journalisé sans empêcher le démarrage des suivants
+    from .tasks.write_behind import start_write_behind
+    from .tasks.notification_outbox import start_notification_outbox
+    from .config_loader import start_protocol_config_watcher
+    from .services.tac_index import start_tac_index
+    from .interface_gateway.work_queue import start_ss7_queue
+    from .tasks.notification_scheduler import start_notification_scheduler
+    
+    # Tampon d'écriture différée (recherches et journal d'audit)
+    await _executer_service("démarrage", "tampon d'écriture différée", start_write_behind)
+    # Outbox des notifications (emails déclenchés par les requêtes)
+    await _executer_service("démarrage", "outbox des notifications", start_notification_outbox)
+    # Configuration des protocoles et surveillance de protocols.yml
+    await _executer_service("démarrage", "surveillance de protocols.yml", start_protocol_config_watcher)
+    # Index mémoire de la base TAC (recherche TAC et validation IMEI sans SQL)
+    await _executer_service("démarrage", "index TAC", start_tac_index)
+    # Workers de la file SS7 (requêtes fire-and-forget)
+    await _executer_service("démarrage", "file SS7", start_ss7_queue)
+    # Serveur Diameter S13 (port partagé entre workers avec SO_REUSEPORT)
+    await _executer_service("démarrage", "serveur Diameter S13", _demarrer_diameter)
+    # Planificateur de notifications
+    if await _executer_service("démarrage", "planificateur de notifications", start_notification_scheduler):
         logger.info("Planificateur de notifications démarré")
+
+async def _demarrer_diameter():
+    """Démarre le serveur Diameter S13 si DIAMETER_SERVER_ENABLED=true et le protocole est activé"""
+    from .config_loader import is_protocol_enabled
+    if os.getenv("DIAMETER_SERVER_ENABLED", "false").lower() == "true" and is_protocol_enabled("diameter"):
+        from .interface_gateway.diameter.server import start_diameter_server
+        await start_diameter_server()
+
+async def _arreter_diameter():
+    """Arrête le serveur Diameter S13 (les réponses en cours sont envoyées)"""
+    from .interface_gateway.diameter.server import stop_diameter_server
+    await stop_diameter_server()
+
+async def _executer_service(etape: str, nom: str, fonction) -> bool:
+    """
+    Démarre ou arrête un service d'arrière-plan, en journalisant son échec éventuel
+    
+    Args:
+        etape: "démarrage" ou "arrêt" (logs)
+        nom: Nom du service (logs)
+        fonction: Coroutine de démarrage ou d'arrêt du service
         
+    Returns:
+        True si l'opération a réussi
+    """
+    try:
+        await fonction()
+        return True
     except Exception as e:
-        logger.error(f"Erreur lors du démarrage des services: {e}")
+        logger.error(f"Erreur lors du {etape} du service {nom}: {e}", exc_info=True)
+        return False
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -3319,14 +3767,28 @@ async def shutdown_event():
     """
     logger.info("Arrêt de l'application EIR Project")
     
-    try:
-        # Arrêter le planificateur de notifications
-        from .tasks.notification_scheduler import stop_notification_scheduler
-        await stop_notification_scheduler()
+    from .tasks.notification_scheduler import stop_notification_scheduler
+    from .config_loader import stop_protocol_config_watcher
+    from .services.tac_index import stop_tac_index
+    from .interface_gateway.work_queue import stop_ss7_queue
+    from .tasks.notification_outbox import stop_notification_outbox
+    from .tasks.write_behind import stop_write_behind
+    
+    # Planificateur de notifications
+    if await _executer_service("arrêt", "planificateur de notifications", stop_notification_scheduler):
         logger.info("Planificateur de notifications arrêté")
-        
-    except Exception as e:
-        logger.error(f"Erreur lors de l'arrêt des services: {e}")
+    # Serveur Diameter S13
+    await _executer_service("arrêt", "serveur Diameter S13", _arreter_diameter)
+    # Surveillance de protocols.yml
+    await _executer_service("arrêt", "surveillance de protocols.yml", stop_protocol_config_watcher)
+    # Vérification périodique de l'index TAC
+    await _executer_service("arrêt", "index TAC", stop_tac_index)
+    # File SS7 (les requêtes acceptées sont traitées avant l'arrêt)
+    await _executer_service("arrêt", "file SS7", stop_ss7_queue)
+    # Outbox (les événements non traités restent en base)
+    await _executer_service("arrêt", "outbox des notifications", stop_notification_outbox)
+    # En dernier : écrire les recherches et entrées d'audit encore en attente
+    await _executer_service("arrêt", "tampon d'écriture différée", stop_write_behind)
 
 # ==========================================
 # ENDPOINT DE CONTRÔLE DU PLANIFICATEUR (ADMIN)
@@ -3377,6 +3839,105 @@ async def declencher_tache_planificateur(
             detail=f"Erreur interne lors du déclenchement de la tâche {job_id}"
         )
 
+# ==========================================
+# STATISTIQUES DES CACHES (ADMIN)
+# ==========================================
+
+@app.get("/admin/cache/imei", tags=["Admin"], response_model=None)
+async def obtenir_statistiques_cache_imei(
+    current_user: Utilisateur = Depends(get_admin_user)
+):
+    """
+    Obtient les compteurs du cache des statuts IMEI (hits, misses, évictions)
+    **Réservé aux administrateurs**
+    """
+    return imei_status_cache.get_stats()
+
+@app.delete("/admin/cache/imei", tags=["Admin"], response_model=None)
+async def vider_cache_imei(
+    current_user: Utilisateur = Depends(get_admin_user)
+):
+    """
+    Vide le cache des statuts IMEI
+    **Réservé aux administrateurs**
+    """
+    imei_status_cache.clear()
+    return {"message": "Cache IMEI vidé", "stats": imei_status_cache.get_stats()}
+
+@app.get("/admin/cache/utilisateurs", tags=["Admin"], response_model=None)
+async def obtenir_statistiques_cache_utilisateurs(
+    current_user: Utilisateur = Depends(get_admin_user)
+):
+    """
+    Obtient les compteurs du cache des utilisateurs authentifiés (hits, misses, invalidations)
+    **Réservé aux administrateurs**
+    """
+    return user_snapshot_cache.get_stats()
+
+@app.delete("/admin/cache/utilisateurs", tags=["Admin"], response_model=None)
+async def vider_cache_utilisateurs(
+    current_user: Utilisateur = Depends(get_admin_user)
+):
+    """
+    Vide le cache des utilisateurs authentifiés
+    **Réservé aux administrateurs**
+    """
+    user_snapshot_cache.clear()
+    return {"message": "Cache utilisateurs vidé", "stats": user_snapshot_cache.get_stats()}
+
+@app.get("/admin/write-behind", tags=["Admin"], response_model=None)
+async def obtenir_statistiques_write_behind(
+    current_user: Utilisateur = Depends(get_admin_user)
+):
+    """
+    Obtient l'état du tampon d'écriture différée des recherches et du journal d'audit
+    (profondeur de file, lignes écrites, débordements)
+    **Réservé aux administrateurs**
+    """
+    return write_behind_buffer.get_stats()
+
+@app.get("/admin/admission", tags=["Admin"], response_model=None)
+async def obtenir_statistiques_admission(
+    current_user: Utilisateur = Depends(get_admin_user)
+):
+    """
+    Obtient l'état du contrôle d'admission par classe de trafic
+    (requêtes en cours, profondeur de file, rejets par file pleine ou délai)
+    **Réservé aux administrateurs**
+    """
+    return admission_controller.get_stats()
+
+@app.get("/admin/protocols/ss7/queue", tags=["Admin"], response_model=None)
+async def obtenir_statistiques_file_ss7(
+    current_user: Utilisateur = Depends(get_admin_user)
+):
+    """
+    Obtient l'état de la file des requêtes SS7 fire-and-forget
+    (profondeur, refus, latences d'attente et de traitement)
+    **Réservé aux administrateurs**
+    """
+    from .interface_gateway.work_queue import ss7_work_queue
+    return ss7_work_queue.get_stats()
+
+@app.get("/admin/notifications/outbox", tags=["Admin"], response_model=None)
+async def obtenir_statistiques_outbox(
+    current_user: Utilisateur = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtient l'état de l'outbox des notifications (événements publiés, traités,
+    récapitulatifs envoyés) et le nombre d'événements par statut
+    **Réservé aux administrateurs**
+    """
+    from .models.notification_outbox import NotificationOutbox
+    
+    par_statut = dict(
+        db.query(NotificationOutbox.statut, func.count(NotificationOutbox.id))
+        .group_by(NotificationOutbox.statut)
+        .all()
+    )
+    return {**notification_outbox.get_stats(), "evenements_par_statut": par_statut}
+
 # Test endpoint for email configuration
 @app.get("/test-email-config", response_model=None)
 async def test_email_config():
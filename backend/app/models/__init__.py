@@ -3,6 +3,7 @@ from .appareil import Appareil
 from .sim import SIM
 from .recherche import Recherche
 from .notification import Notification
+from .notification_outbox import NotificationOutbox
 from .journal_audit import JournalAudit
 from .import_export import ImportExport
 
@@ -12,6 +13,7 @@ __all__ = [
     "SIM",
     "Recherche",
     "Notification",
+    "NotificationOutbox",
     "JournalAudit",
     "ImportExport"
 ]
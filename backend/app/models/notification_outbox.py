@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Text, JSON, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from ..core.database import Base
+from datetime import datetime
+import uuid
+
+class NotificationOutbox(Base):
+    """Événements de notification en attente de traitement (outbox durable)"""
+    __tablename__ = "notification_outbox"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    evenement = Column(String(50), nullable=False)  # verification_imei, nouvel_appareil
+    charge_utile = Column(JSON, default=lambda: {})  # Paramètres de la notification
+    statut = Column(String(20), default='en_attente')  # en_attente, en_cours, traité, échoué
+    tentative = Column(Integer, default=0)
+    erreur = Column(Text)
+    date_creation = Column(DateTime, default=datetime.now, nullable=False)
+    date_traitement = Column(DateTime)
+    utilisateur_id = Column(UUID(as_uuid=True), ForeignKey("utilisateur.id"))
+
+    __table_args__ = (
+        Index("idx_notification_outbox_statut_date", "statut", "date_creation"),
+    )
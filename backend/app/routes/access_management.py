@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from ..core.dependencies import get_db, require_niveau_acces, get_access_context
 from ..core.permissions import AccessLevel, Operation, PermissionManager, PorteeDonnees
+from ..core.user_cache import user_snapshot_cache
 from ..models.utilisateur import Utilisateur
 from ..services.audit import AuditService
 from ..core.audit_deps import get_audit_service
@@ -182,6 +183,7 @@ def mettre_a_jour_permissions_utilisateur(
         changements["est_actif"] = {"de": ancien_statut, "vers": mise_a_jour_permission.est_actif}
     
     db.commit()
+    user_snapshot_cache.invalidate(utilisateur.id)
     
     # Journaliser les changements de permissions
     service_audit.log_permission_change(
@@ -238,6 +240,7 @@ def ajouter_regle_acces(
         utilisateur.portee_donnees = "organisation"
     
     db.commit()
+    user_snapshot_cache.invalidate(utilisateur.id)
     
     # Journaliser l'ajout de règle
     admin_actuel = contexte_acces["user"]
@@ -286,6 +289,7 @@ def supprimer_regle_acces(
         raise HTTPException(status_code=404, detail="Rule not found")
     
     db.commit()
+    user_snapshot_cache.invalidate(user.id)
     
     # Log the rule removal
     current_admin = contexte_acces["user"]
@@ -391,6 +395,7 @@ def mettre_a_jour_permissions_lot(
             errors.append(f"Error updating user {user_id}: {str(e)}")
     
     db.commit()
+    user_snapshot_cache.invalidate(*updated_users)
     
     # Log bulk update
     current_admin = contexte_acces["user"]
@@ -492,6 +497,7 @@ def appliquer_modele_permissions(
             user.plages_imei_autorisees = additional_config["plages_imei_autorisees"]
     
     db.commit()
+    user_snapshot_cache.invalidate(user.id)
     
     # Log template application
     current_admin = contexte_acces["user"]
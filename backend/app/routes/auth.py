@@ -1,5 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta, datetime, timezone
 import uuid
 import os
@@ -7,7 +10,8 @@ import logging
 import secrets
 import random
 
-from ..core.dependencies import get_db, get_current_user
+from ..core.dependencies import get_db, get_async_db, get_current_user, get_current_user_async
+from ..core.user_cache import user_snapshot_cache
 from ..core.auth import verify_password, get_password_hash, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
 from ..schemas.auth import CreationUtilisateur, ConnexionUtilisateur, Jeton, ReponseUtilisateur, ProfilUtilisateurDetaille
 from ..schemas.password_reset import (
@@ -187,14 +191,15 @@ async def resend_verification_email(data: dict, request: Request, db: Session =
 
 
 @router.post("/connexion", response_model=Jeton)
-async def login(user_credentials: ConnexionUtilisateur, request: Request, db: Session = Depends(get_db), translator = Depends(get_current_translator)):
+async def login(user_credentials: ConnexionUtilisateur, request: Request, db: AsyncSession = Depends(get_async_db), translator = Depends(get_current_translator)):
     """
     Connexion utilisateur
     """
     try:
         logger.info(f"Tentative de connexion pour l'email: {user_credentials.email}")
 
-        user = db.query(Utilisateur).filter(Utilisateur.email == user_credentials.email).first()
+        result = await db.execute(select(Utilisateur).where(Utilisateur.email == user_credentials.email))
+        user = result.scalars().first()
 
         if not user:
             logger.warning(f"Tentative de connexion avec email inexistant: {user_credentials.email}")
@@ -213,7 +218,8 @@ async def login(user_credentials: ConnexionUtilisateur, request: Request, db: Se
 
             )
 
-        password_valid = verify_password(user_credentials.mot_de_passe, user.mot_de_passe)
+        # bcrypt est coûteux en CPU : vérification hors de la boucle d'événements
+        password_valid = await run_in_threadpool(verify_password, user_credentials.mot_de_passe, user.mot_de_passe)
 
         if not password_valid:
             logger.warning(f"Échec de la vérification du mot de passe pour: {user.email}")
@@ -239,7 +245,7 @@ async def login(user_credentials: ConnexionUtilisateur, request: Request, db: Se
             utilisateur_id=user.id
         )
         db.add(audit)
-        db.commit()
+        await db.commit()
 
         return {"access_token": access_token, "token_type": "bearer"}
 
@@ -255,8 +261,8 @@ async def login(user_credentials: ConnexionUtilisateur, request: Request, db: Se
 
 @router.get("/profile", response_model=ProfilUtilisateurDetaille)
 async def get_profile_detailed(
-    current_user: Utilisateur = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Utilisateur = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
     translator = Depends(get_current_translator)
 ):
     """
@@ -268,24 +274,29 @@ async def get_profile_detailed(
         from ..models.journal_audit import JournalAudit
 
         # Dernière connexion (assouplir le filtre LIKE)
-        derniere_connexion_audit = db.query(JournalAudit).filter(
-            JournalAudit.utilisateur_id == current_user.id,
-            JournalAudit.action.ilike('Connexion utilisateur:%')   # plus flexible
-        ).order_by(JournalAudit.date.desc()).first()
-        derniere_connexion = derniere_connexion_audit.date if derniere_connexion_audit else None
+        derniere_connexion = (await db.execute(
+            select(func.max(JournalAudit.date)).where(
+                JournalAudit.utilisateur_id == current_user.id,
+                JournalAudit.action.ilike('Connexion utilisateur:%')   # plus flexible
+            )
+        )).scalar()
 
         # Nombre total de connexions
-        nb_connexions = db.query(JournalAudit).filter(
-            JournalAudit.utilisateur_id == current_user.id,
-            JournalAudit.action.like('Connexion utilisateur:%')
-        ).count()
+        nb_connexions = (await db.execute(
+            select(func.count(JournalAudit.id)).where(
+                JournalAudit.utilisateur_id == current_user.id,
+                JournalAudit.action.like('Connexion utilisateur:%')
+            )
+        )).scalar()
 
         # Activités récentes (7 derniers jours)
         date_limite = datetime.now() - timedelta(days=7)
-        activites_recentes = db.query(JournalAudit).filter(
-            JournalAudit.utilisateur_id == current_user.id,
-            JournalAudit.date >= date_limite
-        ).count()
+        activites_recentes = (await db.execute(
+            select(func.count(JournalAudit.id)).where(
+                JournalAudit.utilisateur_id == current_user.id,
+                JournalAudit.date >= date_limite
+            )
+        )).scalar()
 
         # Permissions dynamiques selon type et niveau d'accès
         permissions = []
@@ -336,7 +347,7 @@ async def get_profile_detailed(
             utilisateur_id=current_user.id
         )
         db.add(audit)
-        db.commit()
+        await db.commit()
 
         logger.info(f"Profil détaillé récupéré avec succès pour: {current_user.email}")
 
@@ -432,6 +443,9 @@ def logout(current_user: Utilisateur = Depends(get_current_user), db: Session =
         db.add(audit)
         db.commit()
         
+        # La prochaine requête authentifiée relira l'utilisateur en base
+        user_snapshot_cache.invalidate(current_user.id)
+        
         logger.info(f"Déconnexion réussie pour l'utilisateur: {current_user.email}")
         
         return {"message": "Déconnexion réussie"}
@@ -5,14 +5,18 @@ Fournit les endpoints pour créer, lister, envoyer et gérer les notifications
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
+from sqlalchemy import and_, or_, func, desc, select, case
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import uuid
 import logging
 import time
 
-from ..core.dependencies import get_db, get_current_user, get_admin_user
+from ..core.dependencies import (
+    get_db, get_async_db, get_current_user, get_admin_user,
+    get_current_user_async, get_admin_user_async
+)
 from ..services.email_service import send_email
 from ..services.sms_service import send_sms
 from ..models.notification import Notification
@@ -116,38 +120,47 @@ async def test_notifications():
 
 @router.get("/statistiques/globales", response_model=StatistiquesNotifications)
 async def obtenir_statistiques_notifications(
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Utilisateur = Depends(get_current_user_async)
 ):
     """
     Obtient les statistiques des notifications pour l'utilisateur connecté
     """
     try:
+        since_24h = datetime.now() - timedelta(hours=24)
+        recent = Notification.date_creation >= since_24h
+        
+        def compter(*conditions):
+            return func.count(case((and_(*conditions), 1))) if conditions else func.count(Notification.id)
+        
+        # Tous les compteurs en une seule requête agrégée
+        query = select(
+            compter(),
+            compter(Notification.statut == 'en_attente'),
+            compter(Notification.statut == 'envoyé'),
+            compter(Notification.statut == 'échoué'),
+            compter(Notification.type == 'email'),
+            compter(Notification.type == 'sms'),
+            compter(recent),
+            compter(recent, Notification.statut == 'envoyé'),
+            compter(recent, Notification.statut == 'échoué'),
+            compter(recent, Notification.type == 'email'),
+            compter(recent, Notification.type == 'sms')
+        )
+        
         # Filtrer par utilisateur sauf pour les admins
-        base_query = db.query(Notification)
         if current_user.type_utilisateur != "administrateur":
-            base_query = base_query.filter(Notification.utilisateur_id == current_user.id)
-        
-        # Statistiques générales
-        total_notifications = base_query.count()
-        en_attente = base_query.filter(Notification.statut == 'en_attente').count()
-        envoyes = base_query.filter(Notification.statut == 'envoyé').count()
-        echecs = base_query.filter(Notification.statut == 'échoué').count()
+            query = query.where(Notification.utilisateur_id == current_user.id)
         
-        # Statistiques par type
-        emails_total = base_query.filter(Notification.type == 'email').count()
-        sms_total = base_query.filter(Notification.type == 'sms').count()
-        
-        # Statistiques des dernières 24h
-        since_24h = datetime.now() - timedelta(hours=24)
-        derniere_24h_query = base_query.filter(Notification.date_creation >= since_24h)
+        (total_notifications, en_attente, envoyes, echecs, emails_total, sms_total,
+         total_24h, envoyes_24h, echecs_24h, emails_24h, sms_24h) = (await db.execute(query)).one()
         
         derniere_24h = {
-            'total': derniere_24h_query.count(),
-            'envoyes': derniere_24h_query.filter(Notification.statut == 'envoyé').count(),
-            'echecs': derniere_24h_query.filter(Notification.statut == 'échoué').count(),
-            'emails': derniere_24h_query.filter(Notification.type == 'email').count(),
-            'sms': derniere_24h_query.filter(Notification.type == 'sms').count()
+            'total': total_24h,
+            'envoyes': envoyes_24h,
+            'echecs': echecs_24h,
+            'emails': emails_24h,
+            'sms': sms_24h
         }
         
         # Calcul du taux de succès
@@ -656,8 +669,8 @@ async def admin_lister_utilisateurs_pour_notifications(
     avec_email: bool = Query(True, description="Lister seulement les utilisateurs avec email"),
     recherche: Optional[str] = Query(None, description="Rechercher par nom ou email"),
     limite: int = Query(50, le=100, description="Limite du nombre de résultats"),
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Utilisateur = Depends(get_admin_user_async)
 ):
     """
     Liste les utilisateurs disponibles pour l'envoi de notifications administratives
@@ -666,18 +679,18 @@ async def admin_lister_utilisateurs_pour_notifications(
     """
     try:
         # Construire la requête de base
-        query = db.query(Utilisateur)
+        query = select(Utilisateur)
         
         # Appliquer les filtres
         if actifs_seulement:
-            query = query.filter(Utilisateur.est_actif == True)
+            query = query.where(Utilisateur.est_actif == True)
         
         if avec_email:
-            query = query.filter(Utilisateur.email.isnot(None), Utilisateur.email != '')
+            query = query.where(Utilisateur.email.isnot(None), Utilisateur.email != '')
         
         if recherche:
             terme_recherche = f"%{recherche}%"
-            query = query.filter(
+            query = query.where(
                 or_(
                     Utilisateur.nom.ilike(terme_recherche),
                     Utilisateur.email.ilike(terme_recherche)
@@ -685,7 +698,7 @@ async def admin_lister_utilisateurs_pour_notifications(
             )
         
         # Limiter les résultats et ordonner
-        utilisateurs = query.order_by(Utilisateur.nom).limit(limite).all()
+        utilisateurs = (await db.execute(query.order_by(Utilisateur.nom).limit(limite))).scalars().all()
         
         # Formater la réponse
         utilisateurs_formated = [
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 
 class CreationIMEI(BaseModel):
@@ -40,3 +40,12 @@ class ReponseAppareil(BaseModel):
 class AssignationAppareil(BaseModel):
     """Schéma pour l'assignation d'un appareil à un utilisateur"""
     utilisateur_id: str
+
+class VerificationLotIMEI(BaseModel):
+    """Schéma pour la vérification d'un lot d'IMEI"""
+    imeis: List[str] = Field(..., min_length=1, max_length=5000)
+
+class ValidationLotIMEI(BaseModel):
+    """Schéma pour la validation TAC + Luhn d'un lot d'IMEI"""
+    imeis: List[str] = Field(..., min_length=1, max_length=1000000)
+    details: bool = True
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional, Dict, Any
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.journal_audit import JournalAudit
 from ..models.utilisateur import Utilisateur
 import uuid
@@ -9,10 +10,35 @@ import json
 class AuditService:
     """Service for handling audit logging"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, write_behind=None):
+        """
+        Args:
+            db: Database session
+            write_behind: Optional WriteBehindBuffer; when set, entries are queued
+                and inserted in batches instead of being committed one by one
+        """
         self.db = db
+        self.write_behind = write_behind
+    
+    def log_action(self, *args, **kwargs) -> JournalAudit:
+        """
+        Log an audit action (see build_entry for the arguments)
+        
+        Returns:
+            JournalAudit: The created audit log entry
+        """
+        audit_log = self.build_entry(*args, **kwargs)
+        
+        # Deferred write when a buffer is attached and accepts the entry
+        if self.write_behind is not None and self.write_behind.enqueue_audit(audit_log):
+            return audit_log
+        
+        self.db.add(audit_log)
+        self.db.commit()
+        
+        return audit_log
     
-    def log_action(
+    def build_entry(
         self,
         action: str,
         user_id: Optional[str] = None,
@@ -23,7 +49,7 @@ class AuditService:
         new_values: Optional[Dict[str, Any]] = None
     ) -> JournalAudit:
         """
-        Log an audit action
+        Build an audit log entry without writing it
         
         Args:
             action: Description of the action performed
@@ -35,7 +61,7 @@ class AuditService:
             new_values: New values (for updates)
         
         Returns:
-            JournalAudit: The created audit log entry
+            JournalAudit: The audit log entry
         """
         
         # Build comprehensive action description
@@ -60,17 +86,12 @@ class AuditService:
         formatted_action = self._format_action_string(action_details)
         
         # Create audit log entry
-        audit_log = JournalAudit(
+        return JournalAudit(
             id=uuid.uuid4(),
             action=formatted_action,
             date=datetime.now(),
             utilisateur_id=user_id
         )
-        
-        self.db.add(audit_log)
-        self.db.commit()
-        
-        return audit_log
     
     def _format_action_string(self, action_details: Dict[str, Any]) -> str:
         """Format action details into a readable string"""
@@ -378,4 +399,30 @@ class AuditService:
                 "error_message": result.get("error_message"),
                 "validation_errors": result.get("validation_errors", [])
             }
-        )
\ No newline at end of file
+        )
+
+
+class AsyncAuditService(AuditService):
+    """
+    Audit service for `async def` routes, bound to the request's AsyncSession
+    
+    log_action is a coroutine, so every log_* helper returns an awaitable:
+    `await audit_service.log_imei_search(...)`. When the write-behind buffer is
+    full or stopped, the entry is committed through the async session instead of
+    a blocking commit on the event loop.
+    """
+    
+    def __init__(self, db: AsyncSession, write_behind=None):
+        super().__init__(db, write_behind=write_behind)
+    
+    async def log_action(self, *args, **kwargs) -> JournalAudit:
+        """Async variant of AuditService.log_action"""
+        audit_log = self.build_entry(*args, **kwargs)
+        
+        if self.write_behind is not None and self.write_behind.enqueue_audit(audit_log):
+            return audit_log
+        
+        self.db.add(audit_log)
+        await self.db.commit()
+        
+        return audit_log
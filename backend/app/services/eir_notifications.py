@@ -3,7 +3,7 @@ Service de notifications EIR Project utilisant le nouveau système de templates
 Intègre les templates JSON pour les notifications automatiques
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from sqlalchemy.orm import Session
 from datetime import datetime
 import logging
@@ -243,6 +243,109 @@ class EIRNotificationService:
             logger.error(f"Erreur notification alerte sécurité: {e}")
             return {"success": False, "error": str(e)}
     
+    @staticmethod
+    async def notifier_verification_imei(user_id: str, imei: str, statut: str, **kwargs) -> Dict[str, Any]:
+        """
+        Notifie le résultat d'une vérification IMEI en utilisant les templates JSON
+        
+        Args:
+            user_id: ID de l'utilisateur
+            imei: IMEI vérifié
+            statut: Résultat de la vérification ("valide", "invalide", "blackliste")
+            **kwargs: marque, modele, raison, date_verification
+            
+        Returns:
+            Résultat de l'envoi
+        """
+        db = next(get_db_session())
+        
+        try:
+            user = db.query(Utilisateur).filter(Utilisateur.id == user_id).first()
+            if not user:
+                return {"success": False, "error": "Utilisateur introuvable"}
+            
+            # Variables pour le template
+            variables = {
+                "nom_utilisateur": user.nom,
+                "imei": imei,
+                "marque": kwargs.get("marque") or "Inconnue",
+                "modele": kwargs.get("modele") or "Inconnu",
+                "raison": kwargs.get("raison") or "IMEI inconnu de la base de données",
+                "date_verification": kwargs.get("date_verification") or datetime.now().strftime('%d/%m/%Y à %H:%M')
+            }
+            
+            template_key = f"verification_imei_{statut}"
+            template_result = render_notification(template_key, "email", **variables)
+            
+            if not template_result:
+                return {"success": False, "error": f"Template {template_key} introuvable"}
+            
+            return await send_notification_now(
+                user_id=user_id,
+                notification_type="email",
+                destinataire=user.email,
+                sujet=template_result["subject"],
+                contenu=template_result["content"]
+            )
+            
+        except Exception as e:
+            logger.error(f"Erreur notification vérification IMEI: {e}")
+            return {"success": False, "error": str(e)}
+    
+    @staticmethod
+    async def notifier_digest_verifications_imei(user_id: str, verifications: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Envoie un email récapitulatif regroupant plusieurs vérifications IMEI
+        
+        Args:
+            user_id: ID de l'utilisateur
+            verifications: Liste de vérifications (imei, statut, marque, modele, date_verification)
+            
+        Returns:
+            Résultat de l'envoi
+        """
+        db = next(get_db_session())
+        
+        try:
+            user = db.query(Utilisateur).filter(Utilisateur.id == user_id).first()
+            if not user:
+                return {"success": False, "error": "Utilisateur introuvable"}
+            
+            lignes = []
+            for verification in verifications:
+                appareil = " ".join(
+                    part for part in (verification.get("marque"), verification.get("modele")) if part
+                )
+                ligne = f"• {verification.get('date_verification', '')} - {verification.get('imei')} : {verification.get('statut', '').upper()}"
+                if appareil:
+                    ligne += f" ({appareil})"
+                lignes.append(ligne)
+            
+            variables = {
+                "nom_utilisateur": user.nom,
+                "nombre_verifications": len(verifications),
+                "date_debut": verifications[0].get("date_verification", ""),
+                "date_fin": verifications[-1].get("date_verification", ""),
+                "liste_verifications": "\n".join(lignes)
+            }
+            
+            template_result = render_notification("verification_imei_digest", "email", **variables)
+            
+            if not template_result:
+                return {"success": False, "error": "Template récapitulatif vérification IMEI introuvable"}
+            
+            return await send_notification_now(
+                user_id=user_id,
+                notification_type="email",
+                destinataire=user.email,
+                sujet=template_result["subject"],
+                contenu=template_result["content"]
+            )
+            
+        except Exception as e:
+            logger.error(f"Erreur notification récapitulatif vérifications IMEI: {e}")
+            return {"success": False, "error": str(e)}
+    
     @staticmethod
     async def notifier_nouvel_appareil(user_id: str, appareil_details: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -10,9 +10,11 @@ import logging
 from typing import Dict, Optional, List, Tuple
 from datetime import datetime, timedelta
 import yaml
-import re
 import os
 
+from .imei_validation import imei_conforme, nettoyer_imei
+from .tac_snapshot import SharedTacSnapshot, get_shared_tac_snapshot
+
 logger = logging.getLogger(__name__)
 
 class ExternalIMEIService:
@@ -55,52 +57,56 @@ class ExternalIMEIService:
             }
         }
     
-    def _load_tac_database(self) -> Dict:
-        """Charge la base de données TAC locale"""
+    def _load_tac_database(self) -> SharedTacSnapshot:
+        """
+        Charge la base de données TAC locale
+        Le JSON n'est décodé que s'il a changé depuis le dernier instantané binaire ;
+        sinon l'instantané (partagé par les workers) est simplement projeté
+        """
         tac_file = "data/tac_database.json"
+        shared = get_shared_tac_snapshot(f"{tac_file}.tacsnap")
         try:
-            with open(tac_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            stat = os.stat(tac_file)
         except FileNotFoundError:
             logger.warning(f"TAC database {tac_file} not found")
-            return {}
+            return shared
+        
+        signature = f"{stat.st_size}|{stat.st_mtime_ns}"
+        snapshot = shared.get()
+        if snapshot is None or snapshot.signature != signature:
+            try:
+                shared.publish(lambda: self._read_tac_json(tac_file), signature, force=False)
+            except (OSError, ValueError) as e:
+                logger.warning(f"TAC database {tac_file} not loaded: {e}")
+        return shared
+    
+    @staticmethod
+    def _read_tac_json(tac_file: str) -> List[Dict]:
+        """Convertit les entrées du JSON TAC au format de l'instantané"""
+        with open(tac_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        entries = data.get("tac_entries", {})
+        return [
+            {
+                "tac": tac,
+                "marque": entry.get("brand"),
+                "modele": entry.get("model"),
+                "type_appareil": entry.get("type"),
+                "statut": entry.get("status"),
+                "annee_sortie": entry.get("release_year")
+            }
+            for tac, entry in entries.items()
+        ]
     
     def validate_imei_luhn(self, imei: str) -> bool:
         """
         Valide un IMEI avec l'algorithme de Luhn
+        Un IMEI de 14 chiffres (sans chiffre de contrôle) est accepté
         """
         if not imei or len(imei) not in [14, 15]:
             return False
         
-        # Supprime les espaces et caractères non numériques
-        imei_clean = re.sub(r'\D', '', imei)
-        
-        if len(imei_clean) not in [14, 15]:
-            return False
-        
-        # Pour IMEI de 15 chiffres, on utilise les 14 premiers pour Luhn
-        if len(imei_clean) == 15:
-            digits = [int(d) for d in imei_clean[:14]]
-        else:
-            digits = [int(d) for d in imei_clean]
-        
-        # Algorithme de Luhn
-        total = 0
-        for i, digit in enumerate(reversed(digits)):
-            if i % 2 == 1:  # Positions paires (en partant de la droite)
-                digit *= 2
-                if digit > 9:
-                    digit -= 9
-            total += digit
-        
-        # Calcule le chiffre de contrôle
-        check_digit = (10 - (total % 10)) % 10
-        
-        # Pour IMEI de 15 chiffres, vérifie le dernier chiffre
-        if len(imei_clean) == 15:
-            return check_digit == int(imei_clean[-1])
-        
-        return True  # Pour IMEI de 14 chiffres, considéré valide si Luhn passe
+        return imei_conforme(nettoyer_imei(imei))
     
     def get_tac_info(self, imei: str) -> Dict:
         """
@@ -111,13 +117,15 @@ class ExternalIMEIService:
         
         tac = imei[:8]  # Les 8 premiers chiffres sont le TAC
         
-        # Recherche dans la base TAC locale
-        if tac in self.tac_database:
+        # Recherche dans la base TAC locale (recherche dichotomique dans l'instantané projeté)
+        snapshot = self.tac_database.get()
+        record = snapshot.get(tac) if snapshot is not None and tac.isascii() and tac.isdigit() else None
+        if record:
             return {
                 "tac": tac,
-                "brand": self.tac_database[tac].get("brand", "Unknown"),
-                "model": self.tac_database[tac].get("model", "Unknown"),
-                "device_type": self.tac_database[tac].get("type", "Mobile"),
+                "brand": record["marque"] or "Unknown",
+                "model": record["modele"] or "Unknown",
+                "device_type": record["type_appareil"] or "Mobile",
                 "source": "local_tac_database"
             }
         
@@ -0,0 +1,321 @@
+"""
+Cache en mémoire des statuts IMEI pour la recherche GET /imei/{imei}
+LRU borné avec expiration (TTL) et invalidation explicite par les chemins d'écriture
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Iterable
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.imei import IMEI
+from ..models.appareil import Appareil
+
+logger = logging.getLogger(__name__)
+
+# Sentinelle pour distinguer "absent du cache" de "IMEI inconnu mis en cache"
+_ABSENT = object()
+
+
+def build_imei_projection(imei_record: Optional[IMEI], appareil: Optional[Appareil]) -> Optional[Dict[str, Any]]:
+    """
+    Construit la projection IMEI + appareil utilisée par la recherche IMEI
+
+    Args:
+        imei_record: Enregistrement IMEI (ou None si inconnu)
+        appareil: Appareil associé à l'IMEI
+
+    Returns:
+        Dictionnaire de projection, ou None si l'IMEI n'existe pas
+    """
+    if imei_record is None:
+        return None
+
+    projection = {
+        "id": str(imei_record.id),
+        "numero_imei": imei_record.numero_imei,
+        "statut": imei_record.statut,
+        "numero_slot": imei_record.numero_slot,
+        "appareil": None
+    }
+
+    if appareil is not None:
+        projection["appareil"] = {
+            "id": str(appareil.id),
+            "marque": appareil.marque,
+            "modele": appareil.modele,
+            "emmc": appareil.emmc,
+            "numero_serie": appareil.numero_serie,
+            "utilisateur_id": str(appareil.utilisateur_id) if appareil.utilisateur_id else None
+        }
+
+    return projection
+
+
+class IMEIStatusCache:
+    """
+    Cache LRU/TTL des projections IMEI indexées par numéro IMEI
+    Les IMEI inconnus sont aussi mis en cache (cache négatif) et doivent
+    être invalidés lors de la création d'un IMEI
+
+    Chaque invalidation ouvre une nouvelle génération : un chargement commencé avant
+    l'invalidation d'un IMEI (lecture antérieure à la mise à jour) n'est pas enregistré.
+    L'invalidation est locale au processus : avec plusieurs workers, le TTL borne
+    la durée pendant laquelle un autre worker peut servir un statut périmé
+    (ex. un IMEI mis en liste noire), d'où un TTL court par défaut.
+    """
+
+    # Nombre d'IMEI invalidés dont la génération est conservée individuellement
+    MAX_INVALIDATED = 10000
+
+    def __init__(self, max_entries: int = 200000, ttl_seconds: float = 30):
+        """
+        Initialise le cache
+
+        Args:
+            max_entries: Nombre maximum d'entrées avant éviction LRU
+            ttl_seconds: Durée de vie d'une entrée en secondes
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        # Les routes synchrones s'exécutent dans le threadpool de Starlette
+        self._lock = threading.Lock()
+        # Génération courante, génération de la dernière invalidation de chaque IMEI, et
+        # génération minimale acceptée par put() (relevée quand ce suivi est purgé)
+        self._generation = 0
+        self._invalidated: Dict[str, int] = {}
+        self._floor = 0
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'expirations': 0,
+            'evictions': 0,
+            'invalidations': 0,
+            'stale_fills': 0
+        }
+
+    def get(self, imei: str, touch: bool = True) -> Any:
+        """
+        Lit une projection depuis le cache
+
+        Args:
+            imei: Numéro IMEI
+            touch: Marquer l'entrée comme récemment utilisée (ordre LRU)
+
+        Returns:
+            La projection (None pour un IMEI inconnu), ou la sentinelle _ABSENT
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(imei)
+            if entry is None:
+                self.stats['misses'] += 1
+                return _ABSENT
+
+            expires_at, projection = entry
+            if expires_at <= now:
+                del self._entries[imei]
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return _ABSENT
+
+            if touch:
+                self._entries.move_to_end(imei)
+            self.stats['hits'] += 1
+            return projection
+
+    def generation(self) -> int:
+        """Génération courante, à relever avant de lire la base pour un put() ultérieur"""
+        with self._lock:
+            return self._generation
+
+    def put(self, imei: str, projection: Optional[Dict[str, Any]], generation: Optional[int] = None):
+        """
+        Enregistre une projection dans le cache
+
+        Args:
+            imei: Numéro IMEI
+            projection: Projection IMEI/appareil, ou None si l'IMEI est inconnu
+            generation: Génération relevée avant la lecture en base ; la projection est
+                ignorée si l'IMEI a été invalidé depuis (lecture antérieure à une écriture)
+        """
+        if self.max_entries <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if generation is not None and (
+                generation < self._floor or self._invalidated.get(imei, -1) > generation
+            ):
+                self.stats['stale_fills'] += 1
+                return
+            self._entries[imei] = (expires_at, projection)
+            self._entries.move_to_end(imei)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def get_or_load(self, imei: str, db: Session) -> Optional[Dict[str, Any]]:
+        """
+        Retourne la projection d'un IMEI, en la chargeant depuis la base si nécessaire
+
+        Le chargement se fait en une seule requête (IMEI joint à appareil) au lieu
+        d'une requête IMEI suivie du chargement paresseux de la relation appareil.
+
+        Args:
+            imei: Numéro IMEI
+            db: Session de base de données
+
+        Returns:
+            Projection IMEI/appareil, ou None si l'IMEI n'existe pas
+        """
+        projection = self.get(imei)
+        if projection is not _ABSENT:
+            return projection
+
+        generation = self.generation()
+        row = (
+            db.query(IMEI, Appareil)
+            .outerjoin(Appareil, IMEI.appareil_id == Appareil.id)
+            .filter(IMEI.numero_imei == imei)
+            .first()
+        )
+        projection = build_imei_projection(*row) if row else None
+        self.put(imei, projection, generation)
+        return projection
+
+    async def get_or_load_async(self, imei: str, db: AsyncSession) -> Optional[Dict[str, Any]]:
+        """
+        Variante de get_or_load pour les routes utilisant une AsyncSession
+
+        Args:
+            imei: Numéro IMEI
+            db: Session asynchrone de base de données
+
+        Returns:
+            Projection IMEI/appareil, ou None si l'IMEI n'existe pas
+        """
+        projection = self.get(imei)
+        if projection is not _ABSENT:
+            return projection
+
+        generation = self.generation()
+        result = await db.execute(
+            select(IMEI, Appareil)
+            .outerjoin(Appareil, IMEI.appareil_id == Appareil.id)
+            .where(IMEI.numero_imei == imei)
+            .limit(1)
+        )
+        row = result.first()
+        projection = build_imei_projection(*row) if row else None
+        self.put(imei, projection, generation)
+        return projection
+
+    def get_many_or_load(self, imeis: Iterable[str], db: Session,
+                         populate: bool = True) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Retourne les projections d'un ensemble d'IMEI, les absents du cache étant
+        chargés en une seule requête (IN) jointe à appareil
+
+        Args:
+            imeis: Numéros IMEI (les doublons sont tolérés)
+            db: Session de base de données
+            populate: Enregistrer les projections chargées dans le cache. False pour les
+                parcours massifs (rapprochement en flux) : ils lisent les entrées présentes
+                sans en insérer ni en réordonner, et n'évincent pas les IMEI chauds
+                des recherches réseau
+
+        Returns:
+            Dictionnaire {imei: projection ou None}
+        """
+        result: Dict[str, Optional[Dict[str, Any]]] = {}
+        missing = []
+        for imei in dict.fromkeys(imeis):
+            projection = self.get(imei, touch=populate)
+            if projection is _ABSENT:
+                missing.append(imei)
+            else:
+                result[imei] = projection
+
+        if missing:
+            generation = self.generation()
+            rows = (
+                db.query(IMEI, Appareil)
+                .outerjoin(Appareil, IMEI.appareil_id == Appareil.id)
+                .filter(IMEI.numero_imei.in_(missing))
+                .all()
+            )
+            loaded = {imei_record.numero_imei: build_imei_projection(imei_record, appareil)
+                      for imei_record, appareil in rows}
+            for imei in missing:
+                projection = loaded.get(imei)
+                if populate:
+                    self.put(imei, projection, generation)
+                result[imei] = projection
+
+        return result
+
+    def invalidate(self, imeis: Iterable[Optional[str]]):
+        """
+        Supprime des IMEI du cache après une écriture
+
+        Args:
+            imeis: Numéros IMEI à invalider (les valeurs vides sont ignorées)
+        """
+        with self._lock:
+            self._generation += 1
+            for imei in imeis:
+                if not imei:
+                    continue
+                self._invalidated[imei] = self._generation
+                if self._entries.pop(imei, None) is not None:
+                    self.stats['invalidations'] += 1
+            if len(self._invalidated) > self.MAX_INVALIDATED:
+                # Suivi purgé : tout chargement commencé avant cette invalidation est ignoré
+                self._invalidated.clear()
+                self._floor = self._generation
+
+    def clear(self):
+        """Vide entièrement le cache (les chargements en cours ne sont pas enregistrés)"""
+        with self._lock:
+            self.stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+            self._generation += 1
+            self._invalidated.clear()
+            self._floor = self._generation
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne les statistiques du cache
+
+        Returns:
+            Compteurs hits/misses et taille courante
+        """
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hit_ratio': round(self.stats['hits'] / lookups, 4) if lookups else 0.0
+            }
+
+    def reset_stats(self):
+        """Remet à zéro les compteurs"""
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0
+
+
+# Instance globale pour utilisation dans l'application
+imei_status_cache = IMEIStatusCache(
+    max_entries=int(os.getenv("IMEI_CACHE_MAX_ENTRIES", "200000")),
+    ttl_seconds=float(os.getenv("IMEI_CACHE_TTL_SECONDS", "30"))
+)
@@ -0,0 +1,186 @@
+"""
+Lecture et écriture en flux pour la vérification IMEI en masse (rapprochements)
+Le corps de requête NDJSON ou CSV est découpé en lots d'IMEI au fil de sa réception,
+et les résultats sont renvoyés en NDJSON sans jamais conserver l'entrée ou la sortie complète
+"""
+
+import csv
+import json
+import logging
+from typing import AsyncIterator, List, Tuple, Optional, Any
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Formats d'entrée acceptés
+FORMATS = ("ndjson", "csv")
+
+# Longueur maximale d'une ligne d'entrée (protège la mémoire contre une entrée sans saut de ligne)
+MAX_LINE_BYTES = 4096
+
+
+def detect_format(content_type: Optional[str], format_param: Optional[str] = None) -> str:
+    """
+    Détermine le format d'entrée à partir du paramètre explicite ou du Content-Type
+
+    Args:
+        content_type: En-tête Content-Type de la requête
+        format_param: Format demandé explicitement ("ndjson" ou "csv")
+
+    Returns:
+        "ndjson" ou "csv"
+    """
+    if format_param:
+        return format_param.lower()
+    if content_type and "csv" in content_type.lower():
+        return "csv"
+    return "ndjson"
+
+
+async def iter_lines(body: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """
+    Découpe un flux d'octets en lignes au fil de l'eau
+
+    Args:
+        body: Flux d'octets (request.stream())
+
+    Yields:
+        (numéro de ligne, contenu décodé) ; le contenu vaut None si la ligne
+        dépasse MAX_LINE_BYTES ou n'est pas décodable en UTF-8
+    """
+    buffer = bytearray()
+    line_number = 0
+    overflow = False
+
+    async for chunk in body:
+        buffer.extend(chunk)
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end < 0:
+                break
+            line_number += 1
+            if overflow:
+                overflow = False
+                yield line_number, None
+            else:
+                yield line_number, _decode(buffer[start:end])
+            start = end + 1
+        del buffer[:start]
+
+        # Ligne trop longue : on abandonne son contenu et on attend le prochain saut de ligne
+        if len(buffer) > MAX_LINE_BYTES:
+            overflow = True
+            buffer.clear()
+
+    if buffer or overflow:
+        line_number += 1
+        yield line_number, None if overflow else _decode(buffer)
+
+
+def _decode(raw: bytes) -> Optional[str]:
+    """Décode une ligne UTF-8 (BOM et retour chariot retirés)"""
+    try:
+        return bytes(raw).decode("utf-8-sig").strip()
+    except UnicodeDecodeError:
+        return None
+
+
+def parse_line(line: str, fmt: str) -> Any:
+    """
+    Extrait l'IMEI d'une ligne d'entrée
+
+    NDJSON : une chaîne JSON ("352...") ou un objet {"imei": "352..."}
+    CSV : première colonne de la ligne
+
+    Args:
+        line: Ligne décodée et non vide
+        fmt: Format d'entrée
+
+    Returns:
+        Numéro IMEI
+
+    Raises:
+        ValueError: Si la ligne ne contient pas d'IMEI exploitable
+    """
+    if fmt == "csv":
+        fields = next(csv.reader([line]), [])
+        imei = fields[0] if fields else ""
+    else:
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError:
+            raise ValueError("JSON invalide")
+        if isinstance(value, dict):
+            value = value.get("imei", value.get("numero_imei"))
+        imei = value if isinstance(value, str) else str(value) if isinstance(value, int) else ""
+
+    imei = imei.strip()
+    if not imei:
+        raise ValueError("IMEI manquant")
+    return imei
+
+
+async def iter_imei_chunks(body: AsyncIterator[bytes], fmt: str,
+                           chunk_size: int) -> AsyncIterator[Tuple[List[str], List[dict]]]:
+    """
+    Regroupe les IMEI d'un flux d'entrée en lots de taille bornée
+
+    Une première ligne CSV non numérique est traitée comme un en-tête et ignorée.
+
+    Args:
+        body: Flux d'octets de la requête
+        fmt: Format d'entrée ("ndjson" ou "csv")
+        chunk_size: Nombre d'IMEI par lot
+
+    Yields:
+        (IMEI du lot, erreurs de lecture rencontrées depuis le lot précédent)
+    """
+    imeis: List[str] = []
+    errors: List[dict] = []
+    header_checked = fmt != "csv"
+
+    async for line_number, line in iter_lines(body):
+        if line is None:
+            errors.append({"ligne": line_number, "erreur": "Ligne illisible ou trop longue"})
+        elif line:
+            try:
+                imei = parse_line(line, fmt)
+            except ValueError as e:
+                errors.append({"ligne": line_number, "erreur": str(e)})
+            else:
+                if not header_checked:
+                    header_checked = True
+                    if not imei.isdigit():
+                        continue
+                imeis.append(imei)
+
+        if len(imeis) >= chunk_size or len(errors) >= chunk_size:
+            yield imeis, errors
+            imeis, errors = [], []
+
+    if imeis or errors:
+        yield imeis, errors
+
+
+def ndjson_line(item: dict) -> bytes:
+    """Sérialise un résultat en une ligne NDJSON"""
+    return json.dumps(item, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse qui laisse le canal `receive` au générateur
+
+    La StreamingResponse standard écoute la déconnexion du client sur `receive`
+    pendant l'envoi, ce qui consommerait les morceaux du corps de requête encore
+    en cours de lecture. Ici, seul le générateur lit le corps (request.stream()),
+    et une déconnexion y est signalée par ClientDisconnect.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,272 @@
+"""
+Validation des IMEI (format, chiffre de contrôle Luhn, extraction du TAC)
+Fonctions unitaires pour un IMEI, et versions vectorisées NumPy pour les lots :
+les IMEI sont convertis en une matrice de chiffres et validés sans boucle Python
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Valeur d'un chiffre doublé par l'algorithme de Luhn (2 * d, moins 9 au-delà de 9)
+_LUHN_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+# Caractères ignorés dans un IMEI saisi (même nettoyage que la fonction SQL)
+_NON_DIGITS = re.compile(r"[^0-9]")
+
+# Largeur de la matrice de chiffres dans le cas général : les IMEI valides ont 14 à 16
+# chiffres, une colonne de plus distingue les valeurs trop longues
+_LARGEUR = 17
+
+# Poids des 15 chiffres dans la somme de Luhn (un sur deux est doublé, contrôle compris)
+_POIDS_LUHN = np.array([1, 2] * 7 + [1], dtype=np.float32)
+
+# Poids décimaux d'une moitié de TAC (4 chiffres, exacts en float32)
+_POIDS_DEMI_TAC = np.array([1000, 100, 10, 1], dtype=np.float32)
+
+
+def nettoyer_imei(imei: str) -> str:
+    """
+    Supprime les caractères non numériques d'un IMEI saisi
+
+    Args:
+        imei: IMEI saisi
+
+    Returns:
+        Chiffres de l'IMEI
+    """
+    return imei if imei.isascii() and imei.isdigit() else _NON_DIGITS.sub("", imei)
+
+
+def chiffre_controle(digits: str) -> int:
+    """
+    Calcule le chiffre de contrôle Luhn des 14 premiers chiffres d'un IMEI
+
+    Args:
+        digits: 14 chiffres (au-delà, seuls les 14 premiers sont pris en compte)
+
+    Returns:
+        Chiffre de contrôle
+    """
+    # En partant de la droite (hors chiffre de contrôle), le premier chiffre est doublé
+    total = sum(map(int, digits[0:14:2])) + sum(map(_LUHN_DOUBLED.__getitem__, map(int, digits[1:14:2])))
+    return (10 - total % 10) % 10
+
+
+def luhn_valide(digits: str) -> bool:
+    """
+    Vérifie le chiffre de contrôle Luhn d'un IMEI
+
+    Args:
+        digits: IMEI nettoyé (chiffres uniquement)
+
+    Returns:
+        True si l'IMEI compte 15 chiffres et que son chiffre de contrôle est correct
+    """
+    return len(digits) == 15 and chiffre_controle(digits) == int(digits[14])
+
+
+def imei_acceptable(imei: str) -> bool:
+    """
+    Vérifie qu'un IMEI peut être importé : 14 ou 15 chiffres. Le chiffre de contrôle
+    n'est pas exigé : un EIR doit pouvoir enregistrer (et mettre en liste noire) des
+    IMEI clonés dont le chiffre de contrôle est faux
+
+    Args:
+        imei: IMEI tel qu'il sera enregistré (aucun nettoyage)
+
+    Returns:
+        True si l'IMEI est acceptable
+    """
+    return imei.isascii() and imei.isdigit() and len(imei) in (14, 15)
+
+
+def imei_conforme(imei: str) -> bool:
+    """
+    Vérifie qu'un IMEI est conforme : 15 chiffres avec un chiffre de contrôle correct,
+    ou 14 chiffres (IMEI transmis sans chiffre de contrôle)
+
+    Args:
+        imei: IMEI tel qu'il sera enregistré (aucun nettoyage)
+
+    Returns:
+        True si l'IMEI est conforme
+    """
+    return imei_acceptable(imei) and (len(imei) == 14 or luhn_valide(imei))
+
+
+def _analyser(imeis: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray], bool]:
+    """
+    Lit un lot d'IMEI dans un seul tampon : les séparateurs donnent les longueurs et les
+    octets non numériques sans boucle Python
+
+    Returns:
+        (tampon, longueurs, masque des IMEI entièrement numériques ou None si un IMEI
+        contient un retour à la ligne, lot entièrement ASCII)
+    """
+    n = len(imeis)
+    joint = "\n".join(imeis)
+    # Un caractère non ASCII devient "?", qui n'est pas un chiffre
+    tampon = np.frombuffer(joint.encode("ascii", "replace"), dtype=np.uint8)
+    separateurs = np.flatnonzero(tampon == 10)
+    if len(separateurs) != n - 1:
+        return tampon, np.fromiter(map(len, imeis), dtype=np.int64, count=n), None, joint.isascii()
+    longueurs = np.diff(separateurs, prepend=-1, append=len(tampon)) - 1
+    # Octets ni chiffre ni séparateur, rapportés à leur IMEI
+    numeriques = np.ones(n, dtype=bool)
+    autres = np.flatnonzero((tampon - np.uint8(48) > 9) & (tampon != 10))
+    numeriques[np.searchsorted(separateurs, autres)] = False
+    return tampon, longueurs, numeriques, joint.isascii()
+
+
+def _matrice(imeis: Sequence[str], analyse: Tuple[np.ndarray, np.ndarray, Optional[np.ndarray], bool]
+             ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Construit la matrice de chiffres d'un lot déjà analysé (voir matrice_chiffres)"""
+    tampon, longueurs, numeriques, ascii_seul = analyse
+    n = len(imeis)
+    if numeriques is not None and len(tampon) == 16 * n - 1 and (longueurs == 15).all():
+        # Cas courant (IMEI de 15 caractères) : le tampon est déjà une matrice
+        return np.append(tampon, np.uint8(10)).reshape(n, 16)[:, :15] - np.uint8(48), longueurs, numeriques
+
+    if ascii_seul:
+        brut = np.array(imeis, dtype=f"S{_LARGEUR}")
+    else:
+        brut = np.array([imei.encode("ascii", "replace") for imei in imeis], dtype=f"S{_LARGEUR}")
+    # Le remplissage (octet nul) devient 208 : il n'est jamais compté comme chiffre
+    chiffres = brut.view(np.uint8).reshape(n, _LARGEUR) - np.uint8(48)
+    if numeriques is None:
+        numeriques = (chiffres <= 9).sum(axis=1, dtype=np.int64) == longueurs
+    return chiffres, longueurs, numeriques
+
+
+def matrice_chiffres(imeis: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Convertit des IMEI en matrice de chiffres
+
+    Args:
+        imeis: IMEI (sans nettoyage : tout caractère non numérique rend l'IMEI non numérique)
+
+    Returns:
+        (chiffres uint8 de forme (n, 15) ou (n, 17), longueurs, masque des IMEI entièrement
+        numériques). Les positions au-delà de la longueur d'un IMEI ne sont pas significatives ;
+        un IMEI de plus de 17 caractères n'est jamais valide.
+    """
+    return _matrice(imeis, _analyser(imeis))
+
+
+def luhn_valides(chiffres: np.ndarray, longueurs: np.ndarray, numeriques: np.ndarray) -> np.ndarray:
+    """
+    Version vectorisée de luhn_valide
+
+    Args:
+        chiffres, longueurs, numeriques: Résultat de matrice_chiffres
+
+    Returns:
+        Masque des IMEI de 15 chiffres dont le chiffre de contrôle est correct
+    """
+    # Somme de Luhn (chiffre de contrôle compris) en un produit matriciel :
+    # un chiffre doublé vaut 2 * d, moins 9 si d >= 5 ; l'IMEI est valide si la somme est multiple de 10
+    total = chiffres[:, :15].astype(np.float32) @ _POIDS_LUHN
+    total -= 9 * (chiffres[:, 1:14:2] >= 5).sum(axis=1, dtype=np.int32)
+    return numeriques & (longueurs == 15) & (total.astype(np.int32) % 10 == 0)
+
+
+def controler_imeis(imeis: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Version vectorisée de imei_acceptable et luhn_valide, pour contrôler une colonne
+    d'import en une fois
+
+    Args:
+        imeis: IMEI tels qu'ils seront enregistrés
+
+    Returns:
+        (masque des IMEI acceptables, masque des IMEI dont le chiffre de contrôle est correct)
+    """
+    if not len(imeis):
+        vide = np.zeros(0, dtype=bool)
+        return vide, vide
+    chiffres, longueurs, numeriques = matrice_chiffres(imeis)
+    acceptables = numeriques & ((longueurs == 14) | (longueurs == 15))
+    return acceptables, luhn_valides(chiffres, longueurs, numeriques)
+
+
+def imeis_acceptables(imeis: Sequence[str]) -> np.ndarray:
+    """
+    Version vectorisée de imei_acceptable
+
+    Args:
+        imeis: IMEI tels qu'ils seront enregistrés
+
+    Returns:
+        Masque des IMEI acceptables
+    """
+    return controler_imeis(imeis)[0]
+
+
+def extraire_tacs(chiffres: np.ndarray) -> np.ndarray:
+    """
+    Extrait le TAC (8 premiers chiffres) de chaque IMEI sous forme d'entier
+
+    Args:
+        chiffres: Matrice de matrice_chiffres
+
+    Returns:
+        TAC en uint32 (même clé que l'instantané TAC) ; non significatif pour un IMEI invalide
+    """
+    # Au plus 255 * 1111 par moitié pour un IMEI non numérique : le résultat tient dans un uint32
+    haut = (chiffres[:, :4] @ _POIDS_DEMI_TAC).astype(np.uint32)
+    bas = (chiffres[:, 4:8] @ _POIDS_DEMI_TAC).astype(np.uint32)
+    return haut * np.uint32(10000) + bas
+
+
+def rechercher_tacs(tacs: np.ndarray, cles: np.ndarray) -> np.ndarray:
+    """
+    Joint des TAC à des clés triées (searchsorted)
+
+    Args:
+        tacs: TAC recherchés (uint32)
+        cles: Clés triées (uint32), par exemple les clés de l'instantané TAC
+
+    Returns:
+        Position de chaque TAC dans les clés, -1 s'il est absent
+    """
+    if not len(cles):
+        return np.full(len(tacs), -1, dtype=np.int64)
+    positions = np.searchsorted(cles, tacs)
+    bornees = np.minimum(positions, len(cles) - 1)
+    return np.where(cles[bornees] == tacs, bornees, -1)
+
+
+def valider_lot(imeis: Iterable[str]) -> Dict[str, Any]:
+    """
+    Nettoie et valide un lot d'IMEI (format et Luhn), et extrait leurs TAC
+
+    Args:
+        imeis: IMEI saisis (les caractères non numériques sont ignorés, comme en unitaire)
+
+    Returns:
+        Dictionnaire de tableaux alignés sur les IMEI : imeis (nettoyés), format_valide
+        (14 à 16 chiffres), luhn_valide et tac
+    """
+    imeis = list(imeis)
+    if not imeis:
+        vide = np.zeros(0, dtype=bool)
+        return {"imeis": imeis, "format_valide": vide, "luhn_valide": vide, "tac": np.zeros(0, dtype=np.uint32)}
+    analyse = _analyser(imeis)
+    nettoyes: List[str] = imeis
+    numeriques = analyse[2]
+    a_nettoyer = range(len(imeis)) if numeriques is None else np.flatnonzero(~numeriques).tolist()
+    if len(a_nettoyer):
+        # Seuls les IMEI contenant des séparateurs ou des lettres sont nettoyés
+        nettoyes = list(imeis)
+        for position in a_nettoyer:
+            nettoyes[position] = nettoyer_imei(imeis[position])
+        analyse = _analyser(nettoyes)
+    chiffres, longueurs, numeriques = _matrice(nettoyes, analyse)
+    return {
+        "imeis": nettoyes,
+        "format_valide": numeriques & (longueurs >= 14) & (longueurs <= 16),
+        "luhn_valide": luhn_valides(chiffres, longueurs, numeriques),
+        "tac": extraire_tacs(chiffres)
+    }
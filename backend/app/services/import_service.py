@@ -19,6 +19,8 @@ from ..models.appareil import Appareil
 from ..models.imei import IMEI
 from ..models.utilisateur import Utilisateur
 from ..models.journal_audit import JournalAudit
+from .imei_cache import imei_status_cache
+from .imei_validation import controler_imeis, imei_conforme
 
 logger = logging.getLogger(__name__)
 
@@ -148,27 +150,8 @@ class ImportService:
         return mapping
     
     def validate_imei(self, imei: str) -> bool:
-        """Valide un numéro IMEI avec l'algorithme de Luhn"""
-        if not imei or not imei.isdigit():
-            return False
-        
-        if len(imei) not in [14, 15]:
-            return False
-        
-        # Algorithme de Luhn pour validation
-        def luhn_checksum(card_num):
-            def digits_of(n):
-                return [int(d) for d in str(n)]
-            
-            digits = digits_of(card_num)
-            odd_digits = digits[-1::-2]
-            even_digits = digits[-2::-2]
-            checksum = sum(odd_digits)
-            for d in even_digits:
-                checksum += sum(digits_of(d*2))
-            return checksum % 10
-        
-        return luhn_checksum(imei) == 0
+        """Valide un numéro IMEI (14 chiffres, ou 15 chiffres avec chiffre de contrôle Luhn correct)"""
+        return bool(imei) and imei_conforme(imei)
     
 
     def process_csv_import(self, 
@@ -238,13 +221,19 @@ class ImportService:
                 "processed": 0,
                 "appareils_created": 0,
                 "imeis_created": 0,
+                "luhn_invalides": 0,
                 "errors": [],
                 "warnings": [],
                 "column_mapping_used": column_mapping
             }
+            imported_imeis = []
+
+            # Contrôle de la colonne IMEI en une fois (format et Luhn vectorisés).
+            # Un chiffre de contrôle faux n'empêche pas l'import (IMEI clonés) : il est signalé
+            imeis_valides, luhn_valides = controler_imeis(df[column_mapping['imei1']].str.strip().tolist())
 
             # ===== 5. Traitement de chaque ligne du fichier CSV =====
-            for index, row in df.iterrows():
+            for position, (index, row) in enumerate(df.iterrows()):
                 try:
                     # Extraire les données en utilisant le mapping détecté
                     imei_val = row.get(column_mapping['imei1'], '').strip()
@@ -253,7 +242,7 @@ class ImportService:
                     statut_input = row.get(column_mapping.get('statut'), 'active').strip()
                     
                     # Validation de base
-                    if not imei_val or len(imei_val) < 14:
+                    if not imeis_valides[position]:
                         results["warnings"].append(f"Ligne {index + 2}: IMEI manquant ou invalide, ligne ignorée.")
                         continue
 
@@ -293,6 +282,11 @@ class ImportService:
                     # Mettre à jour les caches pour détecter les doublons au sein du même fichier
                     existing_imeis.add(imei_val)
                     existing_snrs.add(snr)
+                    imported_imeis.append(imei_val)
+
+                    if len(imei_val) == 15 and not luhn_valides[position]:
+                        results["luhn_invalides"] += 1
+                        results["warnings"].append(f"Ligne {index + 2}: Chiffre de contrôle Luhn incorrect pour l'IMEI '{imei_val}', importé.")
                     
                     # Mettre à jour les statistiques
                     results["processed"] += 1
@@ -307,6 +301,7 @@ class ImportService:
             # ===== 6. Commit ou Rollback de la transaction =====
             if not results["errors"]:
                 self.db.commit()
+                imei_status_cache.invalidate(imported_imeis)
                 self._log_import_audit(user_id, "CSV", results)
             else:
                 self.db.rollback()
@@ -386,10 +381,19 @@ class ImportService:
                 "processed": 0,
                 "appareils_created": 0,
                 "imeis_created": 0,
+                "luhn_invalides": 0,
                 "errors": [],
                 "warnings": [],
                 "column_mapping_used": column_mapping
             }
+            imported_imeis = []
+
+            # Contrôle des IMEI en une fois (format et Luhn vectorisés).
+            # Un chiffre de contrôle faux n'empêche pas l'import (IMEI clonés) : il est signalé
+            imeis_valides, luhn_valides = controler_imeis([
+                str(record.get(column_mapping['imei1'], '')).strip() if isinstance(record, dict) else ''
+                for record in records
+            ])
 
             # ===== 4. Traitement de chaque enregistrement JSON =====
             for index, record in enumerate(records):
@@ -400,7 +404,7 @@ class ImportService:
                     modele = str(record.get(column_mapping['modele'], 'Inconnu')).strip()
                     statut_input = str(record.get(column_mapping.get('statut'), 'active')).strip()
                     
-                    if not imei_val or len(imei_val) < 14:
+                    if not imeis_valides[index]:
                         results["warnings"].append(f"Enregistrement {index + 1}: IMEI manquant ou invalide, ignoré.")
                         continue
                     
@@ -437,6 +441,11 @@ class ImportService:
                     # Mettre à jour les caches pour éviter les doublons dans le même fichier
                     existing_imeis.add(imei_val)
                     existing_snrs.add(snr)
+                    imported_imeis.append(imei_val)
+
+                    if len(imei_val) == 15 and not luhn_valides[index]:
+                        results["luhn_invalides"] += 1
+                        results["warnings"].append(f"Enregistrement {index + 1}: Chiffre de contrôle Luhn incorrect pour l'IMEI '{imei_val}', importé.")
                     
                     # Mettre à jour les statistiques
                     results["processed"] += 1
@@ -451,6 +460,7 @@ class ImportService:
             # ===== 5. Commit ou Rollback de la transaction =====
             if not results["errors"]:
                 self.db.commit()
+                imei_status_cache.invalidate(imported_imeis)
                 self._log_import_audit(user_id, "JSON", results)
             else:
                 self.db.rollback()
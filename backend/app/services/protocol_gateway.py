@@ -1,22 +1,37 @@
+import itertools
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Union
 from enum import Enum
 
+from ..interface_gateway.diameter.codec import DIAMETER_SUCCESS
+from ..interface_gateway.diameter.wire import EcaView, EcrView, encode_eca, encode_ecr
+from ..interface_gateway.map.codec import (
+    EQUIPMENT_WHITELISTED, MapComponentView, encode_check_imei_invoke, encode_check_imei_result
+)
+
+# Trame binaire (MAP, Diameter) ou texte (SOAP)
+Message = Union[str, bytes, bytearray, memoryview]
+
+# EquipmentStatus (MAP) / Equipment-Status (Diameter S13) -> statut EIR
+EQUIPMENT_STATUS_NAMES = {0: "whitelisted", 1: "blacklisted", 2: "greylisted"}
+
 class ProtocolType(Enum):
     REST = "rest"
     MAP = "map" 
     SOAP = "soap"
     SS7 = "ss7"
+    DIAMETER = "diameter"
 
 class ProtocolAdapter(ABC):
     """Interface pour adaptateurs de protocole"""
     
     @abstractmethod
-    def format_request(self, data: Dict[str, Any]) -> str:
+    def format_request(self, data: Dict[str, Any]) -> Message:
         pass
     
     @abstractmethod
-    def parse_response(self, response: str) -> Dict[str, Any]:
+    def parse_response(self, response: Message) -> Dict[str, Any]:
         pass
     
     @abstractmethod
@@ -24,29 +39,72 @@ class ProtocolAdapter(ABC):
         pass
 
 class MAPAdapter(ProtocolAdapter):
-    """Adaptateur pour protocole MAP"""
+    """Adaptateur pour protocole MAP (composants TCAP checkIMEI encodés en BER)"""
     
-    def format_request(self, data: Dict[str, Any]) -> str:
-        imei = data.get("imei")
-        return f"""
-        MAP-CHECK-IMEI-REQ {{
-            imei: {imei},
-            operation: "check-equipment-status",
-            version: "3"
-        }}
-        """
+    def __init__(self):
+        # Identifiants d'invocation sur un octet signé
+        self._invoke_ids = itertools.cycle(range(1, 128))
     
-    def parse_response(self, response: str) -> Dict[str, Any]:
-        # Parsing de la réponse MAP
+    def format_request(self, data: Dict[str, Any]) -> bytearray:
+        return encode_check_imei_invoke(next(self._invoke_ids), data["imei"], data.get("map_version", 3))
+
+    def parse_response(self, response: Message) -> Dict[str, Any]:
+        # Lecture sur place : seuls les champs utilisés sont décodés
+        component = MapComponentView(response)
+        if component.kind == "return_error":
+            return {
+                "status": "error",
+                "invoke_id": component.invoke_id,
+                "result_code": "error",
+                "map_error_code": component.error_code
+            }
         return {
-            "status": "allowed",
-            "imei": "123456789012345",
+            "status": EQUIPMENT_STATUS_NAMES.get(component.equipment_status, "unknown"),
+            "invoke_id": component.invoke_id,
             "result_code": "success"
         }
     
     def validate_format(self, data: Dict[str, Any]) -> bool:
         return "imei" in data and len(data["imei"]) == 15
 
+class DiameterAdapter(ProtocolAdapter):
+    """Adaptateur pour Diameter S13 (ECR/ECA)"""
+
+    def __init__(self, origin_host: str = "gateway.eir.local.realm", origin_realm: str = "eir.local.realm",
+                 destination_realm: str = "eir.local.realm"):
+        self.origin_host = origin_host
+        self.origin_realm = origin_realm
+        self.destination_realm = destination_realm
+        self._ids = itertools.count(1)
+
+    def format_request(self, data: Dict[str, Any]) -> bytearray:
+        identifier = next(self._ids) & 0xFFFFFFFF
+        return encode_ecr(
+            hop_by_hop=identifier,
+            end_to_end=identifier,
+            session_id=f"{self.origin_host};{int(time.time())};{identifier}",
+            origin_host=self.origin_host,
+            origin_realm=self.origin_realm,
+            destination_realm=self.destination_realm,
+            # Terminal-Information/IMEI : 14 chiffres, sans chiffre de contrôle
+            imei=data["imei"][:14],
+            software_version=data.get("software_version")
+        )
+
+    def parse_response(self, response: Message) -> Dict[str, Any]:
+        answer = EcaView(response)
+        result_code = answer.result_code
+        if result_code != DIAMETER_SUCCESS:
+            return {"status": "error", "result_code": result_code, "error_message": answer.error_message}
+        return {
+            "status": EQUIPMENT_STATUS_NAMES.get(answer.equipment_status, "unknown"),
+            "result_code": result_code
+        }
+
+    def validate_format(self, data: Dict[str, Any]) -> bool:
+        imei = data.get("imei")
+        return isinstance(imei, str) and imei.isdigit() and len(imei) in (14, 15)
+
 class SOAPAdapter(ProtocolAdapter):
     """Adaptateur pour protocole SOAP"""
     
@@ -62,7 +120,7 @@ class SOAPAdapter(ProtocolAdapter):
         </soap:Envelope>
         """
     
-    def parse_response(self, response: str) -> Dict[str, Any]:
+    def parse_response(self, response: Message) -> Dict[str, Any]:
         # Parsing XML SOAP
         return {"status": "allowed", "imei": "123456789012345"}
     
@@ -76,6 +134,7 @@ class ProtocolGateway:
         self.adapters = {
             ProtocolType.MAP: MAPAdapter(),
             ProtocolType.SOAP: SOAPAdapter(),
+            ProtocolType.DIAMETER: DiameterAdapter(),
             # Autres adaptateurs...
         }
     
@@ -92,14 +151,18 @@ class ProtocolGateway:
         formatted_request = adapter.format_request(data)
         
         # Simulation du traitement
-        response = self.simulate_network_response(protocol, data)
+        response = self.simulate_network_response(protocol, formatted_request)
         
         return adapter.parse_response(response)
     
-    def simulate_network_response(self, protocol: ProtocolType, data: Dict[str, Any]) -> str:
-        """Simulation de réponse réseau"""
+    def simulate_network_response(self, protocol: ProtocolType, request: Message) -> Message:
+        """Simulation de réponse réseau (trames MAP et Diameter construites depuis la requête)"""
         if protocol == ProtocolType.MAP:
-            return "MAP-CHECK-IMEI-RSP { result: success, status: allowed }"
+            invoke = MapComponentView(request)
+            return encode_check_imei_result(invoke.invoke_id, EQUIPMENT_WHITELISTED)
+        elif protocol == ProtocolType.DIAMETER:
+            return encode_eca(EcrView(request), "eir.local.realm", "eir.local.realm", DIAMETER_SUCCESS,
+                              equipment_status=EQUIPMENT_WHITELISTED)
         elif protocol == ProtocolType.SOAP:
             return "<soap:Body><checkIMEIResponse><status>allowed</status></checkIMEIResponse></soap:Body>"
-        return "{}"
\ No newline at end of file
+        return "{}"
@@ -0,0 +1,344 @@
+"""
+Import TAC par COPY (PostgreSQL)
+Le CSV est lu en flux, normalisé ligne à ligne et copié dans une table de transit,
+puis fusionné dans tac_database par une seule requête ensembliste
+"""
+
+import io
+import csv
+import time
+import hashlib
+import logging
+from itertools import islice
+from typing import Dict, Any, Optional, Iterator, Tuple, BinaryIO, List
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Formats de fichier supportés par l'import CSV
+FORMATS_IMPORT_TAC = ("osmocom", "standard")
+
+# Statuts acceptés par la contrainte CHECK de tac_database
+STATUTS_TAC = ("valide", "invalide", "bloque", "test", "obsolete")
+
+# Valeurs par défaut des colonnes absentes du format Osmocom (comme importer_tac_avec_mapping)
+TYPE_APPAREIL_DEFAUT = "smartphone"
+STATUT_DEFAUT = "valide"
+
+# En-têtes reconnus pour le format standard
+COLONNES_STANDARD = {
+    "tac": ("tac", "type_allocation_code"),
+    "marque": ("marque", "brand", "manufacturer", "fabricant"),
+    "modele": ("modele", "model", "modèle", "name"),
+    "type_appareil": ("type_appareil", "type", "device_type"),
+    "statut": ("statut", "status"),
+    "annee_sortie": ("annee_sortie", "release_year", "year", "annee")
+}
+
+# Longueurs des colonnes VARCHAR de tac_database : une valeur trop longue ferait échouer tout le COPY
+_LONGUEURS = {"marque": 100, "modele": 100, "type_appareil": 50}
+
+# Table de transit : temporaire, donc non journalisée (pas de WAL) et propre à la session,
+# ce qui permet des imports concurrents ; supprimée à la fin de la transaction
+_STAGING_DDL = """
+    CREATE TEMP TABLE tac_import_staging (
+        ligne INTEGER NOT NULL,
+        tac TEXT NOT NULL,
+        marque TEXT,
+        modele TEXT,
+        type_appareil TEXT,
+        statut TEXT,
+        annee_sortie INTEGER
+    ) ON COMMIT DROP
+"""
+
+_STAGING_COPY = """
+    COPY tac_import_staging (ligne, tac, marque, modele, type_appareil, statut, annee_sortie)
+    FROM STDIN WITH (FORMAT csv)
+"""
+
+# Fusion : la dernière occurrence d'un TAC dans le fichier l'emporte, et seules les
+# lignes réellement modifiées sont réécrites (date_modification inchangée sinon)
+_MERGE_SQL = """
+    WITH source AS (
+        SELECT DISTINCT ON (tac) tac, marque, modele, type_appareil, statut, annee_sortie
+        FROM tac_import_staging
+        ORDER BY tac, ligne DESC
+    ), merged AS (
+        INSERT INTO tac_database AS t (tac, marque, modele, type_appareil, statut, annee_sortie)
+        SELECT tac, marque, modele, type_appareil, statut, annee_sortie FROM source
+        ON CONFLICT (tac) DO UPDATE SET
+            marque = EXCLUDED.marque,
+            modele = EXCLUDED.modele,
+            type_appareil = EXCLUDED.type_appareil,
+            statut = EXCLUDED.statut,
+            annee_sortie = COALESCE(EXCLUDED.annee_sortie, t.annee_sortie),
+            date_modification = CURRENT_TIMESTAMP
+        WHERE (t.marque, t.modele, t.type_appareil, t.statut)
+                IS DISTINCT FROM (EXCLUDED.marque, EXCLUDED.modele, EXCLUDED.type_appareil, EXCLUDED.statut)
+            OR (EXCLUDED.annee_sortie IS NOT NULL AND EXCLUDED.annee_sortie IS DISTINCT FROM t.annee_sortie)
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT
+        (SELECT COUNT(*) FROM source) AS distincts,
+        COUNT(*) FILTER (WHERE inserted) AS inserted,
+        COUNT(*) FILTER (WHERE NOT inserted) AS updated
+    FROM merged
+"""
+
+_SYNC_LOG_SQL = """
+    INSERT INTO tac_sync_log (
+        source_name, sync_type, format_type, status, records_imported, records_updated,
+        records_errors, sync_duration_ms, error_message, file_size_bytes, checksum
+    ) VALUES (
+        :source_name, 'manual', 'csv', :status, :imported, :updated,
+        :errors, :duration_ms, :error_message, :file_size, :checksum
+    ) RETURNING id
+"""
+
+
+class _HashingReader(io.RawIOBase):
+    """Lecture binaire du fichier téléversé avec calcul du SHA-256 et de la taille au fil de l'eau"""
+
+    def __init__(self, raw: BinaryIO):
+        self._raw = raw
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._raw.read(len(buffer))
+        count = len(data)
+        buffer[:count] = data
+        self.sha256.update(data)
+        self.size += count
+        return count
+
+
+class _CopyStream:
+    """
+    Fichier en lecture seule alimentant COPY ... FROM STDIN
+    Les lignes sont sérialisées en CSV par lots, à mesure que le pilote les demande
+    """
+
+    def __init__(self, rows: Iterator[Tuple[Any, ...]], batch_size: int = 2000):
+        self._rows = rows
+        self._batch_size = batch_size
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._pending = ""
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            batch = list(islice(self._rows, self._batch_size))
+            if not batch:
+                break
+            self._writer.writerows(batch)
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+
+        if size < 0 or size >= len(self._pending):
+            data, self._pending = self._pending, ""
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    # copy_expert n'utilise que read ; readline pour les pilotes qui l'attendent
+    readline = read
+
+
+def _texte(value: Optional[str], colonne: str) -> Optional[str]:
+    """Nettoie une valeur texte (espaces, octets nuls) et la tronque à la taille de la colonne"""
+    if value is None:
+        return None
+    value = value.replace("\x00", "").strip()
+    longueur = _LONGUEURS.get(colonne)
+    return value[:longueur] if longueur else value
+
+
+def _tac(value: str) -> Optional[str]:
+    """TAC complété à 8 chiffres (LPAD), ou None s'il est invalide"""
+    tac = value.strip().zfill(8)
+    return tac if len(tac) == 8 and tac.isascii() and tac.isdigit() else None
+
+
+def _annee(value: Optional[str]) -> Optional[int]:
+    """Année de sortie plausible, ou None"""
+    value = (value or "").strip()
+    if value.isascii() and value.isdigit() and 1970 <= int(value) <= 2100:
+        return int(value)
+    return None
+
+
+def _est_entete_osmocom(colonnes: List[str]) -> bool:
+    """Ligne d'en-tête ou de licence du CSV Osmocom"""
+    premiere = colonnes[0].strip().lower()
+    return premiere == "tac" or premiere.startswith("osmocom tac")
+
+
+def iter_tac_rows(lignes: Iterator[List[str]], format_source: str,
+                  compteurs: Dict[str, int]) -> Iterator[Tuple[Any, ...]]:
+    """
+    Normalise les lignes CSV en lignes de la table de transit
+
+    Args:
+        lignes: Lignes CSV déjà découpées (csv.reader)
+        format_source: "osmocom" (tac, marque, modèle, ..., aka) ou "standard" (en-têtes nommés)
+        compteurs: Compteurs mis à jour sur place (lignes, valides, erreurs)
+
+    Yields:
+        (ligne, tac, marque, modele, type_appareil, statut, annee_sortie)
+
+    Raises:
+        ValueError: Si le format est inconnu ou si l'en-tête standard n'a pas de colonne TAC
+    """
+    if format_source not in FORMATS_IMPORT_TAC:
+        raise ValueError(f"Format source non supporté: {format_source}")
+
+    positions: Optional[Dict[str, int]] = None
+    for numero, colonnes in enumerate(lignes, start=1):
+        if not colonnes or not any(colonne.strip() for colonne in colonnes):
+            continue
+
+        if format_source == "osmocom":
+            if _est_entete_osmocom(colonnes):
+                continue
+            compteurs["lignes"] += 1
+            tac = _tac(colonnes[0])
+            if tac is None or len(colonnes) < 3:
+                compteurs["erreurs"] += 1
+                continue
+            marque = _texte(colonnes[1], "marque") or "Unknown"
+            # Modèle vide : premier alias de la colonne "aka" (8e colonne)
+            modele = _texte(colonnes[2], "modele")
+            if not modele and len(colonnes) >= 8:
+                modele = _texte(colonnes[7].split(",")[0], "modele")
+            compteurs["valides"] += 1
+            yield (numero, tac, marque, modele or "Unknown Model", TYPE_APPAREIL_DEFAUT, STATUT_DEFAUT, None)
+            continue
+
+        if positions is None:
+            entetes = [colonne.strip().lower() for colonne in colonnes]
+            positions = {}
+            for champ, alias in COLONNES_STANDARD.items():
+                for nom in alias:
+                    if nom in entetes:
+                        positions[champ] = entetes.index(nom)
+                        break
+            if "tac" not in positions:
+                raise ValueError("Colonne TAC introuvable dans l'en-tête du fichier")
+            continue
+
+        compteurs["lignes"] += 1
+
+        def valeur(champ: str) -> Optional[str]:
+            position = positions.get(champ)
+            return colonnes[position] if position is not None and position < len(colonnes) else None
+
+        tac = _tac(valeur("tac") or "")
+        statut = (_texte(valeur("statut"), "statut") or STATUT_DEFAUT).lower()
+        if tac is None or statut not in STATUTS_TAC:
+            compteurs["erreurs"] += 1
+            continue
+        compteurs["valides"] += 1
+        yield (
+            numero, tac,
+            _texte(valeur("marque"), "marque") or "Unknown",
+            _texte(valeur("modele"), "modele") or "Unknown Model",
+            _texte(valeur("type_appareil"), "type_appareil") or TYPE_APPAREIL_DEFAUT,
+            statut,
+            _annee(valeur("annee_sortie"))
+        )
+
+
+def importer_tac_csv(db: Session, fichier: BinaryIO, format_source: str = "osmocom",
+                     source_name: str = "manual_upload") -> Dict[str, Any]:
+    """
+    Importe un CSV TAC par COPY dans une table de transit puis fusion ensembliste
+    Le résultat est enregistré dans tac_sync_log (statut error en cas d'échec)
+
+    Args:
+        db: Session de base de données (PostgreSQL / psycopg2)
+        fichier: Fichier CSV binaire, lu en flux (UTF-8, BOM toléré)
+        format_source: "osmocom" ou "standard"
+        source_name: Nom de la source dans tac_sync_log
+
+    Returns:
+        Compteurs (imported, updated, unchanged, duplicates, errors), durée, taille,
+        somme de contrôle et identifiant du journal de synchronisation
+
+    Raises:
+        ValueError: Format inconnu, en-tête invalide ou fichier non UTF-8 (UnicodeDecodeError)
+    """
+    started = time.perf_counter()
+    lecteur = _HashingReader(fichier)
+    texte = io.TextIOWrapper(io.BufferedReader(lecteur, 1 << 16), encoding="utf-8-sig", newline="")
+    compteurs = {"lignes": 0, "valides": 0, "erreurs": 0}
+
+    try:
+        db.execute(text(_STAGING_DDL))
+        rows = iter_tac_rows(csv.reader(texte), format_source, compteurs)
+        # Curseur psycopg2 sur la connexion de la session : même transaction que la fusion
+        with db.connection().connection.cursor() as cursor:
+            cursor.copy_expert(_STAGING_COPY, _CopyStream(rows))
+        merge = db.execute(text(_MERGE_SQL)).fetchone()
+    except Exception as e:
+        db.rollback()
+        _journaliser_echec(db, source_name, lecteur, started, str(e))
+        raise
+
+    distincts, inserted, updated = merge
+    duration_ms = int((time.perf_counter() - started) * 1000)
+    resultat = {
+        "imported": inserted,
+        "updated": updated,
+        "unchanged": distincts - inserted - updated,
+        "duplicates": compteurs["valides"] - distincts,
+        "errors": compteurs["erreurs"],
+        "lines": compteurs["lignes"],
+        "format": format_source,
+        "duration_ms": duration_ms,
+        "file_size_bytes": lecteur.size,
+        "checksum": lecteur.sha256.hexdigest()
+    }
+    sync_id = db.execute(text(_SYNC_LOG_SQL), {
+        "source_name": source_name,
+        "status": "success" if compteurs["erreurs"] == 0 else "partial",
+        "imported": inserted,
+        "updated": updated,
+        "errors": compteurs["erreurs"],
+        "duration_ms": duration_ms,
+        "error_message": None,
+        "file_size": lecteur.size,
+        "checksum": resultat["checksum"]
+    }).scalar()
+    db.commit()
+
+    resultat["sync_id"] = str(sync_id)
+    logger.info(f"Import TAC {source_name}: {inserted} ajoutés, {updated} modifiés, "
+                f"{resultat['unchanged']} inchangés, {compteurs['erreurs']} erreurs en {duration_ms} ms")
+    return resultat
+
+
+def _journaliser_echec(db: Session, source_name: str, lecteur: _HashingReader, started: float, message: str):
+    """Enregistre un import échoué dans tac_sync_log (sans masquer l'erreur d'origine)"""
+    try:
+        db.execute(text(_SYNC_LOG_SQL), {
+            "source_name": source_name,
+            "status": "error",
+            "imported": 0,
+            "updated": 0,
+            "errors": 0,
+            "duration_ms": int((time.perf_counter() - started) * 1000),
+            "error_message": message[:1000],
+            "file_size": lecteur.size,
+            "checksum": None
+        })
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Journalisation de l'échec d'import TAC impossible: {e}")
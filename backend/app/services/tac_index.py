@@ -0,0 +1,417 @@
+"""
+Index mémoire de la base TAC (Type Allocation Code)
+Sert la recherche /tac/{tac} et la validation IMEI (TAC + Luhn) sans requête SQL
+Les données sont un instantané binaire projeté par mmap, partagé par tous les workers
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Sequence
+import numpy as np
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from .imei_validation import luhn_valide, nettoyer_imei, rechercher_tacs, valider_lot
+from .tac_snapshot import get_shared_tac_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Sentinelle pour distinguer "index non chargé" de "TAC inconnu"
+_ABSENT = object()
+
+# Colonnes chargées depuis tac_database (la colonne raison n'est pas exposée)
+_TAC_COLUMNS = "tac, marque, modele, annee_sortie, type_appareil, statut, date_creation, date_modification"
+
+# Nombre de TAC par requête IN du repli SQL des lots
+_SQL_CHUNK_SIZE = 1000
+
+
+def _iso(value: Any) -> Optional[str]:
+    """Date au format ISO (les pilotes sans type date renvoient déjà une chaîne)"""
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _record(row: Any) -> Dict[str, Any]:
+    """Enregistrement TAC au format de l'instantané depuis une ligne SQL"""
+    return {
+        "tac": row.tac,
+        "marque": row.marque,
+        "modele": row.modele,
+        "annee_sortie": row.annee_sortie,
+        "type_appareil": row.type_appareil,
+        "statut": row.statut,
+        "date_creation": _iso(row.date_creation),
+        "date_modification": _iso(row.date_modification)
+    }
+
+
+def _validation(tac: str, luhn: bool, record: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Résultat de validation d'un IMEI au format de la fonction SQL valider_imei_avec_tac"""
+    if record is None:
+        return {
+            "valide": luhn,
+            "marque": "Inconnue",
+            "modele": "Inconnu",
+            "tac": tac,
+            "statut": "inconnu",
+            "luhn_valide": luhn,
+            "source": "luhn_only"
+        }
+    return {
+        "valide": record["statut"] == "valide" and luhn,
+        "marque": record["marque"],
+        "modele": record["modele"],
+        "tac": tac,
+        "statut": record["statut"],
+        "annee_sortie": record["annee_sortie"],
+        "type_appareil": record["type_appareil"],
+        "luhn_valide": luhn,
+        "source": "tac_database"
+    }
+
+
+def _table_signature(db: Session) -> str:
+    """Signature peu coûteuse de tac_database (nombre de lignes et dernière modification)"""
+    row = db.execute(text("SELECT COUNT(*), MAX(date_modification) FROM tac_database")).fetchone()
+    return f"{row[0]}|{_iso(row[1])}" if row else "0|None"
+
+
+class TacIndex:
+    """
+    Index de tac_database servi depuis un instantané binaire partagé (voir tac_snapshot)
+
+    L'instantané est réécrit après synchronisation ou import, et quand la vérification
+    périodique constate que la table a changé ; les autres workers projettent la
+    nouvelle génération sans relire la base. Tant qu'aucun instantané n'est disponible
+    (premier démarrage, table absente), les recherches passent par une requête SQL
+    sur la clé primaire.
+    """
+
+    def __init__(self, enabled: bool = True, refresh_interval: float = 300,
+                 snapshot_path: str = "data/tac_index.tacsnap", check_interval: float = 2.0):
+        """
+        Initialise l'index (aucun instantané n'est projeté avant le premier accès)
+
+        Args:
+            enabled: Active l'index
+            refresh_interval: Intervalle de vérification de la table en secondes (0 = désactivé)
+            snapshot_path: Chemin de l'instantané binaire, partagé par les workers
+            check_interval: Intervalle minimal entre deux lectures de la génération de l'instantané
+        """
+        self.enabled = enabled
+        self.refresh_interval = refresh_interval
+        self.snapshot = get_shared_tac_snapshot(snapshot_path, check_interval)
+        self._task: Optional[asyncio.Task] = None
+        self._statuts_cache = None
+        self.is_running = False
+        self.stats = {
+            'lookups': 0,
+            'hits': 0,
+            'misses': 0,
+            'sql_fallbacks': 0,
+            'batch_lookups': 0,
+            'reloads': 0,
+            'errors': 0,
+            'last_reload_ms': None,
+            'last_error': None
+        }
+
+    @property
+    def loaded(self) -> bool:
+        """Indique si un instantané est disponible"""
+        return self.enabled and self.snapshot.get() is not None
+
+    def load(self, db: Session, force: bool = True) -> int:
+        """
+        Publie tac_database dans l'instantané partagé
+
+        Args:
+            db: Session de base de données
+            force: Réécrire l'instantané même si la signature de la table n'a pas changé
+
+        Returns:
+            Nombre de TAC indexés
+        """
+        started = time.perf_counter()
+        signature = _table_signature(db)
+        generation = self.snapshot.get_stats()['generation']
+        snapshot = self.snapshot.publish(
+            lambda: db.execute(text(f"SELECT {_TAC_COLUMNS} FROM tac_database")).mappings(),
+            signature,
+            force=force
+        )
+        if snapshot is None:
+            raise RuntimeError(f"Instantané TAC {self.snapshot.path} illisible après écriture")
+        if snapshot.generation != generation:
+            self.stats['reloads'] += 1
+            self.stats['last_reload_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            logger.info(f"Index TAC publié: {snapshot.count} TAC, génération {snapshot.generation}")
+        return snapshot.count
+
+    def refresh(self, db: Session) -> bool:
+        """
+        Recharge l'index après une écriture dans tac_database
+        Un échec est journalisé et l'instantané précédent est conservé
+
+        Args:
+            db: Session ayant effectué l'écriture
+
+        Returns:
+            True si un nouvel instantané a été publié
+        """
+        if not self.enabled:
+            return False
+        try:
+            self.load(db)
+            return True
+        except Exception as e:
+            self.stats['errors'] += 1
+            self.stats['last_error'] = str(e)
+            logger.error(f"Rechargement de l'index TAC impossible, instantané précédent conservé: {e}")
+            return False
+
+    def lookup(self, tac: str) -> Any:
+        """
+        Recherche un TAC dans l'index
+
+        Args:
+            tac: TAC à 8 chiffres
+
+        Returns:
+            L'enregistrement TAC, None si le TAC est inconnu, ou la sentinelle _ABSENT
+            si l'index n'est pas chargé
+        """
+        if not self.enabled:
+            return _ABSENT
+        snapshot = self.snapshot.get()
+        if snapshot is None:
+            return _ABSENT
+
+        self.stats['lookups'] += 1
+        position = snapshot.find(tac)
+        if position < 0:
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return snapshot.record(position)
+
+    def get_or_load(self, tac: str, db: Session) -> Optional[Dict[str, Any]]:
+        """
+        Retourne l'enregistrement d'un TAC, depuis l'index ou à défaut depuis la base
+
+        Args:
+            tac: TAC à 8 chiffres
+            db: Session de base de données (utilisée seulement si l'index n'est pas chargé)
+
+        Returns:
+            Enregistrement TAC, ou None si le TAC n'existe pas
+        """
+        record = self.lookup(tac)
+        if record is not _ABSENT:
+            return record
+
+        self.stats['sql_fallbacks'] += 1
+        row = db.execute(
+            text(f"SELECT {_TAC_COLUMNS} FROM tac_database WHERE tac = :tac"),
+            {"tac": tac}
+        ).fetchone()
+        return _record(row) if row is not None else None
+
+    def validate_imei(self, imei: str, db: Session) -> Dict[str, Any]:
+        """
+        Valide un IMEI avec la base TAC et l'algorithme de Luhn
+        Même résultat que la fonction SQL valider_imei_avec_tac
+
+        Args:
+            imei: IMEI saisi (les caractères non numériques sont ignorés)
+            db: Session de base de données (utilisée seulement si l'index n'est pas chargé)
+
+        Returns:
+            Résultat de validation (valide, marque, modele, tac, statut, luhn_valide, source...)
+        """
+        digits = nettoyer_imei(imei)
+        if not 14 <= len(digits) <= 16:
+            return {"valide": False, "erreur": "IMEI doit contenir 14-16 chiffres", "imei": digits}
+
+        tac = digits[:8]
+        return _validation(tac, luhn_valide(digits), self.get_or_load(tac, db))
+
+    def validate_imei_batch(self, imeis: Sequence[str], db: Session, details: bool = True) -> Dict[str, Any]:
+        """
+        Valide un lot d'IMEI : format, Luhn et extraction des TAC sont vectorisés,
+        la jointure avec les clés de l'instantané se fait par recherche dichotomique
+        (searchsorted) et les statuts sont lus une fois par génération d'instantané
+
+        Args:
+            imeis: IMEI saisis
+            db: Session de base de données (utilisée seulement si l'index n'est pas chargé)
+            details: Inclure le résultat de chaque IMEI (même format que validate_imei)
+
+        Returns:
+            Compteurs du lot et, si demandé, résultats dans l'ordre des IMEI
+        """
+        lot = valider_lot(imeis)
+        format_valide, luhn, tacs = lot["format_valide"], lot["luhn_valide"], lot["tac"]
+
+        snapshot = self.snapshot.get() if self.enabled else None
+        if snapshot is not None:
+            self.stats['batch_lookups'] += len(tacs)
+            cles = np.frombuffer(snapshot.keys, dtype=np.uint32)
+            statut_valide = self._statuts_valides(snapshot)
+            lire = snapshot.record
+        else:
+            self.stats['sql_fallbacks'] += 1
+            trouves = self._load_tacs(np.unique(tacs[format_valide]), db)
+            cles = np.array(sorted(trouves), dtype=np.uint32)
+            statut_valide = np.array([trouves[cle]["statut"] == "valide" for cle in cles.tolist()], dtype=bool)
+
+            def lire(position: int) -> Dict[str, Any]:
+                return trouves[int(cles[position])]
+
+        positions = np.where(format_valide, rechercher_tacs(tacs, cles), -1)
+        trouve = positions >= 0
+        # TAC inconnu : Luhn seul ; TAC connu : Luhn et statut "valide"
+        valide = luhn & ~trouve
+        valide[trouve] = luhn[trouve] & statut_valide[positions[trouve]]
+
+        total = len(tacs)
+        nombre_valides = int(valide.sum())
+        resultat = {
+            "total_processed": total,
+            "valid_imeis": nombre_valides,
+            "invalid_imeis": total - nombre_valides,
+            "format_invalide": int((~format_valide).sum()),
+            "luhn_invalide": int((format_valide & ~luhn).sum()),
+            "tac_inconnus": int((format_valide & ~trouve).sum()),
+            "success_rate": round(nombre_valides / total * 100, 2) if total else 0.0
+        }
+        if details:
+            # Chaque TAC trouvé n'est décodé qu'une fois
+            records = {position: lire(position) for position in set(positions[trouve].tolist())}
+            resultats = []
+            for digits, format_ok, luhn_ok, position in zip(lot["imeis"], format_valide.tolist(),
+                                                            luhn.tolist(), positions.tolist()):
+                if not format_ok:
+                    resultats.append({"valide": False, "erreur": "IMEI doit contenir 14-16 chiffres", "imei": digits})
+                else:
+                    resultats.append(_validation(digits[:8], luhn_ok, records.get(position)))
+            resultat["results"] = resultats
+        return resultat
+
+    def _statuts_valides(self, snapshot: Any) -> np.ndarray:
+        """Masque des TAC de statut "valide" de l'instantané, calculé une fois par génération"""
+        cache = self._statuts_cache
+        if cache is None or cache[0] != (snapshot.path, snapshot.generation):
+            masque = np.fromiter(
+                (snapshot.statut(position) == "valide" for position in range(snapshot.count)),
+                dtype=bool, count=snapshot.count
+            )
+            self._statuts_cache = cache = ((snapshot.path, snapshot.generation), masque)
+        return cache[1]
+
+    def _load_tacs(self, tacs: np.ndarray, db: Session) -> Dict[int, Dict[str, Any]]:
+        """Lit un ensemble de TAC depuis la base, par tranches (repli sans instantané)"""
+        trouves: Dict[int, Dict[str, Any]] = {}
+        requete = text(f"SELECT {_TAC_COLUMNS} FROM tac_database WHERE tac IN :tacs").bindparams(
+            bindparam("tacs", expanding=True)
+        )
+        valeurs: List[str] = ["%08d" % tac for tac in tacs.tolist()]
+        for debut in range(0, len(valeurs), _SQL_CHUNK_SIZE):
+            for row in db.execute(requete, {"tacs": valeurs[debut:debut + _SQL_CHUNK_SIZE]}):
+                if row.tac.isdigit():
+                    trouves[int(row.tac)] = _record(row)
+        return trouves
+
+    async def start(self):
+        """Charge l'index et démarre la vérification périodique de tac_database"""
+        if self.is_running or not self.enabled:
+            return
+
+        await asyncio.to_thread(self._load_with_new_session)
+        if self.refresh_interval > 0:
+            self._task = asyncio.create_task(self._run())
+            self.is_running = True
+
+    async def stop(self):
+        """Arrête la vérification périodique (l'instantané reste disponible)"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self):
+        """Boucle de vérification périodique"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await asyncio.to_thread(self._check_with_new_session)
+
+    def _load_with_new_session(self):
+        """
+        Chargement initial : l'instantané existant est projeté sans décodage et n'est
+        réécrit que si tac_database a changé depuis sa publication.
+        Sans base joignable, l'instantané existant reste servi (ou le repli SQL).
+        """
+        self._check_with_new_session()
+        if self.snapshot.get() is None:
+            logger.warning("Index TAC non chargé, recherches TAC servies par la base")
+
+    def _check_with_new_session(self):
+        """Republie l'instantané si tac_database a changé (écriture faite hors de ce worker)"""
+        from ..core.database import SessionLocal
+        db = SessionLocal()
+        try:
+            self.load(db, force=False)
+        except Exception as e:
+            self.stats['errors'] += 1
+            self.stats['last_error'] = str(e)
+            logger.error(f"Vérification de l'index TAC impossible: {e}")
+        finally:
+            db.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne l'état de l'index
+
+        Returns:
+            Compteurs, état de l'instantané partagé (génération, taille projetée)
+        """
+        snapshot = self.snapshot.get_stats()
+        return {
+            **self.stats,
+            'enabled': self.enabled,
+            'loaded': snapshot['generation'] is not None,
+            'refresh_interval_seconds': self.refresh_interval,
+            'snapshot': snapshot
+        }
+
+
+# Instance globale pour utilisation dans l'application
+tac_index = TacIndex(
+    enabled=os.getenv("TAC_INDEX_ENABLED", "true").lower() == "true",
+    refresh_interval=float(os.getenv("TAC_INDEX_REFRESH_INTERVAL_SECONDS", "300")),
+    snapshot_path=os.getenv("TAC_SNAPSHOT_PATH", "data/tac_index.tacsnap"),
+    check_interval=float(os.getenv("TAC_SNAPSHOT_CHECK_INTERVAL_SECONDS", "2"))
+)
+
+async def start_tac_index():
+    """
+    Charge l'index TAC et démarre sa vérification périodique
+    À appeler au démarrage de l'application FastAPI
+    """
+    await tac_index.start()
+
+async def stop_tac_index():
+    """
+    Arrête la vérification périodique de l'index TAC
+    À appeler à l'arrêt de l'application FastAPI
+    """
+    await tac_index.stop()
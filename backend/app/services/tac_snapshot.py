@@ -0,0 +1,465 @@
+"""
+Instantané binaire de la base TAC, partagé entre les workers par mmap
+
+Format (petit-boutiste) :
+    en-tête de 64 octets (magique, version du format, génération, nombre de TAC,
+    positions des sections, signature de la source)
+    clés TAC triées : uint32 * n
+    enregistrements de taille fixe : 6 références de chaînes (uint32) + année (uint16)
+    pool de chaînes dédupliquées : longueur (uint16) + UTF-8
+
+Le fichier est écrit dans un fichier temporaire puis renommé (remplacement atomique) ;
+chaque worker le projette en lecture seule et y fait sa recherche dichotomique sur place.
+Les pages sont partagées par le système et l'ouverture ne demande aucun décodage.
+"""
+
+import os
+import sys
+import mmap
+import time
+import struct
+import fcntl
+import logging
+import tempfile
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Iterable, Callable
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"EIRTACSN"
+SNAPSHOT_FORMAT_VERSION = 1
+
+# magique, format, taille d'enregistrement, nombre, génération, clés, enregistrements,
+# pool, taille du pool, référence de la signature, date de création
+_HEADER = struct.Struct("<8sHHIQIIIIId12x")
+# marque, modele, type_appareil, statut, date_creation, date_modification, annee_sortie
+_RECORD = struct.Struct("<6IH2x")
+_STRING_LENGTH = struct.Struct("<H")
+
+# Référence de chaîne pour une valeur NULL
+NULL_REF = 0xFFFFFFFF
+
+# Champs textuels d'un enregistrement, dans l'ordre du format
+RECORD_FIELDS = ("marque", "modele", "type_appareil", "statut", "date_creation", "date_modification")
+
+
+class TacSnapshotError(Exception):
+    """Fichier d'instantané absent, tronqué ou d'un format inconnu"""
+    pass
+
+
+def _check_byte_order():
+    # La recherche sur place lit les clés comme des uint32 natifs
+    if sys.byteorder != "little":
+        raise TacSnapshotError("Instantané TAC non supporté sur une architecture gros-boutiste")
+
+
+def read_snapshot_header(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Lit l'en-tête d'un instantané sans le projeter en mémoire
+
+    Args:
+        path: Chemin du fichier d'instantané
+
+    Returns:
+        Champs de l'en-tête, ou None si le fichier est absent ou invalide
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read(_HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(data) < _HEADER.size:
+        return None
+
+    (magic, format_version, record_size, count, generation, keys_offset, records_offset,
+     pool_offset, pool_size, signature_ref, created_at) = _HEADER.unpack(data)
+    if magic != SNAPSHOT_MAGIC or format_version != SNAPSHOT_FORMAT_VERSION or record_size != _RECORD.size:
+        return None
+    return {
+        "count": count,
+        "generation": generation,
+        "keys_offset": keys_offset,
+        "records_offset": records_offset,
+        "pool_offset": pool_offset,
+        "pool_size": pool_size,
+        "signature_ref": signature_ref,
+        "created_at": created_at
+    }
+
+
+@contextmanager
+def snapshot_write_lock(path: str):
+    """
+    Verrou inter-processus des écrivains d'un instantané (fichier .lock voisin)
+    Les lecteurs n'en ont pas besoin : le remplacement du fichier est atomique
+
+    Args:
+        path: Chemin du fichier d'instantané
+    """
+    with open(f"{path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def write_tac_snapshot(path: str, records: Iterable[Dict[str, Any]], signature: str = "") -> int:
+    """
+    Écrit un nouvel instantané de manière atomique, avec la génération suivante
+    À appeler sous snapshot_write_lock si plusieurs processus peuvent écrire
+
+    Args:
+        path: Chemin du fichier d'instantané
+        records: Enregistrements TAC (clés tac, marque, modele, annee_sortie,
+            type_appareil, statut, date_creation, date_modification)
+        signature: Signature de la source (permet aux workers de savoir si elle a changé)
+
+    Returns:
+        Génération de l'instantané écrit
+    """
+    _check_byte_order()
+
+    entries = {}
+    for record in records:
+        tac = str(record.get("tac") or "").strip()
+        # Clé primaire côté source : le premier enregistrement d'un TAC l'emporte
+        if len(tac) == 8 and tac.isdigit():
+            entries.setdefault(int(tac), record)
+    keys = sorted(entries)
+
+    pool = bytearray()
+    refs: Dict[str, int] = {}
+
+    def intern(value: Any) -> int:
+        if value is None:
+            return NULL_REF
+        value = value.isoformat() if hasattr(value, "isoformat") else str(value)
+        ref = refs.get(value)
+        if ref is None:
+            encoded = value.encode("utf-8")[:0xFFFF]
+            ref = refs[value] = len(pool)
+            pool.extend(_STRING_LENGTH.pack(len(encoded)))
+            pool.extend(encoded)
+        return ref
+
+    records_data = bytearray(_RECORD.size * len(keys))
+    for position, key in enumerate(keys):
+        record = entries[key]
+        annee = record.get("annee_sortie") or 0
+        _RECORD.pack_into(
+            records_data, position * _RECORD.size,
+            *(intern(record.get(field)) for field in RECORD_FIELDS),
+            annee if 0 < annee <= 0xFFFF else 0
+        )
+    signature_ref = intern(signature)
+
+    previous = read_snapshot_header(path)
+    generation = previous["generation"] + 1 if previous else 1
+    keys_offset = _HEADER.size
+    records_offset = keys_offset + 4 * len(keys)
+    pool_offset = records_offset + len(records_data)
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, _RECORD.size, len(keys), generation,
+        keys_offset, records_offset, pool_offset, len(pool), signature_ref, time.time()
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tacsnap-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(struct.pack(f"<{len(keys)}I", *keys))
+            f.write(records_data)
+            f.write(pool)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    logger.info(f"Instantané TAC écrit: {path} (génération {generation}, {len(keys)} TAC)")
+    return generation
+
+
+class TacSnapshot:
+    """
+    Instantané TAC projeté en lecture seule
+    Les chaînes ne sont décodées qu'à la demande (et mémorisées par le processus)
+    """
+
+    def __init__(self, path: str):
+        """
+        Projette un fichier d'instantané
+
+        Args:
+            path: Chemin du fichier d'instantané
+
+        Raises:
+            TacSnapshotError: Si le fichier est absent, tronqué ou d'un format inconnu
+        """
+        _check_byte_order()
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < _HEADER.size:
+                    raise TacSnapshotError(f"Instantané TAC tronqué: {path}")
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise TacSnapshotError(f"Instantané TAC absent: {path}")
+
+        (magic, format_version, record_size, count, generation, keys_offset, records_offset,
+         pool_offset, pool_size, signature_ref, created_at) = _HEADER.unpack_from(self._mm, 0)
+        if magic != SNAPSHOT_MAGIC or format_version != SNAPSHOT_FORMAT_VERSION or record_size != _RECORD.size:
+            raise TacSnapshotError(f"Format d'instantané TAC inconnu: {path}")
+        if (keys_offset != _HEADER.size or records_offset != keys_offset + 4 * count
+                or pool_offset != records_offset + record_size * count or pool_offset + pool_size > size):
+            raise TacSnapshotError(f"Instantané TAC incohérent: {path}")
+
+        self.path = path
+        self.count = count
+        self.generation = generation
+        self.created_at = created_at
+        self.loaded_at = time.time()
+        self._records_offset = records_offset
+        self._pool_offset = pool_offset
+        self._pool_end = pool_offset + pool_size
+        # Clés lues sur place : bisect travaille directement sur la projection
+        self.keys = memoryview(self._mm)[keys_offset:records_offset].cast("I")
+        self._strings: Dict[int, str] = {}
+        self.signature = self.string(signature_ref)
+
+    def string(self, ref: int) -> Optional[str]:
+        """
+        Décode une chaîne du pool
+
+        Args:
+            ref: Référence dans le pool (NULL_REF pour NULL)
+
+        Returns:
+            La chaîne, ou None
+        """
+        if ref == NULL_REF:
+            return None
+        value = self._strings.get(ref)
+        if value is None:
+            start = self._pool_offset + ref + _STRING_LENGTH.size
+            if start > self._pool_end:
+                raise TacSnapshotError(f"Référence de chaîne invalide dans {self.path}")
+            (length,) = _STRING_LENGTH.unpack_from(self._mm, start - _STRING_LENGTH.size)
+            if start + length > self._pool_end:
+                raise TacSnapshotError(f"Référence de chaîne invalide dans {self.path}")
+            value = self._strings[ref] = self._mm[start:start + length].decode("utf-8", "replace")
+        return value
+
+    def find(self, tac: str) -> int:
+        """
+        Position d'un TAC dans l'instantané
+
+        Args:
+            tac: TAC à 8 chiffres
+
+        Returns:
+            Position de l'enregistrement, ou -1 si le TAC est absent
+        """
+        key = int(tac)
+        keys = self.keys
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            return position
+        return -1
+
+    def record(self, position: int) -> Dict[str, Any]:
+        """
+        Lit l'enregistrement TAC d'une position
+
+        Args:
+            position: Position retournée par find
+
+        Returns:
+            Dictionnaire au format de la table tac_database
+        """
+        refs = _RECORD.unpack_from(self._mm, self._records_offset + position * _RECORD.size)
+        string = self.string
+        return {
+            "tac": "%08d" % self.keys[position],
+            "marque": string(refs[0]),
+            "modele": string(refs[1]),
+            "annee_sortie": refs[6] or None,
+            "type_appareil": string(refs[2]),
+            "statut": string(refs[3]),
+            "date_creation": string(refs[4]),
+            "date_modification": string(refs[5])
+        }
+
+    def statut(self, position: int) -> Optional[str]:
+        """
+        Lit seulement le statut d'une position (sans décoder l'enregistrement)
+
+        Args:
+            position: Position retournée par find
+
+        Returns:
+            Statut du TAC
+        """
+        return self.string(_RECORD.unpack_from(self._mm, self._records_offset + position * _RECORD.size)[3])
+
+    def get(self, tac: str) -> Optional[Dict[str, Any]]:
+        """
+        Recherche un TAC
+
+        Args:
+            tac: TAC à 8 chiffres
+
+        Returns:
+            L'enregistrement TAC, ou None si le TAC est inconnu
+        """
+        position = self.find(tac)
+        return self.record(position) if position >= 0 else None
+
+    def mapped_bytes(self) -> int:
+        """Taille du fichier projeté (pages partagées entre les workers)"""
+        return len(self._mm)
+
+
+class SharedTacSnapshot:
+    """
+    Accès à l'instantané courant d'un chemin
+    La génération de l'en-tête est relue au plus une fois par intervalle ; un
+    instantané remplacé par un autre processus est alors projeté à nouveau.
+    """
+
+    def __init__(self, path: str, check_interval: float = 2.0):
+        """
+        Initialise l'accès (l'instantané est projeté au premier appel de get)
+
+        Args:
+            path: Chemin du fichier d'instantané
+            check_interval: Intervalle minimal entre deux lectures de l'en-tête en secondes
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot: Optional[TacSnapshot] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.stats = {
+            'generation_checks': 0,
+            'remaps': 0,
+            'errors': 0,
+            'last_error': None
+        }
+
+    def get(self) -> Optional[TacSnapshot]:
+        """
+        Retourne l'instantané courant
+
+        Returns:
+            L'instantané projeté, ou None si aucun fichier valide n'existe
+        """
+        if time.monotonic() >= self._next_check:
+            self.check()
+        return self._snapshot
+
+    def check(self) -> bool:
+        """
+        Compare la génération du fichier à celle de l'instantané projeté
+
+        Returns:
+            True si un nouvel instantané a été projeté
+        """
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval
+            self.stats['generation_checks'] += 1
+            header = read_snapshot_header(self.path)
+            current = self._snapshot
+            if header is None or (current is not None and header["generation"] == current.generation):
+                return False
+            return self._map()
+
+    def publish(self, load_records: Callable[[], Iterable[Dict[str, Any]]], signature: str = "",
+                force: bool = True) -> Optional[TacSnapshot]:
+        """
+        Écrit un nouvel instantané et le projette immédiatement
+
+        Args:
+            load_records: Fonction retournant les enregistrements TAC (appelée seulement
+                si un instantané doit être écrit)
+            signature: Signature de la source
+            force: Écrire même si l'instantané courant porte déjà cette signature
+
+        Returns:
+            L'instantané projeté
+        """
+        with snapshot_write_lock(self.path):
+            # Un autre worker a pu publier la même source pendant l'attente du verrou
+            self.check()
+            current = self._snapshot
+            if force or current is None or current.signature != signature:
+                write_tac_snapshot(self.path, load_records(), signature)
+                with self._lock:
+                    self._map()
+                    self._next_check = time.monotonic() + self.check_interval
+        return self._snapshot
+
+    def _map(self) -> bool:
+        # L'ancien instantané n'est pas fermé explicitement : une lecture en cours
+        # dans un autre thread peut encore l'utiliser, le ramasse-miettes le libère
+        try:
+            self._snapshot = TacSnapshot(self.path)
+        except (TacSnapshotError, OSError, ValueError) as e:
+            self.stats['errors'] += 1
+            self.stats['last_error'] = str(e)
+            logger.error(f"Instantané TAC {self.path} ignoré: {e}")
+            return False
+        self.stats['remaps'] += 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne l'état de l'instantané projeté
+
+        Returns:
+            Compteurs, génération et taille projetée
+        """
+        snapshot = self._snapshot
+        return {
+            **self.stats,
+            'path': self.path,
+            'generation': snapshot.generation if snapshot is not None else None,
+            'size': snapshot.count if snapshot is not None else 0,
+            'mapped_bytes': snapshot.mapped_bytes() if snapshot is not None else 0,
+            'created_at': snapshot.created_at if snapshot is not None else None
+        }
+
+
+# Un accès partagé par chemin et par processus
+_shared_snapshots: Dict[str, SharedTacSnapshot] = {}
+_shared_lock = threading.Lock()
+
+def get_shared_tac_snapshot(path: str, check_interval: float = 2.0) -> SharedTacSnapshot:
+    """
+    Retourne l'accès partagé à l'instantané d'un chemin (créé au premier appel)
+
+    Args:
+        path: Chemin du fichier d'instantané
+        check_interval: Intervalle minimal entre deux lectures de l'en-tête en secondes
+            (pris en compte à la création)
+
+    Returns:
+        Accès partagé à l'instantané
+    """
+    key = os.path.abspath(path)
+    with _shared_lock:
+        shared = _shared_snapshots.get(key)
+        if shared is None:
+            shared = _shared_snapshots[key] = SharedTacSnapshot(path, check_interval)
+        return shared
@@ -0,0 +1,369 @@
+"""
+Synchronisation incrémentale de la base TAC depuis les sources Osmocom
+Chaque ligne source reçoit une empreinte de contenu ; seules les insertions,
+modifications et suppressions effectives sont appliquées à tac_database
+"""
+
+import io
+import os
+import csv
+import json
+import time
+import uuid
+import hashlib
+import logging
+from typing import Dict, Any, Optional, Tuple, List
+
+import yaml
+import requests
+from sqlalchemy import bindparam, column, func, table, text
+from sqlalchemy.orm import Session
+
+from .tac_import import STATUT_DEFAUT, TYPE_APPAREIL_DEFAUT, iter_tac_rows
+
+logger = logging.getLogger(__name__)
+
+# Sources acceptées par /admin/tac/sync : nom dans tac_sync_log, format et URL par défaut
+SOURCES_SYNC_TAC = {
+    "osmocom_csv": {"nom": "osmocom_csv_api", "format": "csv", "url": "https://tacdb.osmocom.org/export/tacdb.csv"},
+    "osmocom_json": {"nom": "osmocom_json_api", "format": "json", "url": "https://tacdb.osmocom.org/export/tacdb.json"}
+}
+
+# Part maximale des TAC synchronisés pouvant disparaître en une fois : au-delà, la source
+# est probablement tronquée et les suppressions ne sont pas appliquées
+MAX_DELETE_RATIO = float(os.getenv("TAC_SYNC_MAX_DELETE_RATIO", "0.2"))
+
+# Taille des lots d'écriture
+_BATCH_SIZE = 1000
+
+# Vue Core de tac_database (la table n'a pas de modèle ORM)
+_tac_table = table(
+    "tac_database",
+    column("tac"), column("marque"), column("modele"), column("annee_sortie"),
+    column("type_appareil"), column("statut"), column("hash_contenu")
+)
+
+_SYNC_LOG_SQL = """
+    INSERT INTO tac_sync_log (
+        id, source_name, source_url, sync_type, format_type, status, records_imported, records_updated,
+        records_deleted, records_unchanged, records_errors, sync_duration_ms, error_message,
+        file_size_bytes, checksum
+    ) VALUES (
+        :id, :source_name, :source_url, :sync_type, :format_type, :status, :imported, :updated,
+        :deleted, :unchanged, :errors, :duration_ms, :error_message, :file_size, :checksum
+    )
+"""
+
+
+def hash_contenu(marque: str, modele: str, annee_sortie: Optional[int]) -> str:
+    """
+    Empreinte des champs fournis par la source pour un TAC
+    Le statut et le type d'appareil sont gérés localement et n'en font pas partie
+
+    Args:
+        marque: Marque
+        modele: Modèle
+        annee_sortie: Année de sortie (None si la source ne la fournit pas)
+
+    Returns:
+        Empreinte MD5 hexadécimale
+    """
+    contenu = "\x1f".join((marque, modele, str(annee_sortie or "")))
+    return hashlib.md5(contenu.encode("utf-8")).hexdigest()
+
+
+def resoudre_source(source: str, config_path: str = "config/external_apis.yml") -> Dict[str, Any]:
+    """
+    Détermine l'emplacement d'une source de synchronisation
+
+    Ordre de priorité : TAC_SYNC_<SOURCE>_FILE, TAC_SYNC_<SOURCE>_URL, puis les clés file/url
+    de la source dans la section tac_database.sources de external_apis.yml, puis l'URL Osmocom.
+    Un fichier local sert de substitut à l'API (environnement isolé, tests).
+
+    Args:
+        source: Clé de SOURCES_SYNC_TAC (osmocom_csv, osmocom_json)
+        config_path: Chemin de external_apis.yml
+
+    Returns:
+        Nom, format, url et fichier de la source
+
+    Raises:
+        ValueError: Si la source est inconnue
+    """
+    if source not in SOURCES_SYNC_TAC:
+        raise ValueError(f"Source non supportée: {source}")
+    resolue = {**SOURCES_SYNC_TAC[source], "fichier": None}
+
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        for entree in config.get("tac_database", {}).get("sources", []) or []:
+            if entree.get("name") == resolue["nom"]:
+                resolue["url"] = entree.get("url") or resolue["url"]
+                resolue["fichier"] = entree.get("file")
+                break
+    except FileNotFoundError:
+        pass
+
+    prefixe = f"TAC_SYNC_{source.upper()}"
+    if os.getenv(f"{prefixe}_URL"):
+        resolue["url"], resolue["fichier"] = os.getenv(f"{prefixe}_URL"), None
+    if os.getenv(f"{prefixe}_FILE"):
+        resolue["fichier"] = os.getenv(f"{prefixe}_FILE")
+    return resolue
+
+
+def lire_source(source: Dict[str, Any]) -> bytes:
+    """
+    Télécharge (ou lit) le contenu brut de la source
+
+    Args:
+        source: Source résolue par resoudre_source
+
+    Returns:
+        Contenu du fichier source
+    """
+    if source["fichier"]:
+        with open(source["fichier"], "rb") as f:
+            return f.read()
+    response = requests.get(source["url"], timeout=float(os.getenv("TAC_SYNC_TIMEOUT_SECONDS", "60")))
+    response.raise_for_status()
+    return response.content
+
+
+def analyser_source(contenu: bytes, format_source: str) -> Tuple[Dict[str, Tuple[str, str, Optional[int]]], int]:
+    """
+    Extrait les TAC d'un export Osmocom (la dernière occurrence d'un TAC l'emporte)
+
+    Args:
+        contenu: Contenu brut (UTF-8)
+        format_source: "csv" (export Osmocom) ou "json" (liste d'objets tac/manufacturer/model,
+            ou objet tac_entries comme data/tac_database.json)
+
+    Returns:
+        ({tac: (marque, modele, annee_sortie)}, nombre de lignes rejetées)
+
+    Raises:
+        ValueError: Si le contenu ne peut pas être décodé
+    """
+    texte = contenu.decode("utf-8-sig")
+    lignes: Dict[str, Tuple[str, str, Optional[int]]] = {}
+
+    if format_source == "csv":
+        compteurs = {"lignes": 0, "valides": 0, "erreurs": 0}
+        for _, tac, marque, modele, _, _, annee in iter_tac_rows(csv.reader(io.StringIO(texte)), "osmocom", compteurs):
+            lignes[tac] = (marque, modele, annee)
+        return lignes, compteurs["erreurs"]
+
+    document = json.loads(texte)
+    if isinstance(document, dict):
+        entrees = [{"tac": tac, **valeurs} for tac, valeurs in (document.get("tac_entries") or {}).items()]
+    else:
+        entrees = document
+    # Mise en forme CSV "standard" pour réutiliser les mêmes règles de validation
+    normalisees = [["tac", "marque", "modele", "annee_sortie"]] + [
+        [
+            str(entree.get("tac", "")),
+            str(entree.get("manufacturer") or entree.get("brand") or entree.get("marque") or ""),
+            str(entree.get("model") or entree.get("name") or entree.get("modele") or ""),
+            str(entree.get("release_year") or entree.get("year") or entree.get("annee_sortie") or "")
+        ]
+        for entree in entrees if isinstance(entree, dict)
+    ]
+    compteurs = {"lignes": 0, "valides": 0, "erreurs": 0}
+    for _, tac, marque, modele, _, _, annee in iter_tac_rows(iter(normalisees), "standard", compteurs):
+        lignes[tac] = (marque, modele, annee)
+    erreurs = compteurs["erreurs"] + sum(1 for entree in entrees if not isinstance(entree, dict))
+    return lignes, erreurs
+
+
+def _derniere_empreinte(db: Session, source_name: str) -> Optional[str]:
+    """
+    Somme de contrôle du dernier fichier appliqué pour cette source
+
+    None si la dernière synchronisation a différé des suppressions (somme de contrôle non
+    journalisée) : le même fichier est alors comparé de nouveau au lieu d'être ignoré.
+    """
+    return db.execute(text("""
+        SELECT checksum FROM tac_sync_log
+        WHERE source_name = :source_name AND status IN ('success', 'partial')
+        ORDER BY sync_date DESC
+        LIMIT 1
+    """), {"source_name": source_name}).scalar()
+
+
+def _modifie_localement(existant: Any) -> bool:
+    """Vrai si l'opérateur a changé le statut ou le type d'appareil d'un TAC synchronisé"""
+    return (existant.statut or STATUT_DEFAUT) != STATUT_DEFAUT or \
+        (existant.type_appareil or TYPE_APPAREIL_DEFAUT) != TYPE_APPAREIL_DEFAUT
+
+
+def _par_lots(elements: List[Any]):
+    for debut in range(0, len(elements), _BATCH_SIZE):
+        yield elements[debut:debut + _BATCH_SIZE]
+
+
+def synchroniser_tac_source(db: Session, source: str, sync_type: str = "manual",
+                            force: bool = False) -> Dict[str, Any]:
+    """
+    Synchronise tac_database avec une source Osmocom en n'écrivant que les différences
+
+    - insertion : TAC absent de la base
+    - modification : empreinte source différente de l'empreinte enregistrée (marque, modèle
+      et année sont mis à jour ; statut et type d'appareil locaux sont conservés)
+    - suppression : TAC synchronisé (empreinte enregistrée) absent de la source
+    - adoption : TAC saisi localement, identique à la source, qui reçoit seulement son empreinte
+
+    Si le fichier source est identique (somme de contrôle) à la dernière synchronisation réussie,
+    rien n'est relu ni écrit, sauf avec force=True. Une synchronisation dont les suppressions
+    ont été différées (TAC_SYNC_MAX_DELETE_RATIO) ne compte pas : son fichier est recomparé.
+
+    Args:
+        db: Session de base de données
+        source: Clé de SOURCES_SYNC_TAC (osmocom_csv, osmocom_json)
+        sync_type: Type enregistré dans tac_sync_log (manual, scheduled)
+        force: Comparer ligne à ligne même si le fichier source n'a pas changé
+
+    Returns:
+        Compteurs par catégorie, durée, somme de contrôle et identifiant du journal
+
+    Raises:
+        ValueError: Si la source est inconnue ou son contenu illisible
+    """
+    started = time.perf_counter()
+    config = resoudre_source(source)
+    origine = config["fichier"] or config["url"]
+    resultat = {
+        "imported": 0, "updated": 0, "deleted": 0, "retained": 0, "unchanged": 0, "adopted": 0, "errors": 0,
+        "suppressions_differees": 0,
+        "format": config["format"], "source": config["nom"], "source_url": origine,
+        "status": "success", "error_message": None, "file_size_bytes": None, "checksum": None
+    }
+
+    try:
+        contenu = lire_source(config)
+        resultat["file_size_bytes"] = len(contenu)
+        resultat["checksum"] = hashlib.sha256(contenu).hexdigest()
+
+        if not force and resultat["checksum"] == _derniere_empreinte(db, config["nom"]):
+            resultat["source_inchangee"] = True
+        else:
+            _appliquer_differences(db, contenu, config["format"], resultat)
+    except Exception as e:
+        db.rollback()
+        resultat["status"] = "error"
+        resultat["error_message"] = str(e)
+        _journaliser(db, config, sync_type, resultat, started)
+        raise
+
+    _journaliser(db, config, sync_type, resultat, started)
+    logger.info(
+        f"Synchronisation TAC {config['nom']}: {resultat['imported']} ajoutés, {resultat['updated']} modifiés, "
+        f"{resultat['deleted']} supprimés, {resultat['retained']} conservés (modifiés localement), "
+        f"{resultat['unchanged']} inchangés en {resultat['duration_ms']} ms"
+    )
+    return resultat
+
+
+def _appliquer_differences(db: Session, contenu: bytes, format_source: str, resultat: Dict[str, Any]):
+    """Calcule les différences entre la source et tac_database puis les applique (sans commit)"""
+    lignes, resultat["errors"] = analyser_source(contenu, format_source)
+    if resultat["errors"]:
+        resultat["status"] = "partial"
+
+    existants = {
+        row.tac: row
+        for row in db.execute(text(
+            "SELECT tac, marque, modele, annee_sortie, type_appareil, statut, hash_contenu FROM tac_database"
+        ))
+    }
+
+    insertions, modifications, adoptions = [], [], []
+    for tac, (marque, modele, annee) in lignes.items():
+        empreinte = hash_contenu(marque, modele, annee)
+        existant = existants.get(tac)
+        if existant is None:
+            insertions.append({
+                "tac": tac, "marque": marque, "modele": modele, "annee_sortie": annee,
+                "type_appareil": TYPE_APPAREIL_DEFAUT, "statut": STATUT_DEFAUT, "hash_contenu": empreinte
+            })
+        elif existant.hash_contenu == empreinte:
+            resultat["unchanged"] += 1
+        elif (existant.hash_contenu is None and (existant.marque, existant.modele) == (marque, modele)
+              and annee in (None, existant.annee_sortie)):
+            adoptions.append({"b_tac": tac, "b_hash": empreinte})
+        else:
+            modifications.append({
+                "b_tac": tac, "b_marque": marque, "b_modele": modele, "b_annee": annee, "b_hash": empreinte
+            })
+
+    # Seuls les TAC déjà synchronisés peuvent être supprimés (les ajouts manuels n'ont pas d'empreinte).
+    # Un TAC disparu de la source dont l'opérateur a modifié le statut ou le type (ex. bloque)
+    # est conservé : le supprimer ramènerait ses IMEI à "inconnu, Luhn seul"
+    synchronises = [tac for tac, existant in existants.items() if existant.hash_contenu is not None]
+    disparus = [tac for tac in synchronises if tac not in lignes]
+    suppressions = [tac for tac in disparus if not _modifie_localement(existants[tac])]
+    resultat["retained"] = len(disparus) - len(suppressions)
+    if suppressions and len(suppressions) > MAX_DELETE_RATIO * len(synchronises):
+        resultat["status"] = "partial"
+        resultat["error_message"] = (
+            f"{len(suppressions)} suppressions sur {len(synchronises)} TAC synchronisés non appliquées "
+            f"(au-delà de TAC_SYNC_MAX_DELETE_RATIO={MAX_DELETE_RATIO}) : source tronquée ?"
+        )
+        resultat["suppressions_differees"] = len(suppressions)
+        suppressions = []
+
+    for lot in _par_lots(insertions):
+        db.execute(_tac_table.insert(), lot)
+    colonnes = _tac_table.c
+    for lot in _par_lots(modifications):
+        db.execute(
+            _tac_table.update().where(colonnes.tac == bindparam("b_tac")).values(
+                marque=bindparam("b_marque"),
+                modele=bindparam("b_modele"),
+                annee_sortie=func.coalesce(bindparam("b_annee"), colonnes.annee_sortie),
+                hash_contenu=bindparam("b_hash")
+            ),
+            lot
+        )
+    for lot in _par_lots(adoptions):
+        db.execute(_tac_table.update().where(colonnes.tac == bindparam("b_tac")).values(hash_contenu=bindparam("b_hash")), lot)
+    for lot in _par_lots(suppressions):
+        db.execute(_tac_table.delete().where(colonnes.tac.in_(lot)))
+
+    resultat["imported"] = len(insertions)
+    resultat["updated"] = len(modifications)
+    resultat["adopted"] = len(adoptions)
+    resultat["deleted"] = len(suppressions)
+
+
+def _journaliser(db: Session, config: Dict[str, Any], sync_type: str, resultat: Dict[str, Any], started: float):
+    """Enregistre la synchronisation dans tac_sync_log et valide la transaction"""
+    resultat["duration_ms"] = int((time.perf_counter() - started) * 1000)
+    resultat["sync_id"] = str(uuid.uuid4())
+    try:
+        db.execute(text(_SYNC_LOG_SQL), {
+            "id": resultat["sync_id"],
+            "source_name": config["nom"],
+            "source_url": resultat["source_url"],
+            "sync_type": sync_type,
+            "format_type": config["format"],
+            "status": resultat["status"],
+            "imported": resultat["imported"],
+            "updated": resultat["updated"],
+            "deleted": resultat["deleted"],
+            "unchanged": resultat["unchanged"] + resultat["adopted"],
+            "errors": resultat["errors"],
+            "duration_ms": resultat["duration_ms"],
+            "error_message": (resultat["error_message"] or "")[:1000] or None,
+            "file_size": resultat["file_size_bytes"],
+            # Pas de somme de contrôle si des suppressions ont été différées : le fichier
+            # sera recomparé au lieu d'être ignoré comme déjà appliqué
+            "checksum": None if resultat["suppressions_differees"] else resultat["checksum"]
+        })
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        if resultat["status"] != "error":
+            raise
+        logger.error(f"Journalisation de l'échec de synchronisation TAC impossible: {e}")
@@ -18,6 +18,18 @@ from .notification_scheduler import (
     trigger_notification_job
 )
 
+from .write_behind import (
+    write_behind_buffer,
+    start_write_behind,
+    stop_write_behind
+)
+
+from .notification_outbox import (
+    notification_outbox,
+    start_notification_outbox,
+    stop_notification_outbox
+)
+
 __all__ = [
     'notification_dispatcher',
     'send_notification_now', 
@@ -26,5 +38,11 @@ __all__ = [
     'start_notification_scheduler',
     'stop_notification_scheduler',
     'get_scheduler_status',
-    'trigger_notification_job'
+    'trigger_notification_job',
+    'write_behind_buffer',
+    'start_write_behind',
+    'stop_write_behind',
+    'notification_outbox',
+    'start_notification_outbox',
+    'stop_notification_outbox'
 ]
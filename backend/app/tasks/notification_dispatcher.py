@@ -103,6 +103,15 @@ class NotificationDispatcher:
                     'batch_size': 50,
                     'max_execution_time_seconds': 300
                 },
+                'outbox': {
+                    'poll_interval_seconds': 5,
+                    'batch_size': 200,
+                    'max_attempts': 3,
+                    'digest': {
+                        'enabled': True,
+                        'window_seconds': 60
+                    }
+                },
                 'rate_limiting': {
                     'enabled': True,
                     'email': {
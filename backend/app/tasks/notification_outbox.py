@@ -0,0 +1,374 @@
+"""
+Outbox durable des notifications déclenchées par les requêtes HTTP
+Les routes enregistrent un événement (table notification_outbox) dans leur transaction ;
+une tâche de fond du dispatcher, réveillée par une file en mémoire, rend les templates
+et envoie les notifications après la réponse HTTP
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import and_, event, or_
+from sqlalchemy.orm import Session
+
+from ..core.database import SessionLocal
+from ..models.notification_outbox import NotificationOutbox
+from .notification_dispatcher import notification_dispatcher
+
+logger = logging.getLogger(__name__)
+
+# Événements pris en charge par l'outbox
+EVENEMENT_VERIFICATION_IMEI = "verification_imei"
+EVENEMENT_NOUVEL_APPAREIL = "nouvel_appareil"
+
+# Marqueur déposé dans la file par stop() pour terminer la boucle
+_STOP = object()
+
+
+class NotificationOutboxQueue:
+    """
+    Outbox des notifications avec réveil en mémoire et regroupement par utilisateur
+
+    La table est la source de vérité : un événement non signalé (redémarrage,
+    autre worker) est repris au prochain passage périodique.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialise l'outbox
+
+        Args:
+            config: Section notifications.outbox de la configuration du dispatcher
+        """
+        digest_config = config.get('digest', {})
+        self.poll_interval = config.get('poll_interval_seconds', 5)
+        self.batch_size = config.get('batch_size', 200)
+        self.max_attempts = config.get('max_attempts', 3)
+        # Délai après lequel un événement réservé mais jamais enregistré est repris
+        self.claim_timeout = config.get('claim_timeout_seconds', 300)
+        self.digest_enabled = digest_config.get('enabled', True)
+        self.digest_window = digest_config.get('window_seconds', 60)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self.is_running = False
+
+        self.stats = {
+            'published': 0,
+            'processed': 0,
+            'digests_sent': 0,
+            'coalesced': 0,
+            'failed': 0,
+            'drains': 0,
+            'last_drain': None
+        }
+
+    async def start(self):
+        """Démarre la boucle de traitement sur la boucle d'événements courante"""
+        if self.is_running:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        self.is_running = True
+        logger.info(
+            f"Outbox des notifications démarrée - récapitulatif: {self.digest_enabled} "
+            f"({self.digest_window}s), reprise toutes les {self.poll_interval}s"
+        )
+
+    async def stop(self):
+        """Arrête la boucle après le traitement en cours ; les événements restants sont conservés en base"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        self._queue.put_nowait(_STOP)
+        await self._task
+        logger.info(f"Outbox des notifications arrêtée - {self.stats['processed']} événements traités")
+
+    def publier(self, db: Session, evenement: str, user_id: Any, charge_utile: Dict[str, Any]) -> NotificationOutbox:
+        """
+        Enregistre un événement de notification dans la transaction de l'appelant
+
+        L'événement est écrit au commit de l'appelant ; le traitement est signalé
+        juste après ce commit et ne commence jamais avant la fin de la transaction.
+
+        Args:
+            db: Session de la requête (l'appelant reste responsable du commit)
+            evenement: Type d'événement (verification_imei, nouvel_appareil)
+            user_id: ID de l'utilisateur destinataire
+            charge_utile: Paramètres de la notification (sérialisables en JSON)
+
+        Returns:
+            L'événement ajouté à la session
+        """
+        entry = NotificationOutbox(
+            evenement=evenement,
+            utilisateur_id=user_id,
+            charge_utile=charge_utile,
+            statut='en_attente',
+            tentative=0,
+            date_creation=datetime.now()
+        )
+        db.add(entry)
+        # AsyncSession : les événements de commit sont portés par la session synchrone sous-jacente
+        event.listen(getattr(db, "sync_session", db), "after_commit", lambda session: self.signaler(), once=True)
+        self.stats['published'] += 1
+        return entry
+
+    def signaler(self):
+        """Réveille la boucle de traitement (appelable depuis le threadpool)"""
+        if not self.is_running:
+            return
+
+        try:
+            in_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            in_loop = False
+
+        if in_loop:
+            self._queue.put_nowait(True)
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, True)
+
+    async def _run(self):
+        """Boucle : attend un signal ou l'échéance suivante, puis traite les événements en attente"""
+        timeout = 0
+        while True:
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None
+
+            # Les signaux arrivés entre-temps sont couverts par le même passage
+            stopping = item is _STOP
+            while not self._queue.empty():
+                stopping = self._queue.get_nowait() is _STOP or stopping
+            if stopping:
+                return
+
+            try:
+                timeout = await self.drain()
+            except Exception as e:
+                logger.error(f"Erreur lors du traitement de l'outbox: {e}")
+                timeout = self.poll_interval
+
+    async def drain(self) -> float:
+        """
+        Traite les événements en attente
+
+        Les vérifications IMEI d'un même utilisateur sont regroupées : elles ne sont
+        envoyées qu'une fois la fenêtre de regroupement écoulée depuis la plus ancienne,
+        en un seul email récapitulatif s'il y en a plusieurs.
+
+        Les événements dus sont réservés (statut en_cours) par une transaction courte,
+        puis envoyés sans transaction ouverte ; le résultat de chaque envoi est enregistré
+        par son propre commit. Les accès base passent par un thread : la boucle
+        d'événements n'est jamais bloquée.
+
+        Returns:
+            Délai en secondes avant le prochain passage nécessaire
+        """
+        start = time.perf_counter()
+        groups, examined, next_run = await asyncio.to_thread(self._claim, datetime.now())
+
+        for group in groups:
+            result = await self._process(group)
+            await asyncio.to_thread(self._record, group, result)
+
+        if examined >= self.batch_size and groups:
+            next_run = 0
+
+        self.stats['drains'] += 1
+        self.stats['last_drain'] = datetime.now().isoformat()
+        if examined:
+            logger.debug(f"Outbox: {examined} événements examinés en {(time.perf_counter() - start) * 1000:.1f}ms")
+        return next_run
+
+    def _claim(self, now: datetime) -> Tuple[List[List[Dict[str, Any]]], int, float]:
+        """
+        Réserve les événements dus (exécuté dans un thread)
+
+        Un événement réservé depuis plus de claim_timeout (worker arrêté pendant l'envoi)
+        est repris.
+
+        Args:
+            now: Heure de référence du passage
+
+        Returns:
+            (groupes d'événements à envoyer, nombre d'événements examinés, délai avant le prochain passage)
+        """
+        next_run = self.poll_interval
+        window = timedelta(seconds=self.digest_window)
+        db = SessionLocal()
+
+        try:
+            # skip_locked : plusieurs workers peuvent vider l'outbox sans doublon ; les verrous
+            # ne sont tenus que le temps de marquer les événements réservés
+            entries = (
+                db.query(NotificationOutbox)
+                .filter(or_(
+                    NotificationOutbox.statut == 'en_attente',
+                    and_(
+                        NotificationOutbox.statut == 'en_cours',
+                        NotificationOutbox.date_traitement < now - timedelta(seconds=self.claim_timeout)
+                    )
+                ))
+                .order_by(NotificationOutbox.date_creation)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+
+            groups: List[List[NotificationOutbox]] = []
+            digests: Dict[Any, List[NotificationOutbox]] = {}
+            for entry in entries:
+                if self.digest_enabled and entry.evenement == EVENEMENT_VERIFICATION_IMEI:
+                    digests.setdefault(entry.utilisateur_id, []).append(entry)
+                else:
+                    groups.append([entry])
+
+            for group in digests.values():
+                due = group[0].date_creation + window
+                if due > now:
+                    next_run = min(next_run, (due - now).total_seconds())
+                    continue
+                groups.append(group)
+
+            claimed = []
+            for group in groups:
+                for entry in group:
+                    entry.statut = 'en_cours'
+                    entry.date_traitement = now
+                claimed.append([self._snapshot(entry) for entry in group])
+
+            db.commit()
+            return claimed, len(entries), next_run
+
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _snapshot(entry: NotificationOutbox) -> Dict[str, Any]:
+        """Copie des champs d'un événement utilisés après la fermeture de la session"""
+        return {
+            'id': entry.id,
+            'evenement': entry.evenement,
+            'utilisateur_id': entry.utilisateur_id,
+            'charge_utile': entry.charge_utile or {},
+            'tentative': entry.tentative or 0
+        }
+
+    def _record(self, group: List[Dict[str, Any]], result: Dict[str, Any]):
+        """
+        Enregistre le résultat de l'envoi d'un groupe d'événements (exécuté dans un thread)
+
+        Args:
+            group: Événements réservés par _claim
+            result: Résultat de _process
+        """
+        # Une notification créée (même en échec d'envoi) est reprise par le dispatcher
+        handled = result.get("success") or result.get("notification_id")
+        db = SessionLocal()
+
+        try:
+            entries = (
+                db.query(NotificationOutbox)
+                .filter(NotificationOutbox.id.in_([item['id'] for item in group]))
+                .all()
+            )
+            for entry in entries:
+                entry.tentative = (entry.tentative or 0) + 1
+                if handled:
+                    entry.statut = 'traité'
+                    entry.date_traitement = datetime.now()
+                    entry.erreur = None
+                else:
+                    entry.statut = 'échoué' if entry.tentative >= self.max_attempts else 'en_attente'
+                    entry.erreur = result.get("error")
+            db.commit()
+
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if handled:
+            self.stats['processed'] += len(group)
+            if len(group) > 1:
+                self.stats['digests_sent'] += 1
+                self.stats['coalesced'] += len(group)
+        else:
+            self.stats['failed'] += len(group)
+            logger.error(f"Échec du traitement de l'événement {group[0]['evenement']} ({group[0]['id']}): {result.get('error')}")
+
+    async def _process(self, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Envoie la notification d'un événement, ou le récapitulatif d'un groupe de vérifications
+
+        Returns:
+            Résultat du service de notifications (success, notification_id, error)
+        """
+        from ..services.eir_notifications import EIRNotificationService
+
+        first = entries[0]
+        user_id = str(first['utilisateur_id'])
+
+        try:
+            if len(entries) > 1:
+                return await EIRNotificationService.notifier_digest_verifications_imei(
+                    user_id, [entry['charge_utile'] for entry in entries]
+                )
+            if first['evenement'] == EVENEMENT_VERIFICATION_IMEI:
+                return await EIRNotificationService.notifier_verification_imei(user_id, **first['charge_utile'])
+            if first['evenement'] == EVENEMENT_NOUVEL_APPAREIL:
+                return await EIRNotificationService.notifier_nouvel_appareil(user_id, first['charge_utile'])
+            return {"success": False, "error": f"Événement non supporté: {first['evenement']}"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne les statistiques de l'outbox
+
+        Returns:
+            Compteurs et configuration
+        """
+        return {
+            **self.stats,
+            'is_running': self.is_running,
+            'pending_signals': self._queue.qsize() if self._queue else 0,
+            'poll_interval_seconds': self.poll_interval,
+            'batch_size': self.batch_size,
+            'digest_enabled': self.digest_enabled,
+            'digest_window_seconds': self.digest_window
+        }
+
+
+# Instance globale pour utilisation dans l'application
+notification_outbox = NotificationOutboxQueue(
+    notification_dispatcher.config.get('notifications', {}).get('outbox', {})
+)
+
+async def start_notification_outbox():
+    """
+    Démarre le traitement de l'outbox des notifications
+    À appeler au démarrage de l'application FastAPI
+    """
+    await notification_outbox.start()
+
+async def stop_notification_outbox():
+    """
+    Arrête le traitement de l'outbox des notifications
+    À appeler à l'arrêt de l'application FastAPI
+    """
+    await notification_outbox.stop()
@@ -0,0 +1,367 @@
+"""
+Tampon d'écriture différée (write-behind) pour les lignes recherche et journal_audit
+Les endpoints de recherche IMEI déposent leurs lignes dans une file asyncio bornée ;
+une tâche de fond les insère par lots (INSERT multi-lignes) toutes les N ms ou tous les M lignes
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from ..core.database import SessionLocal
+from ..models.recherche import Recherche
+from ..models.journal_audit import JournalAudit
+
+logger = logging.getLogger(__name__)
+
+# Tables acceptées par le tampon
+TABLES = {
+    "recherche": Recherche.__table__,
+    "journal_audit": JournalAudit.__table__
+}
+
+# Marqueur déposé dans la file par stop() pour terminer la boucle de vidage
+_STOP = object()
+
+# Attente maximale (secondes) entre deux tentatives quand la base est injoignable
+MAX_RETRY_BACKOFF = 5.0
+
+
+def _is_transient(error: Exception) -> bool:
+    """Erreur de connexion à la base (le lot peut être réessayé tel quel)"""
+    if isinstance(error, (OperationalError, InterfaceError)):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+def _as_uuid(value: Any) -> Any:
+    """Normalise un identifiant en uuid.UUID (les routes manipulent souvent des str)"""
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    return uuid.UUID(str(value))
+
+
+class WriteBehindBuffer:
+    """
+    File d'écriture différée bornée avec vidage périodique par lots
+
+    Si la file est pleine ou si le tampon n'est pas démarré, enqueue() retourne False
+    et l'appelant écrit la ligne de façon synchrone. Une ligne acceptée n'est jamais
+    abandonnée : base injoignable, le lot est remis en file et réessayé ; lot refusé
+    par la base, les lignes sont réécrites une à une et seule une ligne elle-même
+    refusée est journalisée avec ses valeurs (comme l'aurait fait l'écriture synchrone).
+    """
+
+    def __init__(self, max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval_ms: int = 200, enabled: bool = True):
+        """
+        Initialise le tampon
+
+        Args:
+            max_queue: Nombre maximum de lignes en attente (mémoire bornée)
+            batch_size: Nombre de lignes déclenchant un vidage immédiat
+            flush_interval_ms: Délai maximum avant vidage d'une ligne en attente
+            enabled: Si False, toutes les écritures restent synchrones
+        """
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.enabled = enabled
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self.is_running = False
+        # Lignes acceptées depuis le threadpool, pas encore insérées dans la file
+        self._pending_from_threads = 0
+        self._pending_lock = threading.Lock()
+        self._retry_backoff = 0.0
+
+        self.stats = {
+            'enqueued': 0,
+            'written': 0,
+            'overflow': 0,
+            'requeued': 0,
+            'written_one_by_one': 0,
+            'failed': 0,
+            'flushes': 0,
+            'last_flush': None,
+            'last_flush_rows': 0,
+            'last_flush_ms': 0
+        }
+
+    async def start(self):
+        """Démarre la tâche de vidage sur la boucle d'événements courante"""
+        if self.is_running or not self.enabled:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        # File non bornée : max_queue est vérifié à l'admission (enqueue), les lignes déjà
+        # acceptées (threadpool, lots remis en file) et le marqueur d'arrêt y trouvent toujours place
+        self._queue = asyncio.Queue()
+        self._batch_ready = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        self.is_running = True
+        logger.info(
+            f"Tampon write-behind démarré - lot: {self.batch_size}, "
+            f"intervalle: {int(self.flush_interval * 1000)}ms, file max: {self.max_queue}"
+        )
+
+    async def stop(self):
+        """Arrête la tâche de vidage et écrit toutes les lignes encore en attente"""
+        if not self.is_running:
+            return
+
+        # Plus aucune nouvelle ligne n'est acceptée ; la boucle vide la file jusqu'au marqueur
+        self.is_running = False
+        self._queue.put_nowait(_STOP)
+        self._batch_ready.set()
+        await self._task
+
+        # Lignes acceptées depuis le threadpool avant l'arrêt, arrivées après le marqueur
+        while not self._queue.empty() or self._pending_from_threads:
+            if self._queue.empty():
+                await asyncio.sleep(0)
+                continue
+            await self._flush(self._drain(self._queue.qsize()))
+
+        logger.info(f"Tampon write-behind arrêté - {self.stats['written']} lignes écrites")
+
+    def enqueue(self, table: str, row: Dict[str, Any]) -> bool:
+        """
+        Dépose une ligne dans la file d'écriture différée
+
+        Args:
+            table: Nom de la table cible ("recherche" ou "journal_audit")
+            row: Valeurs de colonnes de la ligne
+
+        Returns:
+            True si la ligne a été prise en charge, False si l'appelant doit l'écrire lui-même
+        """
+        if not self.is_running:
+            return False
+
+        item = (table, row)
+        try:
+            in_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            in_loop = False
+
+        if in_loop:
+            if self._queue.qsize() + self._pending_from_threads >= self.max_queue:
+                self.stats['overflow'] += 1
+                return False
+            self._queue.put_nowait(item)
+            self._signal_batch()
+        else:
+            # Appel depuis le threadpool (routes synchrones) : on passe par la boucle
+            with self._pending_lock:
+                if self._queue.qsize() + self._pending_from_threads >= self.max_queue:
+                    self.stats['overflow'] += 1
+                    return False
+                self._pending_from_threads += 1
+            self._loop.call_soon_threadsafe(self._put_from_thread, item)
+
+        self.stats['enqueued'] += 1
+        return True
+
+    def _put_from_thread(self, item: Tuple[str, Dict[str, Any]]):
+        """Insère dans la file depuis la boucle (appelé via call_soon_threadsafe)"""
+        # Place réservée par enqueue() : la ligne acceptée est toujours insérée
+        self._queue.put_nowait(item)
+        with self._pending_lock:
+            self._pending_from_threads -= 1
+        self._signal_batch()
+
+    def _signal_batch(self):
+        """Réveille la boucle de vidage dès qu'un lot complet est disponible"""
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+
+    def _drain(self, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """Retire jusqu'à `limit` lignes de la file sans attendre"""
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return items
+
+    async def _run(self):
+        """Boucle de vidage : attend une ligne puis un lot complet ou l'expiration de l'intervalle"""
+        while True:
+            first = await self._queue.get()
+
+            if first is not _STOP and self._queue.qsize() + 1 < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_ready.clear()
+
+            batch = [first] + self._drain(self.batch_size - 1)
+            stopping = any(item is _STOP for item in batch)
+            await self._flush([item for item in batch if item is not _STOP])
+
+            if stopping:
+                # Écrire tout ce qui précédait le marqueur avant de rendre la main
+                while not self._queue.empty():
+                    await self._flush(self._drain(self.batch_size))
+                return
+
+    async def _flush(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        """Écrit un lot hors de la boucle d'événements"""
+        if not batch:
+            return
+
+        rows_by_table: Dict[str, List[Dict[str, Any]]] = {}
+        for table, row in batch:
+            rows_by_table.setdefault(table, []).append(row)
+
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._write, rows_by_table)
+            self.stats['written'] += len(batch)
+            self._retry_backoff = 0.0
+        except Exception as e:
+            if _is_transient(e) and self.is_running:
+                # Base injoignable : le lot est remis en file et réessayé après un délai croissant
+                for item in batch:
+                    self._queue.put_nowait(item)
+                self.stats['requeued'] += len(batch)
+                self._retry_backoff = min(MAX_RETRY_BACKOFF, max(self.flush_interval, self._retry_backoff * 2))
+                logger.warning(
+                    f"Écriture différée de {len(batch)} lignes impossible, nouvel essai dans "
+                    f"{self._retry_backoff:.1f}s: {e}"
+                )
+                await asyncio.sleep(self._retry_backoff)
+            else:
+                # Lot refusé (ou arrêt en cours) : une transaction par ligne pour isoler les lignes fautives
+                logger.warning(f"Écriture différée de {len(batch)} lignes refusée, écriture ligne par ligne: {e}")
+                written = await asyncio.to_thread(self._write_each, batch)
+                self.stats['written'] += written
+                self.stats['written_one_by_one'] += written
+                self.stats['failed'] += len(batch) - written
+
+        self.stats['flushes'] += 1
+        self.stats['last_flush'] = datetime.now().isoformat()
+        self.stats['last_flush_rows'] = len(batch)
+        self.stats['last_flush_ms'] = round((time.perf_counter() - start) * 1000, 2)
+
+    @staticmethod
+    def _write(rows_by_table: Dict[str, List[Dict[str, Any]]]):
+        """Insère chaque groupe de lignes en un INSERT multi-lignes, en une seule transaction"""
+        db = SessionLocal()
+        try:
+            for table, rows in rows_by_table.items():
+                db.execute(TABLES[table].insert(), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _write_each(batch: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Insère les lignes une à une, chacune dans sa transaction
+
+        Une ligne refusée est journalisée avec ses valeurs (reprise manuelle possible).
+
+        Returns:
+            Nombre de lignes écrites
+        """
+        written = 0
+        db = SessionLocal()
+        try:
+            for table, row in batch:
+                try:
+                    db.execute(TABLES[table].insert(), [row])
+                    db.commit()
+                    written += 1
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Ligne {table} non écrite par le tampon write-behind: {row} - {e}")
+        finally:
+            db.close()
+        return written
+
+    def enqueue_recherche(self, recherche_id: uuid.UUID, imei: str,
+                          utilisateur_id: Any = None, date_recherche: Optional[datetime] = None) -> bool:
+        """
+        Dépose une ligne d'historique de recherche
+
+        Returns:
+            True si la ligne a été prise en charge par le tampon
+        """
+        return self.enqueue("recherche", {
+            "id": recherche_id,
+            "date_recherche": date_recherche or datetime.now(),
+            "imei_recherche": imei,
+            "utilisateur_id": _as_uuid(utilisateur_id)
+        })
+
+    def enqueue_audit(self, audit_log: JournalAudit) -> bool:
+        """
+        Dépose une entrée de journal d'audit construite par AuditService
+
+        Returns:
+            True si l'entrée a été prise en charge par le tampon
+        """
+        return self.enqueue("journal_audit", {
+            "id": audit_log.id,
+            "action": audit_log.action,
+            "date": audit_log.date,
+            "utilisateur_id": _as_uuid(audit_log.utilisateur_id)
+        })
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retourne les statistiques du tampon
+
+        Returns:
+            Compteurs, profondeur de file et configuration
+        """
+        return {
+            **self.stats,
+            'enabled': self.enabled,
+            'is_running': self.is_running,
+            'queue_depth': self._queue.qsize() if self._queue else 0,
+            'retry_backoff_seconds': self._retry_backoff,
+            'max_queue': self.max_queue,
+            'batch_size': self.batch_size,
+            'flush_interval_ms': int(self.flush_interval * 1000)
+        }
+
+
+# Instance globale pour utilisation dans l'application
+write_behind_buffer = WriteBehindBuffer(
+    max_queue=int(os.getenv("WRITE_BEHIND_MAX_QUEUE", "10000")),
+    batch_size=int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500")),
+    flush_interval_ms=int(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL_MS", "200")),
+    enabled=os.getenv("WRITE_BEHIND_ENABLED", "true").lower() == "true"
+)
+
+async def start_write_behind():
+    """
+    Démarre le tampon d'écriture différée
+    À appeler au démarrage de l'application FastAPI
+    """
+    await write_behind_buffer.start()
+
+async def stop_write_behind():
+    """
+    Vide et arrête le tampon d'écriture différée
+    À appeler à l'arrêt de l'application FastAPI
+    """
+    await write_behind_buffer.stop()
@@ -96,6 +96,7 @@ DROP TABLE IF EXISTS tac_database;
 DROP TABLE IF EXISTS password_reset;
 DROP TABLE IF EXISTS importexport;
 DROP TABLE IF EXISTS journal_audit;
+DROP TABLE IF EXISTS notification_outbox;
 DROP TABLE IF EXISTS notification;
 DROP TABLE IF EXISTS recherche;
 DROP TABLE IF EXISTS sim;
@@ -107,6 +108,7 @@ DROP TABLE IF EXISTS utilisateur;
 -- Drop indexes explicitly (if they exist independently)
 DROP INDEX IF EXISTS idx_utilisateur_date_creation;
 DROP INDEX IF EXISTS idx_notification_source;
+DROP INDEX IF EXISTS idx_notification_outbox_statut_date;
 DROP INDEX IF EXISTS idx_password_reset_token;
 DROP INDEX IF EXISTS idx_password_reset_utilisateur_id;
 DROP INDEX IF EXISTS idx_password_reset_expiration;
@@ -114,6 +116,7 @@ DROP INDEX IF EXISTS idx_password_reset_utilise;
 DROP INDEX IF EXISTS idx_numero_imei;
 DROP INDEX IF EXISTS idx_appareil_utilisateur;
 DROP INDEX IF EXISTS idx_recherche_imei;
+DROP INDEX IF EXISTS idx_recherche_imei_prefixe;
 DROP INDEX IF EXISTS idx_recherche_date;
 DROP INDEX IF EXISTS idx_utilisateur_niveau_acces;
 DROP INDEX IF EXISTS idx_utilisateur_organisation;
@@ -244,6 +247,21 @@ CHECK (source IN ('admin', 'system', 'user'));
 COMMENT ON COLUMN notification.source IS 'Source of the notification: admin (sent by administrator), system (automatic), user (sent by regular user)';
 
 
+-- Table : notification_outbox (événements de notification traités hors du chemin des requêtes)
+CREATE TABLE public.notification_outbox (
+    id UUID PRIMARY KEY,
+    evenement VARCHAR(50) NOT NULL, -- verification_imei, nouvel_appareil
+    charge_utile JSON DEFAULT '{}',
+    statut VARCHAR(20) DEFAULT 'en_attente', -- en_attente, en_cours, traité, échoué
+    tentative INT DEFAULT 0,
+    erreur TEXT,
+    date_creation TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    date_traitement TIMESTAMP,
+    utilisateur_id UUID REFERENCES public.utilisateur(id)
+);
+
+CREATE INDEX idx_notification_outbox_statut_date ON notification_outbox (statut, date_creation);
+
 -- Table : journal_audit (minuscules pour correspondre au modèle SQLAlchemy)
 CREATE TABLE journal_audit (
     id UUID PRIMARY KEY,
@@ -298,6 +316,8 @@ COMMENT ON COLUMN password_reset.date_expiration IS 'Date d''expiration du token
 CREATE INDEX idx_numero_imei ON imei(numero_imei);
 CREATE INDEX idx_appareil_utilisateur ON appareil(utilisateur_id);
 CREATE INDEX idx_recherche_imei ON recherche(imei_recherche);
+-- Préfixes LIKE 'p%' des règles de plages IMEI (indépendant de la collation)
+CREATE INDEX idx_recherche_imei_prefixe ON recherche(imei_recherche varchar_pattern_ops);
 CREATE INDEX idx_recherche_date ON recherche(date_recherche);
 
 -- Index essentiels pour le contrôle d'accès
@@ -336,6 +356,7 @@ CREATE TABLE tac_database (
     type_appareil VARCHAR(50) DEFAULT 'smartphone',
     statut VARCHAR(20) DEFAULT 'valide',
     raison VARCHAR(200),
+    hash_contenu VARCHAR(32), -- empreinte MD5 des champs source (synchronisation incrémentale)
     date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     date_modification TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -473,7 +494,8 @@ DECLARE
     i INTEGER;
     digit INTEGER;
     sum INTEGER := 0;
-    alternate BOOLEAN := false;
+    -- Le premier chiffre à gauche du chiffre de contrôle est doublé
+    alternate BOOLEAN := true;
 BEGIN
     -- Clean input
     numero_imei := REGEXP_REPLACE(numero_imei, '[^0-9]', '', 'g');
@@ -601,6 +623,8 @@ CREATE TABLE tac_sync_log (
     status VARCHAR(20) NOT NULL, -- 'success', 'error', 'partial'
     records_imported INTEGER DEFAULT 0,
     records_updated INTEGER DEFAULT 0,
+    records_deleted INTEGER DEFAULT 0,
+    records_unchanged INTEGER DEFAULT 0,
     records_errors INTEGER DEFAULT 0,
     sync_duration_ms INTEGER,
     error_message TEXT,
@@ -0,0 +1,71 @@
+-- =============================================
+-- EIR - Mise à niveau d'une base existante
+-- Script idempotent, à appliquer après chaque mise à jour de l'application :
+--   psql -h <hôte> -U postgres -d eir_project -f schema_upgrade_postgres.sql
+-- Une base créée par schema_postgres.sql est déjà à jour (le script n'y change rien).
+-- =============================================
+
+-- valider_luhn doublait les mauvais chiffres et rejetait des IMEI valides (490154203237518) :
+-- valider_imei_avec_tac / valider_lot_imeis_avec_tac divergeaient de la validation en mémoire
+CREATE OR REPLACE FUNCTION valider_luhn(numero_imei VARCHAR) 
+RETURNS BOOLEAN AS $$
+DECLARE
+    i INTEGER;
+    digit INTEGER;
+    sum INTEGER := 0;
+    -- Le premier chiffre à gauche du chiffre de contrôle est doublé
+    alternate BOOLEAN := true;
+BEGIN
+    -- Clean input
+    numero_imei := REGEXP_REPLACE(numero_imei, '[^0-9]', '', 'g');
+    
+    -- Must be 15 digits for Luhn validation
+    IF LENGTH(numero_imei) != 15 THEN
+        RETURN false;
+    END IF;
+    
+    -- Process from right to left (excluding check digit)
+    -- Fixed: Use standard FOR loop instead of REVERSE
+    FOR i IN 1..14 LOOP
+        digit := CAST(SUBSTRING(numero_imei FROM (15 - i) FOR 1) AS INTEGER);
+        
+        IF alternate THEN
+            digit := digit * 2;
+            IF digit > 9 THEN
+                digit := digit - 9;
+            END IF;
+        END IF;
+        
+        sum := sum + digit;
+        alternate := NOT alternate;
+    END LOOP;
+    
+    -- Check if sum modulo 10 equals the check digit
+    RETURN (sum * 9) % 10 = CAST(SUBSTRING(numero_imei FROM 15 FOR 1) AS INTEGER);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Synchronisation TAC incrémentale : colonnes absentes des bases créées avant son introduction
+-- (auparavant ajoutées par tac_sync.py pendant la requête /admin/tac/sync)
+ALTER TABLE tac_database ADD COLUMN IF NOT EXISTS hash_contenu VARCHAR(32);
+ALTER TABLE tac_sync_log ADD COLUMN IF NOT EXISTS records_deleted INTEGER DEFAULT 0;
+ALTER TABLE tac_sync_log ADD COLUMN IF NOT EXISTS records_unchanged INTEGER DEFAULT 0;
+
+-- Outbox des notifications (publiée par /imei/{imei} et l'enregistrement d'appareil) :
+-- sans elle, les commits de ces routes échouent sur les bases créées avant son introduction
+CREATE TABLE IF NOT EXISTS public.notification_outbox (
+    id UUID PRIMARY KEY,
+    evenement VARCHAR(50) NOT NULL, -- verification_imei, nouvel_appareil
+    charge_utile JSON DEFAULT '{}',
+    statut VARCHAR(20) DEFAULT 'en_attente', -- en_attente, en_cours, traité, échoué
+    tentative INT DEFAULT 0,
+    erreur TEXT,
+    date_creation TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    date_traitement TIMESTAMP,
+    utilisateur_id UUID REFERENCES public.utilisateur(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_notification_outbox_statut_date ON notification_outbox (statut, date_creation);
+
+-- Préfixes LIKE 'p%' des règles de plages IMEI (filtre SQL de l'historique des recherches)
+CREATE INDEX IF NOT EXISTS idx_recherche_imei_prefixe ON recherche(imei_recherche varchar_pattern_ops);
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark du moteur asynchrone (asyncpg) face à la session synchrone dans une route async
+
+Mesure le débit de recherches IMEI concurrentes sur UNE boucle d'événements (un worker uvicorn) :
+- sync  : requête via SessionLocal depuis une coroutine (comportement avant le portage, bloque la boucle)
+- async : requête via AsyncSessionLocal (comportement après le portage)
+
+Le gain vient du recouvrement des allers-retours réseau vers PostgreSQL : contre une base
+SQLite locale (sans latence), la session synchrone reste plus rapide. --latence-ms ajoute un
+pg_sleep à chaque requête pour reproduire une base distante.
+
+Mode HTTP optionnel (--url) : charge concurrente sur GET /imei/{imei} d'un serveur lancé avec
+un seul worker, à exécuter avant et après déploiement du portage pour comparer.
+
+Usage :
+    cd backend && DATABASE_URL=postgresql://... python ../testing/performance/benchmark_async_db.py
+    python testing/performance/benchmark_async_db.py --url http://localhost:8000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+# Permet d'importer le package backend/app depuis la racine du dépôt
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+
+async def run_load(name: str, call: Callable[[], Awaitable[None]], total: int, concurrency: int) -> Dict[str, float]:
+    """Exécute `total` appels avec `concurrency` coroutines et retourne débit et latences"""
+    latencies: List[float] = []
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    result = {
+        "requetes": len(latencies),
+        "duree_s": round(elapsed, 3),
+        "debit_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2)
+    }
+    print(f"{name:<8} {result['requetes']:>7} req  {result['debit_rps']:>9} req/s  "
+          f"p50 {result['p50_ms']:>8} ms  p99 {result['p99_ms']:>8} ms")
+    return result
+
+
+async def benchmark_db(imei: str, total: int, concurrency: int, latence_ms: float = 0):
+    """Compare la même requête IMEI/appareil via session synchrone et via AsyncSession"""
+    from sqlalchemy import select, func
+    from app.core.database import SessionLocal, AsyncSessionLocal, async_engine, engine
+    from app.models.imei import IMEI
+    from app.models.appareil import Appareil
+    # Enregistre toutes les classes référencées par les relations du modèle Utilisateur
+    import app.models, app.models.password_reset, app.models.email_verification  # noqa: F401
+
+    query = (
+        select(IMEI, Appareil)
+        .outerjoin(Appareil, IMEI.appareil_id == Appareil.id)
+        .where(IMEI.numero_imei == imei)
+        .limit(1)
+    )
+    if latence_ms:
+        # Latence simulée côté serveur PostgreSQL
+        query = query.add_columns(func.pg_sleep(latence_ms / 1000))
+
+    async def sync_lookup():
+        # Avant : appel synchrone depuis une route async, la boucle est bloquée pendant la requête
+        db = SessionLocal()
+        try:
+            db.execute(query).first()
+        finally:
+            db.close()
+
+    async def async_lookup():
+        async with AsyncSessionLocal() as db:
+            (await db.execute(query)).first()
+
+    # Préchauffage des deux pools de connexions
+    await run_load("warmup", sync_lookup, concurrency, concurrency)
+    await run_load("warmup", async_lookup, concurrency, concurrency)
+
+    print(f"\nRecherche IMEI {imei} - {total} requêtes, concurrence {concurrency}, une boucle d'événements")
+    before = await run_load("sync", sync_lookup, total, concurrency)
+    after = await run_load("async", async_lookup, total, concurrency)
+    print(f"\nGain de débit : x{after['debit_rps'] / before['debit_rps']:.2f}")
+
+    engine.dispose()
+    await async_engine.dispose()
+
+
+async def benchmark_http(url: str, imei: str, total: int, concurrency: int, token: str = None):
+    """Charge concurrente sur GET /imei/{imei} d'un serveur en cours d'exécution"""
+    import httpx
+
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=30) as client:
+        async def lookup():
+            response = await client.get(f"/imei/{imei}")
+            response.raise_for_status()
+
+        await run_load("warmup", lookup, concurrency, concurrency)
+        print(f"\nGET {url}/imei/{imei} - {total} requêtes, concurrence {concurrency}")
+        await run_load("http", lookup, total, concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark session synchrone vs AsyncSession (asyncpg)")
+    parser.add_argument("--imei", default="352099001761481", help="IMEI recherché")
+    parser.add_argument("--requests", type=int, default=2000, help="Nombre total de requêtes")
+    parser.add_argument("--concurrency", type=int, default=50, help="Nombre de requêtes simultanées")
+    parser.add_argument("--latence-ms", type=float, default=0, help="Latence simulée par requête (PostgreSQL uniquement)")
+    parser.add_argument("--url", help="URL d'un serveur à charger (mode HTTP) au lieu du mode base de données")
+    parser.add_argument("--token", default=os.getenv("EIR_TOKEN"), help="Jeton d'accès pour le mode HTTP")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(benchmark_http(args.url, args.imei, args.requests, args.concurrency, args.token))
+    else:
+        if not os.getenv("DATABASE_URL"):
+            parser.error("DATABASE_URL doit être défini pour le mode base de données")
+        asyncio.run(benchmark_db(args.imei, args.requests, args.concurrency, args.latence_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark des codecs binaires MAP CheckIMEI et Diameter ECR/ECA
+(contrôles aller-retour et messages corrompus : testing/unit/test_protocol_codecs.py)
+
+Mesure, pour une ECR reçue, le décodage et la construction de l'ECA :
+- dict : decode_message + find_avp/avp_grouped + encode_avp/encode_message (chemin précédent)
+- wire : EcrView (lecture sur place) + encode_eca (écriture dans un bytearray)
+
+Usage :
+    python testing/performance/benchmark_codecs.py --iterations 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# Permet d'importer le package backend/app depuis la racine du dépôt
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.interface_gateway.diameter.codec import (  # noqa: E402
+    APP_S13, AVP_AUTH_APPLICATION_ID, AVP_AUTH_SESSION_STATE, AVP_EQUIPMENT_STATUS, AVP_IMEI,
+    AVP_ORIGIN_HOST, AVP_ORIGIN_REALM, AVP_RESULT_CODE, AVP_SESSION_ID, AVP_TERMINAL_INFORMATION,
+    AVP_VENDOR_ID, AVP_VENDOR_SPECIFIC_APPLICATION_ID, DIAMETER_SUCCESS, FLAG_PROXIABLE,
+    NO_STATE_MAINTAINED, VENDOR_3GPP, avp_grouped, avp_str, avp_uint32, decode_message, encode_avp,
+    encode_message, find_avp
+)
+from app.interface_gateway.diameter.wire import EcrView, encode_eca, encode_ecr  # noqa: E402
+from app.interface_gateway.map.codec import (  # noqa: E402
+    MapComponentView, encode_check_imei_invoke, encode_check_imei_result
+)
+
+EIR_HOST = "eir.local.realm"
+
+
+def random_digits(rng: random.Random, count: int) -> str:
+    return "".join(rng.choice("0123456789") for _ in range(count))
+
+
+def legacy_answer(raw: bytes) -> bytes:
+    """Chemin ECR -> ECA du serveur avant wire.py"""
+    request = decode_message(raw)
+    avps = request["avps"]
+    session_id = avp_str(find_avp(avps, AVP_SESSION_ID))
+    imei = avp_str(find_avp(avp_grouped(find_avp(avps, AVP_TERMINAL_INFORMATION, VENDOR_3GPP)), AVP_IMEI, VENDOR_3GPP))
+    assert imei
+    return encode_message(request["command_code"], request["application_id"], [
+        encode_avp(AVP_SESSION_ID, session_id),
+        encode_avp(AVP_RESULT_CODE, DIAMETER_SUCCESS),
+        encode_avp(AVP_ORIGIN_HOST, EIR_HOST),
+        encode_avp(AVP_ORIGIN_REALM, EIR_HOST),
+        encode_avp(AVP_VENDOR_SPECIFIC_APPLICATION_ID, [
+            encode_avp(AVP_VENDOR_ID, VENDOR_3GPP),
+            encode_avp(AVP_AUTH_APPLICATION_ID, APP_S13)
+        ]),
+        encode_avp(AVP_AUTH_SESSION_STATE, avp_uint32(find_avp(avps, AVP_AUTH_SESSION_STATE)) or NO_STATE_MAINTAINED),
+        encode_avp(AVP_EQUIPMENT_STATUS, 0, vendor_id=VENDOR_3GPP)
+    ], flags=request["flags"] & FLAG_PROXIABLE, hop_by_hop=request["hop_by_hop"], end_to_end=request["end_to_end"])
+
+
+def wire_answer(raw: bytes) -> bytearray:
+    request = EcrView(raw).validate()
+    assert request.imei
+    return encode_eca(request, EIR_HOST, EIR_HOST, DIAMETER_SUCCESS, equipment_status=0)
+
+
+def bench(name: str, function, messages: list, iterations: int) -> float:
+    count = len(messages)
+    start = time.perf_counter()
+    for i in range(iterations):
+        function(messages[i % count])
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<34} {iterations / elapsed:>12,.0f} msg/s   {elapsed / iterations * 1e6:7.2f} µs/msg")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des codecs MAP / Diameter")
+    parser.add_argument("--iterations", type=int, default=100000, help="Messages par mesure")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    messages = [
+        bytes(encode_ecr(i, i, f"mme{i % 8}.test;{i}", f"mme{i % 8}.test", "test", EIR_HOST,
+                         random_digits(rng, 14), "01"))
+        for i in range(1000)
+    ]
+    if not all(bytes(wire_answer(m)) == legacy_answer(m) for m in messages[:100]):
+        raise AssertionError("ECA différentes")
+
+    print(f"ECR reçue -> ECA ({args.iterations} messages)")
+    legacy = bench("dict (decode_message/encode_avp)", legacy_answer, messages, args.iterations)
+    wire = bench("wire (EcrView/encode_eca)", wire_answer, messages, args.iterations)
+    print(f"  Gain : x{legacy / wire:.2f}")
+
+    invokes = [bytes(encode_check_imei_invoke(i % 127 + 1, random_digits(rng, 15))) for i in range(1000)]
+    print(f"\nMAP checkIMEI ({args.iterations} messages)")
+    bench("Invoke -> IMEI (MapComponentView)", lambda m: MapComponentView(m).imei, invokes, args.iterations)
+    bench("ReturnResultLast (encodage)", lambda m: encode_check_imei_result(m[4], 0), invokes, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
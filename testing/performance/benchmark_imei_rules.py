@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark des règles d'accès IMEI (plages_imei_autorisees)
+
+Compare, pour un utilisateur portant plusieurs milliers de règles :
+- interprete : boucle sur les règles JSON avec PermissionManager._imei_matches_rule
+               (comportement avant compilation)
+- compile    : CompiledIMEIRules (arbre de préfixes, intervalles triés, regex
+               précompilées, ensemble d'IMEI exacts)
+
+Avant la mesure, les deux implémentations sont comparées sur tous les IMEI testés.
+
+Usage :
+    python testing/performance/benchmark_imei_rules.py --rules 5000 --lookups 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# Permet d'importer le package backend/app depuis la racine du dépôt
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+# Aucun accès base n'est effectué, mais le module de permissions importe les modèles
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+
+def random_imei(rng: random.Random) -> str:
+    return "35" + "".join(rng.choice("0123456789") for _ in range(13))
+
+
+def generate_rules(count: int, rng: random.Random) -> list:
+    """Génère un mélange réaliste de règles : préfixes TAC, plages, IMEI exacts, quelques regex"""
+    rules = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.5:
+            rules.append({"type": "prefix", "prefix": random_imei(rng)[:rng.choice((6, 8, 10))]})
+        elif kind < 0.8:
+            start = random_imei(rng)
+            end = str(int(start) + rng.randint(1, 10 ** 6)).zfill(15)
+            rules.append({"type": "range", "start": start, "end": end})
+        elif kind < 0.98:
+            rules.append({"type": "exact", "imeis": [random_imei(rng) for _ in range(rng.randint(1, 20))]})
+        else:
+            rules.append({"type": "regex", "pattern": f"^{random_imei(rng)[:7]}\\d{{3}}"})
+    return rules
+
+
+def generate_lookups(rules: list, count: int, rng: random.Random) -> list:
+    """Moitié d'IMEI couverts par une règle, moitié d'IMEI aléatoires"""
+    imeis = []
+    for _ in range(count):
+        rule = rng.choice(rules)
+        if rng.random() < 0.5:
+            imeis.append(random_imei(rng))
+        elif rule["type"] == "prefix":
+            imeis.append((rule["prefix"] + random_imei(rng))[:15])
+        elif rule["type"] == "range":
+            imeis.append(str(rng.randint(int(rule["start"]), int(rule["end"]))).zfill(15))
+        elif rule["type"] == "exact":
+            imeis.append(rng.choice(rule["imeis"]))
+        else:
+            imeis.append(random_imei(rng))
+    return imeis
+
+
+def measure(name: str, call, imeis: list) -> float:
+    start = time.perf_counter()
+    matched = sum(1 for imei in imeis if call(imei))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<11} {len(imeis) / elapsed:>12,.0f} vérifications/s  "
+          f"{elapsed / len(imeis) * 1e6:>9.2f} µs/vérif.  ({matched} couverts)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark des règles d'accès IMEI compilées")
+    parser.add_argument("--rules", type=int, default=5000, help="Nombre de règles de l'utilisateur")
+    parser.add_argument("--lookups", type=int, default=20000, help="Nombre d'IMEI vérifiés")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from app.core.permissions import PermissionManager
+    from app.core.imei_rules import compile_imei_rules
+
+    rng = random.Random(args.seed)
+    rules = generate_rules(args.rules, rng)
+    imeis = generate_lookups(rules, args.lookups, rng)
+
+    def interpreted(imei):
+        return any(PermissionManager._imei_matches_rule(imei, rule) for rule in rules)
+
+    start = time.perf_counter()
+    compiled = compile_imei_rules(rules)
+    print(f"{args.rules} règles compilées en {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # Vérification d'équivalence sur un échantillon (l'interprétation est lente)
+    sample = imeis[:2000]
+    mismatches = [imei for imei in sample if interpreted(imei) != compiled.matches(imei)]
+    if mismatches:
+        print(f"ERREUR : {len(mismatches)} divergences, ex. {mismatches[:3]}")
+        sys.exit(1)
+    print(f"Équivalence vérifiée sur {len(sample)} IMEI\n")
+
+    before = measure("interprete", interpreted, sample)
+    after = measure("compile", compiled.matches, imeis) * len(sample) / len(imeis)
+    print(f"\nAccélération : x{before / after:.0f}")
+
+
+if __name__ == "__main__":
+    main()
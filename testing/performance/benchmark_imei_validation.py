@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Vérification et benchmark de la validation IMEI vectorisée (app.services.imei_validation)
+
+Avant la mesure, contrôle sur des IMEI aléatoires (graine fixe), IMEI mal formés compris
+(séparateurs, lettres, caractères non ASCII, longueurs 0 à 20) :
+- valider_lot : format, Luhn et TAC identiques à nettoyer_imei / luhn_valide
+- imeis_acceptables : identique à imei_acceptable
+- TacIndex.validate_imei_batch : chaque résultat identique à TacIndex.validate_imei
+
+Mesure ensuite, sur --count IMEI :
+- unitaire : TacIndex.validate_imei appelé pour chaque IMEI (boucle Python, Luhn par chiffre)
+- vectorise : valider_lot seul, puis validate_imei_batch (jointure avec l'instantané TAC)
+
+L'instantané TAC est construit depuis data/tacdb.csv dans un répertoire temporaire ;
+aucune base de données n'est nécessaire.
+
+Usage :
+    python testing/performance/benchmark_imei_validation.py --count 1000000 --repeat 3
+"""
+
+import argparse
+import csv
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Permet d'importer le package backend/app depuis la racine du dépôt
+sys.path.insert(0, str(REPO_ROOT / "backend"))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.services.imei_validation import (  # noqa: E402
+    imei_acceptable, imeis_acceptables, luhn_valide, nettoyer_imei, valider_lot
+)
+from app.services.tac_import import iter_tac_rows  # noqa: E402
+from app.services.tac_index import TacIndex  # noqa: E402
+from app.services.tac_snapshot import write_tac_snapshot  # noqa: E402
+
+
+def check(condition: bool, message: str):
+    if not condition:
+        raise AssertionError(message)
+
+
+def check_digit(body: str) -> str:
+    """Chiffre de contrôle Luhn de 14 chiffres (implémentation indépendante)"""
+    total = 0
+    for position, char in enumerate(reversed(body)):
+        digit = int(char) * (2 if position % 2 == 0 else 1)
+        total += digit - 9 if digit > 9 else digit
+    return str((10 - total % 10) % 10)
+
+
+def load_tacs(path: str) -> List[dict]:
+    """Enregistrements TAC de l'export Osmocom (un sur cinq marqué obsolète)"""
+    compteurs = {"lignes": 0, "valides": 0, "erreurs": 0}
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = {row[1]: row for row in iter_tac_rows(csv.reader(f), "osmocom", compteurs)}
+    return [
+        {"tac": tac, "marque": marque, "modele": modele, "annee_sortie": None, "type_appareil": type_appareil,
+         "statut": statut if index % 5 else "obsolete", "date_creation": None, "date_modification": None}
+        for index, (_, tac, marque, modele, type_appareil, statut, _) in enumerate(rows.values())
+    ]
+
+
+def random_imei(rng: random.Random, tacs: List[str], dirty: float) -> str:
+    """IMEI de TAC connu ou inconnu, chiffre de contrôle correct ou non, mal formé avec la probabilité dirty"""
+    tac = rng.choice(tacs) if rng.random() < 0.8 else "%08d" % rng.randrange(10 ** 8)
+    body = tac + "%06d" % rng.randrange(10 ** 6)
+    imei = body + (check_digit(body) if rng.random() < 0.9 else str(rng.randrange(10)))
+    if rng.random() >= dirty:
+        return imei
+    kind = rng.randrange(6)
+    if kind == 0:
+        return imei[:5] + "-" + imei[5:11] + " " + imei[11:]
+    if kind == 1:
+        return body
+    if kind == 2:
+        return imei + str(rng.randrange(10))
+    if kind == 3:
+        return "".join(rng.choice("0123456789abc") for _ in range(rng.randint(0, 20)))
+    if kind == 4:
+        return "é" + imei
+    return ""
+
+
+def verify(index: TacIndex, imeis: List[str]):
+    lot = valider_lot(imeis)
+    for position, imei in enumerate(imeis):
+        digits = nettoyer_imei(imei)
+        check(bool(lot["format_valide"][position]) == (14 <= len(digits) <= 16), f"format {imei!r}")
+        check(bool(lot["luhn_valide"][position]) == luhn_valide(digits), f"Luhn {imei!r}")
+        if 14 <= len(digits) <= 16:
+            check("%08d" % lot["tac"][position] == digits[:8], f"TAC {imei!r}")
+    check(imeis_acceptables(imeis).tolist() == [imei_acceptable(imei) for imei in imeis], "imeis_acceptables")
+    batch = index.validate_imei_batch(imeis, None)
+    check(batch["results"] == [index.validate_imei(imei, None) for imei in imeis], "validate_imei_batch")
+    print(f"Vérification : {len(imeis)} IMEI, vectorisé identique à l'unitaire "
+          f"({batch['valid_imeis']} valides, {batch['tac_inconnus']} TAC inconnus)")
+
+
+def measure(name: str, function: Callable[[], object], repeat: int, count: int):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    median = statistics.median(durations)
+    print(f"{name:<34} {median * 1000:>9.1f} ms  {count / median / 1e6:>7.2f} M IMEI/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark validation IMEI unitaire vs vectorisée")
+    parser.add_argument("--csv", default=str(REPO_ROOT / "data" / "tacdb.csv"), help="Export TAC Osmocom")
+    parser.add_argument("--count", type=int, default=1_000_000, help="IMEI par lot mesuré")
+    parser.add_argument("--dirty", type=float, default=0.02, help="Part d'IMEI mal formés dans le lot mesuré")
+    parser.add_argument("--cases", type=int, default=50_000, help="IMEI de la vérification")
+    parser.add_argument("--repeat", type=int, default=3, help="Répétitions (médiane retenue)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    records = load_tacs(args.csv)
+    tacs = [record["tac"] for record in records]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.tacsnap")
+        write_tac_snapshot(path, records, "benchmark")
+        index = TacIndex(snapshot_path=path, check_interval=3600)
+        check(index.loaded, "instantané TAC non projeté")
+
+        verify(index, [random_imei(rng, tacs, 0.3) for _ in range(args.cases)])
+
+        imeis = [random_imei(rng, tacs, args.dirty) for _ in range(args.count)]
+        print(f"Lot : {args.count} IMEI ({args.dirty:.0%} mal formés), {len(tacs)} TAC, {args.repeat} répétition(s)")
+
+        measure("unitaire (validate_imei par IMEI)",
+                lambda: [index.validate_imei(imei, None) for imei in imeis], args.repeat, args.count)
+        measure("valider_lot", lambda: valider_lot(imeis), args.repeat, args.count)
+        measure("validate_imei_batch (sans détails)",
+                lambda: index.validate_imei_batch(imeis, None, details=False), args.repeat, args.count)
+
+
+if __name__ == "__main__":
+    main()
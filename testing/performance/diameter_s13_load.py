@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Client Diameter S13 et générateur de charge ME-Identity-Check (ECR/ECA)
+
+Ouvre une ou plusieurs connexions vers le serveur Diameter de l'EIR, effectue le
+Capabilities-Exchange, puis envoie des ECR en pipeline (plusieurs requêtes en vol
+par connexion, réponses associées par identifiant Hop-by-Hop). Affiche débit,
+latences et répartition des Result-Code / Equipment-Status.
+
+Mode --local : démarre le serveur dans le même processus sur un port libre, avec
+un statut IMEI simulé (sans base de données), pour tester le codec et le pipeline.
+
+Usage :
+    python testing/performance/diameter_s13_load.py --local --requests 20000 --concurrency 200
+    python testing/performance/diameter_s13_load.py --host 127.0.0.1 --port 3868 --imei 35209900176148
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Permet d'importer le package backend/app depuis la racine du dépôt
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from app.interface_gateway.diameter.codec import (  # noqa: E402
+    APP_DIAMETER_COMMON, APP_S13, VENDOR_3GPP, FLAG_REQUEST, FLAG_PROXIABLE,
+    CMD_CAPABILITIES_EXCHANGE, CMD_DEVICE_WATCHDOG, CMD_DISCONNECT_PEER, CMD_ME_IDENTITY_CHECK,
+    AVP_AUTH_APPLICATION_ID, AVP_AUTH_SESSION_STATE, AVP_DESTINATION_REALM, AVP_EQUIPMENT_STATUS,
+    AVP_HOST_IP_ADDRESS, AVP_IMEI, AVP_ORIGIN_HOST, AVP_ORIGIN_REALM, AVP_PRODUCT_NAME,
+    AVP_RESULT_CODE, AVP_SESSION_ID, AVP_SOFTWARE_VERSION, AVP_TERMINAL_INFORMATION, AVP_VENDOR_ID,
+    AVP_VENDOR_SPECIFIC_APPLICATION_ID, NO_STATE_MAINTAINED,
+    avp_uint32, decode_message, encode_address, encode_avp, encode_message, find_avp, read_message
+)
+
+EQUIPMENT_STATUS_NAMES = {0: "WHITELISTED", 1: "BLACKLISTED", 2: "GREYLISTED"}
+
+
+class DiameterClient:
+    """Connexion Diameter côté MME : requêtes multiplexées par identifiant Hop-by-Hop"""
+
+    def __init__(self, host: str, port: int, origin_host: str = "mme.load.test", origin_realm: str = "load.test"):
+        self.host = host
+        self.port = port
+        self.origin_host = origin_host
+        self.origin_realm = origin_realm
+        self._ids = itertools.count(random.randint(1, 1 << 20))
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader_task: Optional[asyncio.Task] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self):
+        reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._reader_task = asyncio.create_task(self._read_answers(reader))
+        cea = await self.request(CMD_CAPABILITIES_EXCHANGE, APP_DIAMETER_COMMON, [
+            encode_avp(AVP_ORIGIN_HOST, self.origin_host),
+            encode_avp(AVP_ORIGIN_REALM, self.origin_realm),
+            encode_avp(AVP_HOST_IP_ADDRESS, encode_address("127.0.0.1")),
+            encode_avp(AVP_VENDOR_ID, 0),
+            encode_avp(AVP_PRODUCT_NAME, "diameter_s13_load", mandatory=False),
+            encode_avp(AVP_AUTH_APPLICATION_ID, APP_S13)
+        ], proxiable=False)
+        result = avp_uint32(find_avp(cea["avps"], AVP_RESULT_CODE))
+        if result != 2001:
+            raise RuntimeError(f"Capabilities-Exchange refusé: Result-Code {result}")
+
+    async def _read_answers(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                message = decode_message(await read_message(reader))
+                future = self._pending.pop(message["hop_by_hop"], None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connexion Diameter fermée"))
+
+    async def request(self, command: int, application_id: int, avps: List[bytes], proxiable: bool = True) -> dict:
+        hop_by_hop = next(self._ids) & 0xFFFFFFFF
+        future = asyncio.get_running_loop().create_future()
+        self._pending[hop_by_hop] = future
+        self._writer.write(encode_message(
+            command, application_id, avps,
+            flags=FLAG_REQUEST | (FLAG_PROXIABLE if proxiable else 0),
+            hop_by_hop=hop_by_hop, end_to_end=hop_by_hop
+        ))
+        await self._writer.drain()
+        return await future
+
+    async def identity_check(self, imei: str) -> dict:
+        """Envoie une ECR pour l'IMEI (14 chiffres, sans chiffre de contrôle)"""
+        session_id = f"{self.origin_host};{int(time.time())};{next(self._ids)}"
+        return await self.request(CMD_ME_IDENTITY_CHECK, APP_S13, [
+            encode_avp(AVP_SESSION_ID, session_id),
+            encode_avp(AVP_VENDOR_SPECIFIC_APPLICATION_ID, [
+                encode_avp(AVP_VENDOR_ID, VENDOR_3GPP),
+                encode_avp(AVP_AUTH_APPLICATION_ID, APP_S13)
+            ]),
+            encode_avp(AVP_AUTH_SESSION_STATE, NO_STATE_MAINTAINED),
+            encode_avp(AVP_ORIGIN_HOST, self.origin_host),
+            encode_avp(AVP_ORIGIN_REALM, self.origin_realm),
+            encode_avp(AVP_DESTINATION_REALM, "eir.domain.com"),
+            encode_avp(AVP_TERMINAL_INFORMATION, [
+                encode_avp(AVP_IMEI, imei[:14], vendor_id=VENDOR_3GPP),
+                encode_avp(AVP_SOFTWARE_VERSION, "01", vendor_id=VENDOR_3GPP)
+            ], vendor_id=VENDOR_3GPP)
+        ])
+
+    async def watchdog(self) -> dict:
+        return await self.request(CMD_DEVICE_WATCHDOG, APP_DIAMETER_COMMON, [
+            encode_avp(AVP_ORIGIN_HOST, self.origin_host),
+            encode_avp(AVP_ORIGIN_REALM, self.origin_realm)
+        ], proxiable=False)
+
+    async def close(self):
+        try:
+            await asyncio.wait_for(self.request(CMD_DISCONNECT_PEER, APP_DIAMETER_COMMON, [
+                encode_avp(AVP_ORIGIN_HOST, self.origin_host),
+                encode_avp(AVP_ORIGIN_REALM, self.origin_realm),
+                encode_avp(273, 0)  # Disconnect-Cause: REBOOTING
+            ], proxiable=False), timeout=5)
+        finally:
+            self._writer.close()
+            self._reader_task.cancel()
+
+
+async def run_load(client_count: int, concurrency: int, total: int, imeis: List[str], host: str, port: int):
+    clients = [DiameterClient(host, port, origin_host=f"mme{i}.load.test") for i in range(client_count)]
+    await asyncio.gather(*(client.connect() for client in clients))
+
+    dwa = await clients[0].watchdog()
+    print(f"Device-Watchdog : Result-Code {avp_uint32(find_avp(dwa['avps'], AVP_RESULT_CODE))}")
+
+    latencies: List[float] = []
+    result_codes: Dict[int, int] = {}
+    equipment: Dict[str, int] = {}
+    remaining = total
+
+    async def worker(client: DiameterClient):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            imei = random.choice(imeis)
+            start = time.perf_counter()
+            eca = await client.identity_check(imei)
+            latencies.append((time.perf_counter() - start) * 1000)
+            code = avp_uint32(find_avp(eca["avps"], AVP_RESULT_CODE))
+            result_codes[code] = result_codes.get(code, 0) + 1
+            status = avp_uint32(find_avp(eca["avps"], AVP_EQUIPMENT_STATUS, VENDOR_3GPP))
+            name = EQUIPMENT_STATUS_NAMES.get(status, "-")
+            equipment[name] = equipment.get(name, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(client) for client in clients for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+    latencies.sort()
+    print(f"\n{len(latencies)} ECR sur {client_count} connexion(s), {concurrency} en vol par connexion")
+    print(f"Débit   : {len(latencies) / elapsed:,.0f} ECR/s ({elapsed:.2f}s)")
+    print(f"Latence : p50 {statistics.median(latencies):.2f} ms, p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f} ms, "
+          f"max {latencies[-1]:.2f} ms")
+    print(f"Result-Code      : {result_codes}")
+    print(f"Equipment-Status : {equipment}")
+
+
+async def main_async(args):
+    imeis = args.imei or [f"35{random.randint(0, 10 ** 12 - 1):012d}" for _ in range(1000)]
+
+    if args.local:
+        os.environ.setdefault("DATABASE_URL", "sqlite://")
+        from app.interface_gateway.diameter.server import DiameterS13Server
+
+        async def simulated_status(imei: str) -> str:
+            # Statut déterministe (dernier chiffre), latence de recherche simulée
+            if args.lookup_ms:
+                await asyncio.sleep(args.lookup_ms / 1000)
+            return ("whitelisted", "whitelisted", "greylisted", "blacklisted", "unknown")[int(imei[-1]) % 5]
+
+        server = DiameterS13Server({"host": "127.0.0.1", "port": 0, "realm": "eir.domain.com"},
+                                   status_lookup=simulated_status)
+        await server.start()
+        try:
+            await run_load(args.connections, args.concurrency, args.requests, imeis, "127.0.0.1", server.port)
+        finally:
+            await server.stop()
+        print(f"Serveur : {server.get_stats()['result_codes']}")
+    else:
+        await run_load(args.connections, args.concurrency, args.requests, imeis, args.host, args.port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Générateur de charge Diameter S13 (ME-Identity-Check)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3868)
+    parser.add_argument("--local", action="store_true", help="Démarrer un serveur en processus (statuts simulés)")
+    parser.add_argument("--lookup-ms", type=float, default=1.0, help="Latence de recherche simulée en mode --local")
+    parser.add_argument("--connections", type=int, default=2, help="Nombre de connexions pair")
+    parser.add_argument("--concurrency", type=int, default=100, help="ECR en vol par connexion")
+    parser.add_argument("--requests", type=int, default=10000, help="Nombre total d'ECR")
+    parser.add_argument("--imei", action="append", help="IMEI à vérifier (répétable) ; aléatoires par défaut")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
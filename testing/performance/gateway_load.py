@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Générateur de charge en boucle ouverte pour la passerelle multi-protocoles
+
+Envoie des vérifications IMEI à un débit cible, indépendamment des temps de réponse :
+les instants d'envoi sont planifiés à l'avance (intervalle constant ou loi de Poisson)
+et la latence est mesurée depuis l'instant prévu. Un serveur qui ralentit ne ralentit
+donc pas le générateur, et l'attente qu'il provoque apparaît dans les quantiles.
+
+Cibles :
+- http     : POST /verify_imei?protocol=rest|ss7|diameter (httpx)
+- diameter : écouteur Diameter S13 natif (ECR/ECA), plusieurs connexions pair
+
+Les IMEI proviennent de data/imei_blacklist.csv (IMEI complets) et de data/imeidb.csv
+(TAC complétés par un numéro de série aléatoire et le chiffre de contrôle Luhn).
+Le rapport JSON (débit, p50/p95/p99/p999, codes de réponse) inclut le commit courant
+pour comparer les exécutions d'un commit à l'autre.
+
+Usage :
+    python testing/performance/gateway_load.py --protocol rest --rate 500 --duration 30
+    python testing/performance/gateway_load.py --protocol ss7 --rate 2000 --duration 20 --output ss7.json
+    python testing/performance/gateway_load.py --target diameter --port 3868 --rate 5000 --connections 4
+    python testing/performance/gateway_load.py --target diameter --local --rate 5000 --duration 10
+"""
+
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DATA_DIR = REPO_ROOT / "data"
+
+# Permet d'importer le package backend/app et le client Diameter voisin
+sys.path.insert(0, str(REPO_ROOT / "backend"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+QUANTILES = (("p50", 0.50), ("p95", 0.95), ("p99", 0.99), ("p999", 0.999))
+
+# Envoi d'une requête : retourne (succès, code de réponse)
+SendFunction = Callable[[str], Awaitable[Tuple[bool, str]]]
+
+
+def luhn_check_digit(body: str) -> str:
+    """Chiffre de contrôle Luhn des 14 premiers chiffres d'un IMEI"""
+    total = 0
+    for position, char in enumerate(reversed(body)):
+        digit = int(char)
+        if position % 2 == 0:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return str((10 - total % 10) % 10)
+
+
+def load_imeis(blacklist_path: Path, tac_path: Path, count: int, tac_ratio: float, rng: random.Random) -> List[str]:
+    """
+    Constitue le jeu d'IMEI de la charge
+
+    Args:
+        blacklist_path: CSV avec une colonne imei (IMEI complets, 15 chiffres)
+        tac_path: CSV de la base TAC Osmocom (ligne de licence, puis colonne tac)
+        count: Nombre d'IMEI à produire
+        tac_ratio: Part des IMEI construits depuis un TAC (0 à 1)
+        rng: Générateur aléatoire (graine fixe pour des exécutions comparables)
+
+    Returns:
+        Liste d'IMEI de 15 chiffres
+    """
+    known: List[str] = []
+    if blacklist_path.exists():
+        with open(blacklist_path, newline="", encoding="utf-8") as f:
+            known = [row["imei"] for row in csv.DictReader(f) if row.get("imei", "").isdigit()]
+
+    tacs: List[str] = []
+    if tac_path.exists():
+        with open(tac_path, newline="", encoding="utf-8") as f:
+            lines = f.readlines()
+        # imeidb.csv commence par une ligne de licence avant l'en-tête
+        start = next((i for i, line in enumerate(lines) if line.startswith("tac,")), 0)
+        tacs = [row["tac"] for row in csv.DictReader(lines[start:]) if len(row.get("tac") or "") == 8]
+
+    if not known and not tacs:
+        raise SystemExit(f"Aucun IMEI dans {blacklist_path} ni aucun TAC dans {tac_path}")
+
+    imeis = []
+    for _ in range(count):
+        if tacs and (not known or rng.random() < tac_ratio):
+            body = rng.choice(tacs) + f"{rng.randrange(10 ** 6):06d}"
+            imeis.append(body + luhn_check_digit(body))
+        else:
+            imeis.append(rng.choice(known))
+    return imeis
+
+
+def percentile(sorted_values: List[float], quantile: float) -> Optional[float]:
+    """Quantile par rang le plus proche d'une liste triée"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(quantile * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    """Quantiles, moyenne et maximum (millisecondes, arrondis)"""
+    values = sorted(values)
+    summary = {name: percentile(values, q) for name, q in QUANTILES}
+    summary["mean"] = sum(values) / len(values) if values else None
+    summary["max"] = values[-1] if values else None
+    return {key: round(value, 3) if value is not None else None for key, value in summary.items()}
+
+
+def git_commit() -> Optional[str]:
+    """Commit courant du dépôt, ou None hors d'un dépôt git"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class OpenLoopRunner:
+    """
+    Planifie les envois à débit fixe et collecte les mesures
+
+    Chaque envoi est une tâche indépendante : le générateur n'attend jamais une réponse
+    avant l'envoi suivant. Au-delà de max_outstanding requêtes en vol, les envois prévus
+    sont comptés comme abandonnés (le serveur ne suit plus) au lieu d'être retardés.
+    """
+
+    def __init__(self, send: SendFunction, imeis: List[str], rate: float, duration: float,
+                 warmup: float, poisson: bool, max_outstanding: int, rng: random.Random):
+        self.send = send
+        self.imeis = imeis
+        self.rate = rate
+        self.duration = duration
+        self.warmup = warmup
+        self.poisson = poisson
+        self.max_outstanding = max_outstanding
+        self.rng = rng
+
+        self.outstanding = 0
+        self.latencies: List[float] = []
+        self.service_times: List[float] = []
+        self.schedule_lag: List[float] = []
+        self.codes: Dict[str, int] = {}
+        self.stats = {"scheduled": 0, "sent": 0, "completed": 0, "errors": 0, "dropped": 0}
+
+    async def _fire(self, imei: str, intended: float, measured: bool):
+        sent_at = time.perf_counter()
+        try:
+            ok, code = await self.send(imei)
+        except Exception as e:
+            ok, code = False, type(e).__name__
+        done = time.perf_counter()
+        self.outstanding -= 1
+        if not measured:
+            return
+        self.stats["completed"] += 1
+        if not ok:
+            self.stats["errors"] += 1
+        self.codes[code] = self.codes.get(code, 0) + 1
+        self.latencies.append((done - intended) * 1000)
+        self.service_times.append((done - sent_at) * 1000)
+        self.schedule_lag.append((sent_at - intended) * 1000)
+
+    async def run(self) -> float:
+        """
+        Exécute la charge (échauffement compris) et attend les dernières réponses
+
+        Returns:
+            Durée de la fenêtre mesurée en secondes
+        """
+        loop_start = time.perf_counter()
+        measure_start = loop_start + self.warmup
+        end = measure_start + self.duration
+        tasks = set()
+        imeis = itertools.cycle(self.imeis)
+        intended = loop_start
+        sequence = 0
+
+        while intended < end:
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            measured = intended >= measure_start
+            if measured:
+                self.stats["scheduled"] += 1
+            if self.outstanding >= self.max_outstanding:
+                if measured:
+                    self.stats["dropped"] += 1
+            else:
+                self.outstanding += 1
+                if measured:
+                    self.stats["sent"] += 1
+                task = asyncio.create_task(self._fire(next(imeis), intended, measured))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if self.poisson:
+                intended += self.rng.expovariate(self.rate)
+            else:
+                # Calculé depuis l'origine : pas de dérive par accumulation d'arrondis
+                sequence += 1
+                intended = loop_start + sequence / self.rate
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        # Débit mesuré jusqu'à la dernière réponse, pas seulement jusqu'au dernier envoi
+        return max(time.perf_counter(), end) - measure_start
+
+    def report(self, elapsed: float) -> dict:
+        return {
+            "requests": {**self.stats, "codes": dict(sorted(self.codes.items()))},
+            "throughput_rps": round(self.stats["completed"] / elapsed, 2) if elapsed else 0,
+            "success_rps": round((self.stats["completed"] - self.stats["errors"]) / elapsed, 2) if elapsed else 0,
+            "elapsed_seconds": round(elapsed, 3),
+            "latency_ms": summarize(self.latencies),
+            "service_time_ms": summarize(self.service_times),
+            "schedule_lag_ms": summarize(self.schedule_lag)
+        }
+
+
+async def http_sender(args) -> Tuple[SendFunction, Callable[[], Awaitable[None]]]:
+    """Envoi HTTP POST /verify_imei ; succès = 2xx (les ss7 en file répondent sans statut IMEI)"""
+    import httpx
+
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    client = httpx.AsyncClient(
+        base_url=args.url, headers=headers, timeout=args.timeout,
+        limits=httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    )
+    params = {"protocol": args.protocol}
+
+    async def send(imei: str) -> Tuple[bool, str]:
+        response = await client.post("/verify_imei", params=params, json={"imei": imei})
+        return response.is_success, str(response.status_code)
+
+    return send, client.aclose
+
+
+async def diameter_sender(args, port: int) -> Tuple[SendFunction, Callable[[], Awaitable[None]]]:
+    """Envoi d'ECR sur plusieurs connexions pair (tour à tour) ; succès = Result-Code 2001"""
+    from diameter_s13_load import DiameterClient
+    from app.interface_gateway.diameter.codec import AVP_RESULT_CODE, avp_uint32, find_avp
+
+    clients = [DiameterClient(args.host, port, origin_host=f"mme{i}.load.test") for i in range(args.connections)]
+    await asyncio.gather(*(client.connect() for client in clients))
+    rotation = itertools.cycle(clients)
+
+    async def send(imei: str) -> Tuple[bool, str]:
+        eca = await asyncio.wait_for(next(rotation).identity_check(imei), args.timeout)
+        code = avp_uint32(find_avp(eca["avps"], AVP_RESULT_CODE))
+        return code == 2001, str(code)
+
+    async def close():
+        await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+    return send, close
+
+
+async def main_async(args) -> dict:
+    rng = random.Random(args.seed)
+    imeis = load_imeis(args.blacklist, args.tac_db, args.imei_count, args.tac_ratio, rng)
+
+    server = None
+    if args.target == "diameter":
+        port = args.port
+        if args.local:
+            os.environ.setdefault("DATABASE_URL", "sqlite://")
+            from app.interface_gateway.diameter.server import DiameterS13Server
+
+            async def simulated_status(imei: str) -> str:
+                if args.lookup_ms:
+                    await asyncio.sleep(args.lookup_ms / 1000)
+                return ("whitelisted", "whitelisted", "greylisted", "blacklisted", "unknown")[int(imei[-1]) % 5]
+
+            server = DiameterS13Server({"host": "127.0.0.1", "port": 0, "realm": "eir.domain.com"},
+                                       status_lookup=simulated_status)
+            await server.start()
+            port = server.port
+        send, close = await diameter_sender(args, port)
+    else:
+        send, close = await http_sender(args)
+
+    runner = OpenLoopRunner(send, imeis, args.rate, args.duration, args.warmup, args.poisson,
+                            args.max_outstanding, rng)
+    try:
+        elapsed = await runner.run()
+    finally:
+        await close()
+        if server is not None:
+            await server.stop()
+
+    if args.target == "diameter":
+        endpoint = "local" if args.local else f"{args.host}:{args.port}"
+    else:
+        endpoint = f"{args.url}/verify_imei?protocol={args.protocol}"
+    return {
+        "run": {
+            "target": args.target,
+            "protocol": "diameter" if args.target == "diameter" else args.protocol,
+            "endpoint": endpoint,
+            "rate_rps": args.rate,
+            "arrivals": "poisson" if args.poisson else "uniform",
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "connections": args.connections,
+            "max_outstanding": args.max_outstanding,
+            "imei_pool": len(imeis),
+            "seed": args.seed,
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat()
+        },
+        **runner.report(elapsed)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Générateur de charge en boucle ouverte (passerelle IMEI)")
+    parser.add_argument("--target", choices=("http", "diameter"), default="http")
+    parser.add_argument("--protocol", choices=("rest", "ss7", "diameter"), default="rest",
+                        help="Protocole de /verify_imei (cible http)")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="URL de base de l'API (cible http)")
+    parser.add_argument("--token", help="Jeton Bearer (classe d'admission api)")
+    parser.add_argument("--host", default="127.0.0.1", help="Hôte de l'écouteur Diameter")
+    parser.add_argument("--port", type=int, default=3868, help="Port de l'écouteur Diameter")
+    parser.add_argument("--local", action="store_true", help="Écouteur Diameter en processus (statuts simulés)")
+    parser.add_argument("--lookup-ms", type=float, default=1.0, help="Latence de recherche simulée en mode --local")
+    parser.add_argument("--rate", type=float, default=200, help="Débit cible (requêtes/s)")
+    parser.add_argument("--duration", type=float, default=30, help="Durée mesurée (secondes)")
+    parser.add_argument("--warmup", type=float, default=2, help="Échauffement non mesuré (secondes)")
+    parser.add_argument("--poisson", action="store_true", help="Arrivées de Poisson au lieu d'un intervalle constant")
+    parser.add_argument("--connections", type=int,
+                        help="Connexions HTTP maximum (défaut 64) ou connexions Diameter (défaut 2)")
+    parser.add_argument("--max-outstanding", type=int, default=10000, help="Requêtes en vol avant abandon des envois")
+    parser.add_argument("--timeout", type=float, default=30, help="Délai par requête (secondes)")
+    parser.add_argument("--blacklist", type=Path, default=DATA_DIR / "imei_blacklist.csv")
+    parser.add_argument("--tac-db", type=Path, default=DATA_DIR / "imeidb.csv")
+    parser.add_argument("--tac-ratio", type=float, default=0.5, help="Part des IMEI construits depuis un TAC")
+    parser.add_argument("--imei-count", type=int, default=10000, help="Taille du jeu d'IMEI")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="Fichier du rapport JSON (sortie standard sinon)")
+    args = parser.parse_args()
+
+    if args.connections is None:
+        args.connections = 2 if args.target == "diameter" else 64
+
+    report = json.dumps(asyncio.run(main_async(args)), indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(report + "\n", encoding="utf-8")
+        print(f"Rapport écrit dans {args.output}", file=sys.stderr)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Configuration des tests unitaires : le package backend/app est importé comme en
+production (import app...), sans base de données
+"""
+import os
+import sys
+from pathlib import Path
+
+# Permet d'importer le package backend/app depuis la racine du dépôt
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
@@ -0,0 +1,100 @@
+"""
+Tests des files d'admission (app.core.admission) : transmission du créneau à la sortie,
+rejet après le délai d'attente, annulation après transmission, dimensionnement d'après
+le pool SQLAlchemy
+"""
+import asyncio
+
+import pytest
+
+from app.core.admission import (
+    CLASSE_API, CLASSE_RESEAU, CLASSE_VISITEUR, AdmissionLane, _default_concurrency
+)
+
+
+def test_creneau_transmis_au_premier_en_attente():
+    async def scenario():
+        lane = AdmissionLane("test", max_concurrency=1, max_queue=10, queue_timeout_ms=1000)
+        assert await lane.acquire()
+        premier = asyncio.create_task(lane.acquire())
+        second = asyncio.create_task(lane.acquire())
+        await asyncio.sleep(0)
+        assert lane.queue_depth == 2
+
+        # Le créneau passe au premier arrivé sans être rendu à la file
+        lane.release()
+        assert await premier
+        assert lane.active == 1 and lane.queue_depth == 1
+        assert not second.done()
+
+        lane.release()
+        assert await second
+        lane.release()
+        return lane
+
+    lane = asyncio.run(scenario())
+    assert lane.active == 0
+    assert lane.stats['admitted'] == 3
+    assert lane.stats['admitted_after_wait'] == 2
+
+
+def test_rejet_apres_delai_et_file_pleine():
+    async def scenario():
+        lane = AdmissionLane("test", max_concurrency=1, max_queue=1, queue_timeout_ms=20)
+        assert await lane.acquire()
+        attente = asyncio.create_task(lane.acquire())
+        await asyncio.sleep(0)
+        assert not await lane.acquire()
+        assert not await attente
+        lane.release()
+        return lane
+
+    lane = asyncio.run(scenario())
+    assert lane.stats['shed_queue_full'] == 1
+    assert lane.stats['shed_timeout'] == 1
+    assert lane.active == 0 and lane.queue_depth == 0
+
+
+def test_annulation_apres_transmission_creneau_rendu():
+    async def scenario():
+        lane = AdmissionLane("test", max_concurrency=1, max_queue=10, queue_timeout_ms=1000)
+        assert await lane.acquire()
+        annulee = asyncio.create_task(lane.acquire())
+        suivante = asyncio.create_task(lane.acquire())
+        await asyncio.sleep(0)
+
+        # Créneau transmis, puis client déconnecté avant la reprise de la tâche
+        lane.release()
+        annulee.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await annulee
+        assert await asyncio.wait_for(suivante, 0.5)
+        assert lane.active == 1
+        lane.release()
+        return lane
+
+    lane = asyncio.run(scenario())
+    assert lane.active == 0 and lane.queue_depth == 0
+
+
+def test_annulation_en_attente_retiree_de_la_file():
+    async def scenario():
+        lane = AdmissionLane("test", max_concurrency=1, max_queue=10, queue_timeout_ms=1000)
+        assert await lane.acquire()
+        annulee = asyncio.create_task(lane.acquire())
+        await asyncio.sleep(0)
+        annulee.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await annulee
+        assert lane.queue_depth == 0
+        lane.release()
+        return lane
+
+    assert asyncio.run(scenario()).active == 0
+
+
+@pytest.mark.parametrize("capacite", [4, 15, 40])
+def test_api_et_visiteur_sous_le_pool(capacite):
+    limites = _default_concurrency(capacite)
+    assert limites[CLASSE_API] + limites[CLASSE_VISITEUR] < capacite
+    assert limites[CLASSE_RESEAU] == capacite
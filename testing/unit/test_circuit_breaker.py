@@ -0,0 +1,127 @@
+"""
+Tests du disjoncteur par protocole (app.interface_gateway.circuit_breaker), des
+remises en file des payloads SS7 refusées (app.interface_gateway.work_queue) et
+du traitement des annulations par run_handler (app.interface_gateway.dispatcher)
+"""
+import asyncio
+
+from app.interface_gateway.circuit_breaker import (
+    CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, CircuitBreaker, get_circuit_breaker
+)
+from app.interface_gateway.dispatcher import get_protocol_metrics, run_handler
+from app.interface_gateway.handlers.registry import register_handler
+from app.interface_gateway.work_queue import ProtocolWorkQueue
+
+
+def _ouvrir(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record(breaker.allow(), False)
+
+
+def test_ouverture_puis_fermeture_par_essai():
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=0)
+    _ouvrir(breaker)
+    assert breaker.stats['opened'] == 1
+
+    ticket = breaker.allow()
+    assert ticket[0] == CIRCUIT_HALF_OPEN
+    assert breaker.allow() is None
+    breaker.record(ticket, True)
+    assert breaker.state == CIRCUIT_CLOSED
+
+
+def test_resultat_admis_ferme_ignore_en_semi_ouvert():
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=0)
+    lente = breaker.allow()
+    _ouvrir(breaker)
+    essai = breaker.allow()
+    assert essai[0] == CIRCUIT_HALF_OPEN
+
+    # La requête admise circuit fermé se termine pendant l'essai : ni fermeture, ni place libérée
+    breaker.record(lente, True)
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    assert breaker.allow() is None
+    assert breaker.stats['stale_results'] == 1
+
+    breaker.record(essai, False)
+    assert breaker._state == CIRCUIT_OPEN
+
+
+def test_echec_admis_avant_ouverture_ignore():
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=60)
+    lente = breaker.allow()
+    _ouvrir(breaker)
+    breaker.record(lente, False)
+    assert breaker.stats['opened'] == 1
+    assert breaker.state == CIRCUIT_OPEN
+
+
+class _Refus(Exception):
+    def __init__(self, retry_after):
+        super().__init__("Disjoncteur ouvert")
+        self.retry_after = retry_after
+
+
+def test_payload_refusee_remise_en_file():
+    appels = []
+
+    async def handler(payload):
+        appels.append(payload["imei"])
+        if len(appels) < 3:
+            raise _Refus(0.01)
+
+    async def scenario():
+        queue = ProtocolWorkQueue("test", handler, workers=1, max_retries=3)
+        await queue.start()
+        assert queue.submit({"imei": "490154203237518"})
+        await asyncio.sleep(0.2)
+        await queue.stop()
+        return queue.stats
+
+    stats = asyncio.run(scenario())
+    assert appels == ["490154203237518"] * 3
+    assert stats['refused'] == 2
+    assert stats['retried'] == 2
+    assert stats['processed'] == 1
+    assert stats['failed'] == 0 and stats['dropped'] == 0
+
+
+def test_payload_abandonnee_apres_max_retries():
+    async def handler(payload):
+        raise _Refus(0.01)
+
+    async def scenario():
+        queue = ProtocolWorkQueue("test", handler, workers=1, max_retries=1)
+        await queue.start()
+        queue.submit({"imei": "490154203237518"})
+        await asyncio.sleep(0.2)
+        await queue.stop()
+        return queue.stats
+
+    stats = asyncio.run(scenario())
+    assert stats['refused'] == 2
+    assert stats['retried'] == 1
+    assert stats['dropped'] == 1
+    assert stats['failed'] == 0
+
+
+def test_requete_annulee_ni_erreur_ni_echec():
+    @register_handler("test_annulation")
+    async def handler(payload):
+        await asyncio.sleep(10)
+
+    async def scenario():
+        task = asyncio.create_task(run_handler("test_annulation", {"imei": "490154203237518"}))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    assert asyncio.run(scenario())
+    metrics = get_protocol_metrics("test_annulation")
+    assert metrics.cancelled == 1
+    assert metrics.requests == 0 and metrics.errors == 0 and metrics.in_flight == 0
+    assert get_circuit_breaker("test_annulation")._consecutive_failures == 0
@@ -0,0 +1,63 @@
+"""
+Tests du chargement de config/protocols.yml (app.config_loader) : loggers des
+protocoles reconfigurés au rechargement, préchargement sans surveillance,
+configuration par défaut si le premier chargement échoue
+"""
+import asyncio
+import logging
+
+from app import config_loader
+from app.config_loader import ProtocolConfigWatcher, _build_protocol_logger
+
+
+def test_logger_desactive_puis_reactive():
+    protocol_logger = _build_protocol_logger("test_logs", {"enabled": True, "level": "DEBUG"})
+    assert not protocol_logger.disabled
+    assert protocol_logger.level == logging.DEBUG
+
+    assert _build_protocol_logger("test_logs", {"enabled": False}).disabled
+    assert not _build_protocol_logger("test_logs", {"enabled": True, "level": "WARNING"}).disabled
+
+
+def test_prechargement_sans_surveillance(monkeypatch):
+    chargements = []
+    monkeypatch.setattr(config_loader, "get_protocol_config_snapshot", lambda: chargements.append(1))
+
+    watcher = ProtocolConfigWatcher(interval=0)
+    asyncio.run(watcher.start())
+    assert chargements == [1]
+    assert not watcher.is_running
+
+
+def test_premier_chargement_invalide_configuration_par_defaut(monkeypatch, tmp_path):
+    fichier = tmp_path / "protocols.yml"
+    fichier.write_text("enabled_protocols: [rest\n", encoding="utf-8")
+    monkeypatch.setattr(config_loader, "CONFIG_PATH", str(fichier))
+    monkeypatch.setattr(config_loader, "_snapshot", None)
+    monkeypatch.setattr(config_loader, "_load_error", None)
+    lectures = []
+    lire = config_loader._read_snapshot
+
+    def lecture_comptee():
+        lectures.append(1)
+        return lire()
+
+    monkeypatch.setattr(config_loader, "_read_snapshot", lecture_comptee)
+
+    # Défauts publiés, erreur enregistrée, fichier lu une seule fois
+    snapshot = config_loader.get_protocol_config_snapshot()
+    assert snapshot.source is None
+    assert config_loader.is_protocol_enabled("rest")
+    assert config_loader.get_protocol_timeout("diameter") == 60
+    assert lectures == [1]
+
+    watcher = ProtocolConfigWatcher(interval=0)
+    assert watcher.get_stats()['snapshot_error']
+    assert asyncio.run(watcher.check()) is False
+    assert lectures == [1]
+
+    # Fichier corrigé : rechargé par la surveillance
+    fichier.write_text("enabled_protocols:\n  rest: false\n", encoding="utf-8")
+    assert asyncio.run(watcher.check()) is True
+    assert not config_loader.is_protocol_enabled("rest")
+    assert watcher.get_stats()['snapshot_error'] is None
@@ -0,0 +1,88 @@
+"""
+Tests du serveur Diameter S13 (app.interface_gateway.diameter.server) sur une
+connexion TCP locale
+"""
+import asyncio
+import socket
+import struct
+
+import pytest
+
+from app.interface_gateway.diameter.codec import (
+    APP_DIAMETER_COMMON, APP_S13, AVP_ORIGIN_HOST, AVP_ORIGIN_REALM, AVP_RESULT_CODE, AVP_SESSION_ID,
+    CMD_CAPABILITIES_EXCHANGE, CMD_ME_IDENTITY_CHECK, FLAG_ERROR, FLAG_PROXIABLE, FLAG_REQUEST,
+    avp_uint32, decode_message, encode_avp, encode_message, find_avp, read_message
+)
+from app.interface_gateway.diameter.server import DiameterS13Server
+from app.interface_gateway.diameter.wire import encode_ecr
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="SO_REUSEPORT indisponible")
+def test_port_partage_entre_workers():
+    async def scenario():
+        premier = DiameterS13Server({"host": "127.0.0.1", "port": 0})
+        await premier.start()
+        # Deuxième worker uvicorn : même port, sans EADDRINUSE
+        second = DiameterS13Server({"host": "127.0.0.1", "port": premier.port})
+        await second.start()
+        ports = (premier.port, second.port)
+        await premier.stop()
+        await second.stop()
+        return ports
+
+    premier, second = asyncio.run(scenario())
+    assert premier == second
+
+
+async def _statut(imei: str) -> str:
+    return "whitelisted"
+
+
+async def _echange(requetes: list) -> list:
+    """Envoie chaque requête sur une connexion après un CER, retourne les réponses décodées"""
+    serveur = DiameterS13Server({"host": "127.0.0.1", "port": 0}, status_lookup=_statut)
+    await serveur.start()
+    reader, writer = await asyncio.open_connection("127.0.0.1", serveur.port)
+    try:
+        cer = encode_message(CMD_CAPABILITIES_EXCHANGE, APP_DIAMETER_COMMON, [
+            encode_avp(AVP_ORIGIN_HOST, "mme.test"), encode_avp(AVP_ORIGIN_REALM, "test")
+        ], flags=FLAG_REQUEST, hop_by_hop=1, end_to_end=1)
+        reponses = []
+        for requete in [cer] + requetes:
+            writer.write(requete)
+            await writer.drain()
+            reponses.append(decode_message(await asyncio.wait_for(read_message(reader), 5)))
+        return reponses[1:]
+    finally:
+        writer.close()
+        await serveur.stop()
+
+
+def _resultat(reponse: dict) -> int:
+    return avp_uint32(find_avp(reponse["avps"], AVP_RESULT_CODE))
+
+
+def test_ecr_valide():
+    ecr = encode_ecr(7, 8, "mme.test;1", "mme.test", "test", "eir.test", "490154203237518")
+    reponse, = asyncio.run(_echange([bytes(ecr)]))
+    assert _resultat(reponse) == 2001
+    assert not reponse["flags"] & FLAG_ERROR
+
+
+@pytest.mark.parametrize("avps,flags,attendu", [
+    # AVP dont la longueur déborde du message
+    ([struct.pack("!IBBH", AVP_SESSION_ID, 0x40, 0, 100) + b"abcd"], FLAG_REQUEST | FLAG_PROXIABLE, 5014),
+    # Terminal-Information (IMEI) absent
+    ([encode_avp(AVP_SESSION_ID, "mme.test;2")], FLAG_REQUEST | FLAG_PROXIABLE, 5005),
+    # Bit E dans une requête
+    ([encode_avp(AVP_SESSION_ID, "mme.test;3")], FLAG_REQUEST | FLAG_ERROR, 3008),
+])
+def test_requete_invalide_recoit_une_reponse_d_erreur(avps, flags, attendu):
+    requete = encode_message(CMD_ME_IDENTITY_CHECK, APP_S13, avps, flags=flags,
+                             hop_by_hop=0x1234, end_to_end=0x5678)
+    reponse, = asyncio.run(_echange([requete]))
+    assert _resultat(reponse) == attendu
+    assert reponse["flags"] & FLAG_ERROR
+    assert not reponse["flags"] & FLAG_REQUEST
+    assert (reponse["hop_by_hop"], reponse["end_to_end"]) == (0x1234, 0x5678)
+    assert reponse["command_code"] == CMD_ME_IDENTITY_CHECK
@@ -0,0 +1,50 @@
+"""
+Tests du cache des statuts IMEI (app.services.imei_cache) : une projection lue
+avant l'invalidation d'un IMEI n'est pas enregistrée
+"""
+from app.services.imei_cache import _ABSENT, IMEIStatusCache
+
+IMEI = "490154203237518"
+AVANT = {"numero_imei": IMEI, "statut": "actif"}
+APRES = {"numero_imei": IMEI, "statut": "bloque"}
+
+
+def test_remplissage_perime_ignore():
+    cache = IMEIStatusCache()
+    # Lecture en base commencée avant la mise à jour du statut...
+    generation = cache.generation()
+    # ...mise à jour validée et invalidée pendant la lecture
+    cache.invalidate([IMEI])
+    cache.put(IMEI, AVANT, generation)
+
+    assert cache.get(IMEI) is _ABSENT
+    assert cache.stats['stale_fills'] == 1
+
+    cache.put(IMEI, APRES, cache.generation())
+    assert cache.get(IMEI) == APRES
+
+
+def test_invalidation_d_un_autre_imei_sans_effet():
+    cache = IMEIStatusCache()
+    generation = cache.generation()
+    cache.invalidate(["356938035643809"])
+    cache.put(IMEI, AVANT, generation)
+    assert cache.get(IMEI) == AVANT
+
+
+def test_purge_du_suivi_et_clear_rejettent_les_chargements_en_cours():
+    cache = IMEIStatusCache()
+    cache.MAX_INVALIDATED = 2
+    generation = cache.generation()
+    cache.invalidate(["1", "2", "3"])
+    cache.put(IMEI, AVANT, generation)
+    assert cache.get(IMEI) is _ABSENT
+
+    generation = cache.generation()
+    cache.clear()
+    cache.put(IMEI, AVANT, generation)
+    assert cache.get(IMEI) is _ABSENT
+
+
+def test_ttl_par_defaut_court():
+    assert IMEIStatusCache().ttl_seconds <= 30
@@ -0,0 +1,123 @@
+"""
+Tests des règles d'accès IMEI compilées (app.core.imei_rules) : équivalence avec
+l'interprétation de référence PermissionManager._imei_matches_rule, regex envoyées
+à PostgreSQL limitées au sous-ensemble commun avec re
+"""
+import random
+
+import pytest
+
+from sqlalchemy import Column, MetaData, String, Table
+from sqlalchemy.dialects import postgresql
+
+from app.core.imei_rules import compile_imei_rules, is_sql_compatible_regex
+from app.core.permissions import PermissionManager
+
+
+def _imei(rng: random.Random) -> str:
+    return "35" + "".join(rng.choice("0123456789") for _ in range(13))
+
+
+def _regles(rng: random.Random, nombre: int) -> list:
+    """Mélange de préfixes, plages, IMEI exacts et regex"""
+    regles = []
+    for _ in range(nombre):
+        tirage = rng.random()
+        if tirage < 0.4:
+            regles.append({"type": "prefix", "prefix": _imei(rng)[:rng.choice((2, 6, 8, 10))]})
+        elif tirage < 0.7:
+            debut = _imei(rng)
+            regles.append({"type": "range", "start": debut, "end": str(int(debut) + rng.randint(1, 10 ** 9)).zfill(15)})
+        elif tirage < 0.9:
+            regles.append({"type": "exact", "imeis": [_imei(rng) for _ in range(rng.randint(1, 5))]})
+        else:
+            regles.append({"type": "regex", "pattern": f"{_imei(rng)[:5]}\\d{{3}}"})
+    return regles
+
+
+def _interprete(regles: list, imei: str) -> bool:
+    return any(PermissionManager._imei_matches_rule(imei, regle) for regle in regles)
+
+
+@pytest.mark.parametrize("graine", range(5))
+def test_equivalence_avec_interpretation(graine):
+    rng = random.Random(graine)
+    regles = _regles(rng, 200)
+    compilees = compile_imei_rules(regles)
+    imeis = [_imei(rng) for _ in range(300)]
+    for regle in regles[:100]:
+        if regle["type"] == "prefix":
+            imeis.append((regle["prefix"] + _imei(rng))[:15])
+        elif regle["type"] == "range":
+            imeis.extend((regle["start"], regle["end"]))
+        elif regle["type"] == "exact":
+            imeis.append(regle["imeis"][0])
+
+    for imei in imeis:
+        assert compilees.matches(imei) == _interprete(regles, imei), imei
+
+
+@pytest.mark.parametrize("regles,imei,attendu", [
+    ([{"type": "prefix", "prefix": "3532"}], "353260000000000", True),
+    ([{"type": "prefix", "prefix": "3532"}], "490154203237518", False),
+    # Préfixe absent ou vide : tous les IMEI sont couverts
+    ([{"type": "prefix"}], "490154203237518", True),
+    ([{"type": "prefix", "prefix": ""}], "490154203237518", True),
+    ([{"type": "range", "start": "350000000000000", "end": "359999999999999"}], "359999999999999", True),
+    ([{"type": "range", "start": "359999999999999", "end": "350000000000000"}], "355000000000000", False),
+    ([{"type": "exact", "imeis": ["490154203237518"]}], "490154203237518", True),
+    ([{"type": "regex", "pattern": "4901\\d+"}], "490154203237518", True),
+    ([{"type": "regex", "pattern": "0154"}], "490154203237518", False),
+    ([{"type": "inconnu"}], "490154203237518", False),
+    ([], "490154203237518", False),
+])
+def test_regles_unitaires(regles, imei, attendu):
+    assert compile_imei_rules(regles).matches(imei) is attendu
+    assert _interprete(regles, imei) is attendu
+
+
+def test_prefixe_none_traite_comme_vide():
+    # str(None) donnait le préfixe littéral "None", qui ne couvrait aucun IMEI
+    regles = [{"type": "prefix", "prefix": None}]
+    assert compile_imei_rules(regles).matches("490154203237518")
+    assert compile_imei_rules([{"type": "prefix", "prefix": "None"}]).matches("490154203237518") is False
+
+
+@pytest.mark.parametrize("motif,attendu", [
+    ("4901\\d+", True),
+    ("35(?:32|45)[0-9]{6,8}", True),
+    ("^(35|86)\\d{13}$", True),
+    ("3532\\.?[^a-z]*", True),
+    ("", True),
+    # Assertions, références arrière, drapeaux, ancres et classes propres à re
+    ("35(?=32)", False),
+    ("(35)\\1", False),
+    ("(?i)35", False),
+    ("\\A35\\Z", False),
+    ("35\\b", False),
+    ("(?P<tac>35)", False),
+    # Formes littérales acceptées par re, refusées ou réinterprétées par PostgreSQL
+    ("35{", False),
+    ("35\\d{,3}", False),
+    ("35\\x41", False),
+    ("35\\d{300}", False),
+    ("35(", False),
+])
+def test_regex_compatible_sql(motif, attendu):
+    assert is_sql_compatible_regex(motif) is attendu
+
+
+def test_regex_non_portable_evaluee_en_python():
+    colonne = Column("imei_recherche", String)
+    Table("recherche", MetaData(), colonne)
+    portable = compile_imei_rules([{"type": "regex", "pattern": "4901\\d+"}])
+    assert portable.sql_complete
+
+    regles = compile_imei_rules([
+        {"type": "prefix", "prefix": "3532"},
+        {"type": "regex", "pattern": "49(?=01)\\d+"},
+    ])
+    assert not regles.sql_complete
+    assert regles.matches("490154203237518")
+    sql = str(regles.sql_filter(colonne, "postgresql").compile(dialect=postgresql.dialect()))
+    assert "~" not in sql
@@ -0,0 +1,136 @@
+"""
+Tests de la validation IMEI (app.services.imei_validation) : fonctions unitaires,
+vecteurs connus et équivalence des versions vectorisées NumPy
+"""
+import random
+
+import numpy as np
+import pytest
+
+from app.interface_gateway.imei_status import luhn_check_digit, normalize_imei
+from app.services.imei_validation import (
+    chiffre_controle, controler_imeis, extraire_tacs, imei_acceptable, imei_conforme,
+    imeis_acceptables, luhn_valide, matrice_chiffres, nettoyer_imei, rechercher_tacs, valider_lot
+)
+
+# IMEI de référence (exemple de la norme 3GPP TS 23.003) et variantes
+IMEI_VALIDE = "490154203237518"
+
+# Lot mixte : longueurs 0 à 20, séparateurs, lettres, non ASCII, retours à la ligne
+LOT_MIXTE = [
+    IMEI_VALIDE,
+    "490154203237517",
+    "49015420323751",
+    "4901542032375180",
+    "49015420323751800",
+    "490154203237518000",
+    "4901-5420 3237518",
+    " 490154203237518 ",
+    "49015420323751a",
+    "é49015420323751",
+    "４90154203237518",
+    "4901542032\n37518",
+    "\n",
+    "",
+    "0" * 15,
+    "9" * 20,
+    "35326005123456",
+    "353260051234567",
+]
+
+
+@pytest.mark.parametrize("imei,attendu", [
+    (IMEI_VALIDE, True),
+    ("490154203237517", False),
+    ("49015420323751", False),
+    ("4901542032375180", False),
+    ("000000000000000", True),
+    ("", False),
+])
+def test_luhn_valide(imei, attendu):
+    assert luhn_valide(imei) is attendu
+
+
+@pytest.mark.parametrize("imei,acceptable,conforme", [
+    (IMEI_VALIDE, True, True),
+    ("490154203237517", True, False),
+    ("49015420323751", True, True),
+    ("4901542032375180", False, False),
+    ("4901-5420323751", False, False),
+    ("49015420323751a", False, False),
+    ("４90154203237518", False, False),
+    ("", False, False),
+])
+def test_imei_acceptable_et_conforme(imei, acceptable, conforme):
+    # Un chiffre de contrôle faux n'empêche pas l'import (IMEI clonés)
+    assert imei_acceptable(imei) is acceptable
+    assert imei_conforme(imei) is conforme
+
+
+def test_chiffre_controle():
+    assert chiffre_controle(IMEI_VALIDE[:14]) == 8
+    assert luhn_check_digit(IMEI_VALIDE[:14]) == "8"
+    assert normalize_imei(IMEI_VALIDE[:14]) == IMEI_VALIDE
+    assert normalize_imei(IMEI_VALIDE) == IMEI_VALIDE
+
+
+def test_nettoyer_imei():
+    assert nettoyer_imei("4901-5420 3237518") == IMEI_VALIDE
+    assert nettoyer_imei(IMEI_VALIDE) == IMEI_VALIDE
+    assert nettoyer_imei("é\n") == ""
+
+
+def _verifier_lot(imeis):
+    lot = valider_lot(imeis)
+    for position, imei in enumerate(imeis):
+        digits = nettoyer_imei(imei)
+        assert lot["imeis"][position] == digits
+        assert bool(lot["format_valide"][position]) == (14 <= len(digits) <= 16), imei
+        assert bool(lot["luhn_valide"][position]) == luhn_valide(digits), imei
+        if 14 <= len(digits) <= 16:
+            assert "%08d" % lot["tac"][position] == digits[:8], imei
+    acceptables, luhn = controler_imeis(imeis)
+    assert acceptables.tolist() == [imei_acceptable(imei) for imei in imeis]
+    # luhn_valide attend un IMEI nettoyé : tout autre caractère rend l'IMEI invalide
+    assert luhn.tolist() == [imei.isascii() and imei.isdigit() and luhn_valide(imei) for imei in imeis]
+    assert imeis_acceptables(imeis).tolist() == acceptables.tolist()
+
+
+@pytest.mark.parametrize("imei", LOT_MIXTE)
+def test_lot_equivalent_unitaire(imei):
+    # Chaque IMEI seul (cas général), puis dans un lot de 15 caractères (cas reshape)
+    _verifier_lot([imei])
+    _verifier_lot([IMEI_VALIDE, imei, "490154203237517"])
+
+
+def test_lot_mixte():
+    _verifier_lot(LOT_MIXTE)
+
+
+def test_lot_aleatoire():
+    rng = random.Random(42)
+    imeis = []
+    for _ in range(2000):
+        imei = "".join(rng.choice("0123456789") for _ in range(rng.choice((14, 15, 15, 15, 16, 17))))
+        if rng.random() < 0.1:
+            imei = imei[:5] + rng.choice("- é\na") + imei[5:]
+        imeis.append(imei)
+    _verifier_lot(imeis)
+    # Lot uniquement composé d'IMEI de 15 chiffres (chemin rapide)
+    _verifier_lot([imei[:15] for imei in imeis if imei.isdigit() and len(imei) >= 15])
+
+
+def test_lot_vide():
+    lot = valider_lot([])
+    assert lot["imeis"] == [] and len(lot["tac"]) == 0
+    acceptables, luhn = controler_imeis([])
+    assert len(acceptables) == 0 and len(luhn) == 0
+
+
+def test_extraire_et_rechercher_tacs():
+    chiffres, _, _ = matrice_chiffres([IMEI_VALIDE, "353260051234567", "99999999000000"])
+    tacs = extraire_tacs(chiffres)
+    assert tacs.tolist() == [49015420, 35326005, 99999999]
+    cles = np.array([35326005, 49015420], dtype=np.uint32)
+    assert rechercher_tacs(tacs, cles).tolist() == [1, 0, -1]
+    assert rechercher_tacs(tacs, np.zeros(0, dtype=np.uint32)).tolist() == [-1, -1, -1]
@@ -0,0 +1,42 @@
+"""
+Tests des contrôles d'accès IMEI (app.core.permissions) avec projections préchargées
+par lot : ni requête SQL ni insertion dans le cache des statuts IMEI
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import permissions
+from app.core.permissions import PermissionManager
+
+APPLE = "490154203237518"
+SAMSUNG = "353260051234563"
+
+
+@pytest.fixture
+def utilisateur_marque():
+    return SimpleNamespace(type_utilisateur="utilisateur_authentifie", plages_imei_autorisees=None,
+                           marques_autorisees=["Apple"])
+
+
+@pytest.fixture
+def sans_cache(monkeypatch):
+    def interdit(*args, **kwargs):
+        raise AssertionError("cache des statuts IMEI consulté")
+    monkeypatch.setattr(permissions.imei_status_cache, "get_or_load", interdit)
+
+
+@pytest.mark.parametrize("imei,attendu,raison", [
+    (APPLE, True, "acces_marque"),
+    (SAMSUNG, False, "restriction_marque"),
+    # IMEI inconnu (absent du lot) : accès standard, comme sans appareil en base
+    ("356938035643809", True, "standard_access"),
+])
+def test_projections_prechargees(utilisateur_marque, sans_cache, imei, attendu, raison):
+    projections = {
+        APPLE: {"appareil": {"marque": "Apple"}},
+        SAMSUNG: {"appareil": {"marque": "Samsung"}},
+    }
+    acces, contexte = PermissionManager.can_access_imei(utilisateur_marque, imei, object(), projections)
+    assert acces is attendu
+    assert contexte["raison"] == raison
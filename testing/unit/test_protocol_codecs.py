@@ -0,0 +1,171 @@
+"""
+Tests des codecs binaires MAP CheckIMEI (interface_gateway.map.codec) et Diameter
+ECR/ECA (interface_gateway.diameter.wire) : allers-retours sur des messages aléatoires
+(graine fixe), équivalence avec le codec Diameter à dictionnaires, messages corrompus
+"""
+import random
+
+import pytest
+
+from app.interface_gateway.diameter.codec import (
+    APP_S13, AVP_AUTH_APPLICATION_ID, AVP_AUTH_SESSION_STATE, AVP_DESTINATION_REALM,
+    AVP_EQUIPMENT_STATUS, AVP_IMEI, AVP_ORIGIN_HOST, AVP_ORIGIN_REALM, AVP_RESULT_CODE, AVP_SESSION_ID,
+    AVP_SOFTWARE_VERSION, AVP_TERMINAL_INFORMATION, AVP_VENDOR_ID, AVP_VENDOR_SPECIFIC_APPLICATION_ID,
+    CMD_ME_IDENTITY_CHECK, DIAMETER_SUCCESS, FLAG_PROXIABLE, FLAG_REQUEST, NO_STATE_MAINTAINED, VENDOR_3GPP,
+    DiameterDecodeError, avp_grouped, avp_str, avp_uint32, decode_message, encode_avp, encode_message, find_avp
+)
+from app.interface_gateway.diameter.wire import EcaView, EcrView, encode_eca, encode_ecr
+from app.interface_gateway.map.codec import (
+    MapComponentView, MapDecodeError, encode_check_imei_invoke, encode_check_imei_result, write_return_error
+)
+
+EIR_HOST = "eir.local.realm"
+CASES = 500
+SEEDS = [1, 2, 3]
+
+
+def random_digits(rng: random.Random, count: int) -> str:
+    return "".join(rng.choice("0123456789") for _ in range(count))
+
+
+def random_text(rng: random.Random) -> str:
+    """Chaîne de longueur quelconque (padding 0 à 3 octets), caractères non ASCII compris"""
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789.;-_éàü€"
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 60)))
+
+
+def legacy_ecr(hop_by_hop: int, session_id: str, origin_host: str, origin_realm: str, imei: str,
+               software_version) -> bytes:
+    """ECR construite avec le codec à dictionnaires (référence de l'encodage)"""
+    terminal = [encode_avp(AVP_IMEI, imei, vendor_id=VENDOR_3GPP)]
+    if software_version is not None:
+        terminal.append(encode_avp(AVP_SOFTWARE_VERSION, software_version, vendor_id=VENDOR_3GPP))
+    return encode_message(CMD_ME_IDENTITY_CHECK, APP_S13, [
+        encode_avp(AVP_SESSION_ID, session_id),
+        encode_avp(AVP_VENDOR_SPECIFIC_APPLICATION_ID, [
+            encode_avp(AVP_VENDOR_ID, VENDOR_3GPP),
+            encode_avp(AVP_AUTH_APPLICATION_ID, APP_S13)
+        ]),
+        encode_avp(AVP_AUTH_SESSION_STATE, NO_STATE_MAINTAINED),
+        encode_avp(AVP_ORIGIN_HOST, origin_host),
+        encode_avp(AVP_ORIGIN_REALM, origin_realm),
+        encode_avp(AVP_DESTINATION_REALM, EIR_HOST),
+        encode_avp(AVP_TERMINAL_INFORMATION, terminal, vendor_id=VENDOR_3GPP)
+    ], flags=FLAG_REQUEST | FLAG_PROXIABLE, hop_by_hop=hop_by_hop, end_to_end=hop_by_hop)
+
+
+def legacy_answer(raw: bytes) -> bytes:
+    """Chemin ECR -> ECA du serveur S13 avant wire.py"""
+    request = decode_message(raw)
+    avps = request["avps"]
+    session_id = avp_str(find_avp(avps, AVP_SESSION_ID))
+    return encode_message(request["command_code"], request["application_id"], [
+        encode_avp(AVP_SESSION_ID, session_id),
+        encode_avp(AVP_RESULT_CODE, DIAMETER_SUCCESS),
+        encode_avp(AVP_ORIGIN_HOST, EIR_HOST),
+        encode_avp(AVP_ORIGIN_REALM, EIR_HOST),
+        encode_avp(AVP_VENDOR_SPECIFIC_APPLICATION_ID, [
+            encode_avp(AVP_VENDOR_ID, VENDOR_3GPP),
+            encode_avp(AVP_AUTH_APPLICATION_ID, APP_S13)
+        ]),
+        encode_avp(AVP_AUTH_SESSION_STATE, avp_uint32(find_avp(avps, AVP_AUTH_SESSION_STATE)) or NO_STATE_MAINTAINED),
+        encode_avp(AVP_EQUIPMENT_STATUS, 0, vendor_id=VENDOR_3GPP)
+    ], flags=request["flags"] & FLAG_PROXIABLE, hop_by_hop=request["hop_by_hop"], end_to_end=request["end_to_end"])
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_map_aller_retour(seed):
+    rng = random.Random(seed)
+    for _ in range(CASES):
+        invoke_id = rng.randint(-128, 127)
+        version = rng.choice((2, 3))
+        imei = random_digits(rng, rng.choice((14, 15)))
+        invoke = MapComponentView(encode_check_imei_invoke(invoke_id, imei, version))
+        assert invoke.kind == "invoke" and invoke.invoke_id == invoke_id and invoke.opcode == 43
+        assert invoke.imei == (imei if len(imei) == 15 else imei + "0")
+
+        status = rng.choice((0, 1, 2) if version == 2 else (None, 0, 1, 2))
+        result = MapComponentView(encode_check_imei_result(invoke_id, status, version))
+        assert result.kind == "return_result" and result.invoke_id == invoke_id
+        assert result.equipment_status == status
+
+        error_code = rng.randint(0, 127)
+        error = MapComponentView(write_return_error(bytearray(), invoke_id, error_code))
+        assert error.kind == "return_error" and error.error_code == error_code
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_diameter_aller_retour(seed):
+    rng = random.Random(seed)
+    for _ in range(CASES):
+        hop_by_hop = rng.getrandbits(32)
+        session_id = random_text(rng)
+        origin_host, origin_realm = random_text(rng), random_text(rng)
+        imei = random_digits(rng, 14)
+        software_version = rng.choice((None, random_digits(rng, 2)))
+
+        # ECR octet pour octet identique au codec à dictionnaires
+        ecr = encode_ecr(hop_by_hop, hop_by_hop, session_id, origin_host, origin_realm, EIR_HOST, imei,
+                         software_version)
+        assert bytes(ecr) == legacy_ecr(hop_by_hop, session_id, origin_host, origin_realm, imei, software_version)
+
+        view = EcrView(ecr).validate()
+        assert view.command_code == CMD_ME_IDENTITY_CHECK and view.is_request
+        assert view.hop_by_hop == hop_by_hop and view.end_to_end == hop_by_hop
+        assert view.session_id == session_id and view.origin_host == origin_host
+        assert view.imei == imei and view.software_version == software_version
+
+        result_code = rng.choice((DIAMETER_SUCCESS, 5012))
+        equipment_status = rng.choice((0, 1, 2)) if result_code == DIAMETER_SUCCESS else None
+        eca = encode_eca(view, EIR_HOST, EIR_HOST, result_code, equipment_status)
+
+        answer = EcaView(eca).validate()
+        assert not answer.is_request and answer.hop_by_hop == hop_by_hop
+        assert answer.session_id == session_id
+        assert answer.result_code == result_code and answer.equipment_status == equipment_status
+
+        # ECA relue par le codec à dictionnaires
+        legacy = decode_message(bytes(eca))
+        assert avp_str(find_avp(legacy["avps"], AVP_SESSION_ID)) == session_id
+        assert avp_uint32(find_avp(legacy["avps"], AVP_RESULT_CODE)) == result_code
+        assert avp_uint32(find_avp(legacy["avps"], AVP_EQUIPMENT_STATUS, VENDOR_3GPP)) == equipment_status
+
+
+def test_eca_identique_au_serveur_precedent():
+    rng = random.Random(42)
+    for i in range(200):
+        raw = bytes(encode_ecr(i, i, f"mme{i % 8}.test;{i}", f"mme{i % 8}.test", "test", EIR_HOST,
+                               random_digits(rng, 14), "01"))
+        request = EcrView(raw).validate()
+        assert bytes(encode_eca(request, EIR_HOST, EIR_HOST, DIAMETER_SUCCESS, equipment_status=0)) == legacy_answer(raw)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_messages_corrompus(seed):
+    """Messages tronqués ou altérés : erreur de décodage attendue, jamais une autre exception"""
+    rng = random.Random(seed)
+    ecr = bytes(encode_ecr(1, 1, "mme;1;1", "mme.test", "test", EIR_HOST, "35209900176148", "01"))
+    invoke = bytes(encode_check_imei_invoke(1, "352099001761481"))
+    for _ in range(CASES):
+        for message, view, errors in ((ecr, EcrView, DiameterDecodeError), (invoke, MapComponentView, MapDecodeError)):
+            data = bytearray(message)
+            if rng.random() < 0.5:
+                data = data[:rng.randrange(len(data))]
+            else:
+                data[rng.randrange(len(data))] = rng.randrange(256)
+            try:
+                decoded = view(data)
+                if isinstance(decoded, EcrView):
+                    decoded.validate()
+                    decoded.session_id, decoded.imei, decoded.software_version, decoded.hop_by_hop
+                else:
+                    decoded.invoke_id, decoded.opcode, decoded.imei, decoded.requested_equipment_info
+            except errors:
+                pass
+
+
+def test_terminal_information_absent():
+    raw = encode_message(CMD_ME_IDENTITY_CHECK, APP_S13, [encode_avp(AVP_SESSION_ID, "s;1")],
+                         flags=FLAG_REQUEST, hop_by_hop=1, end_to_end=1)
+    assert EcrView(raw).validate().imei is None
+    assert avp_grouped(find_avp(decode_message(raw)["avps"], AVP_TERMINAL_INFORMATION, VENDOR_3GPP)) == []
@@ -0,0 +1,45 @@
+"""
+Tests du script de mise à niveau (backend/schema_upgrade_postgres.sql) : les tables et
+index créés par le script sont ceux de schema_postgres.sql, sous forme idempotente
+"""
+import re
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[2] / "backend"
+SCHEMA = (BACKEND / "schema_postgres.sql").read_text(encoding="utf-8")
+UPGRADE = (BACKEND / "schema_upgrade_postgres.sql").read_text(encoding="utf-8")
+
+
+def _table(sql: str, nom: str) -> str:
+    """Colonnes d'un CREATE TABLE (avec ou sans IF NOT EXISTS), espaces normalisés"""
+    match = re.search(rf"CREATE TABLE (?:IF NOT EXISTS )?(?:public\.)?{nom} \((.*?)\n\);", sql, re.S)
+    assert match, f"CREATE TABLE {nom} absent"
+    return " ".join(match.group(1).split())
+
+
+def _index(sql: str, nom: str) -> str:
+    """Définition d'un CREATE INDEX (avec ou sans IF NOT EXISTS)"""
+    match = re.search(rf"CREATE INDEX (?:IF NOT EXISTS )?{nom} (ON [^;]+);", sql)
+    assert match, f"CREATE INDEX {nom} absent"
+    return match.group(1)
+
+
+@pytest.mark.parametrize("table", ["notification_outbox"])
+def test_table_identique_au_schema(table):
+    assert f"CREATE TABLE IF NOT EXISTS public.{table} (" in UPGRADE
+    assert _table(UPGRADE, table) == _table(SCHEMA, table)
+
+
+@pytest.mark.parametrize("index", ["idx_notification_outbox_statut_date", "idx_recherche_imei_prefixe"])
+def test_index_identique_au_schema(index):
+    assert f"CREATE INDEX IF NOT EXISTS {index} " in UPGRADE
+    assert _index(UPGRADE, index) == _index(SCHEMA, index)
+
+
+def test_script_idempotent():
+    # Aucune instruction destructive ni création sans garde
+    assert not re.search(r"\bDROP\b", UPGRADE)
+    assert not re.search(r"CREATE (TABLE|INDEX) (?!IF NOT EXISTS)", UPGRADE)
+    assert not re.search(r"ADD COLUMN (?!IF NOT EXISTS)", UPGRADE)
@@ -0,0 +1,98 @@
+"""
+Tests de TacIndex.validate_imei (app.services.tac_index) : format du résultat identique
+à la fonction SQL valider_imei_avec_tac, et algorithme de valider_luhn (schéma et script
+de mise à niveau) identique à la validation en mémoire
+"""
+import re
+from pathlib import Path
+
+import pytest
+
+from app.services.imei_validation import luhn_valide
+from app.services.tac_index import TacIndex
+from app.services.tac_snapshot import write_tac_snapshot
+
+BACKEND = Path(__file__).resolve().parents[2] / "backend"
+SCHEMA = BACKEND / "schema_postgres.sql"
+UPGRADE = BACKEND / "schema_upgrade_postgres.sql"
+
+IMEI_VALIDE = "490154203237518"
+
+TACS = [
+    {"tac": "49015420", "marque": "Apple", "modele": "iPhone", "annee_sortie": 2020,
+     "type_appareil": "smartphone", "statut": "valide", "date_creation": None, "date_modification": None},
+    {"tac": "35326005", "marque": "Samsung", "modele": "Galaxy", "annee_sortie": None,
+     "type_appareil": "smartphone", "statut": "obsolete", "date_creation": None, "date_modification": None},
+]
+
+
+def _fonction_sql(path: Path, nom: str) -> str:
+    """Corps d'une fonction PL/pgSQL (de CREATE OR REPLACE FUNCTION à LANGUAGE plpgsql)"""
+    sql = path.read_text(encoding="utf-8")
+    debut = sql.index(f"CREATE OR REPLACE FUNCTION {nom}(")
+    return sql[debut:sql.index("$$ LANGUAGE plpgsql;", debut)]
+
+
+def _cles_sql() -> list:
+    """Clés de chaque jsonb_build_object de valider_imei_avec_tac, dans l'ordre du code"""
+    corps = _fonction_sql(SCHEMA, "valider_imei_avec_tac")
+    blocs = corps.split("jsonb_build_object(")[1:]
+    return [re.findall(r"^\s*'(\w+)',", bloc.split(");")[0], re.M) for bloc in blocs]
+
+
+def _luhn_plpgsql(numero_imei: str, alternate: bool) -> bool:
+    """Transcription de la boucle de valider_luhn"""
+    if len(numero_imei) != 15:
+        return False
+    total = 0
+    for i in range(1, 15):
+        digit = int(numero_imei[15 - i - 1])
+        if alternate:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+        alternate = not alternate
+    return (total * 9) % 10 == int(numero_imei[14])
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / "test.tacsnap")
+    write_tac_snapshot(path, TACS, "test")
+    index = TacIndex(snapshot_path=path, check_interval=3600)
+    assert index.loaded
+    return index
+
+
+def test_format_identique_a_la_fonction_sql(index):
+    erreur, trouve, inconnu = _cles_sql()
+    assert list(index.validate_imei("1234", None)) == erreur
+    assert list(index.validate_imei(IMEI_VALIDE, None)) == trouve
+    assert list(index.validate_imei("999999990000000", None)) == inconnu
+
+
+def test_vecteur_de_reference(index):
+    resultat = index.validate_imei(IMEI_VALIDE, None)
+    assert resultat["valide"] is True and resultat["luhn_valide"] is True
+    assert resultat["tac"] == "49015420" and resultat["source"] == "tac_database"
+
+    resultat = index.validate_imei("490154203237517", None)
+    assert resultat["valide"] is False and resultat["luhn_valide"] is False
+
+    # TAC connu mais non valide, TAC inconnu (Luhn seul)
+    assert index.validate_imei("353260051234560", None)["valide"] is False
+    inconnu = index.validate_imei("999999990000000", None)
+    assert inconnu["source"] == "luhn_only" and inconnu["valide"] is luhn_valide("999999990000000")
+
+
+@pytest.mark.parametrize("path", [SCHEMA, UPGRADE], ids=["schema", "upgrade"])
+def test_valider_luhn_sql(path):
+    corps = _fonction_sql(path, "valider_luhn")
+    alternate = re.search(r"alternate BOOLEAN := (true|false);", corps).group(1) == "true"
+    for imei in (IMEI_VALIDE, "490154203237517", "353260051234567", "000000000000000", "356759040141773"):
+        assert _luhn_plpgsql(imei, alternate) == luhn_valide(imei), imei
+
+
+def test_script_de_mise_a_niveau_identique_au_schema():
+    assert _fonction_sql(UPGRADE, "valider_luhn") == _fonction_sql(SCHEMA, "valider_luhn")
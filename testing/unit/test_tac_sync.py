@@ -0,0 +1,91 @@
+"""
+Tests de la synchronisation TAC incrémentale (app.services.tac_sync) : un TAC disparu
+de la source n'est supprimé que s'il n'a pas été modifié localement, un fichier dont
+les suppressions ont été différées n'est pas ignoré à la synchronisation suivante
+"""
+import json
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.services.tac_sync import _appliquer_differences, hash_contenu, synchroniser_tac_source
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE tac_database (
+                tac VARCHAR(8) PRIMARY KEY, marque VARCHAR(100), modele VARCHAR(100), annee_sortie INTEGER,
+                type_appareil VARCHAR(50) DEFAULT 'smartphone', statut VARCHAR(20) DEFAULT 'valide',
+                hash_contenu VARCHAR(32)
+            )
+        """))
+        conn.execute(text("""
+            CREATE TABLE tac_sync_log (
+                id VARCHAR(36) PRIMARY KEY, source_name VARCHAR(100) NOT NULL, source_url TEXT,
+                sync_type VARCHAR(50) NOT NULL, format_type VARCHAR(20) NOT NULL, status VARCHAR(20) NOT NULL,
+                records_imported INTEGER DEFAULT 0, records_updated INTEGER DEFAULT 0,
+                records_deleted INTEGER DEFAULT 0, records_unchanged INTEGER DEFAULT 0,
+                records_errors INTEGER DEFAULT 0, sync_duration_ms INTEGER, error_message TEXT,
+                sync_date TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+                file_size_bytes INTEGER, checksum VARCHAR(64)
+            )
+        """))
+        lignes = [
+            {"tac": f"3532600{i}", "marque": "Samsung", "modele": f"Galaxy {i}", "statut": "valide",
+             "type_appareil": "smartphone", "hash": hash_contenu("Samsung", f"Galaxy {i}", None)}
+            for i in range(10)
+        ]
+        lignes[7]["statut"] = "bloque"
+        lignes[8]["type_appareil"] = "tablette"
+        conn.execute(text("""
+            INSERT INTO tac_database (tac, marque, modele, type_appareil, statut, hash_contenu)
+            VALUES (:tac, :marque, :modele, :type_appareil, :statut, :hash)
+        """), lignes)
+        # Ajout manuel, sans empreinte : jamais supprimé par la synchronisation
+        conn.execute(text("INSERT INTO tac_database (tac, marque, modele) VALUES ('86000000', 'Xiaomi', 'Mi')"))
+    with Session(engine) as session:
+        yield session
+
+
+def test_tac_disparus_modifies_localement_conserves(db):
+    source = [{"tac": f"3532600{i}", "manufacturer": "Samsung", "model": f"Galaxy {i}"} for i in range(6)]
+    resultat = {"imported": 0, "updated": 0, "deleted": 0, "retained": 0, "unchanged": 0, "adopted": 0}
+
+    _appliquer_differences(db, json.dumps(source).encode(), "json", resultat)
+
+    restants = {row.tac: row.statut for row in db.execute(text("SELECT tac, statut FROM tac_database"))}
+    assert resultat["unchanged"] == 6
+    assert resultat["deleted"] == 2
+    assert resultat["retained"] == 2
+    assert "35326006" not in restants and "35326009" not in restants
+    assert restants["35326007"] == "bloque"
+    assert "35326008" in restants
+    assert "86000000" in restants
+
+
+def test_suppressions_differees_fichier_recompare(db, monkeypatch, tmp_path):
+    def synchroniser(tacs):
+        fichier = tmp_path / "tacdb.json"
+        fichier.write_text(json.dumps(
+            [{"tac": f"3532600{i}", "manufacturer": "Samsung", "model": f"Galaxy {i}"} for i in tacs]
+        ), encoding="utf-8")
+        monkeypatch.setenv("TAC_SYNC_OSMOCOM_JSON_FILE", str(fichier))
+        time.sleep(0.01)
+        return synchroniser_tac_source(db, "osmocom_json")
+
+    # Source tronquée : 6 suppressions sur 10 TAC synchronisés, au-delà du plafond
+    for _ in range(2):
+        resultat = synchroniser([0, 1])
+        assert resultat["status"] == "partial"
+        assert resultat["suppressions_differees"] == 6
+        assert resultat["deleted"] == 0
+        assert "source_inchangee" not in resultat
+
+    # Fichier complet appliqué puis inchangé : ignoré à la synchronisation suivante
+    assert synchroniser(range(10))["status"] == "success"
+    assert synchroniser(range(10)).get("source_inchangee")
@@ -0,0 +1,97 @@
+"""
+Tests du tampon d'écriture différée (app.tasks.write_behind) : aucune ligne acceptée
+par enqueue() n'est abandonnée (lot refusé, base injoignable, dépôt depuis le threadpool)
+"""
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import utilisateur  # noqa: F401 (relations des modèles)
+from app.tasks import write_behind
+from app.tasks.write_behind import TABLES, WriteBehindBuffer
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    for table in TABLES.values():
+        table.create(engine)
+    monkeypatch.setattr(write_behind, "SessionLocal", sessionmaker(bind=engine))
+    return engine
+
+
+def _lignes(engine, table: str) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(TABLES[table])).scalar()
+
+
+def _audit(identifiant: uuid.UUID) -> dict:
+    return {"id": identifiant, "action": "test", "date": datetime.now(), "utilisateur_id": None}
+
+
+def test_lot_refuse_reecrit_ligne_par_ligne(engine):
+    doublon = uuid.uuid4()
+
+    async def scenario():
+        tampon = WriteBehindBuffer(batch_size=10, flush_interval_ms=10)
+        await tampon.start()
+        for identifiant in (doublon, uuid.uuid4(), doublon, uuid.uuid4()):
+            assert tampon.enqueue("journal_audit", _audit(identifiant))
+        await tampon.stop()
+        return tampon.stats
+
+    stats = asyncio.run(scenario())
+    assert _lignes(engine, "journal_audit") == 3
+    assert stats['written'] == 3
+    assert stats['failed'] == 1
+
+
+def test_base_injoignable_lot_remis_en_file(engine, monkeypatch):
+    ecrire = WriteBehindBuffer._write
+    essais = []
+
+    def ecriture_instable(rows_by_table):
+        essais.append(1)
+        if len(essais) == 1:
+            raise OperationalError("INSERT", {}, Exception("connexion perdue"))
+        ecrire(rows_by_table)
+
+    monkeypatch.setattr(WriteBehindBuffer, "_write", staticmethod(ecriture_instable))
+
+    async def scenario():
+        tampon = WriteBehindBuffer(batch_size=10, flush_interval_ms=10)
+        await tampon.start()
+        for _ in range(5):
+            tampon.enqueue_recherche(uuid.uuid4(), "490154203237518")
+        await asyncio.sleep(0.2)
+        await tampon.stop()
+        return tampon.stats
+
+    stats = asyncio.run(scenario())
+    assert _lignes(engine, "recherche") == 5
+    assert stats['requeued'] == 5
+    assert stats['failed'] == 0
+
+
+def test_lignes_deposees_depuis_le_threadpool(engine):
+    async def scenario():
+        tampon = WriteBehindBuffer(max_queue=50, batch_size=10, flush_interval_ms=10)
+        await tampon.start()
+
+        def route_synchrone():
+            return [tampon.enqueue_recherche(uuid.uuid4(), "490154203237518") for _ in range(20)]
+
+        acceptees = sum(await asyncio.to_thread(route_synchrone))
+        await tampon.stop()
+        return acceptees, tampon.stats
+
+    acceptees, stats = asyncio.run(scenario())
+    assert acceptees == 20
+    assert _lignes(engine, "recherche") == 20
+    assert stats['failed'] == 0